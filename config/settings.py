@@ -45,6 +45,42 @@ class Settings(BaseSettings):
     model_retrain_days: int = 7
     min_training_samples: int = 1000
     
+    # ML executor (process pool for model fitting; 0 workers = CPU count - 1)
+    ml_executor_workers: int = 0
+    ml_executor_max_pending: int = 8
+    ml_executor_timeout_seconds: float = 120.0
+    # Request-path ARIMA prefit wait; on timeout the request skips the ML signal
+    ml_prefit_timeout_seconds: float = 15.0
+    
+    # Model fitting (threads per fit, early stopping on a time-ordered validation tail)
+    ml_train_threads: int = 2
+    ml_early_stopping_rounds: int = 20
+    ml_validation_fraction: float = 0.15
+    ml_max_bin: int = 256
+    
+    # Walk-forward background training (reads the local candle store, runs after market close IST)
+    ml_training_schedule_enabled: bool = False
+    ml_training_hour: int = 16
+    ml_training_minute: int = 15
+    ml_training_horizons: str = "1,5"
+    ml_training_folds: int = 5
+    ml_training_jobs: int = -1  # Parallel fold fits, sharing ml_train_threads
+    ml_training_min_improvement: float = 0.0
+
+    # Write-behind queue (activity logs, usage logs, scan persistence)
+    write_behind_batch_size: int = 200
+    write_behind_flush_seconds: float = 2.0
+    write_behind_max_spill_mb: int = 50
+    
+    # Paper trading exit monitor (trail the stop this % below the peak LTP; 0 = fixed stop only)
+    paper_trading_trailing_stop_pct: float = 0.0
+    # Seconds the shared scan loop waits for one index's signal before skipping it
+    paper_trading_signal_timeout_seconds: float = 30.0
+    
+    # Expiry-day gamma scanner (rescans NIFTY/BANKNIFTY/SENSEX on expiry afternoons)
+    gamma_scan_schedule_enabled: bool = False
+    gamma_scan_interval_seconds: int = 60
+    
     # Trading
     max_position_size: float = 100000.0
     risk_per_trade: float = 0.02
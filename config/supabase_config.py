@@ -1,9 +1,13 @@
 """
 Supabase Configuration
 """
+import asyncio
 import os
-from supabase import create_client, Client
-from typing import Optional
+import weakref
+import httpx
+from supabase import create_client, Client, AsyncClient, AsyncClientOptions
+from supabase_auth import AsyncMemoryStorage
+from typing import Dict, Optional
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -13,6 +17,11 @@ load_dotenv()
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
+# Project JWT secret (Settings > API); lets the API verify HS256 access tokens locally
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
+# Connection pool shared by the async clients (per event loop)
+SUPABASE_POOL_MAX_CONNECTIONS = int(os.getenv("SUPABASE_POOL_MAX_CONNECTIONS", "50"))
+SUPABASE_TIMEOUT_SECONDS = float(os.getenv("SUPABASE_TIMEOUT_SECONDS", "30"))
 
 if not SUPABASE_URL or not SUPABASE_KEY:
     raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in .env file")
@@ -47,3 +56,72 @@ def get_supabase_admin_client() -> Client:
 # Initialize on import
 supabase: Client = get_supabase_client()
 supabase_admin: Client = get_supabase_admin_client()
+
+
+# ==================== ASYNC CLIENTS ====================
+# Services await these so concurrent requests overlap their database I/O
+# instead of blocking the event loop. httpx connections belong to the loop
+# that opened them, so each running loop gets its own pool and clients.
+
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict]" = weakref.WeakKeyDictionary()
+
+
+def _get_async_client(admin: bool) -> AsyncClient:
+    loop = asyncio.get_running_loop()
+    clients = _async_clients.get(loop)
+    if clients is None:
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=SUPABASE_POOL_MAX_CONNECTIONS,
+                max_keepalive_connections=SUPABASE_POOL_MAX_CONNECTIONS
+            ),
+            timeout=SUPABASE_TIMEOUT_SECONDS,
+            follow_redirects=True
+        )
+        clients = _async_clients[loop] = {"http": http_client}
+
+    role = "admin" if admin else "anon"
+    if role not in clients:
+        key = (SUPABASE_SERVICE_KEY or SUPABASE_KEY) if admin else SUPABASE_KEY
+        clients[role] = AsyncClient(
+            SUPABASE_URL,
+            key,
+            AsyncClientOptions(storage=AsyncMemoryStorage(), httpx_client=clients["http"])
+        )
+    return clients[role]
+
+
+def get_async_supabase_client() -> AsyncClient:
+    """Async anon-key client for the running event loop"""
+    return _get_async_client(admin=False)
+
+
+def get_async_supabase_admin_client() -> AsyncClient:
+    """Async service-role client for the running event loop"""
+    return _get_async_client(admin=True)
+
+
+async def close_async_supabase_clients():
+    """Close the running loop's connection pool"""
+    clients = _async_clients.pop(asyncio.get_running_loop(), None)
+    if clients:
+        await clients["http"].aclose()
+
+
+class AsyncSupabaseProxy:
+    """
+    Module-level handle to an async client
+
+    Attribute access is forwarded to the running loop's client, so services
+    can bind it at import time and write `await self.supabase.table(...)...execute()`.
+    """
+
+    def __init__(self, admin: bool):
+        self._admin = admin
+
+    def __getattr__(self, name):
+        return getattr(_get_async_client(self._admin), name)
+
+
+async_supabase = AsyncSupabaseProxy(admin=False)
+async_supabase_admin = AsyncSupabaseProxy(admin=True)
@@ -0,0 +1,56 @@
+-- ============================================
+-- CONSOLIDATED BILLING STATUS READ
+-- ============================================
+-- Returns everything BillingService.get_user_billing_status needs in one
+-- round trip: subscription row, credits row, today's usage and this
+-- month's usage per scan type. Plan limits and credit packs are static
+-- configuration and are cached in the API process instead.
+-- Run this in Supabase SQL Editor after subscription_schema.sql
+
+CREATE OR REPLACE FUNCTION public.get_billing_status(
+    p_user_id UUID,
+    p_today DATE DEFAULT CURRENT_DATE
+)
+RETURNS JSONB AS $$
+    SELECT jsonb_build_object(
+        'subscription', (
+            SELECT to_jsonb(s)
+            FROM public.user_subscriptions s
+            WHERE s.user_id = p_user_id
+            LIMIT 1
+        ),
+        'credits', (
+            SELECT to_jsonb(c)
+            FROM public.user_credits c
+            WHERE c.user_id = p_user_id
+            LIMIT 1
+        ),
+        'today_usage', COALESCE((
+            SELECT jsonb_object_agg(u.scan_type, u.total)
+            FROM (
+                SELECT scan_type, SUM(count) AS total
+                FROM public.usage_logs
+                WHERE user_id = p_user_id
+                  AND usage_date = p_today
+                GROUP BY scan_type
+            ) u
+        ), '{}'::jsonb),
+        'month_usage', COALESCE((
+            SELECT jsonb_object_agg(m.scan_type, m.total)
+            FROM (
+                SELECT scan_type, SUM(count) AS total
+                FROM public.usage_logs
+                WHERE user_id = p_user_id
+                  AND usage_date >= date_trunc('month', p_today)::date
+                  AND usage_date <= p_today
+                GROUP BY scan_type
+            ) m
+        ), '{}'::jsonb)
+    );
+$$ LANGUAGE sql STABLE SECURITY DEFINER SET search_path = public;
+
+-- Reads any user's billing data, so only the backend (service role) may call it
+REVOKE ALL ON FUNCTION public.get_billing_status(UUID, DATE) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.get_billing_status(UUID, DATE) TO service_role;
+
+COMMENT ON FUNCTION public.get_billing_status(UUID, DATE) IS 'Subscription, credits, today''s and month-to-date usage for one user in a single call';
@@ -0,0 +1,78 @@
+-- ============================================
+-- ATOMIC CREDIT DEDUCTION
+-- ============================================
+-- Checks the balance, debits it, records the credit transaction and bumps
+-- today's usage_logs row in one transaction. The conditional UPDATE takes
+-- the user_credits row lock, so concurrent scans for the same user are
+-- serialised and can never take the balance below zero.
+-- Run this in Supabase SQL Editor after subscription_schema.sql
+
+CREATE OR REPLACE FUNCTION public.deduct_credits_atomic(
+    p_user_id UUID,
+    p_amount NUMERIC,
+    p_description TEXT DEFAULT NULL,
+    p_scan_type TEXT DEFAULT NULL,
+    p_scan_count INTEGER DEFAULT NULL,
+    p_metadata JSONB DEFAULT NULL,
+    p_usage_date DATE DEFAULT CURRENT_DATE
+)
+RETURNS JSONB AS $$
+DECLARE
+    v_balance_before NUMERIC;
+    v_balance_after NUMERIC;
+BEGIN
+    IF p_amount IS NULL OR p_amount < 0 THEN
+        RETURN jsonb_build_object('success', false, 'reason', 'invalid_amount');
+    END IF;
+
+    UPDATE public.user_credits
+       SET balance = balance - p_amount,
+           lifetime_spent = COALESCE(lifetime_spent, 0) + p_amount,
+           updated_at = NOW()
+     WHERE user_id = p_user_id
+       AND balance >= p_amount
+    RETURNING balance + p_amount, balance
+         INTO v_balance_before, v_balance_after;
+
+    IF NOT FOUND THEN
+        SELECT balance INTO v_balance_before
+          FROM public.user_credits
+         WHERE user_id = p_user_id;
+
+        RETURN jsonb_build_object(
+            'success', false,
+            'reason', CASE WHEN v_balance_before IS NULL THEN 'not_found' ELSE 'insufficient' END,
+            'balance', v_balance_before
+        );
+    END IF;
+
+    INSERT INTO public.credit_transactions (
+        user_id, transaction_type, amount, balance_before, balance_after,
+        description, scan_type, scan_count, metadata
+    ) VALUES (
+        p_user_id, 'debit', p_amount, v_balance_before, v_balance_after,
+        COALESCE(p_description, 'Usage deduction: ' || p_amount || ' credits'),
+        p_scan_type, p_scan_count, COALESCE(p_metadata, '{"action": "usage_deduction"}'::jsonb)
+    );
+
+    -- usage_logs only tracks scan quotas (see its scan_type CHECK constraint)
+    IF p_scan_type IN ('option_scan', 'stock_scan', 'bulk_scan') THEN
+        INSERT INTO public.usage_logs (user_id, scan_type, count, usage_date, metadata)
+        VALUES (p_user_id, p_scan_type, GREATEST(COALESCE(p_scan_count, 1), 1), p_usage_date, p_metadata)
+        ON CONFLICT (user_id, scan_type, usage_date)
+        DO UPDATE SET count = public.usage_logs.count + EXCLUDED.count;
+    END IF;
+
+    RETURN jsonb_build_object(
+        'success', true,
+        'balance', v_balance_after,
+        'balance_before', v_balance_before
+    );
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- Moves any user's money, so only the backend (service role) may call it
+REVOKE ALL ON FUNCTION public.deduct_credits_atomic(UUID, NUMERIC, TEXT, TEXT, INTEGER, JSONB, DATE) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.deduct_credits_atomic(UUID, NUMERIC, TEXT, TEXT, INTEGER, JSONB, DATE) TO service_role;
+
+COMMENT ON FUNCTION public.deduct_credits_atomic(UUID, NUMERIC, TEXT, TEXT, INTEGER, JSONB, DATE) IS 'Check + debit + credit_transactions + usage_logs in one call; returns success and the new balance';
@@ -10,12 +10,14 @@ from pydantic import BaseModel
 from typing import Optional, List, Dict
 from datetime import datetime, timedelta, date, timezone, time
 import pandas as pd
+import asyncio
 import logging
 import os
 import random
 import uuid
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
+from apscheduler.triggers.cron import CronTrigger
 
 from config.settings import settings
 from src.api.fyers_client import fyers_client
@@ -27,6 +29,8 @@ from src.trading.signal_generator import signal_generator, risk_manager
 from src.services.auth_service import auth_service
 from src.services.screener_service import screener_service
 from src.services.billing_service import billing_service
+from src.services.ml_executor import MLExecutorBusy
+from src.services.signal_pipeline import register_pipeline, ACTIONABLE_SIGNAL, OPTIONS_SCAN
 from src.models.auth_models import UserRegister, UserLogin, FyersTokenStore
 from src.middleware.token_middleware import require_tokens, ScanType
 from src.middleware.refund_decorator import with_refund_on_failure
@@ -175,7 +179,14 @@ def get_candles_cached(symbol: str, resolution: str, date_from: datetime, date_t
         if candles is not None and not candles.empty:
             CANDLE_CACHE[cache_key] = (candles, now)
             logger.debug(f"💾 Cached: {cache_key} ({len(candles)} candles, TTL={ttl}s)")
-        
+
+            # Keep daily/hourly history on disk for offline model training
+            try:
+                from src.ml.candle_store import get_candle_store
+                get_candle_store().merge(symbol, resolution, candles)
+            except Exception as store_error:
+                logger.debug(f"Candle store write skipped for {cache_key}: {store_error}")
+
         return candles
         
     except Exception as e:
@@ -395,19 +406,152 @@ async def fetch_market_news():
         logger.error(traceback.format_exc())
 
 
+# Full-chain OI analytics refresh interval (weekly, next-weekly, monthly expiries)
+OI_ANALYTICS_REFRESH_MINUTES = 5
+
+
+async def refresh_oi_analytics():
+    """
+    Background task to pull full option chains for all tracked expiries
+    and cache max pain / OI walls / PCR bands / OI-change heatmaps.
+    Runs during market hours only; Fyers calls run off the event loop.
+    """
+    if not fyers_client.access_token or not is_market_open():
+        return
+    
+    try:
+        import asyncio
+        from src.analytics.oi_analytics import get_oi_analyzer
+        
+        summary = await asyncio.to_thread(get_oi_analyzer(fyers_client).refresh_all)
+        logger.info(f"✅ OI analytics refreshed: {summary}")
+    except Exception as e:
+        logger.error(f"❌ OI analytics refresh error: {e}")
+
+
+@app.on_event("startup")
+async def start_oi_analytics_job():
+    """Schedule the multi-expiry OI analytics refresh"""
+    try:
+        scheduler.add_job(
+            refresh_oi_analytics,
+            IntervalTrigger(minutes=OI_ANALYTICS_REFRESH_MINUTES),
+            id="oi_analytics_job",
+            name="Refresh full-chain OI analytics",
+            replace_existing=True
+        )
+        if not scheduler.running:
+            scheduler.start()
+            logger.info("✅ Background scheduler started")
+        logger.info(f"🧱 OI analytics job configured - every {OI_ANALYTICS_REFRESH_MINUTES} minutes")
+    except Exception as sched_error:
+        logger.error(f"❌ Error setting up OI analytics job: {sched_error}")
+
+
+async def refresh_gamma_scan():
+    """
+    Background task to rescan expiry-day gamma opportunities and cache
+    the latest result per index. No-op outside expiry afternoons.
+    """
+    if not fyers_client.access_token or not is_market_open():
+        return
+    
+    try:
+        import asyncio
+        from src.analytics.expiry_gamma_scanner import run_scheduled_gamma_scan
+        
+        summary = await asyncio.to_thread(run_scheduled_gamma_scan, fyers_client)
+        if summary:
+            logger.info(f"🎯 Gamma scan refreshed: {summary}")
+    except Exception as e:
+        logger.error(f"❌ Gamma scan refresh error: {e}")
+
+
+@app.on_event("startup")
+async def start_gamma_scan_job():
+    """Schedule the expiry-day gamma rescan (opt-in via GAMMA_SCAN_SCHEDULE_ENABLED)"""
+    if not settings.gamma_scan_schedule_enabled:
+        return
+    
+    try:
+        scheduler.add_job(
+            refresh_gamma_scan,
+            IntervalTrigger(seconds=settings.gamma_scan_interval_seconds),
+            id="gamma_scan_job",
+            name="Expiry-day gamma scanner",
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
+        )
+        if not scheduler.running:
+            scheduler.start()
+            logger.info("✅ Background scheduler started")
+        logger.info(f"🎯 Gamma scan job configured - every {settings.gamma_scan_interval_seconds}s")
+    except Exception as sched_error:
+        logger.error(f"❌ Error setting up gamma scan job: {sched_error}")
+
+
+def _training_horizons() -> tuple:
+    return tuple(int(h) for h in settings.ml_training_horizons.split(",") if h.strip())
+
+
+async def run_walk_forward_training():
+    """
+    Background task to retrain index ML models with walk-forward CV from
+    the local candle store. Runs in a worker thread; folds fan out across cores.
+    """
+    try:
+        from src.ml.training_pipeline import get_walk_forward_trainer
+        
+        results = await asyncio.to_thread(get_walk_forward_trainer().run, None, _training_horizons())
+        promoted = [r.model_key for r in results if r.status == "promoted"]
+        logger.info(f"🧠 Walk-forward training complete: {len(results)} models, promoted {promoted or 'none'}")
+    except Exception as e:
+        logger.error(f"❌ Walk-forward training error: {e}")
+
+
+@app.on_event("startup")
+async def start_walk_forward_training_job():
+    """Schedule nightly walk-forward retraining (opt-in via ML_TRAINING_SCHEDULE_ENABLED)"""
+    if not settings.ml_training_schedule_enabled:
+        return
+    
+    try:
+        scheduler.add_job(
+            run_walk_forward_training,
+            CronTrigger(
+                day_of_week="mon-fri",
+                hour=settings.ml_training_hour,
+                minute=settings.ml_training_minute,
+                timezone="Asia/Kolkata"
+            ),
+            id="walk_forward_training_job",
+            name="Walk-forward index model training",
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
+        )
+        if not scheduler.running:
+            scheduler.start()
+            logger.info("✅ Background scheduler started")
+        logger.info(f"🧠 Walk-forward training job configured - weekdays {settings.ml_training_hour:02d}:{settings.ml_training_minute:02d} IST")
+    except Exception as sched_error:
+        logger.error(f"❌ Error setting up walk-forward training job: {sched_error}")
+
+
 # Startup event to load Fyers token from Supabase and start scheduler
 @app.on_event("startup")
 async def load_fyers_token_from_db():
     """Load the most recent Fyers token from Supabase on startup.
     No expiry check - let Fyers API validate the token."""
     try:
-        from config.supabase_config import supabase_admin
-        supabase = supabase_admin
+        from config.supabase_config import async_supabase_admin
+        supabase = async_supabase_admin
 
         logger.info(f"🔍 Loading Fyers token from database...")
         
         # Get most recently updated token
-        response = supabase.table("fyers_tokens").select("*").order("updated_at", desc=True).limit(1).execute()
+        response = await supabase.table("fyers_tokens").select("*").order("updated_at", desc=True).limit(1).execute()
         
         if response.data:
             token_data = response.data[0]
@@ -484,13 +628,53 @@ async def shutdown_scheduler():
         logger.error(f"❌ Error stopping scheduler: {e}")
 
 
+@app.on_event("startup")
+async def start_write_behind_queue():
+    """Start the batched writer for logs and scan results"""
+    try:
+        from src.services.write_behind import get_write_behind_queue
+        await get_write_behind_queue().start()
+    except Exception as e:
+        logger.error(f"❌ Error starting write-behind queue: {e}")
+
+
+@app.on_event("shutdown")
+async def stop_write_behind_queue():
+    """Flush buffered writes before exit"""
+    try:
+        from src.services.write_behind import get_write_behind_queue
+        await get_write_behind_queue().stop()
+    except Exception as e:
+        logger.error(f"❌ Error stopping write-behind queue: {e}")
+
+
+@app.on_event("shutdown")
+async def close_database_pool():
+    """Close the async Supabase connection pool"""
+    try:
+        from config.supabase_config import close_async_supabase_clients
+        await close_async_supabase_clients()
+    except Exception as e:
+        logger.error(f"❌ Error closing database pool: {e}")
+
+
+@app.on_event("shutdown")
+async def shutdown_ml_executor():
+    """Stop ML worker processes"""
+    try:
+        from src.services.ml_executor import get_ml_executor
+        get_ml_executor().shutdown()
+    except Exception as e:
+        logger.error(f"❌ Error stopping ML executor: {e}")
+
+
 # Initialize Fyers client on startup
 async def initialize_fyers_client():
     """Initialize the Fyers client with stored token"""
     try:
-        from config.supabase_config import supabase_admin
+        from config.supabase_config import async_supabase_admin as supabase_admin
         # Try to load Fyers token from database
-        response = supabase_admin.table("fyers_tokens").select("*").limit(1).execute()
+        response = await supabase_admin.table("fyers_tokens").select("*").limit(1).execute()
         
         if response.data:
             token_data = response.data[0]
@@ -590,6 +774,8 @@ async def health_check():
         "analysis_cache_entries": len(ANALYSIS_CACHE),
     }
     
+    from src.services.write_behind import get_write_behind_queue
+    
     return {
         "status": "online",
         "service": "TradeWise API",
@@ -601,7 +787,8 @@ async def health_check():
         },
         "news_service": news_status,
         "rate_limiter": rate_limiter_stats,
-        "cache": cache_stats
+        "cache": cache_stats,
+        "write_behind": get_write_behind_queue().get_status()
     }
 
 
@@ -897,9 +1084,9 @@ async def get_fyers_token_status():
     """Check if any valid Fyers token exists (for development)"""
     try:
         from datetime import timezone
-        from config.supabase_config import supabase_admin
+        from config.supabase_config import async_supabase_admin as supabase_admin
         
-        response = supabase_admin.table("fyers_tokens").select("*").order("updated_at", desc=True).limit(1).execute()
+        response = await supabase_admin.table("fyers_tokens").select("*").order("updated_at", desc=True).limit(1).execute()
         
         if not response.data:
             return {
@@ -969,11 +1156,11 @@ async def delete_fyers_token(authorization: str = Header(None, description="Bear
 async def refresh_fyers_token_from_db():
     """Manually refresh Fyers client with latest token from database"""
     try:
-        from supabase import create_client
-        supabase = create_client(settings.supabase_url, settings.supabase_key)
+        from config.supabase_config import async_supabase_admin
+        supabase = async_supabase_admin
         
         # Get the most recent token
-        response = supabase.table("fyers_tokens").select("*").order("updated_at", desc=True).limit(1).execute()
+        response = await supabase.table("fyers_tokens").select("*").order("updated_at", desc=True).limit(1).execute()
         
         if response.data:
             token_data = response.data[0]
@@ -1176,10 +1363,10 @@ async def get_news_service_status():
     
     try:
         # Get latest fetch log
-        from config.supabase_config import get_supabase_admin_client
-        supabase = get_supabase_admin_client()
+        from config.supabase_config import get_async_supabase_admin_client
+        supabase = get_async_supabase_admin_client()
         
-        response = supabase.table("news_fetch_log").select("*").order(
+        response = await supabase.table("news_fetch_log").select("*").order(
             "fetch_time", desc=True
         ).limit(5).execute()
         
@@ -1187,14 +1374,14 @@ async def get_news_service_status():
         
         # Count today's requests
         today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
-        today_response = supabase.table("news_fetch_log").select("id").gte(
+        today_response = await supabase.table("news_fetch_log").select("id").gte(
             "fetch_time", today_start.isoformat()
         ).execute()
         
         requests_today = len(today_response.data) if today_response.data else 0
         
         # Get article count
-        articles_response = supabase.table("market_news").select("id", count="exact").execute()
+        articles_response = await supabase.table("market_news").select("id", count="exact").execute()
         total_articles = articles_response.count if hasattr(articles_response, 'count') else len(articles_response.data or [])
         
         return {
@@ -1276,10 +1463,10 @@ async def ai_chat(
         
         if request.scan_id and not scan_data:
             try:
-                from config.supabase_config import get_supabase_admin_client
-                supabase = get_supabase_admin_client()
+                from config.supabase_config import get_async_supabase_admin_client
+                supabase = get_async_supabase_admin_client()
                 
-                response = supabase.table("option_scan_results").select("*").eq(
+                response = await supabase.table("option_scan_results").select("*").eq(
                     "id", request.scan_id
                 ).single().execute()
                 
@@ -1304,8 +1491,8 @@ async def ai_chat(
         if not has_valid_scan_data and not has_valid_signal_data:
             logger.info("⚠️ No data from frontend, fetching from database...")
             try:
-                from config.supabase_config import get_supabase_admin_client
-                supabase = get_supabase_admin_client()
+                from config.supabase_config import get_async_supabase_admin_client
+                supabase = get_async_supabase_admin_client()
                 
                 # Try to detect index from query or use explicit index parameter
                 target_index = None
@@ -1335,7 +1522,7 @@ async def ai_chat(
                     query_builder = query_builder.eq("index", target_index)
                     logger.info(f"📊 Filtering scan results by index: {target_index}")
                 
-                latest_response = query_builder.order(
+                latest_response = await query_builder.order(
                     "timestamp", desc=True
                 ).limit(1).execute()
                 
@@ -1390,8 +1577,8 @@ async def ai_chat(
         
         # Log analytics (optional - don't fail if table doesn't exist)
         try:
-            from config.supabase_config import get_supabase_admin_client
-            supabase = get_supabase_admin_client()
+            from config.supabase_config import get_async_supabase_admin_client
+            supabase = get_async_supabase_admin_client()
             
             # Safely serialize citations
             citations_data = []
@@ -1402,7 +1589,7 @@ async def ai_chat(
                     else:
                         citations_data.append(c.dict())
             
-            supabase.table("ai_chat_history").insert({
+            await supabase.table("ai_chat_history").insert({
                 "user_id": str(user.id),
                 "scan_id": request.scan_id,
                 "query": request.query,
@@ -1472,10 +1659,10 @@ async def explain_signal(
         signal_data = request.signal_data
         if not signal_data and request.signal_id:
             try:
-                from config.supabase_config import get_supabase_admin_client
-                supabase = get_supabase_admin_client()
+                from config.supabase_config import get_async_supabase_admin_client
+                supabase = get_async_supabase_admin_client()
                 
-                response = supabase.table("trading_signals").select("*").eq(
+                response = await supabase.table("trading_signals").select("*").eq(
                     "id", request.signal_id
                 ).single().execute()
                 
@@ -1551,12 +1738,12 @@ async def compare_indices(
             raise HTTPException(status_code=503, detail="AI service not available")
         
         # Fetch latest scans for requested indices
-        from config.supabase_config import get_supabase_admin_client
-        supabase = get_supabase_admin_client()
+        from config.supabase_config import get_async_supabase_admin_client
+        supabase = get_async_supabase_admin_client()
         
         indices_data = []
         for index in request.indices:
-            response = supabase.table("option_scan_results").select("*").eq(
+            response = await supabase.table("option_scan_results").select("*").eq(
                 "index", index
             ).eq(
                 "user_id", str(user.id)
@@ -1637,10 +1824,10 @@ async def generate_trade_plan(
         # Get signal data
         signal_data = request.signal_data
         if not signal_data and request.signal_id:
-            from config.supabase_config import get_supabase_admin_client
-            supabase = get_supabase_admin_client()
+            from config.supabase_config import get_async_supabase_admin_client
+            supabase = get_async_supabase_admin_client()
             
-            response = supabase.table("trading_signals").select("*").eq(
+            response = await supabase.table("trading_signals").select("*").eq(
                 "id", request.signal_id
             ).single().execute()
             
@@ -1713,10 +1900,10 @@ async def get_query_suggestions(
             raise HTTPException(status_code=503, detail="AI service not available")
         
         # Get scan data
-        from config.supabase_config import get_supabase_admin_client
-        supabase = get_supabase_admin_client()
+        from config.supabase_config import get_async_supabase_admin_client
+        supabase = get_async_supabase_admin_client()
         
-        response = supabase.table("option_scan_results").select("*").eq(
+        response = await supabase.table("option_scan_results").select("*").eq(
             "id", scan_id
         ).single().execute()
         
@@ -2276,8 +2463,9 @@ async def train_model(symbol: str, days: int = 365):
             date_from=datetime.now() - timedelta(days=days)
         )
         
-        # Train model
-        metrics = price_predictor.train(df)
+        # Train model in the ML worker pool (keeps the event loop free)
+        from src.services.ml_executor import train_price_model
+        metrics = await train_price_model(price_predictor, df)
         
         # Save model
         model_path = f"models/saved_models/{symbol.replace(':', '_')}_model.pkl"
@@ -2289,6 +2477,10 @@ async def train_model(symbol: str, days: int = 365):
             "training_metrics": metrics,
             "model_path": model_path
         }
+    except MLExecutorBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Model training timed out")
     except Exception as e:
         logger.error(f"Error training model: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -2328,6 +2520,7 @@ async def predict_price(symbol: str, periods: int = 1):
 # ==================== INDEX OPTIONS ENDPOINTS ====================
 
 from src.analytics.index_options import get_index_analyzer, INDEX_CONFIG
+from src.analytics.oi_analytics import get_oi_analyzer
 
 @app.get("/index/list")
 async def list_indices():
@@ -2378,9 +2571,21 @@ async def get_expiry_dates(index: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _gamma_oi_walls(index: str) -> Optional[dict]:
+    """Full-chain OI walls for the nearest expiry (from background cache)"""
+    weekly_oi = get_oi_analyzer(fyers_client).get_cached(index, "weekly")
+    return {
+        "max_pain": weekly_oi.max_pain,
+        "call_walls": [w.strike for w in weekly_oi.call_walls],
+        "put_walls": [w.strike for w in weekly_oi.put_walls],
+        "computed_at": weekly_oi.computed_at
+    } if weekly_oi else None
+
+
 @app.get("/index/{index}/gamma-scanner")
 async def scan_gamma_opportunities(
     index: str,
+    fresh: bool = Query(False, description="Bypass the scheduled-scan cache"),
     authorization: str = Header(None, description="Bearer token for authenticated access")
 ):
     """
@@ -2397,7 +2602,13 @@ async def scan_gamma_opportunities(
         - Trading advice for current phase
     """
     try:
-        from src.analytics.expiry_gamma_scanner import expiry_gamma_scanner
+        from src.analytics.expiry_gamma_scanner import expiry_gamma_scanner, get_cached_gamma_scan
+        
+        # Serve the latest scheduled scan when available
+        if not fresh:
+            cached = get_cached_gamma_scan(index.upper())
+            if cached:
+                return {**cached, "oi_walls": _gamma_oi_walls(index.upper())}
         
         # Load user's Fyers token if provided
         if authorization:
@@ -2461,6 +2672,8 @@ async def scan_gamma_opportunities(
         result["expiry_date"] = getattr(chain, 'expiry_date', None)
         result["days_to_expiry"] = getattr(chain, 'days_to_expiry', 0)
         
+        result["oi_walls"] = _gamma_oi_walls(index.upper())
+        
         return result
         
     except Exception as e:
@@ -2569,6 +2782,7 @@ async def get_enhanced_ml_prediction(
     strike: int = Query(None, description="Strike price (default: ATM)"),
     premium: float = Query(None, description="Current premium (default: estimated)"),
     expiry: str = Query("weekly", description="Expiry: weekly, next_weekly, monthly"),
+    monte_carlo: bool = Query(False, description="Add Monte Carlo P&L distribution to the simulation"),
     authorization: str = Header(None, description="Bearer token for authenticated access")
 ):
     """
@@ -2601,6 +2815,8 @@ async def get_enhanced_ml_prediction(
        - Expected P&L, win probability
        - Trade grade (A+ to F)
        - Position sizing recommendation
+       - monte_carlo=true: simulated spot/IV paths with full repricing,
+         P&L percentiles and T1/T2/SL hit probabilities
     
     Returns comprehensive prediction with actionable recommendations.
     """
@@ -2673,11 +2889,19 @@ async def get_enhanced_ml_prediction(
         
         price_history = []
         volume_history = []
+        indicator_state = None
         
         if historical_df is not None and not historical_df.empty:
             price_history = historical_df['close'].tolist()
             if 'volume' in historical_df.columns:
                 volume_history = historical_df['volume'].tolist()
+            
+            # Streaming indicators only fold in candles they have not seen yet
+            try:
+                from src.ml.streaming_indicators import get_indicator_registry
+                indicator_state = get_indicator_registry().sync(symbol, "60", historical_df)
+            except Exception as e:
+                logger.warning(f"Streaming indicators unavailable, recomputing features: {e}")
         else:
             # Fallback: need at least some data
             raise HTTPException(status_code=500, detail="Insufficient historical data")
@@ -2698,7 +2922,10 @@ async def get_enhanced_ml_prediction(
             days_to_expiry=float(dte),
             price_history=price_history,
             volume_history=volume_history if volume_history else None,
-            is_expiry_day=is_expiry_day
+            is_expiry_day=is_expiry_day,
+            monte_carlo=monte_carlo,
+            indicator_state=indicator_state,
+            index_name=index.upper()
         )
         
         # Add context
@@ -3110,6 +3337,8 @@ async def get_option_chain_analysis(
                 "resistance": chain.resistance_levels
             },
             "oi_buildup": chain.oi_buildup_zones,
+            # Full-chain analytics for weekly / next-weekly / monthly (background cache)
+            "full_chain_oi": get_oi_analyzer(fyers_client).get_cached_dict(index.upper()),
             "strikes": [
                 {
                     "strike": s.strike,
@@ -3830,6 +4059,7 @@ async def get_event_calendar():
 
 # ==================== TRADING SIGNALS ====================
 
+@register_pipeline(ACTIONABLE_SIGNAL)
 @app.get("/signals/{symbol}/actionable")
 async def get_actionable_trading_signal(
     symbol: str,
@@ -4075,6 +4305,23 @@ async def get_actionable_trading_signal(
         except Exception as e:
             logger.warning(f"Could not fetch historical data for ML: {e}")
         
+        # Estimate ARIMA parameters in the ML worker pool when the cached model
+        # needs a (re)fit, so get_ml_signal() below only re-filters or reuses it
+        # A prefit that timed out (or a saturated pool) must not be followed by
+        # the same fit inline, which would double the request's worst case
+        ml_fit_inline = True
+        if ML_AVAILABLE and historical_prices is not None and len(historical_prices) >= 50:
+            from src.services.ml_executor import MLExecutorBusy, prefit_ensemble
+            try:
+                await prefit_ensemble(
+                    historical_prices, symbol=index_name, timeout=settings.ml_prefit_timeout_seconds
+                )
+            except (asyncio.TimeoutError, MLExecutorBusy) as e:
+                ml_fit_inline = False
+                logger.warning(f"ML prefit unavailable ({type(e).__name__}), skipping ML signal for this request")
+            except Exception as e:
+                logger.warning(f"ML prefit skipped, fitting inline: {e}")
+        
         # ==================== INDEX PROBABILITY ANALYSIS ====================
         # 🚀 QUICK MODE: Skip expensive 50-stock analysis
         # 🎯 FULL MODE: Scan ALL constituent stocks to enhance signal
@@ -4173,7 +4420,8 @@ async def get_actionable_trading_signal(
                 historical_prices=historical_prices,
                 probability_analysis=probability_analysis,
                 use_new_flow=True,  # 🚀 NEW ICT-FIRST FLOW ENABLED!
-                index=index_name  # Pass the extracted index name (NIFTY, BANKNIFTY, etc.)
+                index=index_name,  # Pass the extracted index name (NIFTY, BANKNIFTY, etc.)
+                ml_fit_inline=ml_fit_inline
             )
             
             # Verify NEW flow actually ran by checking for its unique fields
@@ -4204,7 +4452,8 @@ async def get_actionable_trading_signal(
                 chain_data=chain_data,
                 historical_prices=historical_prices,
                 probability_analysis=probability_analysis,
-                index=index_name  # Pass the index name for database saving
+                index=index_name,  # Pass the index name for database saving
+                ml_fit_inline=ml_fit_inline
             )
             logger.info("✅ OLD flow completed as fallback")
         
@@ -4298,7 +4547,8 @@ async def get_actionable_trading_signal(
                     volume_history=None,  # Volume data not always available
                     iv_history=None,  # IV history not available
                     timestamp=None,  # Use current time
-                    is_expiry_day=(days_to_expiry <= 1)
+                    is_expiry_day=(days_to_expiry <= 1),
+                    index_name=index_name
                 )
                 
                 signal["enhanced_ml_prediction"] = enhanced_prediction
@@ -4703,7 +4953,7 @@ def _calculate_scalp_feasibility(
     }
 
 
-def _generate_actionable_signal_topdown(mtf_result, session_info, chain_data, historical_prices=None, probability_analysis=None, use_new_flow=True, index="NIFTY"):
+def _generate_actionable_signal_topdown(mtf_result, session_info, chain_data, historical_prices=None, probability_analysis=None, use_new_flow=True, index="NIFTY", ml_fit_inline=True):
     """
     Generate trading signal using ICT top-down methodology
     
@@ -4716,6 +4966,7 @@ def _generate_actionable_signal_topdown(mtf_result, session_info, chain_data, hi
         historical_prices: Historical price data for ML
         probability_analysis: Constituent stock analysis
         use_new_flow: If True, use new ICT-first flow; if False, fall back to old flow
+        ml_fit_inline: If False, the ML signal is skipped when its ARIMA model needs a refit
     
     Returns:
         Complete signal dictionary with ICT analysis, confirmations, and confidence breakdown
@@ -4723,7 +4974,7 @@ def _generate_actionable_signal_topdown(mtf_result, session_info, chain_data, hi
     
     if not use_new_flow:
         # Feature flag: Fall back to old flow
-        return _generate_actionable_signal(mtf_result, session_info, chain_data, historical_prices, probability_analysis, index=index)
+        return _generate_actionable_signal(mtf_result, session_info, chain_data, historical_prices, probability_analysis, index=index, ml_fit_inline=ml_fit_inline)
     
     spot_price = mtf_result.current_price
     session = session_info.current_session
@@ -5055,7 +5306,7 @@ def _generate_actionable_signal_topdown(mtf_result, session_info, chain_data, hi
     
     if historical_prices is not None and len(historical_prices) >= 50:
         try:
-            ml_result = get_ml_signal(historical_prices, steps=1)
+            ml_result = get_ml_signal(historical_prices, steps=1, symbol=index, allow_fit=ml_fit_inline)
             
             if ml_result.get('success'):
                 ensemble = ml_result['predictions'].get('ensemble', {})
@@ -5638,7 +5889,7 @@ def _generate_actionable_signal_topdown(mtf_result, session_info, chain_data, hi
             index=index
         ) if is_expiry_day else None
     }
-def _generate_actionable_signal(mtf_result, session_info, chain_data, historical_prices=None, probability_analysis=None, index="NIFTY"):
+def _generate_actionable_signal(mtf_result, session_info, chain_data, historical_prices=None, probability_analysis=None, index="NIFTY", ml_fit_inline=True):
     """Generate clear trading signal from MTF analysis with full Greeks integration, ML predictions, and constituent stock analysis"""
     
     spot_price = mtf_result.current_price
@@ -5716,7 +5967,7 @@ def _generate_actionable_signal(mtf_result, session_info, chain_data, historical
     if historical_prices is not None and len(historical_prices) >= 50:
         try:
             # Get ML ensemble prediction (ARIMA + LSTM + Momentum)
-            ml_result = get_ml_signal(historical_prices, steps=1)
+            ml_result = get_ml_signal(historical_prices, steps=1, symbol=index, allow_fit=ml_fit_inline)
             
             if ml_result.get('success'):
                 ensemble = ml_result['predictions'].get('ensemble', {})
@@ -8416,11 +8667,11 @@ async def get_ai_chat_history(
         user = await auth_service.get_current_user(token)
         
         from datetime import datetime, timedelta, timezone
-        from config.supabase_config import supabase_admin as supabase
+        from config.supabase_config import async_supabase_admin as supabase
         time_threshold = (datetime.now(timezone.utc) - timedelta(hours=hours)).isoformat()
         
         # Fetch chat history
-        response = supabase.table("ai_chat_history")\
+        response = await supabase.table("ai_chat_history")\
             .select("*")\
             .eq("user_id", str(user.id))\
             .gte("created_at", time_threshold)\
@@ -8478,7 +8729,7 @@ async def get_recent_screener_scans(
         if date and time_end:
             query = query.lte("scanned_at", time_end)
         
-        response = query.order("scanned_at", desc=True)\
+        response = await query.order("scanned_at", desc=True)\
             .limit(limit)\
             .execute()
         
@@ -8514,14 +8765,14 @@ async def get_available_scan_dates(
         time_threshold = (datetime.now(timezone.utc) - timedelta(days=days_back)).isoformat()
         
         # Get distinct dates for stock screener (screener_results table)
-        stock_response = screener_service.supabase_admin.table("screener_results")\
+        stock_response = await screener_service.supabase_admin.table("screener_results")\
             .select("scanned_at")\
             .eq("user_id", str(user.id))\
             .gte("scanned_at", time_threshold)\
             .execute()
         
         # Get distinct dates for options scanner (option_scanner_results table)
-        options_response = screener_service.supabase_admin.table("option_scanner_results")\
+        options_response = await screener_service.supabase_admin.table("option_scanner_results")\
             .select("timestamp")\
             .eq("user_id", str(user.id))\
             .gte("timestamp", time_threshold)\
@@ -8576,7 +8827,7 @@ async def debug_screener_data(
         user = await auth_service.get_current_user(token)
         
         # Get last 10 records from screener_results
-        stock_check = screener_service.supabase_admin.table("screener_results")\
+        stock_check = await screener_service.supabase_admin.table("screener_results")\
             .select("id, user_id, symbol, scanned_at, signal_type")\
             .eq("user_id", str(user.id))\
             .order("scanned_at", desc=True)\
@@ -8584,7 +8835,7 @@ async def debug_screener_data(
             .execute()
         
         # Get count
-        count_response = screener_service.supabase_admin.table("screener_results")\
+        count_response = await screener_service.supabase_admin.table("screener_results")\
             .select("id", count="exact")\
             .eq("user_id", str(user.id))\
             .execute()
@@ -8720,6 +8971,7 @@ async def debug_auth_status(authorization: str = Header(None)):
             "message": str(e)
         }
 
+@register_pipeline(OPTIONS_SCAN)
 @app.get("/options/scan")
 @require_tokens(ScanType.OPTION_SCAN)
 @with_refund_on_failure(ScanType.OPTION_SCAN)
@@ -10968,8 +11220,9 @@ async def train_ml_model(
                 detail="Insufficient historical data for training"
             )
         
-        # Train model
-        metrics = ml_optimizer.train(index_name.upper(), df)
+        # Train model in the ML worker pool (keeps the event loop free)
+        from src.services.ml_executor import train_index_model
+        metrics = await train_index_model(ml_optimizer, index_name.upper(), df)
         
         # Save model
         ml_optimizer.save_model(index_name.upper())
@@ -10980,11 +11233,47 @@ async def train_ml_model(
             "training_metrics": metrics
         }
         
+    except MLExecutorBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Model training timed out")
     except Exception as e:
         logger.error(f"ML training error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/index/train-ml-walk-forward")
+async def trigger_walk_forward_training():
+    """
+    Start a walk-forward training run in the background
+
+    Trains every index/horizon from the local candle store; models are
+    promoted into the registry only if they beat the current version.
+    Poll /index/ml-training-status for results.
+    """
+    if not INDEX_ANALYSIS_AVAILABLE:
+        raise HTTPException(status_code=503, detail="Index analysis modules not available")
+    
+    from src.ml.training_pipeline import get_walk_forward_trainer
+    if get_walk_forward_trainer().get_status()["running"]:
+        raise HTTPException(status_code=409, detail="Walk-forward training already running")
+    
+    asyncio.create_task(run_walk_forward_training())
+    return {"status": "started", "horizons": list(_training_horizons())}
+
+
+@app.get("/index/ml-training-status")
+async def get_walk_forward_training_status():
+    """
+    Latest walk-forward training result per model
+    """
+    if not INDEX_ANALYSIS_AVAILABLE:
+        raise HTTPException(status_code=503, detail="Index analysis modules not available")
+    
+    from src.ml.training_pipeline import get_walk_forward_trainer
+    return {"status": "success", **get_walk_forward_trainer().get_status()}
+
+
 @app.get("/index/ml-status")
 async def get_ml_model_status():
     """
@@ -11003,6 +11292,94 @@ async def get_ml_model_status():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/index/ml-metrics")
+async def get_ml_inference_metrics(
+    index: Optional[str] = Query(None, description="Limit prediction drift to one index"),
+    window: int = Query(50, ge=5, le=250, description="Predictions per drift comparison window")
+):
+    """
+    ML inference latency, cache hit rates and prediction drift
+    
+    - latency: per-component histogram (ms buckets), calls, errors, p50/p95/p99
+    - caches: feature store / model registry / ensemble hit rates
+    - predictions: per index and component, the latest `window` outputs vs
+      the `window` before them, plus a breakdown per model version
+    """
+    from src.ml.ml_metrics import get_ml_metrics
+    return {"status": "success", **get_ml_metrics().snapshot(index, window)}
+
+
+@app.get("/index/ml-predictions")
+async def get_batch_ml_predictions(
+    indices: str = Query("NIFTY,BANKNIFTY,FINNIFTY,SENSEX", description="Comma-separated index names"),
+    horizon: int = Query(1, ge=1, description="Days ahead for the index model (walk-forward trained horizons)")
+):
+    """
+    ML predictions for several indices in one call
+
+    Rows for all indices are scored together: one predict_proba per trained
+    index model and one for the intraday direction model, instead of one
+    model call per index.
+    """
+    if not INDEX_ANALYSIS_AVAILABLE:
+        raise HTTPException(status_code=503, detail="Index analysis modules not available")
+
+    try:
+        analyzer = get_probability_analyzer(fyers_client)
+        index_names = [name.strip().upper() for name in indices.split(",") if name.strip()]
+        end_date = datetime.now()
+
+        daily_items = []
+        hourly_states = []
+        for index_name in index_names:
+            symbol = analyzer._get_index_symbol(index_name)
+            daily_df = get_candles_cached(symbol, "D", end_date - timedelta(days=200), end_date)
+            if daily_df is not None and not daily_df.empty:
+                daily_items.append((index_name, daily_df))
+
+            hourly_df = get_candles_cached(symbol, "60", end_date - timedelta(days=30), end_date)
+            if hourly_df is not None and len(hourly_df) >= 20:
+                from src.ml.streaming_indicators import get_indicator_registry
+                hourly_states.append((index_name, get_indicator_registry().sync(symbol, "60", hourly_df)))
+
+        results = {name: {"index_model": None, "direction_model": None} for name in index_names}
+
+        for (index_name, _), prediction in zip(daily_items, get_ml_optimizer().predict_batch(daily_items, horizon)):
+            if prediction is not None:
+                results[index_name]["index_model"] = {
+                    "direction": prediction.predicted_direction,
+                    "prob_up": prediction.probability_up,
+                    "prob_down": prediction.probability_down,
+                    "prob_flat": prediction.probability_flat,
+                    "confidence": prediction.confidence,
+                    "top_features": prediction.feature_importance
+                }
+
+        from src.services.enhanced_ml_service import get_enhanced_ml_service
+        direction_predictor = get_enhanced_ml_service().direction_predictor
+        if direction_predictor and hourly_states:
+            predictions = direction_predictor.predict_batch_from_states([state for _, state in hourly_states])
+            for (index_name, _), prediction in zip(hourly_states, predictions):
+                results[index_name]["direction_model"] = {
+                    "direction": prediction.direction.value,
+                    "confidence": prediction.confidence,
+                    "expected_move_pct": prediction.expected_move_pct,
+                    "prob_up": prediction.prob_strong_up + prediction.prob_up,
+                    "prob_down": prediction.prob_strong_down + prediction.prob_down,
+                    "prob_sideways": prediction.prob_sideways
+                }
+
+        return {
+            "status": "success",
+            "timestamp": end_date.isoformat(),
+            "horizon": horizon,
+            "predictions": results
+        }
+    except Exception as e:
+        logger.error(f"Batch ML prediction error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/index/quick-analysis/{index_name}")
 async def quick_index_analysis(index_name: str):
     """
@@ -11155,7 +11532,7 @@ async def get_paper_trading_positions(
     if status != "ALL":
         query = query.eq("status", status)
     
-    response = query.order("created_at", desc=True).execute()
+    response = await query.order("created_at", desc=True).execute()
     
     return {
         "status": "success",
@@ -11175,7 +11552,7 @@ async def get_paper_trading_signals(
     token = authorization.replace("Bearer ", "")
     user = await auth_service.get_current_user(token)
     
-    response = paper_trading_service.supabase.table("paper_trading_signals")\
+    response = await paper_trading_service.supabase.table("paper_trading_signals")\
         .select("*")\
         .eq("user_id", str(user.id))\
         .order("signal_timestamp", desc=True)\
@@ -11202,7 +11579,7 @@ async def get_paper_trading_performance(
     
     start_date = (datetime.now() - timedelta(days=days)).date()
     
-    response = paper_trading_service.supabase.table("paper_trading_performance")\
+    response = await paper_trading_service.supabase.table("paper_trading_performance")\
         .select("*")\
         .eq("user_id", str(user.id))\
         .gte("date", start_date.isoformat())\
@@ -11227,7 +11604,7 @@ async def get_paper_trading_activity(
     token = authorization.replace("Bearer ", "")
     user = await auth_service.get_current_user(token)
     
-    response = paper_trading_service.supabase.table("paper_trading_activity_log")\
+    response = await paper_trading_service.supabase.table("paper_trading_activity_log")\
         .select("*")\
         .eq("user_id", str(user.id))\
         .order("timestamp", desc=True)\
@@ -11278,7 +11655,7 @@ async def get_paper_trading_status(
     
     # Get today's performance
     today = datetime.now().date()
-    perf_response = paper_trading_service.supabase.table("paper_trading_performance")\
+    perf_response = await paper_trading_service.supabase.table("paper_trading_performance")\
         .select("*")\
         .eq("user_id", str(user.id))\
         .eq("date", today.isoformat())\
@@ -11292,7 +11669,8 @@ async def get_paper_trading_status(
         "is_running": is_running,
         "open_positions": open_positions_count,
         "market_open": is_market_open(),
-        "today_performance": today_performance
+        "today_performance": today_performance,
+        "engine": paper_trading_service.engine.get_status()
     }
 
 
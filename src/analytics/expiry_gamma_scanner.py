@@ -22,8 +22,13 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
+import threading
 import math
 
+import numpy as np
+
+from src.analytics.theta_decay_table import get_theta_decay_table
+
 try:
     import pytz
     IST = pytz.timezone('Asia/Kolkata')
@@ -464,6 +469,154 @@ class ExpiryDayGammaScanner:
             risk_level=risk_level
         )
     
+    def _chain_to_arrays(self, option_chain: List[Dict]) -> Tuple[List, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Flatten chain dicts into (raw_strikes, strikes, option_types, premiums),
+        one entry per strike per side (CE then PE), keeping only gamma-zone premiums.
+        """
+        raw_strikes, premiums, option_types = [], [], []
+        for opt in option_chain:
+            strike = opt.get("strike", opt.get("strikePrice", 0))
+            for opt_type in ("CE", "PE"):
+                premium_key = f"{opt_type.lower()}_ltp" if f"{opt_type.lower()}_ltp" in opt else "ltp"
+                premium = opt.get(premium_key, opt.get("call" if opt_type == "CE" else "put", {}).get("ltp", 0))
+                
+                if premium is None or premium <= 0 or strike <= 0:
+                    continue
+                if not (self.MIN_PREMIUM_FOR_GAMMA <= premium <= self.MAX_PREMIUM_FOR_GAMMA):
+                    continue
+                
+                raw_strikes.append(strike)
+                premiums.append(premium)
+                option_types.append(opt_type)
+        
+        return (
+            raw_strikes,
+            np.asarray(raw_strikes, dtype=np.float64),
+            np.asarray(option_types, dtype="<U2"),
+            np.asarray(premiums, dtype=np.float64)
+        )
+    
+    def score_chain(
+        self,
+        strikes: np.ndarray,
+        option_types: np.ndarray,
+        premiums: np.ndarray,
+        spot_price: float,
+        ist_time: Optional[datetime] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Array version of analyze_gamma_opportunity scoring for a whole chain.
+        
+        Time remaining and market phase are shared by every option in a scan,
+        so only moneyness/premium-dependent terms are evaluated per element.
+        Scores match the scalar path exactly.
+        
+        Args:
+            strikes: Strike per option
+            option_types: "CE"/"PE" per option
+            premiums: Premium per option
+            spot_price: Current index price
+            ist_time: Current IST time
+            
+        Returns:
+            Dict of arrays: moneyness_pct, delta, gamma, theta_per_15min,
+            potential_gain_50pt, risk_reward, gamma_score, is_opportunity
+        """
+        if ist_time is None:
+            ist_time = self.get_current_ist_time()
+        
+        time_remaining = self.get_time_remaining_minutes(ist_time)
+        market_phase = self.get_market_phase(ist_time)
+        
+        strikes = np.asarray(strikes, dtype=np.float64)
+        premiums = np.asarray(premiums, dtype=np.float64)
+        is_call = np.asarray(option_types) == "CE"
+        
+        moneyness = np.where(is_call, spot_price - strikes, strikes - spot_price) / strikes * 100
+        abs_m = np.abs(moneyness)
+        
+        # Intraday theta (see calculate_intraday_theta)
+        if time_remaining <= 0:
+            theta_15 = premiums.copy()
+        else:
+            if time_remaining > 180:
+                hourly_rate = 0.15
+            elif time_remaining > 60:
+                hourly_rate = 0.25
+            elif time_remaining > 30:
+                hourly_rate = 0.40
+            else:
+                hourly_rate = 0.60
+            rate = np.where(abs_m > 1.0, hourly_rate * 1.3, np.where(abs_m < 0.3, hourly_rate * 0.9, hourly_rate))
+            theta_15 = np.round(premiums * rate / 4, 2)
+        
+        # Delta estimate (see calculate_expiry_day_gamma)
+        if time_remaining < 60:
+            delta = np.where(
+                moneyness > 0.5, np.minimum(0.95, 0.70 + moneyness * 0.1),
+                np.where(moneyness > -0.5, 0.50 + moneyness * 0.3, np.maximum(0.05, 0.30 + moneyness * 0.2))
+            )
+        else:
+            delta = np.where(
+                moneyness > 0, np.minimum(0.85, 0.50 + moneyness * 0.15),
+                np.maximum(0.15, 0.50 + moneyness * 0.15)
+            )
+        
+        # Gamma multiplier: ATM bonus x time bonus x low-premium bonus, capped at 15x
+        atm_factor = np.select([abs_m < 0.3, abs_m < 0.7, abs_m < 1.0], [2.5, 1.8, 1.3], 1.0)
+        if time_remaining < 30:
+            time_factor = 3.0
+        elif time_remaining < 60:
+            time_factor = 2.5
+        elif time_remaining < 120:
+            time_factor = 2.0
+        elif time_remaining < 180:
+            time_factor = 1.5
+        else:
+            time_factor = 1.0
+        premium_factor = np.select([premiums < 10, premiums < 20, premiums < 30], [2.0, 1.5, 1.2], 1.0)
+        gamma = np.minimum(atm_factor * time_factor * premium_factor, 15.0)
+        
+        potential_gain_50pt = np.round(premiums * gamma * (50 / spot_price * 100), 2)
+        risk_reward = potential_gain_50pt / np.maximum(theta_15, 0.1)
+        
+        # Score (0-100)
+        score = np.where(
+            (premiums >= self.IDEAL_PREMIUM_LOW) & (premiums <= self.IDEAL_PREMIUM_HIGH), 30,
+            np.where((premiums >= self.MIN_PREMIUM_FOR_GAMMA) & (premiums <= self.MAX_PREMIUM_FOR_GAMMA), 15, 0)
+        )
+        if market_phase == MarketPhase.GAMMA_WINDOW:
+            score = score + 25
+        elif market_phase == MarketPhase.LUNCH:
+            score = score + 10
+        score = score + np.select([abs_m < 0.3, abs_m < 0.7], [20, 10], 0)
+        score = score + np.select([risk_reward > 10, risk_reward > 5], [15, 10], 0)
+        if 60 < time_remaining < 120:
+            score = score + 10
+        
+        phase_ok = (
+            time_remaining > 30 and
+            market_phase in [MarketPhase.LUNCH, MarketPhase.GAMMA_WINDOW]
+        )
+        is_opportunity = (
+            (score >= 50) &
+            (premiums >= self.MIN_PREMIUM_FOR_GAMMA) &
+            (premiums <= self.MAX_PREMIUM_FOR_GAMMA) &
+            phase_ok
+        )
+        
+        return {
+            "moneyness_pct": moneyness,
+            "delta": np.round(delta, 3),
+            "gamma": np.round(gamma, 2),
+            "theta_per_15min": theta_15,
+            "potential_gain_50pt": potential_gain_50pt,
+            "risk_reward": risk_reward,
+            "gamma_score": score.astype(np.float64),
+            "is_opportunity": np.asarray(is_opportunity, dtype=bool)
+        }
+    
     def scan_for_gamma_opportunities(
         self,
         index: str,
@@ -489,46 +642,25 @@ class ExpiryDayGammaScanner:
         market_phase = self.get_market_phase(ist_time)
         time_remaining = self.get_time_remaining_minutes(ist_time)
         
-        opportunities = []
-        
-        for opt in option_chain:
-            # Check both CE and PE
-            for opt_type in ["CE", "PE"]:
-                premium_key = f"{opt_type.lower()}_ltp" if f"{opt_type.lower()}_ltp" in opt else "ltp"
-                premium = opt.get(premium_key, opt.get("call" if opt_type == "CE" else "put", {}).get("ltp", 0))
-                
-                if premium is None or premium <= 0:
-                    continue
-                
-                # Skip if not in gamma zone
-                if not (self.MIN_PREMIUM_FOR_GAMMA <= premium <= self.MAX_PREMIUM_FOR_GAMMA):
-                    continue
-                
-                strike = opt.get("strike", opt.get("strikePrice", 0))
-                if strike <= 0:
-                    continue
-                
-                symbol = f"{index}{strike}{opt_type}"
-                
-                opportunity = self.analyze_gamma_opportunity(
-                    symbol=symbol,
-                    strike=strike,
-                    option_type=opt_type,
-                    premium=premium,
-                    spot_price=spot_price,
-                    volume=opt.get("volume", 0),
-                    oi=opt.get("oi", 0),
-                    ist_time=ist_time
-                )
-                
-                if opportunity.is_gamma_opportunity:
-                    opportunities.append(opportunity)
-        
-        # Sort by gamma score
-        opportunities.sort(key=lambda x: x.gamma_score, reverse=True)
-        
-        # Get top 5
-        top_opportunities = opportunities[:5]
+        raw_strikes, strikes, option_types, premiums = self._chain_to_arrays(option_chain)
+        
+        scored = self.score_chain(strikes, option_types, premiums, spot_price, ist_time)
+        opportunity_idx = np.flatnonzero(scored["is_opportunity"])
+        
+        # Rank by gamma score (stable: keeps chain order on ties), build objects for top 5 only
+        ranked = opportunity_idx[np.argsort(-scored["gamma_score"][opportunity_idx], kind="stable")]
+        top_opportunities = [
+            self.analyze_gamma_opportunity(
+                symbol=f"{index}{raw_strikes[i]}{option_types[i]}",
+                strike=raw_strikes[i],
+                option_type=str(option_types[i]),
+                premium=float(premiums[i]),
+                spot_price=spot_price,
+                ist_time=ist_time
+            )
+            for i in ranked[:5]
+        ]
+        opportunities_count = len(opportunity_idx)
         
         return {
             "index": index,
@@ -537,7 +669,7 @@ class ExpiryDayGammaScanner:
             "market_phase": market_phase.value,
             "time_remaining_minutes": round(time_remaining, 0),
             "is_gamma_window": market_phase == MarketPhase.GAMMA_WINDOW,
-            "total_opportunities_found": len(opportunities),
+            "total_opportunities_found": opportunities_count,
             "top_opportunities": [
                 {
                     "symbol": opp.symbol,
@@ -556,7 +688,7 @@ class ExpiryDayGammaScanner:
                 }
                 for opp in top_opportunities
             ],
-            "trading_advice": self._get_trading_advice(market_phase, time_remaining, len(opportunities))
+            "trading_advice": self._get_trading_advice(market_phase, time_remaining, opportunities_count)
         }
     
     def _get_trading_advice(
@@ -629,38 +761,128 @@ class ExpiryDayGammaScanner:
         Returns:
             List of expected premiums at each 15-min interval
         """
-        schedule = []
-        current_premium = premium
-        remaining = time_remaining_minutes
-        
-        interval = 0
-        while remaining > 0:
-            # Calculate theta for this interval
-            theta = self.calculate_intraday_theta(
-                current_premium, remaining, moneyness_pct
-            )
-            
-            schedule.append({
-                "interval": interval,
-                "minutes_remaining": round(remaining, 0),
-                "time_to_close": f"{int(remaining // 60)}h {int(remaining % 60)}m",
-                "expected_premium": round(current_premium, 2),
-                "theta_this_interval": theta["theta_per_15min"],
-                "decay_rate": theta["decay_category"]
-            })
-            
-            # Decay premium for next interval
-            current_premium = max(0, current_premium - theta["theta_per_15min"])
-            remaining -= 15
-            interval += 1
-        
-        return schedule
+        # Decay is proportional to premium, so the schedule is a row of the
+        # precomputed multiplier table scaled by premium
+        return get_theta_decay_table().intraday_schedule(
+            premium, time_remaining_minutes, moneyness_pct
+        )
 
 
 # Global scanner instance
 expiry_gamma_scanner = ExpiryDayGammaScanner()
 
 
+# ==================== SCHEDULED SCANNING ====================
+# On expiry afternoons the chain is rescanned on a fixed interval and the
+# latest result per index is served from memory by /index/{index}/gamma-scanner.
+
+GAMMA_SCAN_INDICES = {
+    "NIFTY": "NSE:NIFTY50-INDEX",
+    "BANKNIFTY": "NSE:NIFTYBANK-INDEX",
+    "SENSEX": "BSE:SENSEX-INDEX"
+}
+GAMMA_SCAN_STRIKE_COUNT = 20
+GAMMA_SCAN_CACHE_TTL = 180  # seconds
+
+_gamma_scan_cache: Dict[str, Tuple[Dict, datetime]] = {}
+_gamma_scan_lock = threading.Lock()
+
+
+def scan_index_chain(fyers_client, index: str, expiry_day_only: bool = True) -> Optional[Dict]:
+    """
+    Fetch the nearest-expiry chain for an index and run the array scanner.
+    
+    Returns None when the chain is unavailable or (with expiry_day_only)
+    the nearest expiry is not today.
+    """
+    from src.analytics.option_chain import OptionChain
+    
+    symbol = GAMMA_SCAN_INDICES.get(index)
+    if not symbol:
+        return None
+    
+    response = fyers_client.get_option_chain(symbol, strike_count=GAMMA_SCAN_STRIKE_COUNT)
+    if not response or response.get("code") != 200:
+        return None
+    
+    data = response.get("data", {})
+    expiry_list = data.get("expiryData", [])
+    today = expiry_gamma_scanner.get_current_ist_time().date()
+    expiry_date = None
+    if expiry_list:
+        try:
+            expiry_date = datetime.strptime(expiry_list[0].get("date", ""), "%d-%m-%Y").date()
+        except ValueError:
+            expiry_date = None
+    
+    if expiry_day_only and expiry_date != today:
+        return None
+    
+    rows = data.get("optionsChain", [])
+    spot_price = next(
+        (r.get("ltp", 0) for r in rows if (r.get("strike_price") or 0) <= 0 and r.get("ltp")),
+        0
+    )
+    chain = OptionChain.from_fyers(rows)
+    if spot_price <= 0 or len(chain) == 0:
+        return None
+    
+    option_chain = [
+        {"strike": float(k), "ce_ltp": float(ce), "pe_ltp": float(pe)}
+        for k, ce, pe in zip(chain.strikes, chain.call["ltp"], chain.put["ltp"])
+    ]
+    result = expiry_gamma_scanner.scan_for_gamma_opportunities(
+        index=index,
+        spot_price=spot_price,
+        option_chain=option_chain
+    )
+    result["spot_price"] = spot_price
+    result["atm_strike"] = float(chain.strikes[chain.nearest_index(spot_price)])
+    result["expiry_date"] = expiry_date.strftime("%Y-%m-%d") if expiry_date else None
+    result["days_to_expiry"] = (expiry_date - today).days if expiry_date else None
+    return result
+
+
+def run_scheduled_gamma_scan(fyers_client, indices: Optional[List[str]] = None) -> Dict[str, int]:
+    """
+    Rescan each index and cache the latest result.
+    Only runs from lunch through the final hour, when gamma setups form.
+    
+    Returns:
+        {index: opportunities found} for indices that were scanned
+    """
+    phase = expiry_gamma_scanner.get_market_phase()
+    if phase not in (MarketPhase.LUNCH, MarketPhase.GAMMA_WINDOW, MarketPhase.FINAL_HOUR):
+        return {}
+    
+    summary = {}
+    for index in indices or list(GAMMA_SCAN_INDICES):
+        try:
+            result = scan_index_chain(fyers_client, index)
+        except Exception as e:
+            logger.error(f"Scheduled gamma scan failed for {index}: {e}")
+            continue
+        if result is None:
+            continue
+        with _gamma_scan_lock:
+            _gamma_scan_cache[index] = (result, datetime.now())
+        summary[index] = result["total_opportunities_found"]
+    return summary
+
+
+def get_cached_gamma_scan(index: str, max_age_seconds: int = GAMMA_SCAN_CACHE_TTL) -> Optional[Dict]:
+    """Latest scheduled scan result for an index, or None if missing/stale"""
+    with _gamma_scan_lock:
+        entry = _gamma_scan_cache.get(index.upper())
+    if not entry:
+        return None
+    result, scanned_at = entry
+    age = (datetime.now() - scanned_at).total_seconds()
+    if age > max_age_seconds:
+        return None
+    return {**result, "cached": True, "cache_age_seconds": round(age, 1)}
+
+
 # Convenience functions
 def analyze_expiry_day_option(
     strike: int,
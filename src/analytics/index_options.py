@@ -10,6 +10,8 @@ import numpy as np
 from enum import Enum
 import logging
 
+from src.analytics.option_chain import OptionChain
+
 logger = logging.getLogger(__name__)
 
 
@@ -457,11 +459,16 @@ class IndexOptionsAnalyzer:
             logger.error(f"Error fetching futures data for {index}: {e}")
             return None
     
-    def get_expiry_dates(self, index: str) -> Dict[str, str]:
+    def get_expiry_dates(self, index: str, chain_response: Optional[Dict] = None) -> Dict[str, str]:
         """
         Get actual expiry dates dynamically from Fyers option chain.
         This ensures accuracy regardless of rule changes or holidays.
         Excludes expiry dates that are today (IST timezone) to avoid expiry day options.
+        
+        Args:
+            index: Index name
+            chain_response: Option chain response the caller already fetched
+                (its expiryData is used instead of another Fyers call)
         """
         # Use IST timezone for accurate date comparison
         from pytz import timezone as pytz_timezone
@@ -482,7 +489,7 @@ class IndexOptionsAnalyzer:
             fyers_symbol = symbol_map.get(index, "NSE:NIFTY50-INDEX")
             logger.info(f"Fetching expiries from Fyers for {fyers_symbol}")
             
-            response = self.fyers.get_option_chain(fyers_symbol, strike_count=5)
+            response = chain_response or self.fyers.get_option_chain(fyers_symbol, strike_count=5)
             
             # Extract expiry dates from the expiryData field
             expiry_dates = []
@@ -631,30 +638,7 @@ class IndexOptionsAnalyzer:
         if not strikes_data:
             return 0
         
-        strikes = sorted(set(s.get("strike", 0) for s in strikes_data))
-        min_pain = float('inf')
-        max_pain_strike = strikes[len(strikes)//2]
-        
-        for test_strike in strikes:
-            total_pain = 0
-            for s in strikes_data:
-                strike = s.get("strike", 0)
-                call_oi = s.get("call_oi", 0)
-                put_oi = s.get("put_oi", 0)
-                
-                # Call pain (if spot > strike)
-                if test_strike > strike:
-                    total_pain += (test_strike - strike) * call_oi
-                
-                # Put pain (if spot < strike)
-                if test_strike < strike:
-                    total_pain += (strike - test_strike) * put_oi
-            
-            if total_pain < min_pain:
-                min_pain = total_pain
-                max_pain_strike = test_strike
-        
-        return max_pain_strike
+        return OptionChain.from_strike_dicts(strikes_data).max_pain()
     
     def get_support_resistance_from_oi(self, strikes_data: List[Dict], spot: float) -> Tuple[List[float], List[float]]:
         """
@@ -663,41 +647,24 @@ class IndexOptionsAnalyzer:
         High Put OI = Support (writers will defend)
         High Call OI = Resistance (writers will defend)
         """
-        supports = []
-        resistances = []
-        
         if not strikes_data:
-            return supports, resistances
-        
-        # Sort strikes
-        sorted_strikes = sorted(strikes_data, key=lambda x: x.get("strike", 0))
+            return [], []
         
-        # Find strikes with high OI
-        avg_call_oi = np.mean([s.get("call_oi", 0) for s in sorted_strikes])
-        avg_put_oi = np.mean([s.get("put_oi", 0) for s in sorted_strikes])
-        
-        for s in sorted_strikes:
-            strike = s.get("strike", 0)
-            call_oi = s.get("call_oi", 0)
-            put_oi = s.get("put_oi", 0)
-            
-            # Resistance: High call OI above spot
-            if strike > spot and call_oi > avg_call_oi * 1.5:
-                resistances.append(strike)
-            
-            # Support: High put OI below spot
-            if strike < spot and put_oi > avg_put_oi * 1.5:
-                supports.append(strike)
-        
-        return sorted(supports, reverse=True)[:3], sorted(resistances)[:3]
+        return OptionChain.from_strike_dicts(strikes_data).support_resistance(spot)
     
-    def analyze_option_chain(self, index: str, expiry_type: str = "weekly") -> Optional[OptionChainAnalysis]:
+    def analyze_option_chain(
+        self,
+        index: str,
+        expiry_type: str = "weekly",
+        strike_count: int = 15
+    ) -> Optional[OptionChainAnalysis]:
         """
         Complete option chain analysis for an index
         
         Args:
             index: Index name (NIFTY, BANKNIFTY, etc.)
             expiry_type: "weekly" or "monthly"
+            strike_count: Strikes above and below ATM to fetch from Fyers
         """
         try:
             logger.info(f"🔍 Starting option chain analysis for {index}, expiry: {expiry_type}")
@@ -831,16 +798,10 @@ class IndexOptionsAnalyzer:
             logger.info(f"📡 Fetching actual option chain from Fyers for {index} with expiry {fyers_expiry_timestamp or 'default'}")
             logger.info(f"🔧 Fyers client status: fyers={self.fyers is not None}, fyers.fyers={self.fyers.fyers is not None if self.fyers else 'N/A'}, has_token={bool(self.fyers.access_token) if self.fyers else 'N/A'}")
             
-            strikes_data = []
-            total_call_oi = 0
-            total_put_oi = 0
-            total_call_volume = 0
-            total_put_volume = 0
-            
             chain_response = None
             try:
                 # Pass expiry timestamp to Fyers API to get the correct expiry options
-                chain_response = self.fyers.get_option_chain(config["symbol"], strike_count=15, expiry_date=fyers_expiry_timestamp)
+                chain_response = self.fyers.get_option_chain(config["symbol"], strike_count=strike_count, expiry_date=fyers_expiry_timestamp)
                 logger.info(f"📡 Option chain response code: {chain_response.get('code') if chain_response else 'None'}")
             except Exception as e:
                 logger.warning(f"⚠️ Fyers API error: {e}. Using fallback estimation.")
@@ -849,75 +810,9 @@ class IndexOptionsAnalyzer:
                 options_chain = chain_response.get("data", {}).get("optionsChain", [])
                 logger.info(f"✅ Fetched {len(options_chain)} strikes from Fyers")
                 
-                # Parse actual Fyers data
-                for option_data in options_chain:
-                    strike = option_data.get("strike_price", 0)
-                    
-                    # Skip index entry (strike_price = -1)
-                    if strike <= 0:
-                        continue
-                    
-                    option_type = option_data.get("option_type", "")
-                    ltp = option_data.get("ltp", 0)
-                    oi = option_data.get("oi", 0)
-                    volume = option_data.get("volume", 0)
-                    iv = option_data.get("iv", vix)  # Use IV from data or fallback to VIX
-                    
-                    # Get actual Fyers trading symbol from response
-                    fyers_trading_symbol = option_data.get("symbol", "")
-                    
-                    # Find or create strike entry
-                    strike_entry = next((s for s in strikes_data if s["strike"] == strike), None)
-                    if not strike_entry:
-                        strike_entry = {
-                            "strike": strike,
-                            "call_ltp": 0,
-                            "call_iv": vix,
-                            "call_oi": 0,
-                            "call_volume": 0,
-                            "call_oi_change": 0,
-                            "call_analysis": "",
-                            "call_symbol": "",  # Actual Fyers trading symbol
-                            "put_ltp": 0,
-                            "put_iv": vix,
-                            "put_oi": 0,
-                            "put_volume": 0,
-                            "put_oi_change": 0,
-                            "put_analysis": "",
-                            "put_symbol": ""  # Actual Fyers trading symbol
-                        }
-                        strikes_data.append(strike_entry)
-                    
-                    # Update call or put data
-                    if option_type == "CE":
-                        strike_entry["call_ltp"] = round(ltp, 2)
-                        strike_entry["call_iv"] = round(iv, 2)
-                        strike_entry["call_oi"] = oi
-                        strike_entry["call_volume"] = volume
-                        strike_entry["call_oi_change"] = option_data.get("oi_change", 0)
-                        strike_entry["call_symbol"] = fyers_trading_symbol  # Store actual Fyers symbol
-                        strike_entry["call_analysis"] = self.analyze_oi_change(
-                            strike_entry["call_oi_change"], 
-                            option_data.get("price_change", 0)
-                        )
-                        total_call_oi += oi
-                        total_call_volume += volume
-                    elif option_type == "PE":
-                        strike_entry["put_ltp"] = round(ltp, 2)
-                        strike_entry["put_iv"] = round(iv, 2)
-                        strike_entry["put_oi"] = oi
-                        strike_entry["put_volume"] = volume
-                        strike_entry["put_oi_change"] = option_data.get("oi_change", 0)
-                        strike_entry["put_symbol"] = fyers_trading_symbol  # Store actual Fyers symbol
-                        strike_entry["put_analysis"] = self.analyze_oi_change(
-                            strike_entry["put_oi_change"],
-                            option_data.get("price_change", 0)
-                        )
-                        total_put_oi += oi
-                        total_put_volume += volume
-                
-                # Sort by strike
-                strikes_data.sort(key=lambda x: x["strike"])
+                # Parse actual Fyers data into sorted strike arrays (O(1) strike lookup)
+                chain = OptionChain.from_fyers(options_chain, default_iv=vix)
+                strikes_data = chain.to_strike_dicts(self.analyze_oi_change)
                 logger.info(f"✅ Processed {len(strikes_data)} complete strikes with LIVE data")
                 
             else:
@@ -926,22 +821,27 @@ class IndexOptionsAnalyzer:
                 logger.error("❌ Failed to fetch Fyers option chain - no live data available")
                 return None
             
+            total_call_oi = chain.total_call_oi
+            total_put_oi = chain.total_put_oi
+            total_call_volume = chain.total_call_volume
+            total_put_volume = chain.total_put_volume
+            
             # Calculate PCR
             pcr_oi = total_put_oi / max(total_call_oi, 1)
             pcr_volume = total_put_volume / max(total_call_volume, 1)
             
             # Calculate Max Pain
-            max_pain = self.calculate_max_pain(strikes_data)
+            max_pain = chain.max_pain()
             
             # Get support/resistance from OI
-            supports, resistances = self.get_support_resistance_from_oi(strikes_data, spot_price)
+            supports, resistances = chain.support_resistance(spot_price)
             
             # ATM IV
-            atm_data = next((s for s in strikes_data if s["strike"] == atm_strike), None)
-            atm_iv = atm_data["call_iv"] if atm_data else vix
+            atm_idx = chain.index_of(atm_strike)
+            atm_iv = float(chain.call["iv"][atm_idx]) if atm_idx is not None else vix
             
             # IV Skew
-            iv_skew = atm_data["put_iv"] - atm_data["call_iv"] if atm_data else 0
+            iv_skew = float(chain.put["iv"][atm_idx] - chain.call["iv"][atm_idx]) if atm_idx is not None else 0
             
             # OI buildup zones
             bullish_zones = [s["strike"] for s in strikes_data if s["put_analysis"] == "Long Build" and s["strike"] < spot_price]
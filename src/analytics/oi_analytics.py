@@ -0,0 +1,330 @@
+"""
+Multi-Expiry OI Analytics
+Full-chain max pain, OI walls, PCR by strike band and OI-change heatmaps
+for the weekly, next-weekly and monthly expiries of each index.
+
+The chain endpoints only pull ~15 strikes around ATM for one expiry, which
+truncates max pain and OI support/resistance. This module pulls the full
+chain per expiry on a schedule, computes the analytics on the columnar
+OptionChain, and keeps the latest result in memory so request handlers
+(/index/{index}/chain, gamma scanner, AI context) read from cache.
+"""
+from dataclasses import dataclass, field, asdict, replace
+from typing import Dict, List, Optional
+from datetime import datetime
+import threading
+import logging
+import numpy as np
+
+from src.analytics.option_chain import OptionChain
+from src.analytics.index_options import INDEX_CONFIG, get_index_analyzer
+
+logger = logging.getLogger(__name__)
+
+
+# Fyers caps strikecount at 50 either side of ATM
+FULL_CHAIN_STRIKE_COUNT = 50
+
+# Indices refreshed by the background job
+OI_ANALYTICS_INDICES = ["NIFTY", "BANKNIFTY", "SENSEX"]
+
+# Expiry keys as returned by IndexOptionsAnalyzer.get_expiry_dates
+EXPIRY_TYPES = ["weekly", "next_weekly", "monthly"]
+
+# Strike bands (% distance from spot) for PCR breakdown
+PCR_BANDS = [(0.0, 1.0), (1.0, 2.0), (2.0, 5.0), (5.0, float("inf"))]
+
+# Cached analytics older than this are treated as missing
+OI_ANALYTICS_MAX_AGE = 900  # seconds
+
+
+@dataclass
+class OIWall:
+    """High open-interest strike that writers are likely to defend"""
+    strike: float
+    oi: int
+    oi_change: int
+    distance_pct: float  # Distance from spot in %
+
+
+@dataclass
+class ExpiryOIAnalytics:
+    """Full-chain OI analytics for one index expiry"""
+    index: str
+    expiry_type: str
+    expiry_date: str
+    days_to_expiry: int
+    spot_price: float
+    strike_count: int
+    max_pain: float
+    max_pain_distance_pct: float
+    pcr_oi: float
+    pcr_volume: float
+    total_call_oi: int
+    total_put_oi: int
+    call_walls: List[OIWall]       # Resistance (above spot)
+    put_walls: List[OIWall]        # Support (below spot)
+    pcr_by_band: Dict[str, Dict]   # band label -> {pcr, call_oi, put_oi, strikes}
+    oi_change_heatmap: List[Dict]  # per-strike OI change with normalized intensity
+    computed_at: str = field(default_factory=lambda: datetime.now().isoformat())
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def _band_label(lo: float, hi: float) -> str:
+    return f"{lo:g}%+" if hi == float("inf") else f"{lo:g}-{hi:g}%"
+
+
+def find_oi_walls(chain: OptionChain, spot: float, top_n: int = 3) -> Dict[str, List[OIWall]]:
+    """Top-N call OI strikes above spot and put OI strikes below spot"""
+    walls = {"call": [], "put": []}
+    if len(chain) == 0 or spot <= 0:
+        return walls
+
+    for side, cols, mask in (
+        ("call", chain.call, chain.strikes > spot),
+        ("put", chain.put, chain.strikes < spot)
+    ):
+        idx = np.flatnonzero(mask)
+        if idx.size == 0:
+            continue
+        top = idx[np.argsort(-cols["oi"][idx], kind="stable")[:top_n]]
+        walls[side] = [
+            OIWall(
+                strike=float(chain.strikes[i]),
+                oi=int(cols["oi"][i]),
+                oi_change=int(cols["oi_change"][i]),
+                distance_pct=round(float((chain.strikes[i] - spot) / spot * 100), 2)
+            )
+            for i in top
+            if cols["oi"][i] > 0
+        ]
+    return walls
+
+
+def pcr_by_band(chain: OptionChain, spot: float) -> Dict[str, Dict]:
+    """Put/Call OI ratio bucketed by strike distance from spot"""
+    result = {}
+    if len(chain) == 0 or spot <= 0:
+        return result
+
+    distance = np.abs(chain.strikes - spot) / spot * 100
+    for lo, hi in PCR_BANDS:
+        mask = (distance >= lo) & (distance < hi)
+        call_oi = int(chain.call["oi"][mask].sum())
+        put_oi = int(chain.put["oi"][mask].sum())
+        result[_band_label(lo, hi)] = {
+            "pcr": round(put_oi / max(call_oi, 1), 2),
+            "call_oi": call_oi,
+            "put_oi": put_oi,
+            "strikes": int(mask.sum())
+        }
+    return result
+
+
+def oi_change_heatmap(chain: OptionChain) -> List[Dict]:
+    """Per-strike OI change with intensities normalized to [-1, 1]"""
+    if len(chain) == 0:
+        return []
+
+    call_chg = chain.call["oi_change"]
+    put_chg = chain.put["oi_change"]
+    scale = max(float(np.abs(call_chg).max()), float(np.abs(put_chg).max()), 1.0)
+
+    return [
+        {
+            "strike": float(k),
+            "call_oi_change": int(c),
+            "put_oi_change": int(p),
+            "net_oi_change": int(p - c),  # Positive = put writing (bullish)
+            "call_intensity": round(float(c / scale), 3),
+            "put_intensity": round(float(p / scale), 3)
+        }
+        for k, c, p in zip(chain.strikes, call_chg, put_chg)
+    ]
+
+
+def compute_expiry_analytics(
+    chain: OptionChain,
+    index: str,
+    expiry_type: str,
+    expiry_date: str,
+    days_to_expiry: int,
+    spot_price: float
+) -> ExpiryOIAnalytics:
+    """Compute all OI analytics for a single expiry chain"""
+    max_pain = chain.max_pain()
+    walls = find_oi_walls(chain, spot_price)
+
+    return ExpiryOIAnalytics(
+        index=index,
+        expiry_type=expiry_type,
+        expiry_date=expiry_date,
+        days_to_expiry=days_to_expiry,
+        spot_price=spot_price,
+        strike_count=len(chain),
+        max_pain=max_pain,
+        max_pain_distance_pct=round((max_pain - spot_price) / spot_price * 100, 2) if spot_price else 0,
+        pcr_oi=round(chain.total_put_oi / max(chain.total_call_oi, 1), 2),
+        pcr_volume=round(chain.total_put_volume / max(chain.total_call_volume, 1), 2),
+        total_call_oi=chain.total_call_oi,
+        total_put_oi=chain.total_put_oi,
+        call_walls=walls["call"],
+        put_walls=walls["put"],
+        pcr_by_band=pcr_by_band(chain, spot_price),
+        oi_change_heatmap=oi_change_heatmap(chain)
+    )
+
+
+class MultiExpiryOIAnalyzer:
+    """
+    Periodically pulls full option chains for each index expiry and
+    caches the computed OI analytics in memory.
+    """
+
+    def __init__(self, fyers_client, indices: Optional[List[str]] = None):
+        self.fyers = fyers_client
+        self.indices = indices or OI_ANALYTICS_INDICES
+        self._cache: Dict[str, Dict[str, ExpiryOIAnalytics]] = {}
+        self._cache_time: Dict[str, datetime] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _expiry_timestamps(response: Optional[Dict]) -> Dict[str, str]:
+        """Map 'YYYY-MM-DD' -> Fyers expiry timestamp from an option chain response"""
+        timestamps = {}
+        if response and response.get("code") == 200:
+            for exp in response.get("data", {}).get("expiryData", []):
+                try:
+                    date_key = datetime.strptime(exp.get("date", ""), "%d-%m-%Y").strftime("%Y-%m-%d")
+                    timestamps[date_key] = exp.get("expiry")
+                except ValueError:
+                    continue
+        return timestamps
+
+    def refresh(self, index: str) -> Dict[str, ExpiryOIAnalytics]:
+        """Pull full chains for all tracked expiries of one index and update cache"""
+        config = INDEX_CONFIG.get(index)
+        if not config:
+            logger.warning(f"OI analytics: unknown index {index}")
+            return {}
+
+        # One small chain call gives both the expiry classification and the
+        # Fyers timestamps needed to request each expiry's full chain
+        expiry_response = self.fyers.get_option_chain(config["symbol"], strike_count=1)
+        expiries = get_index_analyzer(self.fyers).get_expiry_dates(index, expiry_response)
+        timestamps = self._expiry_timestamps(expiry_response)
+
+        results: Dict[str, ExpiryOIAnalytics] = {}
+        seen_dates = {}
+        for expiry_type in EXPIRY_TYPES:
+            expiry_date = expiries.get(expiry_type)
+            if not expiry_date:
+                continue
+
+            # Weekly and monthly can coincide near month end
+            if expiry_date in seen_dates:
+                results[expiry_type] = replace(seen_dates[expiry_date], expiry_type=expiry_type)
+                continue
+
+            # Without a timestamp Fyers returns the nearest expiry's chain,
+            # which must not be stored under next_weekly / monthly
+            expiry_timestamp = timestamps.get(expiry_date)
+            if not expiry_timestamp:
+                logger.warning(f"OI analytics: no Fyers timestamp for {index} {expiry_type} ({expiry_date})")
+                continue
+
+            response = self.fyers.get_option_chain(
+                config["symbol"],
+                strike_count=FULL_CHAIN_STRIKE_COUNT,
+                expiry_date=expiry_timestamp
+            )
+            if not response or response.get("code") != 200:
+                logger.warning(f"OI analytics: no chain for {index} {expiry_type} ({expiry_date})")
+                continue
+
+            rows = response.get("data", {}).get("optionsChain", [])
+
+            # Index row (strike_price = -1) carries the spot LTP
+            spot_price = next(
+                (r.get("ltp", 0) for r in rows if (r.get("strike_price") or 0) <= 0 and r.get("ltp")),
+                0
+            )
+            chain = OptionChain.from_fyers(rows)
+            if spot_price <= 0 and len(chain):
+                spot_price = float(np.median(chain.strikes))
+
+            analytics = compute_expiry_analytics(
+                chain,
+                index=index,
+                expiry_type=expiry_type,
+                expiry_date=expiry_date,
+                days_to_expiry=expiries.get(f"{expiry_type}_days", 0),
+                spot_price=spot_price
+            )
+            results[expiry_type] = analytics
+            seen_dates[expiry_date] = analytics
+            logger.info(
+                f"📊 OI analytics {index} {expiry_type}: {len(chain)} strikes, "
+                f"max pain {analytics.max_pain:.0f}, PCR {analytics.pcr_oi}"
+            )
+
+        if results:
+            with self._lock:
+                self._cache[index] = results
+                self._cache_time[index] = datetime.now()
+        return results
+
+    def refresh_all(self) -> Dict[str, int]:
+        """Refresh every tracked index; returns expiries refreshed per index"""
+        summary = {}
+        for index in self.indices:
+            try:
+                summary[index] = len(self.refresh(index))
+            except Exception as e:
+                logger.error(f"OI analytics refresh failed for {index}: {e}")
+                summary[index] = 0
+        return summary
+
+    def get_cached(
+        self,
+        index: str,
+        expiry_type: Optional[str] = None,
+        max_age: int = OI_ANALYTICS_MAX_AGE
+    ):
+        """
+        Latest cached analytics for an index (all expiries, or one expiry_type).
+        Returns None when missing or older than max_age seconds.
+        """
+        with self._lock:
+            cached = self._cache.get(index.upper())
+            cached_time = self._cache_time.get(index.upper())
+
+        if not cached or not cached_time:
+            return None
+        if (datetime.now() - cached_time).total_seconds() > max_age:
+            return None
+        if expiry_type:
+            return cached.get(expiry_type)
+        return cached
+
+    def get_cached_dict(self, index: str, max_age: int = OI_ANALYTICS_MAX_AGE) -> Optional[Dict]:
+        """JSON-ready view of all cached expiries for an index"""
+        cached = self.get_cached(index, max_age=max_age)
+        if not cached:
+            return None
+        return {expiry_type: a.to_dict() for expiry_type, a in cached.items()}
+
+
+# Singleton instance
+oi_analyzer = None
+
+def get_oi_analyzer(fyers_client):
+    global oi_analyzer
+    if oi_analyzer is None:
+        oi_analyzer = MultiExpiryOIAnalyzer(fyers_client)
+    else:
+        # Update the fyers reference in case token changed
+        oi_analyzer.fyers = fyers_client
+    return oi_analyzer
@@ -0,0 +1,287 @@
+"""
+Option Chain Data Structure
+Columnar, strike-indexed view of a single-expiry option chain.
+
+Strikes are held in a sorted NumPy array with parallel CE/PE columns
+(OI, volume, LTP, IV, OI change), so strike lookups are O(1) via a
+strike -> row map (or O(log n) via searchsorted for nearest strike) and
+chain-wide analytics like max pain are vectorized.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Numeric per-side columns held as parallel arrays
+NUMERIC_COLUMNS = ("ltp", "iv", "oi", "volume", "oi_change", "price_change")
+
+
+class OptionChain:
+    """
+    Sorted-strike option chain with parallel call/put columns
+
+    Build from a raw Fyers ``optionsChain`` list with ``from_fyers`` or
+    from the legacy list-of-dicts strike format with ``from_strike_dicts``.
+    """
+
+    def __init__(
+        self,
+        strikes: np.ndarray,
+        call: Dict[str, np.ndarray],
+        put: Dict[str, np.ndarray],
+        call_symbols: Optional[List[str]] = None,
+        put_symbols: Optional[List[str]] = None,
+        call_present: Optional[np.ndarray] = None,
+        put_present: Optional[np.ndarray] = None
+    ):
+        order = np.argsort(strikes, kind="stable")
+        self.strikes = np.asarray(strikes, dtype=np.float64)[order]
+        self.call = {k: np.asarray(v, dtype=np.float64)[order] for k, v in call.items()}
+        self.put = {k: np.asarray(v, dtype=np.float64)[order] for k, v in put.items()}
+
+        n = len(self.strikes)
+        call_symbols = call_symbols or [""] * n
+        put_symbols = put_symbols or [""] * n
+        self.call_symbols = [call_symbols[i] for i in order]
+        self.put_symbols = [put_symbols[i] for i in order]
+
+        # Whether the CE/PE side was actually quoted for each strike
+        self.call_present = (
+            np.ones(n, dtype=bool) if call_present is None
+            else np.asarray(call_present, dtype=bool)[order]
+        )
+        self.put_present = (
+            np.ones(n, dtype=bool) if put_present is None
+            else np.asarray(put_present, dtype=bool)[order]
+        )
+
+        # O(1) exact strike lookup
+        self._index = {float(k): i for i, k in enumerate(self.strikes)}
+
+    # ==================== CONSTRUCTORS ====================
+
+    @classmethod
+    def from_fyers(cls, options_chain: Iterable[Dict], default_iv: float = 0.0) -> "OptionChain":
+        """
+        Build chain from Fyers ``data.optionsChain`` rows (one row per CE/PE)
+
+        Args:
+            options_chain: Raw option rows from Fyers option chain API
+            default_iv: IV used when a row (or missing side) has no IV
+        """
+        row_of: Dict[float, int] = {}
+        strikes: List[float] = []
+        sides = {
+            "CE": {k: [] for k in NUMERIC_COLUMNS},
+            "PE": {k: [] for k in NUMERIC_COLUMNS}
+        }
+        symbols = {"CE": [], "PE": []}
+        present = {"CE": [], "PE": []}
+
+        for option_data in options_chain:
+            strike = option_data.get("strike_price", 0)
+            # Skip index entry (strike_price = -1)
+            if strike is None or strike <= 0:
+                continue
+
+            option_type = option_data.get("option_type", "")
+            if option_type not in sides:
+                continue
+
+            strike = float(strike)
+            row = row_of.get(strike)
+            if row is None:
+                row = len(strikes)
+                row_of[strike] = row
+                strikes.append(strike)
+                for side in ("CE", "PE"):
+                    for col in NUMERIC_COLUMNS:
+                        sides[side][col].append(default_iv if col == "iv" else 0.0)
+                    symbols[side].append("")
+                    present[side].append(False)
+
+            cols = sides[option_type]
+            cols["ltp"][row] = option_data.get("ltp", 0) or 0
+            cols["iv"][row] = option_data.get("iv", default_iv) or default_iv
+            cols["oi"][row] = option_data.get("oi", 0) or 0
+            cols["volume"][row] = option_data.get("volume", 0) or 0
+            cols["oi_change"][row] = option_data.get("oi_change", 0) or 0
+            cols["price_change"][row] = option_data.get("price_change", 0) or 0
+            symbols[option_type][row] = option_data.get("symbol", "")
+            present[option_type][row] = True
+
+        return cls(
+            np.array(strikes, dtype=np.float64),
+            call=sides["CE"],
+            put=sides["PE"],
+            call_symbols=symbols["CE"],
+            put_symbols=symbols["PE"],
+            call_present=np.array(present["CE"], dtype=bool),
+            put_present=np.array(present["PE"], dtype=bool)
+        )
+
+    @classmethod
+    def from_strike_dicts(cls, strikes_data: List[Dict]) -> "OptionChain":
+        """Build chain from the legacy ``[{"strike", "call_oi", "put_oi", ...}]`` format"""
+        strikes = np.array([s.get("strike", 0) for s in strikes_data], dtype=np.float64)
+        call = {
+            col: np.array([s.get(f"call_{col}", 0) or 0 for s in strikes_data], dtype=np.float64)
+            for col in NUMERIC_COLUMNS
+        }
+        put = {
+            col: np.array([s.get(f"put_{col}", 0) or 0 for s in strikes_data], dtype=np.float64)
+            for col in NUMERIC_COLUMNS
+        }
+        return cls(
+            strikes,
+            call=call,
+            put=put,
+            call_symbols=[s.get("call_symbol", "") for s in strikes_data],
+            put_symbols=[s.get("put_symbol", "") for s in strikes_data]
+        )
+
+    # ==================== LOOKUPS ====================
+
+    def __len__(self) -> int:
+        return len(self.strikes)
+
+    def __contains__(self, strike: float) -> bool:
+        return float(strike) in self._index
+
+    def index_of(self, strike: float) -> Optional[int]:
+        """Row index of an exact strike, or None (O(1))"""
+        return self._index.get(float(strike))
+
+    def nearest_index(self, price: float) -> Optional[int]:
+        """Row index of the strike closest to price (O(log n))"""
+        n = len(self.strikes)
+        if n == 0:
+            return None
+        pos = int(np.searchsorted(self.strikes, price))
+        if pos <= 0:
+            return 0
+        if pos >= n:
+            return n - 1
+        # Ties resolve to the lower strike
+        if price - self.strikes[pos - 1] <= self.strikes[pos] - price:
+            return pos - 1
+        return pos
+
+    def get(self, side: str, column: str, strike: float, default: float = 0.0) -> float:
+        """Single value lookup, e.g. ``chain.get("CE", "iv", 25000)``"""
+        i = self.index_of(strike)
+        if i is None:
+            return default
+        cols = self.call if side == "CE" else self.put
+        return float(cols[column][i])
+
+    def window(self, center: float, count: int) -> "OptionChain":
+        """Sub-chain with ``count`` strikes either side of the strike nearest ``center``"""
+        i = self.nearest_index(center)
+        if i is None:
+            return self
+        lo, hi = max(0, i - count), min(len(self.strikes), i + count + 1)
+        return OptionChain(
+            self.strikes[lo:hi],
+            call={k: v[lo:hi] for k, v in self.call.items()},
+            put={k: v[lo:hi] for k, v in self.put.items()},
+            call_symbols=self.call_symbols[lo:hi],
+            put_symbols=self.put_symbols[lo:hi],
+            call_present=self.call_present[lo:hi],
+            put_present=self.put_present[lo:hi]
+        )
+
+    # ==================== AGGREGATES ====================
+
+    @property
+    def total_call_oi(self) -> int:
+        return int(self.call["oi"].sum())
+
+    @property
+    def total_put_oi(self) -> int:
+        return int(self.put["oi"].sum())
+
+    @property
+    def total_call_volume(self) -> int:
+        return int(self.call["volume"].sum())
+
+    @property
+    def total_put_volume(self) -> int:
+        return int(self.put["volume"].sum())
+
+    def pain_curve(self) -> np.ndarray:
+        """
+        Total option-buyer payout if expiry settles at each strike
+
+        Cumulative-sum formulation, O(n) instead of O(n^2):
+            call_pain[j] = K_j * sum_{i<=j} C_i - sum_{i<=j} K_i C_i
+            put_pain[j]  = sum_{i>=j} K_i P_i - K_j * sum_{i>=j} P_i
+        """
+        k = self.strikes
+        c = self.call["oi"]
+        p = self.put["oi"]
+
+        call_pain = k * np.cumsum(c) - np.cumsum(k * c)
+        put_pain = np.cumsum((k * p)[::-1])[::-1] - k * np.cumsum(p[::-1])[::-1]
+        return call_pain + put_pain
+
+    def max_pain(self) -> float:
+        """Strike with minimum total payout to option buyers"""
+        if len(self.strikes) == 0:
+            return 0
+        return float(self.strikes[int(np.argmin(self.pain_curve()))])
+
+    def support_resistance(
+        self,
+        spot: float,
+        threshold: float = 1.5,
+        limit: int = 3
+    ) -> Tuple[List[float], List[float]]:
+        """
+        Support/resistance from OI concentration
+
+        High Put OI below spot = Support, High Call OI above spot = Resistance
+        """
+        if len(self.strikes) == 0:
+            return [], []
+
+        call_oi = self.call["oi"]
+        put_oi = self.put["oi"]
+
+        res_mask = (self.strikes > spot) & (call_oi > call_oi.mean() * threshold)
+        sup_mask = (self.strikes < spot) & (put_oi > put_oi.mean() * threshold)
+
+        # Strikes are sorted ascending: nearest supports are at the end
+        supports = self.strikes[sup_mask][::-1][:limit]
+        resistances = self.strikes[res_mask][:limit]
+        return [float(s) for s in supports], [float(r) for r in resistances]
+
+    def to_strike_dicts(self, analyze_oi_change=None) -> List[Dict]:
+        """
+        Legacy list-of-dicts view (one dict per strike, ``OptionStrike`` fields)
+
+        Args:
+            analyze_oi_change: Optional ``(oi_change, price_change) -> str`` used
+                to fill ``call_analysis``/``put_analysis``
+        """
+        rows = []
+        for i, strike in enumerate(self.strikes):
+            row = {"strike": float(strike)}
+            for prefix, cols, symbols, present in (
+                ("call", self.call, self.call_symbols, self.call_present),
+                ("put", self.put, self.put_symbols, self.put_present)
+            ):
+                row[f"{prefix}_ltp"] = round(float(cols["ltp"][i]), 2)
+                row[f"{prefix}_iv"] = round(float(cols["iv"][i]), 2)
+                row[f"{prefix}_oi"] = int(cols["oi"][i])
+                row[f"{prefix}_volume"] = int(cols["volume"][i])
+                row[f"{prefix}_oi_change"] = int(cols["oi_change"][i])
+                row[f"{prefix}_analysis"] = (
+                    analyze_oi_change(int(cols["oi_change"][i]), float(cols["price_change"][i]))
+                    if analyze_oi_change and present[i] else ""
+                )
+                row[f"{prefix}_symbol"] = symbols[i]
+            rows.append(row)
+        return rows
@@ -16,6 +16,7 @@ import logging
 
 # Import IST timezone utilities for consistent time handling
 from src.utils.ist_utils import get_ist_time, now_ist, MARKET_OPEN_TIME, MARKET_CLOSE_TIME
+from src.analytics.theta_decay_table import get_theta_decay_table
 
 logger = logging.getLogger(__name__)
 
@@ -185,40 +186,17 @@ class OptionsTimeAnalyzer:
             hours_today_remaining = (close_minutes - now_minutes) / 60
             hours_to_expiry = (days_to_expiry - 1) * market_hours_per_day + hours_today_remaining
         
-        # Theta decay rate based on DTE
-        if days_to_expiry > 30:
-            daily_decay = 0.03
-            decay_acc = "slow"
-            strategy = "Sell options - slow decay works for sellers"
-        elif days_to_expiry > 15:
-            daily_decay = 0.05
-            decay_acc = "moderate"
-            strategy = "Balanced - good for spreads"
-        elif days_to_expiry > 7:
-            daily_decay = 0.08
-            decay_acc = "fast"
-            strategy = "Buy options for quick moves, or sell for rapid decay"
-        elif days_to_expiry > 2:
-            daily_decay = 0.15
-            decay_acc = "extreme"
-            strategy = "Expiry week - only for experienced traders. Quick in/out."
-        else:
-            daily_decay = 0.30
-            decay_acc = "extreme"
-            strategy = "Expiry day - extreme risk. Gamma scalping or avoid."
+        # Decay bucket and approximate theta from the precomputed DTE table
+        # Theta ≈ -(S * σ * N'(d1)) / (2 * √T), simplified to -σ / √T
+        profile = get_theta_decay_table().daily_profile(days_to_expiry, atm_iv)
+        daily_decay = profile["daily_decay"]
+        decay_acc = profile["decay_acceleration"]
+        strategy = profile["strategy"]
+        current_theta = profile["current_theta"]
         
         # Hourly decay
         hourly_decay = daily_decay / market_hours_per_day
         
-        # Estimate theta (simplified)
-        # Theta ≈ -(S * σ * N'(d1)) / (2 * √T)
-        # Simplified: Theta increases as T decreases
-        if days_to_expiry > 0:
-            theta_multiplier = 1 / np.sqrt(days_to_expiry / 365)
-            current_theta = -atm_iv * theta_multiplier * 0.01  # Approximate
-        else:
-            current_theta = -0.5  # Expiry day extreme
-        
         return ThetaDecayProfile(
             days_to_expiry=days_to_expiry,
             hours_to_expiry=round(hours_to_expiry, 1),
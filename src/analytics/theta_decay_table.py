@@ -0,0 +1,347 @@
+"""
+Theta Decay Tables
+Precomputed, memoized NumPy decay tables behind the theta endpoints.
+
+Three tables are built once per process:
+
+- Intraday (expiry-day) premium multipliers, indexed by moneyness bucket x
+  whole minutes to close x 15-min interval. The decay rules of
+  ExpiryDayGammaScanner.calculate_intraday_theta are proportional to premium,
+  so a whole 15-min schedule is ``premium * multipliers[bucket, minutes]``.
+- Daily decay profile by days to expiry (OptionsTimeAnalyzer.analyze_theta_decay).
+- Black-Scholes prices normalized by spot on a (sqrt(DTE), IV, log-moneyness)
+  grid. Price/spot only depends on K/S, T and IV, so one grid serves every
+  underlying; lookups are trilinear interpolations.
+"""
+from typing import Dict, List, Optional, Tuple
+from functools import lru_cache
+import threading
+import math
+import logging
+import numpy as np
+from scipy.special import ndtr
+
+logger = logging.getLogger(__name__)
+
+
+# ==================== INTRADAY (EXPIRY DAY) ====================
+# Mirrors ExpiryDayGammaScanner.calculate_intraday_theta
+
+# (minutes-to-close threshold, hourly decay rate, category), checked as "remaining > threshold"
+INTRADAY_DECAY_BANDS = [
+    (180, 0.15, "MODERATE"),
+    (60, 0.25, "HIGH"),
+    (30, 0.40, "VERY_HIGH"),
+    (0, 0.60, "EXTREME")
+]
+
+# Moneyness buckets: ATM (|m| < 0.3%), near (0.3-1%), OTM (|m| > 1%)
+MONEYNESS_DECAY_MULTIPLIERS = np.array([0.9, 1.0, 1.3])
+
+INTERVAL_MINUTES = 15
+
+# Above the first band the rate is constant, so the table only needs to
+# cover up to one interval past it
+_INTRADAY_TABLE_MINUTES = INTRADAY_DECAY_BANDS[0][0]
+
+
+def moneyness_bucket(moneyness_pct: float) -> int:
+    """Moneyness bucket index for MONEYNESS_DECAY_MULTIPLIERS"""
+    if abs(moneyness_pct) > 1.0:
+        return 2
+    if abs(moneyness_pct) < 0.3:
+        return 0
+    return 1
+
+
+def _intraday_band(minutes: np.ndarray) -> np.ndarray:
+    """Band index into INTRADAY_DECAY_BANDS for each (integer) minutes-to-close"""
+    band = np.full(minutes.shape, len(INTRADAY_DECAY_BANDS) - 1)
+    for i, (threshold, _, _) in reversed(list(enumerate(INTRADAY_DECAY_BANDS[:-1]))):
+        band[minutes > threshold] = i
+    return band
+
+
+# ==================== DAILY PROFILE ====================
+# Mirrors the DTE buckets of OptionsTimeAnalyzer.analyze_theta_decay
+
+# (DTE threshold, daily decay, acceleration, strategy), checked as "dte > threshold"
+DAILY_DECAY_BANDS = [
+    (30, 0.03, "slow", "Sell options - slow decay works for sellers"),
+    (15, 0.05, "moderate", "Balanced - good for spreads"),
+    (7, 0.08, "fast", "Buy options for quick moves, or sell for rapid decay"),
+    (2, 0.15, "extreme", "Expiry week - only for experienced traders. Quick in/out."),
+    (-math.inf, 0.30, "extreme", "Expiry day - extreme risk. Gamma scalping or avoid.")
+]
+
+_DAILY_TABLE_DAYS = 365
+
+
+# ==================== BLACK-SCHOLES GRID ====================
+
+BS_MAX_DTE = 60              # days
+BS_SQRT_DTE_STEPS = 96       # grid is uniform in sqrt(days): ATM value ~ sqrt(T)
+BS_IV_GRID = np.round(np.arange(0.05, 0.6001, 0.0125), 5)
+BS_LOG_MONEYNESS_GRID = np.round(np.arange(-0.10, 0.10001, 0.00125), 5)  # ln(K/S)
+
+DEFAULT_RISK_FREE_RATE = 0.07
+
+
+def bs_call_over_spot(log_moneyness, days_to_expiry, iv, risk_free_rate: float = DEFAULT_RISK_FREE_RATE):
+    """
+    Black-Scholes call price divided by spot (broadcasts over arrays)
+
+    Args:
+        log_moneyness: ln(K/S)
+        days_to_expiry: Calendar days to expiry
+        iv: Implied volatility as decimal
+    """
+    k = np.asarray(log_moneyness, dtype=np.float64)
+    T = np.asarray(days_to_expiry, dtype=np.float64) / 365
+    iv = np.asarray(iv, dtype=np.float64)
+    discounted_strike = np.exp(k - risk_free_rate * T)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vol_t = iv * np.sqrt(T)
+        d1 = (-k + (risk_free_rate + 0.5 * iv ** 2) * T) / vol_t
+        d2 = d1 - vol_t
+        price = ndtr(d1) - discounted_strike * ndtr(d2)
+
+    return np.where(T > 0, price, np.maximum(0.0, 1 - np.exp(k)))
+
+
+class ThetaDecayTable:
+    """
+    Memoized decay tables with vectorized lookups
+
+    Use ``get_theta_decay_table()`` rather than constructing directly so the
+    tables are built once per process.
+    """
+
+    def __init__(self, risk_free_rate: float = DEFAULT_RISK_FREE_RATE):
+        self.risk_free_rate = risk_free_rate
+        self._build_intraday()
+        self._build_daily()
+        self._bs_grid: Optional[np.ndarray] = None
+        self._bs_lock = threading.Lock()
+
+    # ==================== BUILD ====================
+
+    def _build_intraday(self):
+        minutes = np.arange(_INTRADAY_TABLE_MINUTES + 1)
+        band = _intraday_band(minutes)
+        band_rates = np.array([b[1] for b in INTRADAY_DECAY_BANDS])
+
+        # Hourly rate [bucket, minutes]; premium lost per interval is rate / 4
+        self.intraday_rates = MONEYNESS_DECAY_MULTIPLIERS[:, None] * band_rates[band][None, :]
+        self.intraday_band = band
+        self.moderate_rates = MONEYNESS_DECAY_MULTIPLIERS * band_rates[0]
+
+        # multipliers[b, R, j] = premium fraction left after j intervals starting R minutes from close
+        n_intervals = -(-_INTRADAY_TABLE_MINUTES // INTERVAL_MINUTES) + 1
+        multipliers = np.ones((len(MONEYNESS_DECAY_MULTIPLIERS), len(minutes), n_intervals))
+        for r in range(1, len(minutes)):
+            keep = 1 - self.intraday_rates[:, r] / 4
+            if r > INTERVAL_MINUTES:
+                multipliers[:, r, 1:] = keep[:, None] * multipliers[:, r - INTERVAL_MINUTES, :-1]
+            else:
+                multipliers[:, r, 1:] = keep[:, None]
+        self.intraday_multipliers = multipliers
+
+    def _build_daily(self):
+        days = np.arange(_DAILY_TABLE_DAYS + 1)
+        band = np.full(days.shape, len(DAILY_DECAY_BANDS) - 1)
+        for i, (threshold, _, _, _) in reversed(list(enumerate(DAILY_DECAY_BANDS[:-1]))):
+            band[days > threshold] = i
+        self.daily_band = band
+        with np.errstate(divide="ignore"):
+            self.daily_theta_multiplier = np.where(days > 0, 1 / np.sqrt(days / 365), 0.0)
+
+    @property
+    def bs_grid(self) -> np.ndarray:
+        """Normalized call prices [sqrt_dte, iv, log_moneyness], built on first use"""
+        if self._bs_grid is None:
+            with self._bs_lock:
+                if self._bs_grid is None:
+                    sqrt_days = np.linspace(0, math.sqrt(BS_MAX_DTE), BS_SQRT_DTE_STEPS + 1)
+                    # float32 keeps the grid ~3 MB; its rounding is far below the interpolation error
+                    self._bs_grid = bs_call_over_spot(
+                        BS_LOG_MONEYNESS_GRID[None, None, :],
+                        (sqrt_days ** 2)[:, None, None],
+                        BS_IV_GRID[None, :, None],
+                        self.risk_free_rate
+                    ).astype(np.float32)
+                    logger.info(f"📐 Theta decay grid built: {self._bs_grid.shape}")
+        return self._bs_grid
+
+    # ==================== INTRADAY LOOKUPS ====================
+
+    def intraday_curve(self, time_remaining_minutes: float, moneyness_pct: float = 0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Premium multipliers, hourly decay rates and band indices for every
+        15-min interval until close
+
+        Minutes are ceiled to the table's integer grid; the band thresholds are
+        integers so ``remaining > t`` and ``ceil(remaining) > t`` always agree.
+        """
+        if time_remaining_minutes <= 0:
+            empty = np.array([])
+            return empty, empty, empty.astype(int)
+
+        b = moneyness_bucket(moneyness_pct)
+        minutes = math.ceil(time_remaining_minutes)
+
+        # Constant MODERATE rate while above the table range
+        prefix = 0
+        if minutes > _INTRADAY_TABLE_MINUTES:
+            prefix = -(-(minutes - _INTRADAY_TABLE_MINUTES) // INTERVAL_MINUTES)
+            minutes -= prefix * INTERVAL_MINUTES
+
+        n_tail = -(-minutes // INTERVAL_MINUTES)
+        tail_minutes = minutes - INTERVAL_MINUTES * np.arange(n_tail)
+
+        head_keep = (1 - self.moderate_rates[b] / 4) ** np.arange(prefix + 1)
+        multipliers = np.concatenate([
+            head_keep[:-1],
+            head_keep[-1] * self.intraday_multipliers[b, minutes, :n_tail]
+        ])
+        rates = np.concatenate([
+            np.full(prefix, self.moderate_rates[b]),
+            self.intraday_rates[b, tail_minutes]
+        ])
+        bands = np.concatenate([
+            np.zeros(prefix, dtype=int),
+            self.intraday_band[tail_minutes]
+        ])
+        return multipliers, rates, bands
+
+    def intraday_schedule(
+        self,
+        premium: float,
+        time_remaining_minutes: float,
+        moneyness_pct: float = 0
+    ) -> List[Dict]:
+        """Expected premium at each 15-min interval until close (see get_15min_decay_schedule)"""
+        multipliers, rates, bands = self.intraday_curve(time_remaining_minutes, moneyness_pct)
+        premiums = premium * multipliers
+        thetas = premiums * rates / 4
+        remaining = time_remaining_minutes - INTERVAL_MINUTES * np.arange(len(multipliers))
+
+        return [
+            {
+                "interval": i,
+                "minutes_remaining": round(float(remaining[i]), 0),
+                "time_to_close": f"{int(remaining[i] // 60)}h {int(remaining[i] % 60)}m",
+                "expected_premium": round(float(premiums[i]), 2),
+                "theta_this_interval": round(float(thetas[i]), 2),
+                "decay_rate": INTRADAY_DECAY_BANDS[bands[i]][2]
+            }
+            for i in range(len(multipliers))
+        ]
+
+    # ==================== DAILY LOOKUPS ====================
+
+    def daily_profile(self, days_to_expiry: float, atm_iv: float = 0.15) -> Dict:
+        """Daily decay, acceleration, strategy and approximate theta for a DTE"""
+        # Bands are "dte > integer threshold", so ceil keeps fractional DTE exact
+        band = DAILY_DECAY_BANDS[self.daily_band[int(np.clip(math.ceil(days_to_expiry), 0, _DAILY_TABLE_DAYS))]]
+
+        if days_to_expiry > 0:
+            if days_to_expiry <= _DAILY_TABLE_DAYS and float(days_to_expiry).is_integer():
+                theta_multiplier = self.daily_theta_multiplier[int(days_to_expiry)]
+            else:
+                theta_multiplier = 1 / np.sqrt(days_to_expiry / 365)
+            current_theta = -atm_iv * theta_multiplier * 0.01
+        else:
+            current_theta = -0.5  # Expiry day extreme
+
+        return {
+            "daily_decay": band[1],
+            "decay_acceleration": band[2],
+            "strategy": band[3],
+            "current_theta": float(current_theta)
+        }
+
+    # ==================== BLACK-SCHOLES LOOKUPS ====================
+
+    def price(
+        self,
+        option_type: str,
+        strike: float,
+        spot: float,
+        iv: float,
+        days_to_expiry: float
+    ) -> float:
+        """
+        Black-Scholes premium interpolated from the grid
+
+        Falls back to the closed form outside the grid (deep ITM/OTM,
+        very high IV or long-dated options).
+        """
+        if spot <= 0 or strike <= 0:
+            return 0.0
+
+        k = math.log(strike / spot)
+        dte = max(days_to_expiry, 0.0)
+        u = math.sqrt(dte)
+
+        in_grid = (
+            BS_LOG_MONEYNESS_GRID[0] <= k <= BS_LOG_MONEYNESS_GRID[-1]
+            and BS_IV_GRID[0] <= iv <= BS_IV_GRID[-1]
+            and dte <= BS_MAX_DTE
+        )
+        if in_grid:
+            call = self._interpolate(u, iv, k)
+        else:
+            call = float(bs_call_over_spot(k, dte, iv, self.risk_free_rate))
+
+        if option_type.upper() in ("CE", "CALL"):
+            value = call
+        else:
+            # Put-call parity on the normalized price
+            value = call - 1 + math.exp(k - self.risk_free_rate * dte / 365)
+        return max(0.0, value) * spot
+
+    def time_decay(
+        self,
+        option_type: str,
+        strike: float,
+        spot: float,
+        iv: float,
+        days_to_expiry: float,
+        minutes: float
+    ) -> float:
+        """
+        Premium change from the passage of ``minutes`` (calendar) with spot
+        and IV unchanged. Negative for a long option.
+        """
+        later = max(0.0, days_to_expiry - minutes / 1440)
+        return (
+            self.price(option_type, strike, spot, iv, later)
+            - self.price(option_type, strike, spot, iv, days_to_expiry)
+        )
+
+    def _interpolate(self, u: float, iv: float, k: float) -> float:
+        """Trilinear interpolation on the (sqrt_dte, iv, log_moneyness) grid"""
+        grid = self.bs_grid
+        coords = []
+        for value, lo, step, size in (
+            (u, 0.0, math.sqrt(BS_MAX_DTE) / BS_SQRT_DTE_STEPS, grid.shape[0]),
+            (iv, BS_IV_GRID[0], BS_IV_GRID[1] - BS_IV_GRID[0], grid.shape[1]),
+            (k, BS_LOG_MONEYNESS_GRID[0], BS_LOG_MONEYNESS_GRID[1] - BS_LOG_MONEYNESS_GRID[0], grid.shape[2])
+        ):
+            pos = min(max((value - lo) / step, 0.0), size - 1)
+            i = min(int(pos), size - 2)
+            coords.append((i, pos - i))
+
+        (i, fu), (j, fv), (m, fk) = coords
+        cube = grid[i:i + 2, j:j + 2, m:m + 2]
+        cube = cube[0] * (1 - fu) + cube[1] * fu
+        cube = cube[0] * (1 - fv) + cube[1] * fv
+        return float(cube[0] * (1 - fk) + cube[1] * fk)
+
+
+@lru_cache(maxsize=4)
+def get_theta_decay_table(risk_free_rate: float = DEFAULT_RISK_FREE_RATE) -> ThetaDecayTable:
+    """Process-wide decay table (one per risk-free rate)"""
+    return ThetaDecayTable(risk_free_rate)
@@ -315,7 +315,7 @@ async def fix_duplicate_credits(authorization: str = Header(None)):
         user_id = await get_current_user_id(authorization)
         
         # Get all credit transactions for user
-        response = billing_service.supabase.table('credit_transactions')\
+        response = await billing_service.supabase.table('credit_transactions')\
             .select('*')\
             .eq('user_id', user_id)\
             .eq('transaction_type', 'purchase')\
@@ -341,7 +341,7 @@ async def fix_duplicate_credits(authorization: str = Header(None)):
             if len(group) > 1:
                 # Keep the first transaction, remove others
                 for duplicate_txn in group[1:]:
-                    billing_service.supabase.table('credit_transactions')\
+                    await billing_service.supabase.table('credit_transactions')\
                         .delete()\
                         .eq('id', duplicate_txn['id'])\
                         .execute()
@@ -352,7 +352,7 @@ async def fix_duplicate_credits(authorization: str = Header(None)):
         # Recalculate correct balance
         if removed_count > 0:
             # Get current balance
-            credits_response = billing_service.supabase.table('user_credits')\
+            credits_response = await billing_service.supabase.table('user_credits')\
                 .select('*')\
                 .eq('user_id', user_id)\
                 .single()\
@@ -363,7 +363,7 @@ async def fix_duplicate_credits(authorization: str = Header(None)):
                 corrected_balance = current_balance - Decimal(str(total_removed_amount))
                 
                 # Update balance
-                billing_service.supabase.table('user_credits')\
+                await billing_service.supabase.table('user_credits')\
                     .update({
                         'balance': float(corrected_balance),
                         'updated_at': datetime.now().isoformat()
@@ -38,11 +38,22 @@ logger = logging.getLogger(__name__)
 BACKTEST_MODE = os.environ.get('BACKTEST_MODE', 'false').lower() == 'true'
 BACKTEST_DATE_TO_STR = os.environ.get('BACKTEST_DATE_TO', None)
 
+# Advanced step by step by the paper-trading replay (src/services/paper_replay.py)
+_simulated_time: Optional[datetime] = None
+
+def set_simulated_time(value: Optional[datetime]):
+    """Pin get_current_time() to a simulated time (None goes back to env/real time)"""
+    global _simulated_time
+    _simulated_time = value
+
 def get_current_time() -> datetime:
     """
     Get current time, respecting backtest mode.
     In backtest mode, returns a fixed historical time for testing.
+    A replay's simulated time takes precedence over both.
     """
+    if _simulated_time is not None:
+        return _simulated_time
     if BACKTEST_MODE and BACKTEST_DATE_TO_STR:
         try:
             backtest_time = datetime.fromisoformat(BACKTEST_DATE_TO_STR)
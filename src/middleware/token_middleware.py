@@ -148,11 +148,9 @@ async def check_subscription_limits(
 ) -> bool:
     """Check if user can use subscription for this scan"""
     
-    # Get today's usage
-    today_usage = await billing_service.get_today_usage(user_id)
-    
-    # Get plan limits
-    plan_limits = await billing_service.get_plan_limits(billing_status.plan_type)
+    # Today's usage and plan limits were loaded with the billing status
+    today_usage = billing_status.today_usage
+    plan_limits = billing_status.limits
     
     if not plan_limits:
         return False
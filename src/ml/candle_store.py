@@ -0,0 +1,124 @@
+"""
+Local Candle Store
+==================
+
+On-disk OHLCV history per (symbol, resolution), so model training can run
+offline (after market close) without calling Fyers.
+
+Candles fetched through get_candles_cached() for the stored resolutions
+are merged into data/raw/candles/<symbol>_<resolution>.npz. Files hold
+plain arrays (int64 ns timestamps + float64 OHLCV); rewrites go through
+a temporary file and os.replace, so readers never see a partial file.
+
+Author: TradeWise ML Team
+Created: 2026-02-02
+"""
+
+import logging
+import os
+import re
+import threading
+import uuid
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+OHLCV_COLUMNS = ("open", "high", "low", "close", "volume")
+
+# Resolutions worth keeping for training (daily models, hourly direction model)
+STORED_RESOLUTIONS = ("D", "60")
+
+DEFAULT_CANDLE_DIR = os.path.join(os.path.dirname(__file__), '../../data/raw/candles')
+
+
+class LocalCandleStore:
+    """
+    Append-merge OHLCV storage keyed by (symbol, resolution)
+    """
+
+    def __init__(self, root_dir: str = DEFAULT_CANDLE_DIR, resolutions=STORED_RESOLUTIONS):
+        """
+        Args:
+            root_dir: Directory for the .npz files
+            resolutions: Resolutions merge() persists; others are ignored
+        """
+        self.root_dir = root_dir
+        self.resolutions = set(resolutions)
+        self._lock = threading.Lock()
+
+    def _path(self, symbol: str, resolution: str) -> str:
+        safe_symbol = re.sub(r"[^A-Za-z0-9_-]", "_", symbol)
+        return os.path.join(self.root_dir, f"{safe_symbol}_{resolution}.npz")
+
+    def merge(self, symbol: str, resolution: str, df: pd.DataFrame) -> int:
+        """
+        Merge candles into the stored series (newer values win on overlap)
+
+        Returns:
+            Number of bars stored after the merge (0 if not persisted)
+        """
+        if resolution not in self.resolutions or df is None or df.empty:
+            return 0
+        if not isinstance(df.index, pd.DatetimeIndex):
+            return 0
+
+        with self._lock:
+            existing = self.read(symbol, resolution)
+            incoming = df[[c for c in OHLCV_COLUMNS if c in df.columns]].astype(np.float64)
+            if incoming.index.tz is not None:
+                incoming = incoming.tz_localize(None)
+            if existing is not None:
+                merged = pd.concat([existing, incoming])
+                merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+            else:
+                merged = incoming.sort_index()
+
+            os.makedirs(self.root_dir, exist_ok=True)
+            path = self._path(symbol, resolution)
+            tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp.npz"
+            arrays = {col: merged[col].to_numpy(dtype=np.float64) for col in merged.columns}
+            arrays["timestamp"] = merged.index.to_numpy(dtype="datetime64[ns]").view(np.int64)
+            np.savez(tmp_path, **arrays)
+            os.replace(tmp_path, path)
+        return len(merged)
+
+    def read(
+        self,
+        symbol: str,
+        resolution: str,
+        start: Optional[pd.Timestamp] = None,
+        end: Optional[pd.Timestamp] = None
+    ) -> Optional[pd.DataFrame]:
+        """
+        Stored candles, optionally limited to [start, end]
+
+        Returns:
+            OHLCV DataFrame indexed by timestamp, or None if nothing is stored
+        """
+        path = self._path(symbol, resolution)
+        if not os.path.exists(path):
+            return None
+
+        with np.load(path) as data:
+            index = pd.DatetimeIndex(pd.to_datetime(data["timestamp"]), name="timestamp")
+            df = pd.DataFrame({k: data[k] for k in data.files if k != "timestamp"}, index=index)
+
+        if start is not None or end is not None:
+            df = df.loc[start:end]
+        return df
+
+
+# Global candle store instance
+_candle_store: Optional[LocalCandleStore] = None
+
+
+def get_candle_store() -> LocalCandleStore:
+    """Get or create the local candle store"""
+    global _candle_store
+    if _candle_store is None:
+        _candle_store = LocalCandleStore()
+    return _candle_store
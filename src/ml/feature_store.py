@@ -0,0 +1,338 @@
+"""
+Index ML Feature Store
+======================
+
+Canonical feature matrix per (symbol, resolution), computed once and
+extended as new bars arrive.
+
+IndexMLOptimizer used to rebuild ~50 indicator columns (SMA/EMA/RSI/MACD/
+Bollinger/ATR/ADX, lags) from raw candles on every train and predict call.
+The store keeps, per series:
+
+- raw OHLCV (float64) and timestamps
+- the feature matrix as one float32 array plus a column index
+
+When a refreshed candle frame extends the stored series, only the new
+bars are computed, from a warm-up tail long enough for the EWM-based
+columns to converge (their error is far below float32 resolution).
+A revised last bar (live candle) is recomputed; anything else that does
+not line up triggers a full rebuild.
+
+Author: TradeWise ML Team
+Created: 2026-02-02
+"""
+
+import threading
+import logging
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from src.ml.ml_metrics import get_ml_metrics
+
+logger = logging.getLogger(__name__)
+
+
+# Series kept in memory, least recently used evicted first
+FEATURE_STORE_SIZE = 16
+
+# Bars of history recomputed ahead of new bars on incremental appends;
+# EWM(span=50) weight left beyond this tail is ~1e-7
+WARMUP_BARS = 400
+
+RAW_COLUMNS = ("open", "high", "low", "close", "volume")
+
+
+def compute_index_features(df: pd.DataFrame) -> Tuple[np.ndarray, List[str]]:
+    """
+    Canonical index feature set
+
+    Columns are built into a dict and stacked once instead of being
+    inserted one by one into a copied frame.
+
+    Args:
+        df: OHLCV frame (DatetimeIndex for time features)
+
+    Returns:
+        (float32 matrix of shape (len(df), n_features), column names)
+    """
+    close = df['close'].astype(np.float64)
+    high = df['high'].astype(np.float64)
+    low = df['low'].astype(np.float64)
+    cols: Dict[str, pd.Series] = {}
+
+    # 1. Price-based features
+    returns = close.pct_change() * 100
+    cols['returns'] = returns
+    cols['log_returns'] = np.log(close / close.shift(1)) * 100
+    for period in [1, 3, 5, 10]:
+        cols[f'momentum_{period}'] = close.pct_change(period) * 100
+
+    # 2. Moving averages
+    for period in [5, 10, 20, 50]:
+        sma = close.rolling(period).mean()
+        cols[f'sma_{period}'] = sma
+        cols[f'ema_{period}'] = close.ewm(span=period).mean()
+        cols[f'price_vs_sma_{period}'] = (close - sma) / sma * 100
+
+    # 3. Volatility
+    for period in [5, 10, 20]:
+        cols[f'volatility_{period}'] = returns.rolling(period).std()
+
+    prev_close = close.shift(1)
+    tr = pd.concat([high - low, (high - prev_close).abs(), (low - prev_close).abs()], axis=1).max(axis=1)
+    cols['atr_14'] = tr.rolling(14).mean()
+    cols['atr_pct'] = cols['atr_14'] / close * 100
+
+    # 4. RSI
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0).rolling(14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
+    rsi = 100 - (100 / (1 + gain / (loss + 0.0001)))
+    cols['rsi_14'] = rsi
+    cols['rsi_oversold'] = (rsi < 30).astype(float)
+    cols['rsi_overbought'] = (rsi > 70).astype(float)
+
+    # 5. MACD
+    macd = close.ewm(span=12).mean() - close.ewm(span=26).mean()
+    macd_signal = macd.ewm(span=9).mean()
+    cols['macd'] = macd
+    cols['macd_signal'] = macd_signal
+    cols['macd_histogram'] = macd - macd_signal
+
+    # 6. Bollinger Bands
+    bb_middle = close.rolling(20).mean()
+    bb_std = close.rolling(20).std()
+    bb_upper = bb_middle + 2 * bb_std
+    bb_lower = bb_middle - 2 * bb_std
+    cols['bb_middle'] = bb_middle
+    cols['bb_upper'] = bb_upper
+    cols['bb_lower'] = bb_lower
+    cols['bb_width'] = (bb_upper - bb_lower) / bb_middle * 100
+    cols['bb_position'] = (close - bb_lower) / (bb_upper - bb_lower + 0.0001)
+
+    # 7. ADX (trend strength)
+    cols['adx'] = _adx(high, low, close, tr)
+
+    # 8. Volume
+    if 'volume' in df.columns:
+        volume = df['volume'].astype(np.float64)
+        volume_sma_10 = volume.rolling(10).mean()
+        cols['volume_sma_10'] = volume_sma_10
+        cols['volume_ratio'] = volume / (volume_sma_10 + 1)
+        cols['volume_trend'] = volume.rolling(5).mean() / (volume.rolling(20).mean() + 1)
+
+    # 9. Time features
+    if isinstance(df.index, pd.DatetimeIndex):
+        day = df.index.day
+        cols['day_of_week'] = pd.Series(df.index.dayofweek, index=df.index)
+        cols['day_of_month'] = pd.Series(day, index=df.index)
+        cols['month'] = pd.Series(df.index.month, index=df.index)
+        cols['is_month_start'] = pd.Series((day <= 5).astype(float), index=df.index)
+        cols['is_month_end'] = pd.Series((day >= 25).astype(float), index=df.index)
+
+    # 10. Lags
+    for lag in [1, 2, 3, 5]:
+        cols[f'return_lag_{lag}'] = returns.shift(lag)
+        cols[f'rsi_lag_{lag}'] = rsi.shift(lag)
+
+    names = list(cols.keys())
+    matrix = np.column_stack([np.asarray(cols[name], dtype=np.float64) for name in names])
+    return matrix.astype(np.float32), names
+
+
+def _adx(high: pd.Series, low: pd.Series, close: pd.Series, tr: pd.Series, period: int = 14) -> pd.Series:
+    """ADX with every intermediate series kept on the candle index"""
+    up_move = high - high.shift(1)
+    down_move = low.shift(1) - low
+
+    plus_dm = pd.Series(np.where((up_move > down_move) & (up_move > 0), up_move, 0.0), index=high.index)
+    minus_dm = pd.Series(np.where((down_move > up_move) & (down_move > 0), down_move, 0.0), index=high.index)
+
+    atr = tr.ewm(span=period).mean()
+    plus_di = 100 * plus_dm.ewm(span=period).mean() / (atr + 0.0001)
+    minus_di = 100 * minus_dm.ewm(span=period).mean() / (atr + 0.0001)
+
+    dx = 100 * (plus_di - minus_di).abs() / (plus_di + minus_di + 0.0001)
+    return dx.ewm(span=period).mean()
+
+
+class FeatureMatrix:
+    """Raw candles and their feature rows for one (symbol, resolution)"""
+
+    def __init__(self, timestamps: np.ndarray, raw: Dict[str, np.ndarray], values: np.ndarray, columns: List[str]):
+        self.timestamps = timestamps          # int64 ns
+        self.raw = raw                        # column -> float64
+        self.values = values                  # float32 (n_bars, n_features)
+        self.columns = columns
+        self.column_index = {name: i for i, name in enumerate(columns)}
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def raw_frame(self, start: int = 0) -> pd.DataFrame:
+        index = pd.DatetimeIndex(self.timestamps[start:].astype("datetime64[ns]"), name="timestamp")
+        return pd.DataFrame({k: v[start:] for k, v in self.raw.items()}, index=index)
+
+    def column_positions(self, columns: Optional[List[str]]) -> List[int]:
+        if columns is None:
+            return list(range(len(self.columns)))
+        return [self.column_index[name] for name in columns]
+
+    def window(
+        self,
+        start: Optional[pd.Timestamp] = None,
+        end: Optional[pd.Timestamp] = None,
+        columns: Optional[List[str]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Feature rows between two timestamps (inclusive)
+
+        Returns:
+            (float32 matrix, int64 ns timestamps)
+        """
+        lo = 0 if start is None else int(np.searchsorted(self.timestamps, pd.Timestamp(start).value, side="left"))
+        hi = len(self) if end is None else int(np.searchsorted(self.timestamps, pd.Timestamp(end).value, side="right"))
+        return self.values[lo:hi][:, self.column_positions(columns)], self.timestamps[lo:hi]
+
+    def frame(
+        self,
+        start: Optional[pd.Timestamp] = None,
+        end: Optional[pd.Timestamp] = None,
+        columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """window() as a DataFrame indexed by timestamp"""
+        values, timestamps = self.window(start, end, columns)
+        return pd.DataFrame(
+            values,
+            index=pd.DatetimeIndex(timestamps.astype("datetime64[ns]"), name="timestamp"),
+            columns=columns if columns is not None else self.columns
+        )
+
+    def latest(self, columns: Optional[List[str]] = None) -> np.ndarray:
+        """Last feature row, shape (1, n_columns)"""
+        return self.values[-1:, self.column_positions(columns)]
+
+
+class FeatureStore:
+    """
+    Memoized index feature matrices keyed by (symbol, resolution)
+    """
+
+    def __init__(self, max_entries: int = FEATURE_STORE_SIZE, warmup_bars: int = WARMUP_BARS):
+        self.max_entries = max_entries
+        self.warmup_bars = warmup_bars
+        self._entries: "OrderedDict[Tuple[str, str], FeatureMatrix]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, symbol: str, resolution: str) -> Optional[FeatureMatrix]:
+        with self._lock:
+            return self._entries.get((symbol, resolution))
+
+    def update(self, symbol: str, resolution: str, df: pd.DataFrame) -> FeatureMatrix:
+        """
+        Bring the stored matrix up to date with a candle frame
+
+        Args:
+            symbol: Series identity (e.g. 'NIFTY')
+            resolution: Candle resolution ('D', '60', '15', ...)
+            df: OHLCV frame with a DatetimeIndex
+
+        Returns:
+            FeatureMatrix covering at least the bars in df
+        """
+        key = (symbol, resolution)
+        with self._lock:
+            entry = self._entries.get(key)
+            timestamps = df.index.to_numpy(dtype="datetime64[ns]").view(np.int64)
+
+            extension = self._extension_start(entry, df, timestamps) if entry is not None else None
+            get_ml_metrics().record_cache("feature_store", hit=extension is not None)
+            if extension is None:
+                entry = self._build(df, timestamps)
+                logger.info(f"🧮 Feature matrix built for {symbol}/{resolution} ({len(entry)} bars)")
+            else:
+                entry, new_start = extension
+                if new_start < len(df):
+                    entry = self._append(entry, df.iloc[new_start:], timestamps[new_start:])
+
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _extension_start(
+        self, entry: FeatureMatrix, df: pd.DataFrame, timestamps: np.ndarray
+    ) -> Optional[Tuple[FeatureMatrix, int]]:
+        """
+        Matrix to extend and position in df of the first bar to add to it,
+        or None when df does not extend the stored series (full rebuild needed).
+
+        A bar matches only if every stored OHLCV column does. A revised last
+        bar is dropped (in a new matrix; entry is shared with readers) and
+        re-added from df.
+        """
+        if len(df) == 0 or len(entry) < 2 or timestamps[0] < entry.timestamps[0]:
+            return None
+        raw = self._raw_arrays(df)
+        if set(raw) != set(entry.raw):
+            return None
+
+        for back in (1, 2):
+            # back=1: last stored bar; back=2: it was revised, anchor on the one before
+            pos = int(np.searchsorted(timestamps, entry.timestamps[-back]))
+            if pos >= len(timestamps) or timestamps[pos] != entry.timestamps[-back]:
+                return None
+            if all(np.isclose(raw[col][pos], entry.raw[col][-back], equal_nan=True) for col in raw):
+                return (self._truncate(entry, 1) if back == 2 else entry), pos + 1
+        return None
+
+    @staticmethod
+    def _truncate(entry: FeatureMatrix, bars: int) -> FeatureMatrix:
+        """entry without its last `bars` bars (entry itself is left untouched)"""
+        return FeatureMatrix(
+            entry.timestamps[:-bars],
+            {k: v[:-bars] for k, v in entry.raw.items()},
+            entry.values[:-bars],
+            entry.columns
+        )
+
+    @staticmethod
+    def _raw_arrays(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        return {col: df[col].to_numpy(dtype=np.float64) for col in RAW_COLUMNS if col in df.columns}
+
+    def _build(self, df: pd.DataFrame, timestamps: np.ndarray) -> FeatureMatrix:
+        values, columns = compute_index_features(df)
+        return FeatureMatrix(timestamps.copy(), self._raw_arrays(df), values, columns)
+
+    def _append(self, entry: FeatureMatrix, new_df: pd.DataFrame, new_timestamps: np.ndarray) -> FeatureMatrix:
+        # Only the new bars are kept; the warm-up tail just seeds rolling/EWM state
+        warmup_start = max(0, len(entry) - self.warmup_bars)
+        new_raw = self._raw_arrays(new_df)
+        tail = pd.concat([entry.raw_frame(warmup_start), pd.DataFrame(new_raw, index=new_df.index)])
+        values, _ = compute_index_features(tail)
+
+        return FeatureMatrix(
+            np.concatenate([entry.timestamps, new_timestamps]),
+            {k: np.concatenate([v, new_raw[k]]) for k, v in entry.raw.items()},
+            np.concatenate([entry.values, values[-len(new_df):]]),
+            entry.columns
+        )
+
+
+# Global feature store instance
+_feature_store: Optional[FeatureStore] = None
+
+
+def get_feature_store() -> FeatureStore:
+    """Get or create the feature store"""
+    global _feature_store
+    if _feature_store is None:
+        _feature_store = FeatureStore()
+    return _feature_store
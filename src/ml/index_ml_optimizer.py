@@ -30,6 +30,12 @@ try:
 except ImportError:
     ML_AVAILABLE = False
 
+from src.ml.feature_store import compute_index_features, get_feature_store
+from src.ml.ml_metrics import get_ml_metrics
+from src.ml.model_registry import ModelRegistry, get_model_registry
+from src.ml.training_config import fit_estimator, get_training_config, to_float32
+from src.ml.training_pipeline import model_key
+
 logger = logging.getLogger(__name__)
 
 
@@ -64,12 +70,16 @@ class IndexMLOptimizer:
         self.models: Dict[str, object] = {}  # One model per index
         self.scalers: Dict[str, StandardScaler] = {}
         self.label_encoders: Dict[str, LabelEncoder] = {}
-        self.feature_names: List[str] = []
+        self.feature_names: List[str] = []  # Columns of the most recently trained model
+        self.index_features: Dict[str, List[str]] = {}  # Feature columns per index model
+        self.model_versions: Dict[str, int] = {}
+        self.training_metrics: Dict[str, Dict] = {}
         self.is_fitted: Dict[str, bool] = {}
         
-        # Model storage path
+        # Model storage path (legacy joblib pickles) and versioned registry
         self.model_dir = os.path.join(os.path.dirname(__file__), '../../models/saved_models')
         os.makedirs(self.model_dir, exist_ok=True)
+        self.registry: ModelRegistry = get_model_registry()
         
         # Direction thresholds
         self.up_threshold = 0.3      # % move to classify as UP
@@ -77,11 +87,17 @@ class IndexMLOptimizer:
         
     def _create_model(self):
         """Create the classification model"""
+        return self.create_model(self.model_type)
+    
+    @staticmethod
+    def create_model(model_type: str):
+        """Create an unfitted classifier of the given type (threads pinned to the training budget)"""
         if not ML_AVAILABLE:
             logger.warning("ML libraries not available")
             return None
-            
-        if self.model_type == "xgboost":
+        
+        n_jobs = get_training_config().n_jobs
+        if model_type == "xgboost":
             return xgb.XGBClassifier(
                 n_estimators=100,
                 max_depth=5,
@@ -90,22 +106,23 @@ class IndexMLOptimizer:
                 colsample_bytree=0.8,
                 random_state=42,
                 use_label_encoder=False,
-                eval_metric='mlogloss'
+                eval_metric='mlogloss',
+                n_jobs=n_jobs
             )
-        elif self.model_type == "random_forest":
+        elif model_type == "random_forest":
             return RandomForestClassifier(
                 n_estimators=100,
                 max_depth=8,
                 random_state=42,
-                n_jobs=-1
+                n_jobs=n_jobs
             )
-        elif self.model_type == "logistic":
+        elif model_type == "logistic":
             return LogisticRegression(
                 max_iter=1000,
                 random_state=42,
                 multi_class='multinomial'
             )
-        elif self.model_type == "gradient_boosting":
+        elif model_type == "gradient_boosting":
             return GradientBoostingClassifier(
                 n_estimators=100,
                 max_depth=5,
@@ -113,7 +130,7 @@ class IndexMLOptimizer:
                 random_state=42
             )
         else:
-            raise ValueError(f"Unknown model type: {self.model_type}")
+            raise ValueError(f"Unknown model type: {model_type}")
     
     def prepare_features(
         self,
@@ -128,139 +145,24 @@ class IndexMLOptimizer:
         2. Aggregated stock signals (if available)
         3. Regime indicators
         4. Time features
-        """
-        features = df.copy()
-        
-        # =====================================
-        # 1. Price-based features
-        # =====================================
-        features['returns'] = features['close'].pct_change() * 100
-        features['log_returns'] = np.log(features['close'] / features['close'].shift(1)) * 100
-        
-        # Momentum
-        for period in [1, 3, 5, 10]:
-            features[f'momentum_{period}'] = features['close'].pct_change(period) * 100
-        
-        # =====================================
-        # 2. Moving Averages
-        # =====================================
-        for period in [5, 10, 20, 50]:
-            features[f'sma_{period}'] = features['close'].rolling(period).mean()
-            features[f'ema_{period}'] = features['close'].ewm(span=period).mean()
-            features[f'price_vs_sma_{period}'] = (
-                (features['close'] - features[f'sma_{period}']) / features[f'sma_{period}'] * 100
-            )
-        
-        # =====================================
-        # 3. Volatility features
-        # =====================================
-        features['volatility_5'] = features['returns'].rolling(5).std()
-        features['volatility_10'] = features['returns'].rolling(10).std()
-        features['volatility_20'] = features['returns'].rolling(20).std()
-        
-        # ATR
-        high_low = features['high'] - features['low']
-        high_close = abs(features['high'] - features['close'].shift(1))
-        low_close = abs(features['low'] - features['close'].shift(1))
-        tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-        features['atr_14'] = tr.rolling(14).mean()
-        features['atr_pct'] = features['atr_14'] / features['close'] * 100
-        
-        # =====================================
-        # 4. RSI
-        # =====================================
-        delta = features['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
-        rs = gain / (loss + 0.0001)
-        features['rsi_14'] = 100 - (100 / (1 + rs))
-        
-        # RSI derivatives
-        features['rsi_oversold'] = (features['rsi_14'] < 30).astype(int)
-        features['rsi_overbought'] = (features['rsi_14'] > 70).astype(int)
-        
-        # =====================================
-        # 5. MACD
-        # =====================================
-        ema_12 = features['close'].ewm(span=12).mean()
-        ema_26 = features['close'].ewm(span=26).mean()
-        features['macd'] = ema_12 - ema_26
-        features['macd_signal'] = features['macd'].ewm(span=9).mean()
-        features['macd_histogram'] = features['macd'] - features['macd_signal']
-        
-        # =====================================
-        # 6. Bollinger Bands
-        # =====================================
-        features['bb_middle'] = features['close'].rolling(20).mean()
-        bb_std = features['close'].rolling(20).std()
-        features['bb_upper'] = features['bb_middle'] + (2 * bb_std)
-        features['bb_lower'] = features['bb_middle'] - (2 * bb_std)
-        features['bb_width'] = (features['bb_upper'] - features['bb_lower']) / features['bb_middle'] * 100
-        features['bb_position'] = (
-            (features['close'] - features['bb_lower']) / 
-            (features['bb_upper'] - features['bb_lower'] + 0.0001)
-        )
         
-        # =====================================
-        # 7. ADX (Trend Strength)
-        # =====================================
-        features['adx'] = self._calculate_adx(features)
-        
-        # =====================================
-        # 8. Volume features
-        # =====================================
-        if 'volume' in features.columns:
-            features['volume_sma_10'] = features['volume'].rolling(10).mean()
-            features['volume_ratio'] = features['volume'] / (features['volume_sma_10'] + 1)
-            features['volume_trend'] = features['volume'].rolling(5).mean() / (features['volume'].rolling(20).mean() + 1)
-        
-        # =====================================
-        # 9. Time features
-        # =====================================
-        if isinstance(features.index, pd.DatetimeIndex):
-            features['day_of_week'] = features.index.dayofweek
-            features['day_of_month'] = features.index.day
-            features['month'] = features.index.month
-            features['is_month_start'] = (features.index.day <= 5).astype(int)
-            features['is_month_end'] = (features.index.day >= 25).astype(int)
-        
-        # =====================================
-        # 10. Lag features
-        # =====================================
-        for lag in [1, 2, 3, 5]:
-            features[f'return_lag_{lag}'] = features['returns'].shift(lag)
-            features[f'rsi_lag_{lag}'] = features['rsi_14'].shift(lag)
-        
-        return features
+        Column definitions live in feature_store.compute_index_features
+        """
+        values, columns = compute_index_features(df)
+        return pd.concat([df, pd.DataFrame(values, index=df.index, columns=columns)], axis=1)
     
-    def _calculate_adx(self, df: pd.DataFrame, period: int = 14) -> pd.Series:
-        """Calculate ADX"""
-        try:
-            high = df['high']
-            low = df['low']
-            close = df['close']
-            
-            tr1 = high - low
-            tr2 = abs(high - close.shift(1))
-            tr3 = abs(low - close.shift(1))
-            tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-            
-            up_move = high - high.shift(1)
-            down_move = low.shift(1) - low
-            
-            plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0)
-            minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0)
-            
-            atr = pd.Series(tr).ewm(span=period).mean()
-            plus_di = 100 * pd.Series(plus_dm).ewm(span=period).mean() / (atr + 0.0001)
-            minus_di = 100 * pd.Series(minus_dm).ewm(span=period).mean() / (atr + 0.0001)
-            
-            dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di + 0.0001)
-            adx = dx.ewm(span=period).mean()
-            
-            return adx
-        except:
-            return pd.Series(index=df.index, data=20)
+    def _feature_frame(self, index_name: str, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Feature rows for the bars in df, served from the shared feature
+        store when the candles are timestamped (computed once per series,
+        extended as new bars arrive)
+        """
+        if not isinstance(df.index, pd.DatetimeIndex) or len(df) < 2:
+            return self.prepare_features(df)
+        
+        from src.ml.time_series_models import infer_resolution
+        matrix = get_feature_store().update(index_name, infer_resolution(df['close']), df)
+        return matrix.frame(df.index[0], df.index[-1])
     
     def prepare_target(self, df: pd.DataFrame, horizon: int = 1) -> pd.Series:
         """
@@ -304,7 +206,7 @@ class IndexMLOptimizer:
         logger.info(f"Training ML model for {index_name}...")
         
         # Prepare features and target
-        features_df = self.prepare_features(df)
+        features_df = self._feature_frame(index_name, df)
         target = self.prepare_target(df, prediction_horizon)
         
         # Align and clean
@@ -318,6 +220,7 @@ class IndexMLOptimizer:
         exclude_cols = ['target', 'open', 'high', 'low', 'close', 'volume']
         feature_cols = [c for c in features_df.columns if c not in exclude_cols]
         self.feature_names = feature_cols
+        self.index_features[index_name] = feature_cols
         
         X = features_df[feature_cols]
         y = features_df['target']
@@ -329,12 +232,11 @@ class IndexMLOptimizer:
         
         # Initialize scaler
         scaler = StandardScaler()
-        X_train_scaled = scaler.fit_transform(X_train)
-        X_test_scaled = scaler.transform(X_test)
+        X_train_scaled = to_float32(scaler.fit_transform(X_train))
+        X_test_scaled = to_float32(scaler.transform(X_test))
         
-        # Train model
-        model = self._create_model()
-        model.fit(X_train_scaled, y_train)
+        # Train model (early stopping on the tail of the training rows)
+        model, report = fit_estimator(self._create_model(), X_train_scaled, y_train.to_numpy(), get_training_config())
         
         # Evaluate
         train_pred = model.predict(X_train_scaled)
@@ -358,7 +260,7 @@ class IndexMLOptimizer:
         tscv = TimeSeriesSplit(n_splits=5)
         cv_scores = cross_val_score(
             self._create_model(), 
-            scaler.fit_transform(X), 
+            to_float32(StandardScaler().fit_transform(X)), 
             y, 
             cv=tscv,
             scoring='accuracy'
@@ -373,6 +275,7 @@ class IndexMLOptimizer:
             "cv_accuracy_std": cv_scores.std(),
             "train_samples": len(X_train),
             "test_samples": len(X_test),
+            "training_report": report.to_dict(),
             "feature_importance": dict(sorted(
                 feature_importance.items(), 
                 key=lambda x: x[1], 
@@ -381,13 +284,16 @@ class IndexMLOptimizer:
         }
         
         logger.info(f"Model trained. Test Accuracy: {test_acc:.2%}")
+        self.training_metrics[index_name] = metrics
+        self.model_versions.pop(index_name, None)
         
         return metrics
     
     def predict(
         self,
         index_name: str,
-        df: pd.DataFrame
+        df: pd.DataFrame,
+        horizon: int = 1
     ) -> Optional[MLPrediction]:
         """
         Make prediction for current state
@@ -395,78 +301,138 @@ class IndexMLOptimizer:
         Args:
             index_name: Index identifier
             df: Recent OHLCV data (at least 60 days)
+            horizon: Days ahead (>1 uses the "<INDEX>_H<h>" model)
             
         Returns:
             MLPrediction object
         """
-        if not ML_AVAILABLE:
-            logger.warning("ML libraries not available")
-            return None
-            
-        if index_name not in self.is_fitted or not self.is_fitted[index_name]:
-            logger.warning(f"Model not trained for {index_name}")
-            # Try to load saved model
-            if not self._load_model(index_name):
-                return None
+        return self.predict_batch([(index_name, df)], horizon)[0]
+    
+    def predict_batch(
+        self,
+        items: List[Tuple[str, pd.DataFrame]],
+        horizon: int = 1
+    ) -> List[Optional[MLPrediction]]:
+        """
+        Predict many (index, candles) pairs
         
-        try:
-            # Prepare features
-            features_df = self.prepare_features(df)
-            features_df = features_df.dropna()
-            
-            if len(features_df) == 0:
-                return None
-            
-            # Get latest row
-            X = features_df[self.feature_names].iloc[-1:].values
-            X_scaled = self.scalers[index_name].transform(X)
-            
-            # Predict
-            model = self.models[index_name]
-            prediction = model.predict(X_scaled)[0]
-            
-            # Get probabilities
-            if hasattr(model, 'predict_proba'):
-                probs = model.predict_proba(X_scaled)[0]
-                # Classes: 0=DOWN, 1=FLAT, 2=UP
-                prob_down = probs[0] if len(probs) > 0 else 0.33
-                prob_flat = probs[1] if len(probs) > 1 else 0.34
-                prob_up = probs[2] if len(probs) > 2 else 0.33
-            else:
-                prob_down = prob_flat = 0.33
-                prob_up = 0.34 if prediction == 2 else 0.33
-            
-            # Map prediction to direction
-            direction_map = {0: "DOWN", 1: "FLAT", 2: "UP"}
-            predicted_direction = direction_map.get(prediction, "FLAT")
-            
-            # Calculate confidence
-            confidence = max(prob_up, prob_down, prob_flat) * 100
-            
-            # Get feature importance
-            feature_importance = {}
-            if hasattr(model, 'feature_importances_'):
-                for name, imp in zip(self.feature_names, model.feature_importances_):
-                    feature_importance[name] = float(imp)
-                feature_importance = dict(sorted(
-                    feature_importance.items(),
-                    key=lambda x: x[1],
-                    reverse=True
-                )[:5])
-            
-            return MLPrediction(
-                predicted_direction=predicted_direction,
-                probability_up=prob_up,
-                probability_down=prob_down,
-                probability_flat=prob_flat,
-                confidence=confidence,
-                model_type=self.model_type,
-                feature_importance=feature_importance
-            )
+        The latest feature row of every item is stacked per index model,
+        so each model is scaled and scored once (one predict_proba call)
+        however many rows it serves.
+        
+        Args:
+            items: (index_name, recent OHLCV data) pairs; an index may repeat
+            horizon: Days ahead (>1 uses the "<INDEX>_H<h>" models)
             
-        except Exception as e:
-            logger.error(f"Prediction error: {e}")
-            return None
+        Returns:
+            MLPrediction (or None when no model/features) per item, in order
+        """
+        results: List[Optional[MLPrediction]] = [None] * len(items)
+        if not ML_AVAILABLE:
+            logger.warning("ML libraries not available")
+            return results
+        
+        metrics = get_ml_metrics()
+        rows_by_index: Dict[str, List[Tuple[int, np.ndarray]]] = {}
+        for pos, (index_name, df) in enumerate(items):
+            key = model_key(index_name, horizon)
+            if not self.is_fitted.get(key):
+                logger.warning(f"Model not trained for {key}")
+                # Try to load saved model
+                if not self._load_model(key):
+                    continue
+            try:
+                features_df = self._feature_frame(index_name, df).dropna()
+                if len(features_df) == 0:
+                    continue
+                # Latest row
+                feature_names = self._features_for(key)
+                rows_by_index.setdefault(key, []).append(
+                    (pos, features_df[feature_names].iloc[-1].to_numpy(dtype=np.float64))
+                )
+            except Exception as e:
+                logger.error(f"Prediction error: {e}")
+        
+        for index_name, rows in rows_by_index.items():
+            try:
+                model = self.models[index_name]
+                feature_names = self._features_for(index_name)
+                X = pd.DataFrame(np.vstack([row for _, row in rows]), columns=feature_names)
+                
+                with metrics.time('index_model'):
+                    X_scaled = self.scalers[index_name].transform(X)
+                    if hasattr(model, 'predict_proba'):
+                        all_probs = model.predict_proba(X_scaled)
+                        predictions = np.asarray(model.classes_)[np.argmax(all_probs, axis=1)]
+                    else:
+                        all_probs = None
+                        predictions = model.predict(X_scaled)
+                
+                feature_importance = self._top_feature_importance(model, feature_names, 5)
+                for i, (pos, _) in enumerate(rows):
+                    results[pos] = self._to_prediction(
+                        predictions[i],
+                        all_probs[i] if all_probs is not None else None,
+                        feature_importance
+                    )
+                    metrics.record_prediction(
+                        index_name, 'index_model', results[pos].predicted_direction,
+                        results[pos].confidence / 100, self.model_versions.get(index_name)
+                    )
+            except Exception as e:
+                logger.error(f"Prediction error: {e}")
+        
+        return results
+    
+    def _to_prediction(
+        self,
+        prediction: int,
+        probs: Optional[np.ndarray],
+        feature_importance: Dict[str, float]
+    ) -> MLPrediction:
+        """Build an MLPrediction from one row of model output"""
+        if probs is not None:
+            # Classes: 0=DOWN, 1=FLAT, 2=UP
+            prob_down = probs[0] if len(probs) > 0 else 0.33
+            prob_flat = probs[1] if len(probs) > 1 else 0.34
+            prob_up = probs[2] if len(probs) > 2 else 0.33
+        else:
+            prob_down = prob_flat = 0.33
+            prob_up = 0.34 if prediction == 2 else 0.33
+        
+        # Map prediction to direction
+        direction_map = {0: "DOWN", 1: "FLAT", 2: "UP"}
+        predicted_direction = direction_map.get(prediction, "FLAT")
+        
+        # Calculate confidence
+        confidence = max(prob_up, prob_down, prob_flat) * 100
+        
+        return MLPrediction(
+            predicted_direction=predicted_direction,
+            probability_up=prob_up,
+            probability_down=prob_down,
+            probability_flat=prob_flat,
+            confidence=confidence,
+            model_type=self.model_type,
+            feature_importance=feature_importance
+        )
+    
+    def _features_for(self, index_name: str) -> List[str]:
+        """Feature columns the index's model was trained on"""
+        return self.index_features.get(index_name, self.feature_names)
+    
+    def _top_feature_importance(self, model, feature_names: List[str], top_n: int) -> Dict[str, float]:
+        """Largest feature importances of a model (empty if unsupported)"""
+        if not hasattr(model, 'feature_importances_'):
+            return {}
+        feature_importance = {
+            name: float(imp) for name, imp in zip(feature_names, model.feature_importances_)
+        }
+        return dict(sorted(
+            feature_importance.items(),
+            key=lambda x: x[1],
+            reverse=True
+        )[:top_n])
     
     def optimize_probability(
         self,
@@ -565,25 +531,21 @@ class IndexMLOptimizer:
         
         return optimized
     
-    def save_model(self, index_name: str):
-        """Save trained model to disk"""
+    def save_model(self, index_name: str) -> bool:
+        """Save trained model to the registry as a new version"""
         if index_name not in self.is_fitted or not self.is_fitted[index_name]:
             logger.warning(f"No trained model for {index_name}")
             return False
         
         try:
-            model_path = os.path.join(self.model_dir, f'{index_name.lower()}_model.joblib')
-            scaler_path = os.path.join(self.model_dir, f'{index_name.lower()}_scaler.joblib')
-            
-            model_data = {
-                'model': self.models[index_name],
-                'feature_names': self.feature_names,
-                'model_type': self.model_type
-            }
-            
-            joblib.dump(model_data, model_path)
-            joblib.dump(self.scalers[index_name], scaler_path)
-            
+            self.model_versions[index_name] = self.registry.save(
+                index_name,
+                self.model_type,
+                self.models[index_name],
+                self.scalers[index_name],
+                self._features_for(index_name),
+                metrics=self.training_metrics.get(index_name)
+            )
             logger.info(f"Model saved for {index_name}")
             return True
         except Exception as e:
@@ -591,33 +553,47 @@ class IndexMLOptimizer:
             return False
     
     def _load_model(self, index_name: str) -> bool:
-        """Load trained model from disk"""
+        """Load trained model from the registry (legacy joblib pickles as fallback)"""
         try:
-            model_path = os.path.join(self.model_dir, f'{index_name.lower()}_model.joblib')
-            scaler_path = os.path.join(self.model_dir, f'{index_name.lower()}_scaler.joblib')
-            
-            if not os.path.exists(model_path) or not os.path.exists(scaler_path):
-                return False
-            
-            model_data = joblib.load(model_path)
-            self.models[index_name] = model_data['model']
-            self.feature_names = model_data['feature_names']
-            self.model_type = model_data['model_type']
-            self.scalers[index_name] = joblib.load(scaler_path)
-            self.is_fitted[index_name] = True
-            
-            logger.info(f"Model loaded for {index_name}")
-            return True
+            artifact = self.registry.load(index_name, self.model_type)
+            if artifact is not None:
+                self.models[index_name] = artifact.model
+                self.scalers[index_name] = artifact.scaler
+                self.index_features[index_name] = artifact.feature_names
+                self.model_versions[index_name] = artifact.version
+                self.is_fitted[index_name] = True
+                return True
+            return self._load_legacy_model(index_name)
         except Exception as e:
             logger.error(f"Error loading model: {e}")
             return False
     
+    def _load_legacy_model(self, index_name: str) -> bool:
+        """Load a model saved as separate joblib pickles (pre-registry format)"""
+        model_path = os.path.join(self.model_dir, f'{index_name.lower()}_model.joblib')
+        scaler_path = os.path.join(self.model_dir, f'{index_name.lower()}_scaler.joblib')
+        
+        if not os.path.exists(model_path) or not os.path.exists(scaler_path):
+            return False
+        
+        model_data = joblib.load(model_path)
+        self.models[index_name] = model_data['model']
+        self.index_features[index_name] = model_data['feature_names']
+        self.model_type = model_data['model_type']
+        self.scalers[index_name] = joblib.load(scaler_path)
+        self.is_fitted[index_name] = True
+        
+        logger.info(f"Legacy model loaded for {index_name}")
+        return True
+    
     def get_model_status(self) -> Dict:
         """Get status of all trained models"""
         return {
             index: {
                 'is_fitted': self.is_fitted.get(index, False),
-                'model_type': self.model_type
+                'model_type': self.model_type,
+                'version': self.model_versions.get(index),
+                'n_features': len(self.index_features.get(index, []))
             }
             for index in ['NIFTY', 'BANKNIFTY', 'SENSEX', 'FINNIFTY']
         }
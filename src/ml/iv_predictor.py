@@ -254,6 +254,170 @@ class IVPredictor:
             iv_risk_score=iv_risk
         )
     
+    def predict_iv_vectorized(
+        self,
+        iv_series: np.ndarray,
+        prices: np.ndarray,
+        timestamps,
+        is_expiry_day=False,
+        days_to_expiry=7,
+        upcoming_events: Optional[List[MarketEvent]] = None,
+        iv_window: int = 30
+    ) -> Dict[str, np.ndarray]:
+        """
+        IV prediction for every bar of a series (historical backfills).
+        
+        Row t matches predict_iv() called with current_iv=iv_series[t],
+        iv_history=iv_series[max(0, t-iv_window+1):t+1],
+        price_history=prices[:t+1] and timestamp=timestamps[t].
+        
+        Args:
+            iv_series: IV readings, oldest first
+            prices: Underlying prices aligned with iv_series
+            timestamps: Bar times (DatetimeIndex or datetime array-like)
+            is_expiry_day: Bool or per-bar bool array
+            days_to_expiry: Int or per-bar array
+            upcoming_events: Scheduled events (same list for every bar)
+            iv_window: Trailing IV readings used for the percentile
+        
+        Returns:
+            Dict of arrays: 'direction' (IVDirection objects), 'confidence',
+            'expected_iv_change_pct', 'predicted_iv', 'regime_percentile' and
+            the factor labels 'event_factor', 'time_factor', 'trend_factor',
+            'expiry_factor'
+        """
+        import pandas as pd
+        from src.ml.speed_predictor import trailing_windows
+        
+        iv = np.asarray(iv_series, dtype=np.float64)
+        prices = np.asarray(prices, dtype=np.float64)
+        n = len(iv)
+        history = np.arange(1, n + 1)
+        expiry = np.broadcast_to(np.asarray(is_expiry_day, dtype=bool), (n,))
+        dte = np.broadcast_to(np.asarray(days_to_expiry), (n,))
+        ts = pd.DatetimeIndex(timestamps)
+        
+        # Percentile within the trailing IV window (standard table for short histories)
+        window = trailing_windows(iv, iv_window)
+        window_len = np.minimum(history, iv_window)
+        percentile = (window <= iv[:, None]).sum(axis=1) / window_len * 100
+        table = sorted(self.iv_percentiles.items())
+        table_pct = np.select([iv <= value for _, value in table], [pct for pct, _ in table], 99)
+        percentile = np.where(window_len < 10, table_pct, percentile)
+        
+        # Events: the first event in the list that applies wins
+        event_factor = np.full(n, "NO_EVENT", dtype=object)
+        event_change = np.zeros(n)
+        if upcoming_events:
+            unassigned = np.ones(n, dtype=bool)
+            bar_days = ts.normalize()
+            if bar_days.tz is not None:
+                bar_days = bar_days.tz_localize(None)
+            for event in upcoming_events:
+                days_until = np.asarray((pd.Timestamp(event.date) - bar_days).days)
+                if event.time is not None:
+                    before = np.asarray(ts < pd.Timestamp(event.time))
+                else:
+                    before = np.zeros(n, dtype=bool)
+                rules = [
+                    (days_until == 0) & before,
+                    days_until == 0,
+                    days_until == 1,
+                    days_until == 2,
+                    days_until == -1
+                ]
+                labels = ["PRE_EVENT_IMMINENT", "POST_EVENT", "PRE_EVENT_24H", "PRE_EVENT_48H", "POST_EVENT_RECENT"]
+                changes = [
+                    self.patterns['pre_event_24h'], self.patterns['post_event_crush'],
+                    self.patterns['pre_event_24h'], self.patterns['pre_event_48h'],
+                    self.patterns['post_event_crush'] * 0.5
+                ]
+                for rule, label, change in zip(rules, labels, changes):
+                    hit = unassigned & rule
+                    event_factor[hit] = label
+                    event_change[hit] = change
+                    unassigned &= ~hit
+        
+        # Intraday timing
+        hour = np.asarray(ts.hour)
+        time_factor = np.where(
+            expiry,
+            np.select([hour < 12, hour < 14], ["EXPIRY_MORNING", "EXPIRY_AFTERNOON"], "EXPIRY_FINAL"),
+            np.select([hour < 10, hour < 13, hour < 14], ["MARKET_OPEN", "MORNING_SESSION", "LUNCH_SESSION"], "CLOSING_SESSION")
+        ).astype(object)
+        time_change = np.where(
+            expiry,
+            np.select([hour < 12, hour < 14], [-0.05, -0.15], -0.25),
+            np.select([hour < 10, hour < 13, hour < 14], [0.02, 0.0, -0.02], 0.03)
+        )
+        
+        # Price trend over the last 20 prices
+        start = np.maximum(history - 20, 0)
+        first_price = prices[start]
+        total_return = (prices - first_price) / first_price
+        speed = np.abs(total_return) / np.minimum(history, 20)
+        trend_rules = [
+            (total_return > 0.02) & (speed > 0.005), total_return > 0.02,
+            (total_return < -0.02) & (speed > 0.005), total_return < -0.02
+        ]
+        trend_factor = np.select(
+            trend_rules, ["FAST_UP_TREND", "SLOW_UP_TREND", "FAST_DOWN_TREND", "SLOW_DOWN_TREND"], "SIDEWAYS"
+        ).astype(object)
+        trend_change = np.select(trend_rules, [-0.05, -0.12, 0.20, 0.08], -0.08)
+        trend_factor[history < 10] = "INSUFFICIENT_DATA"
+        trend_change[history < 10] = 0.0
+        
+        # Expiry proximity
+        expiry_rules = [expiry, dte <= 1, dte <= 3, dte <= 7]
+        expiry_factor = np.select(
+            expiry_rules, ["EXPIRY_DAY", "EXPIRY_TOMORROW", "NEAR_EXPIRY", "APPROACHING_EXPIRY"], "FAR_EXPIRY"
+        ).astype(object)
+        expiry_change = np.select(expiry_rules, [self.patterns['expiry_day_decay'], -0.20, -0.10, -0.05], 0.0)
+        
+        # Regime mean reversion
+        regime_rules = [percentile >= 90, percentile >= 75, percentile >= 50, percentile >= 25]
+        regime_factor = np.select(
+            regime_rules, ["EXTREME_HIGH_REGIME", "HIGH_REGIME", "NORMAL_REGIME", "LOW_REGIME"], "EXTREME_LOW_REGIME"
+        ).astype(object)
+        regime_change = np.select(regime_rules, [-0.15, -0.08, 0.0, 0.05], 0.12)
+        
+        expected_iv_change = (
+            0.30 * event_change +
+            0.25 * regime_change +
+            0.20 * trend_change +
+            0.15 * expiry_change +
+            0.10 * time_change
+        )
+        
+        bucket = np.select(
+            [expected_iv_change > 0.15, expected_iv_change > 0.05, expected_iv_change > -0.05, expected_iv_change > -0.15],
+            [0, 1, 2, 3], 4
+        )
+        directions = np.array([
+            IVDirection.SPIKE, IVDirection.EXPAND, IVDirection.STABLE, IVDirection.CONTRACT, IVDirection.CRUSH
+        ], dtype=object)
+        
+        confidence = (
+            0.5
+            + np.where(np.isin(event_factor, ["PRE_EVENT_IMMINENT", "POST_EVENT", "PRE_EVENT_24H"]), 0.25, 0.0)
+            + np.where(np.isin(regime_factor, ["EXTREME_HIGH_REGIME", "EXTREME_LOW_REGIME"]), 0.15, 0.0)
+            + np.where(np.isin(trend_factor, ["FAST_DOWN_TREND", "SLOW_UP_TREND"]), 0.10, 0.0)
+            + np.where(np.abs(expected_iv_change) > 0.15, 0.10, 0.0)
+        )
+        confidence = np.minimum(0.92, np.maximum(0.35, confidence))
+        
+        return {
+            'direction': directions[bucket],
+            'confidence': confidence,
+            'expected_iv_change_pct': expected_iv_change * 100,
+            'predicted_iv': np.maximum(8, np.minimum(50, iv * (1 + expected_iv_change))),
+            'regime_percentile': percentile,
+            'event_factor': event_factor,
+            'time_factor': time_factor,
+            'trend_factor': trend_factor,
+            'expiry_factor': expiry_factor
+        }
+    
     def _get_iv_regime(self, current_iv: float) -> IVRegime:
         """Determine current IV regime."""
         if current_iv < 12:
@@ -0,0 +1,278 @@
+"""
+ML Inference Metrics
+====================
+
+In-process instrumentation for the ML prediction path:
+
+- Latency histogram per component (direction, speed, iv, theta,
+  simulation, index_model, ...) with call and error counts
+- Hit/miss counters for the ML caches (feature store, model registry,
+  ensemble cache)
+- A rolling record of prediction outputs per (index, component), so a
+  shift in the output distribution (e.g. after a model promotion) shows
+  up as the recent window drifting away from the one before it
+
+Everything lives in memory and resets on restart; it is meant for the
+/index/ml-metrics endpoint, not long-term storage.
+
+Author: TradeWise ML Team
+Created: 2026-02-02
+"""
+
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Tuple
+
+
+# Upper bounds (ms) of the latency buckets; slower calls land in the overflow bucket
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Predictions kept per (index, component)
+PREDICTION_HISTORY_SIZE = 500
+
+# Drift flags: label distribution shift (total variation distance) and
+# mean confidence shift between the recent window and the one before it
+DRIFT_TVD_THRESHOLD = 0.3
+DRIFT_CONFIDENCE_THRESHOLD = 0.15
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram"""
+
+    def __init__(self, buckets_ms: Tuple[float, ...] = LATENCY_BUCKETS_MS):
+        self.buckets_ms = buckets_ms
+        self.counts = [0] * (len(buckets_ms) + 1)
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, elapsed_ms: float, error: bool = False):
+        for i, bound in enumerate(self.buckets_ms):
+            if elapsed_ms <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.calls += 1
+        self.errors += int(error)
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Bucket upper bound containing the q-th percentile (max latency for the overflow bucket)"""
+        if self.calls == 0:
+            return None
+        rank = q / 100 * self.calls
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= rank and count:
+                return float(self.buckets_ms[i]) if i < len(self.buckets_ms) else round(self.max_ms, 2)
+        return round(self.max_ms, 2)
+
+    def to_dict(self) -> Dict:
+        labels = [f"le_{bound}ms" for bound in self.buckets_ms] + [f"gt_{self.buckets_ms[-1]}ms"]
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "mean_ms": round(self.total_ms / self.calls, 2) if self.calls else None,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": round(self.max_ms, 2),
+            "histogram": dict(zip(labels, self.counts))
+        }
+
+
+def _distribution(labels: List[str]) -> Dict[str, float]:
+    counts = Counter(labels)
+    return {label: round(count / len(labels), 4) for label, count in counts.most_common()}
+
+
+def _window_summary(records: List[Dict]) -> Dict:
+    confidences = [r["confidence"] for r in records if r["confidence"] is not None]
+    return {
+        "count": len(records),
+        "distribution": _distribution([r["label"] for r in records]),
+        "mean_confidence": round(sum(confidences) / len(confidences), 4) if confidences else None,
+        "from": records[0]["at"],
+        "to": records[-1]["at"]
+    }
+
+
+class MLMetrics:
+    """
+    Thread-safe latency, cache and prediction-output metrics
+    """
+
+    def __init__(self, history_size: int = PREDICTION_HISTORY_SIZE):
+        self.history_size = history_size
+        self.started_at = datetime.now().isoformat()
+        self._latency: Dict[str, LatencyHistogram] = {}
+        self._cache: Dict[str, List[int]] = {}
+        self._predictions: Dict[Tuple[str, str], Deque[Dict]] = {}
+        self._lock = threading.Lock()
+
+    # ---------------------------------------------------------------- latency
+
+    def record_latency(self, component: str, elapsed_seconds: float, error: bool = False):
+        with self._lock:
+            histogram = self._latency.get(component)
+            if histogram is None:
+                histogram = self._latency[component] = LatencyHistogram()
+            histogram.observe(elapsed_seconds * 1000, error)
+
+    @contextmanager
+    def time(self, component: str):
+        """
+        Time a block; an exception escaping it is counted as an error
+        (and re-raised)
+        """
+        started = time.perf_counter()
+        error = False
+        try:
+            yield
+        except Exception:
+            error = True
+            raise
+        finally:
+            self.record_latency(component, time.perf_counter() - started, error)
+
+    # ---------------------------------------------------------------- caches
+
+    def record_cache(self, cache: str, hit: bool):
+        with self._lock:
+            counts = self._cache.setdefault(cache, [0, 0])
+            counts[0 if hit else 1] += 1
+
+    # ----------------------------------------------------------- predictions
+
+    def record_prediction(
+        self,
+        index_name: str,
+        component: str,
+        label: str,
+        confidence: Optional[float] = None,
+        model_version: Optional[str] = None
+    ):
+        """
+        Append one prediction output to the rolling record
+
+        Args:
+            index_name: Index (or symbol) the prediction is for
+            component: Producing component, e.g. "direction"
+            label: Predicted class / category
+            confidence: 0-1 confidence
+            model_version: Model version that produced it
+        """
+        record = {
+            "at": datetime.now().isoformat(timespec="seconds"),
+            "label": str(label),
+            "confidence": float(confidence) if confidence is not None else None,
+            "model_version": str(model_version) if model_version is not None else None
+        }
+        key = (index_name.upper(), component)
+        with self._lock:
+            history = self._predictions.get(key)
+            if history is None:
+                history = self._predictions[key] = deque(maxlen=self.history_size)
+            history.append(record)
+
+    def drift(self, index_name: Optional[str] = None, window: int = 50) -> Dict:
+        """
+        Compare the latest `window` predictions with the `window` before them
+
+        Returns:
+            {"INDEX": {"component": summary}} with the recent window's
+            distribution, the shift against the previous window, and a
+            breakdown per model version
+        """
+        with self._lock:
+            snapshot = {
+                key: list(history) for key, history in self._predictions.items()
+                if index_name is None or key[0] == index_name.upper()
+            }
+
+        report: Dict[str, Dict] = {}
+        for (index, component), records in sorted(snapshot.items()):
+            recent = records[-window:]
+            summary = {"recent": _window_summary(recent)}
+
+            previous = records[-2 * window:-window]
+            if previous:
+                summary["previous"] = _window_summary(previous)
+                labels = set(summary["recent"]["distribution"]) | set(summary["previous"]["distribution"])
+                tvd = 0.5 * sum(
+                    abs(summary["recent"]["distribution"].get(label, 0) - summary["previous"]["distribution"].get(label, 0))
+                    for label in labels
+                )
+                confidence_shift = None
+                if summary["recent"]["mean_confidence"] is not None and summary["previous"]["mean_confidence"] is not None:
+                    confidence_shift = round(summary["recent"]["mean_confidence"] - summary["previous"]["mean_confidence"], 4)
+                summary["label_shift_tvd"] = round(tvd, 4)
+                summary["confidence_shift"] = confidence_shift
+                summary["drift_flag"] = (
+                    len(previous) >= window // 2 and (
+                        tvd > DRIFT_TVD_THRESHOLD
+                        or (confidence_shift is not None and abs(confidence_shift) > DRIFT_CONFIDENCE_THRESHOLD)
+                    )
+                )
+
+            by_version: Dict[str, List[Dict]] = {}
+            for record in records:
+                if record["model_version"] is not None:
+                    by_version.setdefault(record["model_version"], []).append(record)
+            if by_version:
+                summary["by_model_version"] = {
+                    version: _window_summary(version_records) for version, version_records in by_version.items()
+                }
+
+            report.setdefault(index, {})[component] = summary
+        return report
+
+    # --------------------------------------------------------------- reporting
+
+    def snapshot(self, index_name: Optional[str] = None, window: int = 50) -> Dict:
+        """Latency, cache and drift metrics as one JSON-ready dict"""
+        with self._lock:
+            latency = {component: h.to_dict() for component, h in sorted(self._latency.items())}
+            caches = {
+                cache: {
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_rate": round(hits / (hits + misses), 4) if hits + misses else None
+                }
+                for cache, (hits, misses) in sorted(self._cache.items())
+            }
+        return {
+            "since": self.started_at,
+            "latency": latency,
+            "caches": caches,
+            "predictions": self.drift(index_name, window)
+        }
+
+    def reset(self):
+        with self._lock:
+            self.started_at = datetime.now().isoformat()
+            self._latency.clear()
+            self._cache.clear()
+            self._predictions.clear()
+
+
+# Global metrics instance
+_ml_metrics: Optional[MLMetrics] = None
+_ml_metrics_lock = threading.Lock()
+
+
+def get_ml_metrics() -> MLMetrics:
+    """Get or create the process-wide ML metrics"""
+    global _ml_metrics
+    if _ml_metrics is None:
+        with _ml_metrics_lock:
+            if _ml_metrics is None:
+                _ml_metrics = MLMetrics()
+    return _ml_metrics
@@ -0,0 +1,256 @@
+"""
+Index ML Model Registry
+=======================
+
+Versioned, fast-loading artifacts for IndexMLOptimizer models.
+
+One artifact per (index, model_type, version), under
+models/saved_models/registry/<index>/<model_type>/v<N>/:
+
+- manifest.json       feature list, classes, metrics, model format
+- scaler_mean.npy     StandardScaler parameters as plain arrays
+- scaler_scale.npy
+- model.ubj           XGBoost native binary (xgboost models)
+- model.joblib        sklearn estimators (random_forest, logistic, ...)
+
+Loading is lazy and per process: an artifact is read on first use and
+cached in that process. XGBoost models load from their native binary
+(no pickle). Models are not shared between API workers; each worker holds
+its own copy. model.ubj is read into private memory, and sklearn trees
+copy their node arrays into each Tree even under mmap_mode='r'. Only
+plain array attributes (the scaler arrays, linear coefficients) stay
+memory-mapped, and those are small.
+
+Author: TradeWise ML Team
+Created: 2026-02-02
+"""
+
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import joblib
+import numpy as np
+
+from src.ml.ml_metrics import get_ml_metrics
+
+logger = logging.getLogger(__name__)
+
+
+# Versions kept per (index, model_type); older ones are deleted on save
+KEEP_VERSIONS = 3
+
+DEFAULT_REGISTRY_DIR = os.path.join(os.path.dirname(__file__), '../../models/saved_models/registry')
+
+
+@dataclass
+class ModelArtifact:
+    """A loaded model with its scaler and per-model feature list"""
+    index_name: str
+    model_type: str
+    version: int
+    model: object
+    scaler: object
+    feature_names: List[str]
+    metrics: Dict = field(default_factory=dict)
+    created_at: str = ""
+
+
+def _is_xgboost(model) -> bool:
+    return type(model).__module__.startswith("xgboost")
+
+
+def _build_scaler(mean: np.ndarray, scale: np.ndarray, feature_names: List[str]):
+    """Rebuild a fitted StandardScaler from its parameter arrays"""
+    from sklearn.preprocessing import StandardScaler
+
+    scaler = StandardScaler()
+    scaler.mean_ = mean
+    scaler.scale_ = scale
+    scaler.var_ = np.square(scale)
+    scaler.n_features_in_ = len(mean)
+    scaler.feature_names_in_ = np.asarray(feature_names, dtype=object)
+    scaler.n_samples_seen_ = 0
+    return scaler
+
+
+class ModelRegistry:
+    """
+    Versioned model artifacts with lazy, memory-mapped loading
+    """
+
+    def __init__(self, root_dir: str = DEFAULT_REGISTRY_DIR, keep_versions: int = KEEP_VERSIONS):
+        """
+        Args:
+            root_dir: Registry directory
+            keep_versions: Versions kept per (index, model_type); the latest is
+                always kept, so 0 keeps only it
+        """
+        self.root_dir = root_dir
+        self.keep_versions = keep_versions
+        self._loaded: Dict[Tuple[str, str, int], ModelArtifact] = {}
+        self._lock = threading.Lock()
+
+    def _model_dir(self, index_name: str, model_type: str) -> str:
+        return os.path.join(self.root_dir, index_name.lower(), model_type)
+
+    def versions(self, index_name: str, model_type: str) -> List[int]:
+        """Saved versions, oldest first"""
+        model_dir = self._model_dir(index_name, model_type)
+        if not os.path.isdir(model_dir):
+            return []
+        versions = []
+        for name in os.listdir(model_dir):
+            if name.startswith("v") and name[1:].isdigit():
+                if os.path.exists(os.path.join(model_dir, name, "manifest.json")):
+                    versions.append(int(name[1:]))
+        return sorted(versions)
+
+    def latest_version(self, index_name: str, model_type: str) -> Optional[int]:
+        versions = self.versions(index_name, model_type)
+        return versions[-1] if versions else None
+
+    def save(
+        self,
+        index_name: str,
+        model_type: str,
+        model,
+        scaler,
+        feature_names: List[str],
+        metrics: Optional[Dict] = None
+    ) -> int:
+        """
+        Write a new artifact version
+
+        The version directory is written under a temporary name and renamed
+        into place, so readers never see a partial artifact.
+
+        Returns:
+            The new version number
+        """
+        model_dir = self._model_dir(index_name, model_type)
+        os.makedirs(model_dir, exist_ok=True)
+
+        with self._lock:
+            version = (self.latest_version(index_name, model_type) or 0) + 1
+            tmp_dir = os.path.join(model_dir, f".tmp-{uuid.uuid4().hex[:8]}")
+            os.makedirs(tmp_dir)
+            try:
+                if _is_xgboost(model):
+                    model_format = "xgboost"
+                    model.save_model(os.path.join(tmp_dir, "model.ubj"))
+                else:
+                    model_format = "joblib"
+                    joblib.dump(model, os.path.join(tmp_dir, "model.joblib"))
+
+                np.save(os.path.join(tmp_dir, "scaler_mean.npy"), np.asarray(scaler.mean_, dtype=np.float64))
+                np.save(os.path.join(tmp_dir, "scaler_scale.npy"), np.asarray(scaler.scale_, dtype=np.float64))
+
+                classes = getattr(model, "classes_", None)
+                manifest = {
+                    "index": index_name,
+                    "model_type": model_type,
+                    "version": version,
+                    "format": model_format,
+                    "feature_names": list(feature_names),
+                    "classes": [int(c) for c in classes] if classes is not None else None,
+                    "metrics": metrics or {},
+                    "created_at": datetime.now().isoformat()
+                }
+                with open(os.path.join(tmp_dir, "manifest.json"), "w") as f:
+                    json.dump(manifest, f, indent=2, default=float)
+
+                os.rename(tmp_dir, os.path.join(model_dir, f"v{version}"))
+            except Exception:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                raise
+
+            self._prune(index_name, model_type)
+
+        logger.info(f"💾 Saved {index_name} {model_type} model v{version}")
+        return version
+
+    def _prune(self, index_name: str, model_type: str):
+        model_dir = self._model_dir(index_name, model_type)
+        # max(1, ...): a [:-0] slice would prune nothing, and the version
+        # just saved must survive
+        keep = max(1, self.keep_versions)
+        for version in self.versions(index_name, model_type)[:-keep]:
+            shutil.rmtree(os.path.join(model_dir, f"v{version}"), ignore_errors=True)
+            self._loaded.pop((index_name.lower(), model_type, version), None)
+
+    def load(self, index_name: str, model_type: str, version: Optional[int] = None) -> Optional[ModelArtifact]:
+        """
+        Load an artifact (latest version by default), cached per process
+
+        Returns:
+            ModelArtifact, or None when nothing is saved
+        """
+        if version is None:
+            version = self.latest_version(index_name, model_type)
+            if version is None:
+                return None
+
+        key = (index_name.lower(), model_type, version)
+        with self._lock:
+            artifact = self._loaded.get(key)
+            get_ml_metrics().record_cache("model_registry", hit=artifact is not None)
+            if artifact is None:
+                artifact = self._read(index_name, model_type, version)
+                if artifact is not None:
+                    self._loaded[key] = artifact
+        return artifact
+
+    def _read(self, index_name: str, model_type: str, version: int) -> Optional[ModelArtifact]:
+        path = os.path.join(self._model_dir(index_name, model_type), f"v{version}")
+        manifest_path = os.path.join(path, "manifest.json")
+        if not os.path.exists(manifest_path):
+            return None
+
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        feature_names = manifest["feature_names"]
+
+        if manifest["format"] == "xgboost":
+            import xgboost as xgb
+            model = xgb.XGBClassifier()
+            model.load_model(os.path.join(path, "model.ubj"))
+        else:
+            # Plain array attributes stay memory-mapped; tree nodes are copied on load
+            model = joblib.load(os.path.join(path, "model.joblib"), mmap_mode="r")
+
+        scaler = _build_scaler(
+            np.load(os.path.join(path, "scaler_mean.npy"), mmap_mode="r"),
+            np.load(os.path.join(path, "scaler_scale.npy"), mmap_mode="r"),
+            feature_names
+        )
+
+        logger.info(f"📦 Loaded {index_name} {model_type} model v{version}")
+        return ModelArtifact(
+            index_name=index_name,
+            model_type=model_type,
+            version=version,
+            model=model,
+            scaler=scaler,
+            feature_names=feature_names,
+            metrics=manifest.get("metrics", {}),
+            created_at=manifest.get("created_at", "")
+        )
+
+
+# Global registry instance
+_model_registry: Optional[ModelRegistry] = None
+
+
+def get_model_registry() -> ModelRegistry:
+    """Get or create the model registry"""
+    global _model_registry
+    if _model_registry is None:
+        _model_registry = ModelRegistry()
+    return _model_registry
@@ -0,0 +1,245 @@
+"""
+Monte Carlo Options P&L
+=======================
+
+Vectorized path simulation for OptionsPnLSimulator.
+
+The scenario simulator prices five hand-picked moves with a Greeks
+(Taylor) expansion. This module simulates thousands of spot and IV paths
+over the holding horizon instead and reprices the option with full
+Black-Scholes on every path and step as one array operation, giving:
+
+- P&L distribution at the horizon (percentiles, VaR)
+- Probability of touching T1 / T2 / stop loss during the hold
+- Expected value, both held to horizon and managed (exit at first T1/SL)
+
+Spot paths are GBM at the option's IV, or bootstrapped from recent candle
+returns when enough history is supplied. Time runs on the trading clock:
+375 trading minutes are one trading day, i.e. 365/252 calendar days off
+days-to-expiry.
+
+Author: TradeWise ML Team
+Created: 2026-02-02
+"""
+
+import time
+import math
+import numpy as np
+from typing import Dict, List, Optional
+from dataclasses import dataclass
+
+from src.analytics.theta_decay_table import bs_call_over_spot
+
+
+# Minimum candle returns needed before bootstrapping instead of GBM
+MIN_BOOTSTRAP_RETURNS = 20
+
+# Long horizons use coarser steps so a call stays within ~50ms
+MAX_STEPS = 24
+
+
+@dataclass
+class MonteCarloPnL:
+    """P&L distribution from simulated spot/IV paths"""
+    n_paths: int
+    horizon_mins: int
+    path_model: str  # "gbm" or "bootstrap"
+
+    # Held to horizon
+    expected_pnl: float
+    expected_pnl_pct: float
+    pnl_std: float
+    win_probability: float
+    pnl_percentiles: Dict[str, float]  # p5, p25, p50, p75, p95
+    var_95: float  # Loss not exceeded in 95% of paths
+
+    # Path-dependent levels (premium prices)
+    target1: float
+    target2: float
+    stop_loss: float
+    prob_hit_target1: float
+    prob_hit_target2: float
+    prob_hit_stop_loss: float
+    prob_target1_before_stop: float
+
+    # Exit at first touch of T1 or SL, else at horizon
+    expected_pnl_managed: float
+
+    elapsed_ms: float
+
+
+class MonteCarloPnLSimulator:
+    """
+    Simulates option P&L over a holding horizon with full repricing.
+
+    All paths and steps are priced in one NumPy call, so a default run
+    (4000 paths, 5-min steps, 2-hour hold) takes well under 50ms.
+    """
+
+    def __init__(
+        self,
+        n_paths: int = 4000,
+        step_mins: int = 5,
+        risk_free_rate: float = 0.07,
+        iv_vol_per_hour: float = 0.05,
+        seed: Optional[int] = None
+    ):
+        self.n_paths = n_paths
+        self.step_mins = step_mins
+        self.risk_free_rate = risk_free_rate
+        self.iv_vol_per_hour = iv_vol_per_hour  # Relative IV noise, scales with sqrt(hours)
+        self.trading_minutes_per_day = 375
+        self.trading_days_per_year = 252
+        self.rng = np.random.default_rng(seed)
+
+    def simulate(
+        self,
+        option_type: str,
+        strike: float,
+        premium: float,
+        spot_price: float,
+        current_iv: float,
+        days_to_expiry: float,
+        horizon_mins: int,
+        expected_move_pct: float = 0.0,
+        expected_iv_change_pct: float = 0.0,
+        target1: Optional[float] = None,
+        target2: Optional[float] = None,
+        stop_loss: Optional[float] = None,
+        price_history: Optional[List[float]] = None
+    ) -> MonteCarloPnL:
+        """
+        Simulate P&L paths for a long option position.
+
+        Args:
+            option_type: "CE" or "PE"
+            strike: Option strike price
+            premium: Current (entry) premium
+            spot_price: Current underlying price
+            current_iv: Implied volatility as % (e.g., 16.5)
+            days_to_expiry: Days until expiry (can be fractional)
+            horizon_mins: Holding horizon in trading minutes
+            expected_move_pct: Expected spot move over the horizon (signed %)
+            expected_iv_change_pct: Expected relative IV change over the horizon (%)
+            target1/target2/stop_loss: Premium levels (default +30%/+60%/-30%)
+            price_history: Recent closes (hourly) to bootstrap returns from
+
+        Returns:
+            MonteCarloPnL with distribution and hit probabilities
+        """
+        started = time.perf_counter()
+
+        target1 = target1 if target1 is not None else premium * 1.3
+        target2 = target2 if target2 is not None else premium * 1.6
+        stop_loss = stop_loss if stop_loss is not None else premium * 0.7
+
+        n_steps = min(max(1, math.ceil(horizon_mins / self.step_mins)), MAX_STEPS)
+        step_mins = horizon_mins / n_steps if horizon_mins > 0 else self.step_mins
+        elapsed = step_mins * np.arange(1, n_steps + 1)  # minutes at each step
+
+        spot_paths, path_model = self._spot_paths(
+            spot_price, current_iv / 100, n_steps, step_mins,
+            expected_move_pct, price_history
+        )
+        iv_paths = self._iv_paths(current_iv / 100, n_steps, step_mins, expected_iv_change_pct)
+        calendar_days_per_trading_minute = 365 / (self.trading_days_per_year * self.trading_minutes_per_day)
+        dte_steps = np.maximum(days_to_expiry - elapsed * calendar_days_per_trading_minute, 0.0)
+
+        # Reprice relative to the model value at entry so P&L is anchored to the market premium
+        model_entry = self._price(option_type, strike, np.array([spot_price]), current_iv / 100, days_to_expiry)[0]
+        model_paths = self._price(option_type, strike, spot_paths, iv_paths, dte_steps[None, :])
+        premium_paths = np.maximum(premium + model_paths - model_entry, 0.0)
+
+        final_pnl = premium_paths[:, -1] - premium
+
+        # First-touch step per path (n_steps = never touched)
+        first_t1 = self._first_touch(premium_paths >= target1)
+        first_t2 = self._first_touch(premium_paths >= target2)
+        first_sl = self._first_touch(premium_paths <= stop_loss)
+
+        # Managed exit: take T1 or SL at whichever touches first, else hold to horizon
+        managed_pnl = final_pnl.copy()
+        t1_first = first_t1 < first_sl
+        sl_first = first_sl < first_t1
+        managed_pnl[t1_first] = target1 - premium
+        managed_pnl[sl_first] = stop_loss - premium
+
+        percentiles = np.percentile(final_pnl, [5, 25, 50, 75, 95])
+        expected = float(final_pnl.mean())
+
+        return MonteCarloPnL(
+            n_paths=self.n_paths,
+            horizon_mins=int(horizon_mins),
+            path_model=path_model,
+            expected_pnl=round(expected, 2),
+            expected_pnl_pct=round(expected / premium * 100, 1) if premium > 0 else 0,
+            pnl_std=round(float(final_pnl.std()), 2),
+            win_probability=round(float((final_pnl > 0).mean()), 3),
+            pnl_percentiles={
+                f"p{p}": round(float(v), 2) for p, v in zip([5, 25, 50, 75, 95], percentiles)
+            },
+            var_95=round(float(max(0.0, -percentiles[0])), 2),
+            target1=round(target1, 2),
+            target2=round(target2, 2),
+            stop_loss=round(stop_loss, 2),
+            prob_hit_target1=round(float((first_t1 < n_steps).mean()), 3),
+            prob_hit_target2=round(float((first_t2 < n_steps).mean()), 3),
+            prob_hit_stop_loss=round(float((first_sl < n_steps).mean()), 3),
+            prob_target1_before_stop=round(float(t1_first.mean()), 3),
+            expected_pnl_managed=round(float(managed_pnl.mean()), 2),
+            elapsed_ms=round((time.perf_counter() - started) * 1000, 2)
+        )
+
+    def _spot_paths(
+        self,
+        spot: float,
+        iv: float,
+        n_steps: int,
+        step_mins: float,
+        expected_move_pct: float,
+        price_history: Optional[List[float]]
+    ):
+        """Spot price paths, shape (n_paths, n_steps)"""
+        drift_per_step = math.log(1 + expected_move_pct / 100) / n_steps
+
+        returns = None
+        if price_history is not None and len(price_history) > MIN_BOOTSTRAP_RETURNS:
+            closes = np.asarray(price_history, dtype=np.float64)
+            closes = closes[closes > 0]
+            if len(closes) > MIN_BOOTSTRAP_RETURNS:
+                returns = np.diff(np.log(closes))
+
+        if returns is not None:
+            # Demeaned hourly returns rescaled to the step length; drift comes from the ML forecast
+            returns = (returns - returns.mean()) * math.sqrt(step_mins / 60)
+            shocks = self.rng.choice(returns, size=(self.n_paths, n_steps), replace=True)
+            path_model = "bootstrap"
+        else:
+            step_years = step_mins / (self.trading_minutes_per_day * self.trading_days_per_year)
+            sigma = iv * math.sqrt(step_years)
+            shocks = sigma * self.rng.standard_normal((self.n_paths, n_steps)) - 0.5 * sigma ** 2
+            path_model = "gbm"
+
+        return spot * np.exp(np.cumsum(shocks + drift_per_step, axis=1)), path_model
+
+    def _iv_paths(self, iv: float, n_steps: int, step_mins: float, expected_iv_change_pct: float) -> np.ndarray:
+        """Log-normal IV random walk drifting to the predicted change, shape (n_paths, n_steps)"""
+        drift_per_step = math.log(max(1 + expected_iv_change_pct / 100, 0.05)) / n_steps
+        sigma = self.iv_vol_per_hour * math.sqrt(step_mins / 60)
+        shocks = sigma * self.rng.standard_normal((self.n_paths, n_steps))
+        return iv * np.exp(np.cumsum(shocks + drift_per_step, axis=1))
+
+    def _price(self, option_type: str, strike: float, spot, iv, days_to_expiry) -> np.ndarray:
+        """Black-Scholes premium, broadcasting over path arrays"""
+        log_moneyness = np.log(strike / spot)
+        call = bs_call_over_spot(log_moneyness, days_to_expiry, iv, self.risk_free_rate) * spot
+        if option_type.upper() in ("CE", "CALL"):
+            return call
+        discounted_strike = strike * np.exp(-self.risk_free_rate * np.asarray(days_to_expiry) / 365)
+        return np.maximum(call - spot + discounted_strike, 0.0)
+
+    @staticmethod
+    def _first_touch(hit: np.ndarray) -> np.ndarray:
+        """Index of the first True per row, or n_steps when never True"""
+        first = np.argmax(hit, axis=1)
+        return np.where(hit.any(axis=1), first, hit.shape[1])
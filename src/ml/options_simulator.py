@@ -32,6 +32,7 @@ from src.ml.speed_predictor import SpeedPredictor, SpeedCategory, SpeedPredictio
 from src.ml.iv_predictor import IVPredictor, IVDirection, IVPrediction
 from src.ml.theta_scenario_planner import ThetaScenarioPlanner, ThetaScenarioResult
 from src.ml.xgboost_direction import XGBoostDirectionPredictor, Direction, DirectionPrediction
+from src.ml.monte_carlo_pnl import MonteCarloPnLSimulator, MonteCarloPnL
 
 IST = pytz.timezone('Asia/Kolkata')
 
@@ -133,6 +134,9 @@ class OptionsSimulationResult:
     stop_loss: float
     take_profit: float
     max_hold_time_mins: int
+    
+    # Optional Monte Carlo distribution (simulate(..., monte_carlo=True))
+    monte_carlo: Optional[MonteCarloPnL] = None
 
 
 class OptionsPnLSimulator:
@@ -141,11 +145,12 @@ class OptionsPnLSimulator:
     realistic option P&L scenarios.
     """
     
-    def __init__(self):
+    def __init__(self, monte_carlo_paths: int = 4000):
         self.speed_predictor = SpeedPredictor()
         self.iv_predictor = IVPredictor()
         self.theta_planner = ThetaScenarioPlanner()
         self.direction_predictor = XGBoostDirectionPredictor()
+        self.monte_carlo = MonteCarloPnLSimulator(n_paths=monte_carlo_paths)
     
     def simulate(
         self,
@@ -160,6 +165,7 @@ class OptionsPnLSimulator:
         iv_history: Optional[List[float]] = None,
         timestamp: Optional[datetime] = None,
         is_expiry_day: bool = False,
+        monte_carlo: bool = False,
     ) -> OptionsSimulationResult:
         """
         Run complete P&L simulation using all ML models.
@@ -176,6 +182,7 @@ class OptionsPnLSimulator:
             iv_history: Historical IV values
             timestamp: Current timestamp
             is_expiry_day: Whether it's expiry day
+            monte_carlo: Also simulate spot/IV paths with full repricing
         
         Returns:
             OptionsSimulationResult with complete analysis
@@ -288,6 +295,29 @@ class OptionsPnLSimulator:
                 theta_result, is_expiry_day
             )
         
+        # ============================================
+        # STEP 8: Monte Carlo Distribution (optional)
+        # ============================================
+        
+        mc_result = None
+        if monte_carlo:
+            # Direction forecast is in spot terms; T1/T2/SL in premium terms
+            mc_result = self.monte_carlo.simulate(
+                option_type=option_type,
+                strike=strike,
+                premium=premium,
+                spot_price=spot_price,
+                current_iv=current_iv,
+                days_to_expiry=days_to_expiry,
+                horizon_mins=max_hold,
+                expected_move_pct=direction_pred.expected_move_pct * direction_pred.confidence,
+                expected_iv_change_pct=iv_pred.expected_iv_change_pct,
+                target1=premium + target,
+                target2=premium + 2 * target,
+                stop_loss=premium - stop,
+                price_history=price_history
+            )
+        
         return OptionsSimulationResult(
             option_type=option_type,
             strike=strike,
@@ -315,7 +345,8 @@ class OptionsPnLSimulator:
             exit_strategy=exit_strat,
             stop_loss=round(stop, 2),
             take_profit=round(target, 2),
-            max_hold_time_mins=max_hold
+            max_hold_time_mins=max_hold,
+            monte_carlo=mc_result
         )
     
     def _create_prediction_summary(
@@ -693,7 +724,7 @@ class OptionsPnLSimulator:
     
     def to_dict(self, result: OptionsSimulationResult) -> Dict:
         """Convert simulation result to dictionary for API response."""
-        return {
+        response = {
             'option_details': {
                 'type': result.option_type,
                 'strike': result.strike,
@@ -745,6 +776,9 @@ class OptionsPnLSimulator:
                 'max_hold_time_mins': result.max_hold_time_mins
             }
         }
+        if result.monte_carlo is not None:
+            response['monte_carlo'] = asdict(result.monte_carlo)
+        return response
 
 
 def create_simulator() -> OptionsPnLSimulator:
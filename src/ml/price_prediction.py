@@ -15,6 +15,8 @@ import joblib
 from datetime import datetime, timedelta
 import logging
 
+from src.ml.training_config import fit_estimator, get_training_config, to_float32
+
 logger = logging.getLogger(__name__)
 
 
@@ -126,7 +128,8 @@ class PricePredictor:
         self.is_fitted = False
     
     def _create_model(self):
-        """Create the ML model based on type"""
+        """Create the ML model based on type (threads pinned to the training budget)"""
+        n_jobs = get_training_config().n_jobs
         if self.model_type == "xgboost":
             return xgb.XGBRegressor(
                 n_estimators=100,
@@ -134,7 +137,8 @@ class PricePredictor:
                 learning_rate=0.1,
                 subsample=0.8,
                 colsample_bytree=0.8,
-                random_state=42
+                random_state=42,
+                n_jobs=n_jobs
             )
         elif self.model_type == "lightgbm":
             return lgb.LGBMRegressor(
@@ -143,14 +147,15 @@ class PricePredictor:
                 learning_rate=0.1,
                 subsample=0.8,
                 colsample_bytree=0.8,
-                random_state=42
+                random_state=42,
+                n_jobs=n_jobs
             )
         elif self.model_type == "random_forest":
             return RandomForestRegressor(
                 n_estimators=100,
                 max_depth=10,
                 random_state=42,
-                n_jobs=-1
+                n_jobs=n_jobs
             )
         elif self.model_type == "gradient_boosting":
             return GradientBoostingRegressor(
@@ -218,12 +223,11 @@ class PricePredictor:
         y_train, y_test = y[:split_idx], y[split_idx:]
         
         # Scale features
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_test_scaled = self.scaler.transform(X_test)
+        X_train_scaled = to_float32(self.scaler.fit_transform(X_train))
+        X_test_scaled = to_float32(self.scaler.transform(X_test))
         
-        # Train model
-        self.model = self._create_model()
-        self.model.fit(X_train_scaled, y_train)
+        # Train model (early stopping on the tail of the training rows)
+        self.model, report = fit_estimator(self._create_model(), X_train_scaled, y_train.to_numpy(), get_training_config())
         self.is_fitted = True
         
         # Evaluate
@@ -238,7 +242,8 @@ class PricePredictor:
             "train_r2": r2_score(y_train, train_pred),
             "test_r2": r2_score(y_test, test_pred),
             "train_samples": len(X_train),
-            "test_samples": len(X_test)
+            "test_samples": len(X_test),
+            "training_report": report.to_dict()
         }
         
         logger.info(f"Model trained. Test RMSE: {metrics['test_rmse']:.4f}, "
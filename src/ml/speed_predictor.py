@@ -68,6 +68,18 @@ class SpeedPrediction:
     breakeven_time_mins: int  # Time before theta decay exceeds potential gain
 
 
+def trailing_windows(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Row t holds values[t-window+1 : t+1], NaN-padded at the start
+
+    Lets per-bar "last N values" rules run as one array operation
+    (use nan-aware reductions for the first window-1 rows).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    padded = np.concatenate([np.full(window - 1, np.nan), values])
+    return np.lib.stride_tricks.sliding_window_view(padded, window)
+
+
 class SpeedPredictor:
     """
     Predicts speed/velocity of price movement using multiple factors.
@@ -217,6 +229,143 @@ class SpeedPredictor:
             breakeven_time_mins=breakeven_time
         )
     
+    def predict_speed_vectorized(
+        self,
+        prices: np.ndarray,
+        volumes: np.ndarray,
+        timestamps,
+        is_expiry_day=False,
+        oi_score=0.5,
+        news_score=0.0
+    ) -> Dict[str, np.ndarray]:
+        """
+        Speed prediction for every bar of a series (historical backfills).
+        
+        Row t matches predict_speed() called with price_history=prices[:t+1],
+        volume_history=volumes[:t+1], current_volume=volumes[t] and
+        timestamp=timestamps[t].
+        
+        Args:
+            prices: Close prices, oldest first
+            volumes: Volumes aligned with prices
+            timestamps: Bar times (DatetimeIndex or datetime array-like)
+            is_expiry_day: Bool or per-bar bool array
+            oi_score: OI speed score (scalar or per-bar; 0.5 = no OI data)
+            news_score: News impact score (scalar or per-bar)
+        
+        Returns:
+            Dict of arrays: 'category' (SpeedCategory objects), 'combined_score',
+            'confidence', 'expected_move_pct', 'expected_time_mins' and the
+            factor scores 'volume_score', 'time_of_day_score',
+            'volatility_squeeze_score', 'momentum_score'
+        """
+        import pandas as pd
+        
+        prices = np.asarray(prices, dtype=np.float64)
+        volumes = np.asarray(volumes, dtype=np.float64)
+        n = len(prices)
+        history = np.arange(1, n + 1)
+        expiry = np.broadcast_to(np.asarray(is_expiry_day, dtype=bool), (n,))
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Volume surge
+            avg_volume = np.nanmean(trailing_windows(volumes, 20), axis=1)
+            ratio = volumes / avg_volume
+            volume_score = np.select(
+                [ratio <= 0.5, ratio <= 1.0, ratio <= 2.0, ratio <= 3.0],
+                [0.1, 0.2 + (ratio - 0.5) * 0.4, 0.4 + (ratio - 1.0) * 0.3, 0.7 + (ratio - 2.0) * 0.2],
+                np.minimum(0.98, 0.9 + (ratio - 3.0) * 0.05)
+            )
+            volume_score = np.where((history < 10) | (avg_volume == 0), 0.5, volume_score)
+            
+            # Time of day
+            ts = pd.DatetimeIndex(timestamps)
+            mins = np.asarray(ts.hour * 60 + ts.minute)
+            time_score = np.full(n, 0.5)
+            for start, end in self.slow_periods:
+                time_score = np.where((mins >= start) & (mins <= end), 0.25, time_score)
+            # Earlier periods win, so apply the lists in reverse
+            for periods, mask in ((self.fast_periods, ~expiry), (self.expiry_fast_periods, expiry)):
+                for start, end in reversed(periods):
+                    progress = (mins - start) / (end - start)
+                    peak = 0.7 + 0.2 * (1 - np.abs(progress - 0.5) * 2)
+                    peak = np.where(expiry & (mins >= 14 * 60), 0.95, peak)
+                    time_score = np.where(mask & (mins >= start) & (mins <= end), peak, time_score)
+            time_score = np.where((mins < self.market_open) | (mins > self.market_close), 0.0, time_score)
+            
+            # Volatility squeeze
+            last_20 = trailing_windows(prices, 20)
+            sma = np.nanmean(last_20, axis=1)
+            std = np.nanstd(last_20, axis=1)
+            current_bandwidth = (2 * std) / sma
+            # predict_speed slices the last 30 prices with [-50:-20], i.e. bars t-29..t-20
+            hist_10 = trailing_windows(prices, 10)[np.maximum(history - 21, 0)]
+            hist_bandwidth = np.where(
+                history >= 50,
+                (2 * np.nanstd(hist_10, axis=1)) / np.nanmean(hist_10, axis=1),
+                current_bandwidth
+            )
+            squeeze_ratio = np.where(hist_bandwidth == 0, 1.0, current_bandwidth / hist_bandwidth)
+            band_position = np.minimum(2.0, np.abs(prices - sma) / (std + 0.0001)) / 2.0
+            base_score = np.select(
+                [squeeze_ratio <= 0.5, squeeze_ratio <= 0.7, squeeze_ratio <= 1.0],
+                [0.85, 0.7, 0.5], 0.6
+            )
+            squeeze_score = np.minimum(0.98, base_score + band_position * 0.15)
+            squeeze_score = np.where((history < 20) | (sma == 0), 0.5, squeeze_score)
+            
+            # Momentum
+            lag_5 = np.concatenate([np.full(5, np.nan), prices[:-5]])[:n]
+            lag_10 = np.concatenate([np.full(10, np.nan), prices[:-10]])[:n]
+            roc_5 = (prices - lag_5) / lag_5 * 100
+            prev_roc_5 = (lag_5 - lag_10) / lag_10 * 100
+            acceleration = np.where(history > 15, roc_5 - prev_roc_5, 0)
+            abs_roc = np.abs(roc_5)
+            momentum_score = np.select([abs_roc >= 0.5, abs_roc >= 0.3, abs_roc >= 0.1], [0.8, 0.6, 0.4], 0.2)
+            momentum_score = momentum_score + np.where(np.abs(acceleration) > 0.1, 0.1, 0.0)
+            momentum_score = np.where(history < 10, 0.5, np.minimum(0.95, momentum_score))
+        
+        combined_score = (
+            0.25 * volume_score +
+            0.15 * time_score +
+            0.25 * squeeze_score +
+            0.15 * momentum_score +
+            0.10 * np.asarray(oi_score, dtype=np.float64) +
+            0.10 * np.asarray(news_score, dtype=np.float64)
+        )
+        combined_score = np.where(expiry, np.minimum(1.0, combined_score * 1.3), combined_score)
+        
+        bucket = np.select(
+            [combined_score >= 0.85, combined_score >= 0.70, combined_score >= 0.45, combined_score >= 0.30],
+            [0, 1, 2, 3], 4
+        )
+        categories = np.array([
+            SpeedCategory.EXPLOSIVE, SpeedCategory.FAST, SpeedCategory.NORMAL,
+            SpeedCategory.SLOW, SpeedCategory.CHOPPY
+        ], dtype=object)
+        expected_move = np.where(
+            expiry, np.array([1.2, 0.6, 0.3, 0.15, 0.1])[bucket], np.array([0.8, 0.4, 0.3, 0.15, 0.1])[bucket]
+        )
+        expected_time = np.where(
+            expiry, np.array([10, 20, 60, 120, 180])[bucket], np.array([15, 30, 90, 120, 180])[bucket]
+        )
+        
+        agreement = np.maximum(0, 1 - np.std(np.vstack([volume_score, squeeze_score, momentum_score]), axis=0) * 2)
+        base_confidence = np.where((combined_score >= 0.7) | (combined_score <= 0.3), 0.75, 0.5)
+        confidence = np.minimum(0.95, np.maximum(0.3, base_confidence * 0.6 + agreement * 0.4))
+        
+        return {
+            'category': categories[bucket],
+            'combined_score': combined_score,
+            'confidence': confidence,
+            'expected_move_pct': expected_move,
+            'expected_time_mins': expected_time,
+            'volume_score': volume_score,
+            'time_of_day_score': time_score,
+            'volatility_squeeze_score': squeeze_score,
+            'momentum_score': momentum_score
+        }
+    
     def _calculate_volume_score(
         self, 
         volume_history: List[float], 
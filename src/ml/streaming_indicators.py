@@ -0,0 +1,594 @@
+"""
+Streaming Technical Indicators
+==============================
+
+O(1) per-bar indicators for live prediction.
+
+XGBoostDirectionPredictor._extract_features rebuilds RSI, MACD (a Python
+EMA loop), Bollinger and ATR from the whole price list on every call.
+The objects here keep running state instead: each `update()` folds in one
+bar in constant time, and `snapshot()` / `restore()` let a revised live
+candle be rolled back and re-applied.
+
+Indicators:
+- EMA, MACD (standard, seeded with the first value)
+- RSI (Wilder smoothing, or simple average as TechnicalFeatureExtractor)
+- RollingWindow / Bollinger (sliding mean and population std)
+- ATR (Wilder, or simple average of true range)
+- ADX (Wilder)
+- VWAP (resets each session)
+
+LiveIndicatorState combines them per (symbol, resolution) and serves the
+direction-model feature dict as a read; LiveIndicatorRegistry keeps one
+state per series and feeds it only the bars it has not seen.
+
+Author: TradeWise ML Team
+Created: 2026-02-02
+"""
+
+import copy
+import math
+import threading
+import logging
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+# Sliding sums are recomputed from the window this often to cancel float drift
+RESYNC_EVERY = 1000
+
+
+class StreamingIndicator:
+    """Base class: state lives in instance attributes"""
+
+    def snapshot(self) -> Dict:
+        """Copy of the indicator state"""
+        return copy.deepcopy(self.__dict__)
+
+    def restore(self, state: Dict):
+        """Return to a state taken with snapshot()"""
+        self.__dict__.update(copy.deepcopy(state))
+
+
+class RollingWindow(StreamingIndicator):
+    """Fixed-size window with sliding mean and population variance (Welford)"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values: deque = deque(maxlen=size)
+        self.mean = 0.0
+        self._m2 = 0.0
+        self._updates = 0
+
+    def update(self, x: float):
+        if len(self.values) == self.size:
+            self._remove(self.values[0])
+        self.values.append(x)
+        n = len(self.values)
+        delta = x - self.mean
+        self.mean += delta / n
+        self._m2 += delta * (x - self.mean)
+
+        self._updates += 1
+        if self._updates % RESYNC_EVERY == 0:
+            self._resync()
+
+    def _remove(self, y: float):
+        n = len(self.values) - 1
+        if n == 0:
+            self.mean = 0.0
+            self._m2 = 0.0
+            return
+        delta = y - self.mean
+        self.mean -= delta / n
+        self._m2 -= delta * (y - self.mean)
+
+    def _resync(self):
+        arr = np.fromiter(self.values, dtype=np.float64)
+        self.mean = float(arr.mean())
+        self._m2 = float(((arr - self.mean) ** 2).sum())
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.size
+
+    @property
+    def sum(self) -> float:
+        return self.mean * len(self.values)
+
+    @property
+    def std(self) -> float:
+        """Population standard deviation (np.std)"""
+        n = len(self.values)
+        return math.sqrt(max(self._m2, 0.0) / n) if n else 0.0
+
+
+class EMA(StreamingIndicator):
+    """Exponential moving average, seeded with the first value"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.alpha = 2 / (period + 1)
+        self.value: Optional[float] = None
+        self.count = 0
+
+    def update(self, x: float) -> float:
+        self.value = x if self.value is None else self.alpha * x + (1 - self.alpha) * self.value
+        self.count += 1
+        return self.value
+
+
+class WindowSeededEMA(StreamingIndicator):
+    """
+    EMA over only the last `period` values, seeded at the window start
+    (TechnicalFeatureExtractor._ema), kept in O(1) per bar.
+
+    value = (1-a)^(P-1) * p[t-P+1] + sum_{j<P-1} a (1-a)^j p[t-j]
+    """
+
+    def __init__(self, period: int):
+        self.period = period
+        self.alpha = 2 / (period + 1)
+        self.window: deque = deque(maxlen=period)
+        self._tail = 0.0  # sum over the newest P-1 values
+        self._decay = (1 - self.alpha) ** (period - 1)
+        self._updates = 0
+
+    def update(self, x: float):
+        a = self.alpha
+        n = len(self.window)
+        if self.period > 1 and n >= self.period - 1:
+            # The oldest tail value becomes the seed and leaves the tail sum
+            self._tail -= a * (1 - a) ** (self.period - 2) * self.window[n - (self.period - 1)]
+        self.window.append(x)
+        self._tail = a * x + (1 - a) * self._tail if self.period > 1 else 0.0
+
+        self._updates += 1
+        if self._updates % RESYNC_EVERY == 0:
+            self._resync()
+
+    def _resync(self):
+        a = self.alpha
+        newest = list(self.window)[-(self.period - 1):] if self.period > 1 else []
+        self._tail = sum(a * (1 - a) ** j * p for j, p in enumerate(reversed(newest)))
+
+    @property
+    def value(self) -> Optional[float]:
+        if not self.window:
+            return None
+        if len(self.window) < self.period:
+            return self.window[-1]
+        return self._decay * self.window[0] + self._tail
+
+
+class RSI(StreamingIndicator):
+    """
+    Relative Strength Index
+
+    wilder=True: Wilder smoothing seeded with the first `period` changes.
+    wilder=False: simple average of the last `period` gains/losses
+    (TechnicalFeatureExtractor.calculate_rsi).
+    """
+
+    def __init__(self, period: int = 14, wilder: bool = True):
+        self.period = period
+        self.wilder = wilder
+        self.prev: Optional[float] = None
+        self.changes = 0
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self._gains = RollingWindow(period)
+        self._losses = RollingWindow(period)
+        self._loss_bars: deque = deque(maxlen=period)  # 1 where the change was a loss
+
+    def update(self, close: float) -> float:
+        if self.prev is not None:
+            change = close - self.prev
+            gain, loss = max(change, 0.0), max(-change, 0.0)
+            self.changes += 1
+            if self.wilder:
+                if self.changes <= self.period:
+                    self.avg_gain += (gain - self.avg_gain) / self.changes
+                    self.avg_loss += (loss - self.avg_loss) / self.changes
+                else:
+                    self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+                    self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+            else:
+                self._gains.update(gain)
+                self._losses.update(loss)
+                self._loss_bars.append(1 if loss > 0 else 0)
+                self.avg_gain = self._gains.mean
+                self.avg_loss = self._losses.mean
+        self.prev = close
+        return self.value
+
+    @property
+    def ready(self) -> bool:
+        return self.changes >= self.period
+
+    @property
+    def value(self) -> float:
+        if not self.ready:
+            return 50.0  # Neutral
+        no_losses = self.avg_loss == 0 if self.wilder else sum(self._loss_bars) == 0
+        if no_losses:
+            return 100.0
+        return 100 - (100 / (1 + self.avg_gain / self.avg_loss))
+
+
+class MACD(StreamingIndicator):
+    """MACD line, signal line and histogram"""
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast = EMA(fast)
+        self.slow = EMA(slow)
+        self.signal_ema = EMA(signal)
+
+    def update(self, close: float) -> Tuple[float, float, float]:
+        line = self.fast.update(close) - self.slow.update(close)
+        signal = self.signal_ema.update(line)
+        return line, signal, line - signal
+
+    @property
+    def line(self) -> float:
+        return (self.fast.value or 0.0) - (self.slow.value or 0.0)
+
+    @property
+    def signal(self) -> float:
+        return self.signal_ema.value or 0.0
+
+    @property
+    def histogram(self) -> float:
+        return self.line - self.signal
+
+
+class Bollinger(StreamingIndicator):
+    """Bollinger Bands over a sliding window (population std)"""
+
+    def __init__(self, period: int = 20, num_std: float = 2.0):
+        self.period = period
+        self.num_std = num_std
+        self.window = RollingWindow(period)
+
+    def update(self, close: float):
+        self.window.update(close)
+
+    @property
+    def bands(self) -> Tuple[float, float, float, float]:
+        """(upper, middle, lower, %B)"""
+        current = self.window.values[-1]
+        if not self.window.full:
+            return current, current, current, 0.5
+        middle = self.window.mean
+        std = self.window.std
+        upper = middle + self.num_std * std
+        lower = middle - self.num_std * std
+        # Bands collapse on a flat window; guard against sliding-variance residue
+        pct_b = 0.5 if std <= 1e-9 * abs(middle) else (current - lower) / (upper - lower)
+        return upper, middle, lower, pct_b
+
+
+class ATR(StreamingIndicator):
+    """
+    Average True Range
+
+    wilder=True: Wilder smoothing. wilder=False: simple average of the
+    last `period` true ranges (TechnicalFeatureExtractor.calculate_atr).
+    """
+
+    def __init__(self, period: int = 14, wilder: bool = True):
+        self.period = period
+        self.wilder = wilder
+        self.prev_close: Optional[float] = None
+        self.last_range = 0.0
+        self.value = 0.0
+        self.count = 0
+        self._ranges = RollingWindow(period)
+
+    def update(self, high: float, low: float, close: float) -> float:
+        self.last_range = high - low
+        if self.prev_close is not None:
+            tr = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+            self.count += 1
+            if self.wilder:
+                if self.count <= self.period:
+                    self.value += (tr - self.value) / self.count
+                else:
+                    self.value = (self.value * (self.period - 1) + tr) / self.period
+            else:
+                self._ranges.update(tr)
+                self.value = self._ranges.mean
+        self.prev_close = close
+        return self.value
+
+    @property
+    def ready(self) -> bool:
+        return self.count >= self.period
+
+
+class ADX(StreamingIndicator):
+    """Average Directional Index (Wilder)"""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.prev: Optional[Tuple[float, float, float]] = None
+        self.count = 0
+        self.tr_sum = 0.0
+        self.plus_dm_sum = 0.0
+        self.minus_dm_sum = 0.0
+        self.dx_count = 0
+        self.value = 0.0
+        self.plus_di = 0.0
+        self.minus_di = 0.0
+
+    def update(self, high: float, low: float, close: float) -> float:
+        if self.prev is not None:
+            prev_high, prev_low, prev_close = self.prev
+            up_move = high - prev_high
+            down_move = prev_low - low
+            plus_dm = up_move if up_move > down_move and up_move > 0 else 0.0
+            minus_dm = down_move if down_move > up_move and down_move > 0 else 0.0
+            tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+
+            self.count += 1
+            if self.count <= self.period:
+                self.tr_sum += tr
+                self.plus_dm_sum += plus_dm
+                self.minus_dm_sum += minus_dm
+            else:
+                self.tr_sum = self.tr_sum - self.tr_sum / self.period + tr
+                self.plus_dm_sum = self.plus_dm_sum - self.plus_dm_sum / self.period + plus_dm
+                self.minus_dm_sum = self.minus_dm_sum - self.minus_dm_sum / self.period + minus_dm
+
+            if self.count >= self.period and self.tr_sum > 0:
+                self.plus_di = 100 * self.plus_dm_sum / self.tr_sum
+                self.minus_di = 100 * self.minus_dm_sum / self.tr_sum
+                di_sum = self.plus_di + self.minus_di
+                dx = 100 * abs(self.plus_di - self.minus_di) / di_sum if di_sum > 0 else 0.0
+                self.dx_count += 1
+                if self.dx_count <= self.period:
+                    self.value += (dx - self.value) / self.dx_count
+                else:
+                    self.value = (self.value * (self.period - 1) + dx) / self.period
+        self.prev = (high, low, close)
+        return self.value
+
+    @property
+    def ready(self) -> bool:
+        return self.dx_count >= self.period
+
+
+class VWAP(StreamingIndicator):
+    """Volume-weighted average price, reset when the session changes"""
+
+    def __init__(self):
+        self.session = None
+        self.pv = 0.0
+        self.volume = 0.0
+        self.value: Optional[float] = None
+
+    def update(self, high: float, low: float, close: float, volume: float, session=None) -> Optional[float]:
+        if session != self.session:
+            self.session = session
+            self.pv = 0.0
+            self.volume = 0.0
+        typical = (high + low + close) / 3
+        self.pv += typical * volume
+        self.volume += volume
+        self.value = self.pv / self.volume if self.volume > 0 else typical
+        return self.value
+
+
+# ==================== PER-SYMBOL STATE ====================
+
+class LiveIndicatorState(StreamingIndicator):
+    """
+    All indicators for one (symbol, resolution), updated bar by bar.
+
+    direction_features() returns the same keys and values as
+    XGBoostDirectionPredictor._extract_features for the price/volume
+    part (time-of-day features are added at prediction time).
+    """
+
+    MOMENTUM_PERIODS = [5, 10, 20]
+
+    def __init__(self):
+        self.bars = 0
+        self.last_timestamp: Optional[int] = None  # ns
+        self.last_bar: Optional[Dict] = None
+        self.closes: deque = deque(maxlen=max(self.MOMENTUM_PERIODS) + 1)
+
+        # TechnicalFeatureExtractor-compatible
+        self.rsi_14 = RSI(14, wilder=False)
+        self.rsi_7 = RSI(7, wilder=False)
+        self.ema_12 = WindowSeededEMA(12)
+        self.ema_26 = WindowSeededEMA(26)
+        self.bollinger = Bollinger(20)
+        self.atr = ATR(14, wilder=False)
+        self.volume_20 = RollingWindow(20)
+        self.volume_5 = RollingWindow(5)
+
+        # Standard indicators
+        self.wilder_rsi = RSI(14)
+        self.macd = MACD()
+        self.wilder_atr = ATR(14)
+        self.adx = ADX(14)
+        self.vwap = VWAP()
+
+    def update(self, bar: Dict):
+        """
+        Fold in one candle
+
+        Args:
+            bar: Dict with open/high/low/close/volume and timestamp (ns int or datetime)
+        """
+        close = float(bar['close'])
+        high = float(bar.get('high', close))
+        low = float(bar.get('low', close))
+        volume = float(bar.get('volume', 0.0) or 0.0)
+        timestamp = bar.get('timestamp')
+        ts = pd.Timestamp(timestamp) if timestamp is not None else None
+
+        self.closes.append(close)
+        self.rsi_14.update(close)
+        self.rsi_7.update(close)
+        self.ema_12.update(close)
+        self.ema_26.update(close)
+        self.bollinger.update(close)
+        self.atr.update(high, low, close)
+        self.volume_20.update(volume)
+        self.volume_5.update(volume)
+
+        self.wilder_rsi.update(close)
+        self.macd.update(close)
+        self.wilder_atr.update(high, low, close)
+        self.adx.update(high, low, close)
+        self.vwap.update(high, low, close, volume, ts.date() if ts is not None else None)
+
+        self.bars += 1
+        self.last_timestamp = ts.value if ts is not None else None
+        self.last_bar = {'close': close, 'high': high, 'low': low, 'volume': volume}
+
+    def direction_features(self) -> Dict[str, float]:
+        """Price/volume features for the direction model (no recomputation)"""
+        closes = self.closes
+        price = closes[-1]
+        features = {'current_price': price}
+        features['price_change_1'] = (price - closes[-2]) / closes[-2] * 100 if len(closes) > 1 else 0
+        features['price_change_5'] = (price - closes[-6]) / closes[-6] * 100 if len(closes) > 5 else 0
+
+        features['rsi_14'] = self.rsi_14.value
+        features['rsi_7'] = self.rsi_7.value
+
+        if self.bars < 26:
+            macd = signal = hist = 0.0
+        else:
+            macd = self.ema_12.value - self.ema_26.value
+            signal = macd * 0.9  # Same approximation as TechnicalFeatureExtractor.calculate_macd
+            hist = macd - signal
+        features['macd'] = macd
+        features['macd_signal'] = signal
+        features['macd_histogram'] = hist
+
+        upper, middle, lower, pct_b = self.bollinger.bands
+        features['bb_position'] = pct_b
+        features['bb_width'] = (upper - lower) / middle if middle > 0 else 0
+
+        for p in self.MOMENTUM_PERIODS:
+            features[f'momentum_{p}'] = (price - closes[-p - 1]) / closes[-p - 1] * 100 if len(closes) > p else 0.0
+
+        if self.volume_20.full:
+            avg_volume = self.volume_20.mean
+            volume_ratio = self.volume_5.values[-1] / avg_volume if avg_volume > 0 else 1.0
+            recent_avg = self.volume_5.mean
+            older_avg = (self.volume_20.sum - self.volume_5.sum) / 15
+            features['volume_ratio'] = volume_ratio
+            features['volume_trend'] = (recent_avg - older_avg) / older_avg if older_avg > 0 else 0
+            features['volume_spike'] = 1.0 if volume_ratio > 2.0 else 0.0
+        else:
+            features['volume_ratio'] = 1.0
+            features['volume_trend'] = 0.0
+            features['volume_spike'] = 0.0
+
+        features['atr'] = self.atr.value if self.atr.ready else abs(self.last_bar['high'] - self.last_bar['low'])
+        features['atr_pct'] = features['atr'] / price * 100
+        return features
+
+    def indicators(self) -> Dict[str, Optional[float]]:
+        """Standard (Wilder / full-history EMA) indicator values"""
+        return {
+            'rsi_14_wilder': self.wilder_rsi.value,
+            'macd': self.macd.line,
+            'macd_signal': self.macd.signal,
+            'macd_histogram': self.macd.histogram,
+            'atr_14_wilder': self.wilder_atr.value,
+            'adx_14': self.adx.value,
+            'plus_di': self.adx.plus_di,
+            'minus_di': self.adx.minus_di,
+            'vwap': self.vwap.value,
+            'bars': self.bars
+        }
+
+
+class LiveIndicatorRegistry:
+    """One LiveIndicatorState per (symbol, resolution), fed only unseen bars"""
+
+    def __init__(self):
+        self._states: Dict[Tuple[str, str], LiveIndicatorState] = {}
+        self._before_last: Dict[Tuple[str, str], Dict] = {}
+        self._lock = threading.Lock()
+
+    def get(self, symbol: str, resolution: str) -> Optional[LiveIndicatorState]:
+        with self._lock:
+            return self._states.get((symbol, resolution))
+
+    def sync(self, symbol: str, resolution: str, df: pd.DataFrame) -> LiveIndicatorState:
+        """
+        Bring the state for a series up to date with a candle frame
+
+        Only bars after the last one seen are applied. A revised last bar
+        (live candle) is rolled back from a snapshot and re-applied; a
+        frame that does not contain the last seen bar rebuilds the state.
+        """
+        key = (symbol, resolution)
+        with self._lock:
+            state = self._states.get(key)
+            timestamps = df.index.to_numpy(dtype="datetime64[ns]").view(np.int64)
+            start = 0
+
+            if state is not None and state.last_timestamp is not None:
+                pos = int(np.searchsorted(timestamps, state.last_timestamp))
+                if pos < len(timestamps) and timestamps[pos] == state.last_timestamp:
+                    if np.isclose(float(df['close'].iloc[pos]), state.last_bar['close']) and \
+                            np.isclose(float(df['volume'].iloc[pos]) if 'volume' in df.columns else 0.0,
+                                       state.last_bar['volume']):
+                        start = pos + 1
+                    elif key in self._before_last:
+                        state.restore(self._before_last[key])
+                        start = pos
+                    else:
+                        state = None
+                else:
+                    state = None
+
+            if state is None:
+                state = LiveIndicatorState()
+                start = 0
+                logger.info(f"📈 Streaming indicators seeded for {symbol}/{resolution} ({len(df)} bars)")
+
+            self._apply(key, state, df, timestamps, start)
+            self._states[key] = state
+            return state
+
+    def _apply(self, key, state: LiveIndicatorState, df: pd.DataFrame, timestamps: np.ndarray, start: int):
+        if start >= len(df):
+            return
+        columns = {col: df[col].to_numpy(dtype=np.float64) for col in ('high', 'low', 'close', 'volume') if col in df.columns}
+        last = len(df) - 1
+        for i in range(start, len(df)):
+            if i == last:
+                # Keep the state before the newest bar so a revision can be replayed
+                self._before_last[key] = state.snapshot()
+            bar = {col: values[i] for col, values in columns.items()}
+            bar['timestamp'] = int(timestamps[i])
+            state.update(bar)
+
+
+# Global registry instance
+_indicator_registry: Optional[LiveIndicatorRegistry] = None
+
+
+def get_indicator_registry() -> LiveIndicatorRegistry:
+    """Get or create the live indicator registry"""
+    global _indicator_registry
+    if _indicator_registry is None:
+        _indicator_registry = LiveIndicatorRegistry()
+    return _indicator_registry
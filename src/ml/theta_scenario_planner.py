@@ -114,11 +114,19 @@ class ThetaScenarioPlanner:
     Shows traders exactly what to expect under different conditions.
     """
     
-    def __init__(self):
+    def __init__(self, use_decay_table: bool = True):
         # Market constants
         self.risk_free_rate = 0.07  # India ~7%
         self.trading_minutes_per_day = 375  # 9:15 - 3:30
         
+        # Precomputed Black-Scholes decay grid (shared per process): horizon
+        # theta becomes the repriced premium change instead of a linear theta
+        # extrapolation. use_decay_table=False keeps the linear estimate.
+        self.decay_table = None
+        if use_decay_table:
+            from src.analytics.theta_decay_table import get_theta_decay_table
+            self.decay_table = get_theta_decay_table(self.risk_free_rate)
+        
         # Price move assumptions (as % of spot)
         self.move_sizes = {
             'fast_up': 0.005,    # +0.5%
@@ -318,7 +326,13 @@ class ThetaScenarioPlanner:
         time_hours = time_mins / 60
         
         # Theta decay for this period
-        theta_decay = theta_per_hour * time_hours
+        # (expiry day keeps the accelerated linear estimate from generate_scenarios)
+        if self.decay_table is not None and not is_expiry_day:
+            theta_decay = self.decay_table.time_decay(
+                option_type, strike, current_spot, iv, days_to_expiry, time_mins
+            )
+        else:
+            theta_decay = theta_per_hour * time_hours
         
         # Calculate each price scenario
         price_scenarios = {}
@@ -578,6 +592,6 @@ class ThetaScenarioPlanner:
         }
 
 
-def create_theta_planner() -> ThetaScenarioPlanner:
+def create_theta_planner(use_decay_table: bool = True) -> ThetaScenarioPlanner:
     """Factory function to create a ThetaScenarioPlanner instance."""
-    return ThetaScenarioPlanner()
+    return ThetaScenarioPlanner(use_decay_table=use_decay_table)
@@ -6,6 +6,8 @@ import pandas as pd
 import numpy as np
 from typing import Dict, List, Tuple, Optional
 from datetime import datetime, timedelta
+from collections import OrderedDict
+import threading
 import logging
 from dataclasses import dataclass
 
@@ -14,6 +16,8 @@ from statsmodels.tsa.arima.model import ARIMA
 from statsmodels.tsa.holtwinters import ExponentialSmoothing
 from scipy import stats
 
+from src.ml.ml_metrics import get_ml_metrics
+
 # Deep Learning
 import warnings
 warnings.filterwarnings('ignore')
@@ -21,6 +25,17 @@ warnings.filterwarnings('ignore')
 logger = logging.getLogger(__name__)
 
 
+# Fitted ensembles kept in memory, keyed by (symbol, resolution)
+ENSEMBLE_CACHE_SIZE = 8
+
+# New bars absorbed by re-filtering with the previous ARIMA parameters
+# before the parameters are re-estimated (warm-started)
+MAX_REFILTER_BARS = 24
+
+# Trailing values compared to confirm a new series extends the fitted one
+OVERLAP_CHECK_BARS = 5
+
+
 @dataclass
 class PredictionResult:
     """Prediction result with confidence intervals"""
@@ -57,13 +72,15 @@ class ARIMAPredictor:
         self.model = None
         self.last_fit_result = None
         self.is_fitted = False
+        self.bars_since_fit = 0  # Bars absorbed by refilter() since parameters were estimated
         
-    def fit(self, prices: pd.Series) -> Dict:
+    def fit(self, prices: pd.Series, start_params: Optional[np.ndarray] = None) -> Dict:
         """
         Fit ARIMA model to price data
         
         Args:
             prices: Series of closing prices
+            start_params: Previous parameters to warm-start the optimizer from
             
         Returns:
             Dict with model metrics
@@ -76,29 +93,73 @@ class ARIMAPredictor:
             
             # Fit ARIMA model
             self.model = ARIMA(prices, order=self.order)
-            self.last_fit_result = self.model.fit()
+            self.last_fit_result = self.model.fit(start_params=start_params)
             self.is_fitted = True
+            self.bars_since_fit = 0
             
-            # Calculate metrics
-            residuals = self.last_fit_result.resid
-            aic = self.last_fit_result.aic
-            bic = self.last_fit_result.bic
-            
-            metrics = {
-                "aic": round(aic, 2),
-                "bic": round(bic, 2),
-                "residual_std": round(residuals.std(), 4),
-                "fitted_samples": len(prices),
-                "order": self.order
-            }
-            
-            logger.info(f"✅ ARIMA({self.order}) fitted - AIC: {aic:.2f}")
+            metrics = self._fit_metrics(prices)
+            logger.info(f"✅ ARIMA({self.order}) fitted - AIC: {metrics['aic']:.2f}")
             return metrics
             
         except Exception as e:
             logger.error(f"ARIMA fit error: {e}")
             return {"error": str(e)}
     
+    def fit_from_params(self, prices: pd.Series, params: np.ndarray) -> Dict:
+        """
+        Adopt parameters estimated elsewhere (e.g. in an ML worker process)
+        by filtering the series with them - no optimization runs here
+        
+        Args:
+            prices: Series the parameters were estimated on
+            params: Estimated parameter vector
+            
+        Returns:
+            Dict with model metrics
+        """
+        self.model = ARIMA(prices, order=self.order)
+        self.last_fit_result = self.model.filter(np.asarray(params, dtype=np.float64))
+        self.is_fitted = True
+        self.bars_since_fit = 0
+        return self._fit_metrics(prices)
+    
+    def _fit_metrics(self, prices: pd.Series) -> Dict:
+        """Metrics for the current fit result"""
+        return {
+            "aic": round(self.last_fit_result.aic, 2),
+            "bic": round(self.last_fit_result.bic, 2),
+            "residual_std": round(self.last_fit_result.resid.std(), 4),
+            "fitted_samples": len(prices),
+            "order": self.order
+        }
+    
+    def refilter(self, prices: pd.Series, new_bars: int) -> Dict:
+        """
+        Run the state-space filter over an updated series with the
+        already-estimated parameters (no optimization)
+        
+        Args:
+            prices: Updated series of closing prices
+            new_bars: Bars appended since the last fit/refilter
+            
+        Returns:
+            Dict with model metrics
+        """
+        if not self.is_fitted:
+            raise ValueError("Model not fitted. Call fit() first.")
+        
+        self.last_fit_result = self.last_fit_result.apply(prices)
+        self.bars_since_fit += new_bars
+        
+        return {
+            "aic": round(self.last_fit_result.aic, 2),
+            "bic": round(self.last_fit_result.bic, 2),
+            "residual_std": round(self.last_fit_result.resid.std(), 4),
+            "fitted_samples": len(prices),
+            "order": self.order,
+            "bars_since_fit": self.bars_since_fit
+        }
+    
     def predict(self, steps: int = 1) -> PredictionResult:
         """
         Forecast future prices
@@ -330,6 +391,8 @@ class EnsemblePredictor:
         self.arima = ARIMAPredictor(order=(5, 1, 2))
         self.is_fitted = False
         self.fitted_price_hash = None  # Track which data we're fitted on
+        self._fitted_tail: Optional[pd.Series] = None  # Last bars of the fitted series
+        self.lock = threading.Lock()
 
         # Model weights - ARIMA + Momentum only
         self.weights = {
@@ -360,10 +423,126 @@ class EnsemblePredictor:
         arima_metrics = self.arima.fit(prices)
         metrics['arima'] = arima_metrics
 
+        self._mark_fitted(prices)
+        logger.info("✅ Ensemble model fitted with ARIMA + Momentum")
+
+        return metrics
+
+    def _mark_fitted(self, prices: pd.Series):
         self.is_fitted = True
         self.fitted_price_hash = self._get_price_hash(prices)
-        logger.info("✅ Ensemble model fitted with ARIMA + Momentum")
+        self._fitted_tail = prices.iloc[-OVERLAP_CHECK_BARS:].copy()
+
+    def _appended_bars(self, prices: pd.Series) -> Optional[int]:
+        """
+        Number of bars to absorb since the fitted series, or None when the
+        new series does not extend it (different data, revised history).
+
+        Only the completed fitted bars must line up: the last fitted bar may
+        still have been forming, so a changed value there counts as one bar
+        to absorb (re-filtered like an appended bar) instead of a mismatch.
+        Rolling windows that also drop bars from the front still count as
+        an extension as long as the fitted bars line up.
+        """
+        tail = self._fitted_tail
+        if tail is None or len(prices) < len(tail):
+            return None
+        completed = tail.to_numpy()[:-1]
+
+        if isinstance(prices.index, pd.DatetimeIndex):
+            if tail.index[-1] not in prices.index:
+                return None
+            end = prices.index.get_loc(tail.index[-1])
+            if not isinstance(end, (int, np.integer)):
+                return None
+            end += 1
+        else:
+            # Positional series: search backwards for the completed fitted bars
+            values = prices.to_numpy()
+            end = None
+            for candidate in range(len(prices), len(tail) - 1, -1):
+                if np.allclose(values[candidate - len(tail):candidate - 1], completed):
+                    end = candidate
+                    break
+            if end is None:
+                return None
+
+        start = end - len(tail)
+        values = prices.to_numpy()
+        if start < 0 or not np.allclose(values[start:end - 1], completed):
+            return None
+        revised = not np.isclose(values[end - 1], tail.iloc[-1])
+        return len(prices) - end + int(revised)
+
+    def plan_update(self, prices: pd.Series) -> Tuple[str, Optional[int]]:
+        """
+        Which update() path a series needs, without doing any work
+
+        Returns:
+            (mode, appended bars or None when the series is unrelated)
+        """
+        if self.is_fitted and self.fitted_price_hash == self._get_price_hash(prices):
+            return 'cached', 0
+
+        new_bars = self._appended_bars(prices) if self.arima.is_fitted else None
+
+        if new_bars is not None and 0 < new_bars and self.arima.bars_since_fit + new_bars <= MAX_REFILTER_BARS:
+            return 'refilter', new_bars
+        if new_bars is not None:
+            return 'warm_refit', new_bars
+        return 'full_fit', None
+
+    def apply_params(self, prices: pd.Series, params: np.ndarray, mode: str) -> Dict:
+        """
+        Install ARIMA parameters estimated out of process for this series
+
+        Args:
+            prices: Series the parameters were estimated on
+            params: ARIMA parameter vector
+            mode: Update mode the estimate stands in for ('warm_refit' / 'full_fit')
+
+        Returns:
+            Dict with metrics and the 'mode'
+        """
+        metrics = {'arima': self.arima.fit_from_params(prices, params), 'mode': mode}
+        self._mark_fitted(prices)
+        return metrics
+
+    def update(self, prices: pd.Series) -> Dict:
+        """
+        Bring the ensemble up to date with the cheapest valid path:
+
+        - same series: reuse the fitted model
+        - a few bars appended: re-filter with the existing ARIMA parameters
+        - many bars appended / refilter budget used up: refit warm-started
+          from the previous parameters
+        - unrelated series: full fit
+
+        Returns:
+            Dict with metrics and the 'mode' that was used
+        """
+        mode, new_bars = self.plan_update(prices)
+        if mode == 'cached':
+            return {'mode': 'cached'}
+
+        if mode == 'refilter':
+            try:
+                metrics = {'arima': self.arima.refilter(prices, new_bars), 'mode': 'refilter'}
+                self._mark_fitted(prices)
+                return metrics
+            except Exception as e:
+                logger.warning(f"ARIMA refilter failed, refitting: {e}")
+
+        if new_bars is not None:
+            # Same underlying series: previous parameters are a good starting point
+            previous_params = np.asarray(self.arima.last_fit_result.params)
+            metrics = {'arima': self.arima.fit(prices, start_params=previous_params), 'mode': 'warm_refit'}
+            self._mark_fitted(prices)
+            logger.info(f"♻️ Ensemble refit warm-started ({new_bars} new bars)")
+            return metrics
 
+        metrics = self.fit(prices)
+        metrics['mode'] = 'full_fit'
         return metrics
     
     def predict(self, prices: pd.Series, steps: int = 1) -> Dict:
@@ -478,38 +657,83 @@ class EnsemblePredictor:
 # Global ensemble predictor instance
 ensemble_predictor = EnsemblePredictor()
 
+# Fitted ensembles per (symbol, resolution), least recently used evicted first
+_ensemble_cache: "OrderedDict[Tuple[str, str], EnsemblePredictor]" = OrderedDict()
+_ensemble_cache_lock = threading.Lock()
+
+
+def infer_resolution(prices: pd.Series) -> str:
+    """Bar size of a candle series in Fyers resolution notation ('15', '60', 'D')"""
+    if not isinstance(prices.index, pd.DatetimeIndex) or len(prices) < 2:
+        return "unknown"
+    step = pd.Series(prices.index).diff().median()
+    if pd.isna(step):
+        return "unknown"
+    if step >= pd.Timedelta(days=1):
+        return "D"
+    return str(int(step.total_seconds() // 60))
+
+
+def get_ensemble_predictor(symbol: str, resolution: str) -> EnsemblePredictor:
+    """Cached ensemble for a (symbol, resolution) series"""
+    key = (symbol, resolution)
+    with _ensemble_cache_lock:
+        predictor = _ensemble_cache.get(key)
+        get_ml_metrics().record_cache("ensemble", hit=predictor is not None)
+        if predictor is None:
+            predictor = EnsemblePredictor()
+            _ensemble_cache[key] = predictor
+            if len(_ensemble_cache) > ENSEMBLE_CACHE_SIZE:
+                evicted, _ = _ensemble_cache.popitem(last=False)
+                logger.info(f"🗑️ Evicted ML ensemble for {evicted}")
+        else:
+            _ensemble_cache.move_to_end(key)
+        return predictor
+
 
-def get_ml_signal(prices: pd.Series, steps: int = 1) -> Dict:
+def get_ml_signal(
+    prices: pd.Series,
+    steps: int = 1,
+    symbol: Optional[str] = None,
+    resolution: Optional[str] = None,
+    allow_fit: bool = True
+) -> Dict:
     """
     Convenience function to get ML signal for integration with trading system
 
     Args:
         prices: Historical price data
         steps: Forecast periods
+        symbol: Series identity for the model cache (e.g. 'NIFTY')
+        resolution: Candle resolution; inferred from the index when omitted
+        allow_fit: False: fail instead of (warm-)refitting ARIMA in this call
+            (cached / refilter paths still run)
 
     Returns:
         Dict with ML prediction results
     """
-    global ensemble_predictor
-
     try:
-        # Check if we need to refit (different data series or not fitted)
-        current_hash = ensemble_predictor._get_price_hash(prices)
-        needs_refit = (
-            not ensemble_predictor.is_fitted or
-            ensemble_predictor.fitted_price_hash != current_hash
+        predictor = get_ensemble_predictor(
+            symbol or "default",
+            resolution or infer_resolution(prices)
         )
 
-        if needs_refit:
-            logger.info(f"🔄 Refitting ML model for new price series (hash: {current_hash[:20]}...)")
-            ensemble_predictor.fit(prices)
+        with predictor.lock:
+            if not allow_fit and predictor.plan_update(prices)[0] in ('warm_refit', 'full_fit'):
+                raise RuntimeError("ARIMA fit needed and inline fitting is disabled")
+
+            # Reuse, re-filter or (warm-)refit depending on how the series changed
+            update = predictor.update(prices)
+            if update.get('mode') != 'cached':
+                logger.info(f"🔄 ML model {update.get('mode')} for {symbol or 'default'} ({len(prices)} bars)")
 
-        # Get prediction
-        results = ensemble_predictor.predict(prices, steps)
+            # Get prediction
+            results = predictor.predict(prices, steps)
 
         return {
             'success': True,
             'predictions': results,
+            'model_update': update.get('mode'),
             'timestamp': datetime.now().isoformat()
         }
 
@@ -0,0 +1,267 @@
+"""
+ML Training Configuration
+=========================
+
+Shared fitting policy for the gradient-boosted / tree models:
+
+- Features go in as contiguous float32 arrays (tree learners bin or cast
+  to float32 anyway, so float64 frames only double memory and add copies)
+- XGBoost uses the histogram method; its sklearn wrapper builds the
+  quantised (binned) matrix once per fit and reuses it every round
+- Early stopping on a time-ordered validation tail of the training rows;
+  the tail only picks the number of rounds, the model is then refit on
+  every row so the newest bars are not left out
+- Thread budget: n_jobs / nthread pinned to a configured core count so
+  training never takes every core of the API box
+- Parallel fits (walk-forward folds) share that budget instead of each
+  taking it
+- Each fit reports wall time, input size and resident memory
+
+Author: TradeWise ML Team
+Created: 2026-02-02
+"""
+
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass, replace
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TrainingConfig:
+    """How estimators are built and fitted"""
+    n_jobs: int = 2                      # Threads per fit (-1 = all cores)
+    early_stopping_rounds: int = 20      # 0 disables early stopping
+    validation_fraction: float = 0.15    # Tail of the training rows held out for early stopping
+    max_bin: int = 256                   # Histogram bins (XGBoost / LightGBM)
+    max_estimators: int = 500            # Boosting rounds ceiling when early stopping is on
+
+    @classmethod
+    def from_settings(cls) -> "TrainingConfig":
+        from config.settings import settings
+        return cls(
+            n_jobs=settings.ml_train_threads,
+            early_stopping_rounds=settings.ml_early_stopping_rounds,
+            validation_fraction=settings.ml_validation_fraction,
+            max_bin=settings.ml_max_bin
+        )
+
+
+@dataclass
+class TrainingReport:
+    """Cost of one fit"""
+    fit_seconds: float
+    n_train: int                         # Rows the returned model was fitted on
+    n_validation: int                    # Rows early stopping was scored on
+    n_features: int
+    input_mb: float
+    rss_mb: Optional[float]              # Resident memory after the fit
+    rss_growth_mb: Optional[float]       # Resident memory after minus before
+    best_iteration: Optional[int]
+    n_jobs: int
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def to_float32(X) -> np.ndarray:
+    """Contiguous float32 copy of a feature matrix (no copy if already one)"""
+    return np.ascontiguousarray(X, dtype=np.float32)
+
+
+def _current_rss_mb() -> Optional[float]:
+    """Resident memory of this process now (None where /proc is unavailable)
+
+    Not ru_maxrss: that is the process-lifetime high-water mark, so a fit
+    after any larger allocation would report the old peak and zero growth.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def split_thread_budget(n_fits: int, n_jobs: int, config: TrainingConfig) -> Tuple[int, TrainingConfig]:
+    """
+    Share the thread budget between parallel fits
+
+    Args:
+        n_fits: Independent fits to run (e.g. walk-forward folds)
+        n_jobs: Parallel fits wanted (-1 = as many as the budget allows)
+        config: Training config; its n_jobs is the total thread budget
+
+    Returns:
+        (parallel fits, config with the per-fit thread count) so that
+        parallel fits x threads per fit stays within config.n_jobs
+    """
+    budget = config.n_jobs if config.n_jobs > 0 else (os.cpu_count() or 1)
+    outer = budget if n_jobs < 0 else min(n_jobs, budget)
+    outer = max(1, min(outer, n_fits))
+    return outer, replace(config, n_jobs=max(1, budget // outer))
+
+
+def _library(model) -> str:
+    return type(model).__module__.split(".")[0]
+
+
+def configure_estimator(model, config: TrainingConfig):
+    """
+    Apply the thread budget and histogram settings to an unfitted estimator
+
+    Returns:
+        The same estimator (parameters set in place)
+    """
+    params = model.get_params()
+    updates = {}
+    if "n_jobs" in params:
+        updates["n_jobs"] = config.n_jobs
+
+    library = _library(model)
+    if library == "xgboost":
+        updates.update(tree_method="hist", max_bin=config.max_bin)
+        if config.early_stopping_rounds:
+            updates.update(
+                early_stopping_rounds=config.early_stopping_rounds,
+                n_estimators=max(params.get("n_estimators") or 100, config.max_estimators)
+            )
+    elif library == "lightgbm":
+        updates["max_bin"] = config.max_bin
+        if config.early_stopping_rounds:
+            updates["n_estimators"] = max(params.get("n_estimators") or 100, config.max_estimators)
+    elif "n_iter_no_change" in params and config.early_stopping_rounds:
+        # sklearn GradientBoosting: internal validation split
+        updates.update(
+            n_iter_no_change=config.early_stopping_rounds,
+            validation_fraction=config.validation_fraction,
+            n_estimators=max(params.get("n_estimators") or 100, config.max_estimators)
+        )
+
+    if updates:
+        model.set_params(**updates)
+    return model
+
+
+def _refit_params(model, library: str, best_iteration: int):
+    """Fixed round count from early stopping, early stopping off"""
+    if library == "xgboost":
+        # best_iteration is 0-based
+        model.set_params(n_estimators=best_iteration + 1, early_stopping_rounds=None)
+    elif library == "lightgbm":
+        model.set_params(n_estimators=best_iteration)
+    else:
+        model.set_params(n_estimators=best_iteration, n_iter_no_change=None)
+
+
+def fit_estimator(
+    model,
+    X,
+    y,
+    config: Optional[TrainingConfig] = None,
+    X_val=None,
+    y_val=None
+) -> Tuple[object, TrainingReport]:
+    """
+    Fit an estimator under the training config
+
+    Without an explicit validation set, the last validation_fraction of the
+    (time-ordered) training rows is held out for early stopping, then the
+    model is refit on all rows for the number of rounds early stopping chose.
+    sklearn GradientBoosting holds out its own split and is refit the same way.
+
+    Returns:
+        (fitted model, TrainingReport)
+    """
+    config = config or TrainingConfig()
+    configure_estimator(model, config)
+    library = _library(model)
+
+    X = to_float32(X)
+    y = np.asarray(y)
+    uses_eval_set = library in ("xgboost", "lightgbm") and config.early_stopping_rounds > 0
+    X_all, y_all = X, y
+    held_out_tail = False
+
+    if uses_eval_set and X_val is None:
+        n_val = int(len(X) * config.validation_fraction)
+        if n_val > 0:
+            X, X_val = X[:-n_val], X[-n_val:]
+            y, y_val = y[:-n_val], y[-n_val:]
+            held_out_tail = True
+    if X_val is not None:
+        X_val = to_float32(X_val)
+        y_val = np.asarray(y_val)
+
+    fit_kwargs = {}
+    if uses_eval_set and X_val is not None:
+        fit_kwargs["eval_set"] = [(X_val, y_val)]
+        if library == "xgboost":
+            fit_kwargs["verbose"] = False
+        else:
+            import lightgbm as lgb
+            fit_kwargs["callbacks"] = [lgb.early_stopping(config.early_stopping_rounds, verbose=False)]
+    elif library == "xgboost":
+        # Early stopping configured but no rows to validate on
+        model.set_params(early_stopping_rounds=None)
+
+    rss_before = _current_rss_mb()
+    started = time.perf_counter()
+    model.fit(X, y, **fit_kwargs)
+
+    best_iteration = getattr(model, "best_iteration", None)
+    if best_iteration is None:
+        best_iteration = getattr(model, "best_iteration_", None) or getattr(model, "n_estimators_", None)
+
+    n_validation = len(X_val) if X_val is not None else 0
+    internal_split = "n_iter_no_change" in model.get_params() and model.get_params()["n_iter_no_change"]
+    if best_iteration is not None and (held_out_tail or internal_split):
+        # Early stopping chose the rounds; fit them on every row
+        _refit_params(model, library, int(best_iteration))
+        X, y = X_all, y_all
+        model.fit(X, y)
+        if internal_split:
+            n_validation = int(round(len(X) * model.get_params()["validation_fraction"]))
+
+    fit_seconds = time.perf_counter() - started
+    rss_after = _current_rss_mb()
+
+    report = TrainingReport(
+        fit_seconds=round(fit_seconds, 3),
+        n_train=len(X),
+        n_validation=n_validation,
+        n_features=X.shape[1] if X.ndim > 1 else 1,
+        input_mb=round(X.nbytes / 2**20, 2),
+        rss_mb=round(rss_after, 1) if rss_after is not None else None,
+        rss_growth_mb=round(rss_after - rss_before, 1) if rss_after is not None and rss_before is not None else None,
+        best_iteration=int(best_iteration) if best_iteration is not None else None,
+        n_jobs=config.n_jobs
+    )
+    logger.info(
+        f"⏱️ Fitted {type(model).__name__} in {report.fit_seconds}s "
+        f"({report.n_train} rows x {report.n_features}, {report.input_mb} MB float32, "
+        f"best iteration {report.best_iteration}, RSS {report.rss_mb} MB, growth {report.rss_growth_mb} MB)"
+    )
+    return model, report
+
+
+# Global config instance
+_training_config: Optional[TrainingConfig] = None
+
+
+def get_training_config() -> TrainingConfig:
+    """Get the training config (from settings; defaults when app settings are not configured)"""
+    global _training_config
+    if _training_config is None:
+        try:
+            _training_config = TrainingConfig.from_settings()
+        except Exception as e:
+            # Standalone scripts / tests run without the API's .env
+            logger.debug(f"Training settings unavailable, using defaults: {e}")
+            _training_config = TrainingConfig()
+    return _training_config
@@ -0,0 +1,400 @@
+"""
+Walk-Forward Training Pipeline
+==============================
+
+Background retraining for IndexMLOptimizer models.
+
+For each index and prediction horizon:
+
+1. Read daily candles from the local candle store (no Fyers calls)
+2. Build features/targets exactly as IndexMLOptimizer.train() does
+3. Score the model type with expanding-window walk-forward CV (a purge
+   gap of `horizon` rows between train and test), folds fitted in
+   parallel across cores
+4. Fit a candidate on all labelled rows
+5. Promote it into the model registry only if it beats the current
+   version on the same fold rows: the current model is re-scored on the
+   test rows it was not trained on, and the candidate's fold predictions
+   on those rows are compared with it
+
+Horizon-1 models are registered under the index name and other horizons
+under "<INDEX>_H<h>"; IndexMLOptimizer.predict(index, df, horizon) loads
+the model for the horizon asked for.
+
+Author: TradeWise ML Team
+Created: 2026-02-02
+"""
+
+import json
+import logging
+import os
+import threading
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+
+logger = logging.getLogger(__name__)
+
+
+INDEX_SYMBOLS = {
+    "NIFTY": "NSE:NIFTY50-INDEX",
+    "BANKNIFTY": "NSE:NIFTYBANK-INDEX",
+    "FINNIFTY": "NSE:FINNIFTY-INDEX",
+    "SENSEX": "BSE:SENSEX-INDEX",
+}
+
+
+@dataclass
+class TrainingResult:
+    """Outcome of one (index, horizon) training run"""
+    model_key: str
+    index_name: str
+    horizon: int
+    model_type: str
+    status: str                       # "promoted", "rejected", "skipped", "error"
+    wf_accuracy_mean: Optional[float] = None
+    wf_accuracy_std: Optional[float] = None
+    fold_accuracies: List[float] = field(default_factory=list)
+    incumbent_accuracy: Optional[float] = None
+    version: Optional[int] = None
+    samples: int = 0
+    message: str = ""
+    finished_at: str = ""
+
+
+def model_key(index_name: str, horizon: int) -> str:
+    """Registry / optimizer key for an (index, horizon) model"""
+    return index_name if horizon == 1 else f"{index_name}_H{horizon}"
+
+
+def walk_forward_splits(
+    n_samples: int,
+    n_folds: int = 5,
+    min_train_size: int = 100,
+    gap: int = 0
+) -> List[Tuple[int, int, int]]:
+    """
+    Expanding-window folds over time-ordered rows
+
+    Each fold trains on rows [0, train_end) and tests on [test_start, test_end);
+    test windows are contiguous, equally sized and cover the tail of the data.
+    `gap` rows are purged between the two, so a training label that looks
+    `gap` bars ahead never overlaps the test window.
+
+    Returns:
+        (train_end, test_start, test_end) per fold, empty if there is too little data
+    """
+    test_size = (n_samples - min_train_size - gap) // n_folds
+    if test_size < 1:
+        return []
+    splits = []
+    for fold in range(n_folds):
+        test_start = n_samples - (n_folds - fold) * test_size
+        splits.append((test_start - gap, test_start, test_start + test_size))
+    return splits
+
+
+def _fit_and_predict(
+    model_type: str, X: np.ndarray, y: np.ndarray, train_end: int, test_start: int, test_end: int,
+    config=None
+) -> np.ndarray:
+    """Fit scaler + model on one fold's training rows, return its test-row predictions"""
+    from sklearn.preprocessing import StandardScaler
+    from src.ml.index_ml_optimizer import IndexMLOptimizer
+    from src.ml.training_config import fit_estimator, get_training_config, to_float32
+
+    scaler = StandardScaler()
+    X_train = to_float32(scaler.fit_transform(X[:train_end]))
+    X_test = to_float32(scaler.transform(X[test_start:test_end]))
+    model, _ = fit_estimator(IndexMLOptimizer.create_model(model_type), X_train, y[:train_end], config or get_training_config())
+    return np.asarray(model.predict(X_test))
+
+
+class WalkForwardTrainer:
+    """
+    Walk-forward CV, candidate fitting and registry promotion
+    """
+
+    def __init__(
+        self,
+        optimizer=None,
+        candle_store=None,
+        n_folds: int = 5,
+        n_jobs: int = -1,
+        min_improvement: float = 0.0,
+        history_days: int = 1500,
+        min_unseen_rows: Optional[int] = None
+    ):
+        """
+        Args:
+            optimizer: IndexMLOptimizer serving predictions (default: global)
+            candle_store: LocalCandleStore to train from (default: global)
+            n_folds: Walk-forward folds
+            n_jobs: Parallel fold fits (-1 = as many as the training thread
+                budget allows; capped so folds x threads per fit stays within it)
+            min_improvement: Accuracy margin a candidate must beat the incumbent by
+            history_days: Daily bars of history to train on
+            min_unseen_rows: Rows after the registered model's training data
+                needed before it can be replaced (default: one test fold)
+        """
+        if optimizer is None:
+            from src.ml.index_ml_optimizer import get_ml_optimizer
+            optimizer = get_ml_optimizer()
+        if candle_store is None:
+            from src.ml.candle_store import get_candle_store
+            candle_store = get_candle_store()
+
+        self.optimizer = optimizer
+        self.candle_store = candle_store
+        self.n_folds = n_folds
+        self.n_jobs = n_jobs
+        self.min_improvement = min_improvement
+        self.history_days = history_days
+        self.min_unseen_rows = min_unseen_rows
+        self.last_results: Dict[str, TrainingResult] = {}
+        self._run_lock = threading.Lock()
+
+        # Own feature store: training runs in a background thread and must
+        # not rebuild / extend the matrices the serving optimizer reads
+        from src.ml.feature_store import FeatureStore
+        self.feature_store = FeatureStore(max_entries=len(INDEX_SYMBOLS))
+
+    def build_dataset(
+        self, index_name: str, df: pd.DataFrame, horizon: int
+    ) -> Tuple[np.ndarray, np.ndarray, List[str], pd.Index]:
+        """
+        Feature matrix, direction labels and row timestamps, time ordered
+
+        Rows whose future return is not known yet (last `horizon` bars)
+        are dropped rather than labelled FLAT.
+        """
+        if isinstance(df.index, pd.DatetimeIndex) and len(df) >= 2:
+            matrix = self.feature_store.update(index_name, "D", df)
+            features_df = matrix.frame(df.index[0], df.index[-1])
+        else:
+            features_df = self.optimizer.prepare_features(df)
+        target = self.optimizer.prepare_target(df, horizon)
+        target.iloc[-horizon:] = np.nan
+
+        exclude_cols = ['target', 'open', 'high', 'low', 'close', 'volume']
+        feature_cols = [c for c in features_df.columns if c not in exclude_cols]
+        dataset = features_df[feature_cols].assign(target=target).dropna()
+        return (
+            dataset[feature_cols].to_numpy(dtype=np.float64),
+            dataset['target'].to_numpy(dtype=np.int64),
+            feature_cols,
+            dataset.index
+        )
+
+    def train_one(self, index_name: str, horizon: int = 1, df: Optional[pd.DataFrame] = None) -> TrainingResult:
+        """
+        Walk-forward evaluate, fit and (maybe) promote one model
+
+        Args:
+            index_name: Index, e.g. "NIFTY"
+            horizon: Days ahead the model predicts
+            df: Daily candles (default: read from the local candle store)
+        """
+        from sklearn.preprocessing import StandardScaler
+        from src.ml.index_ml_optimizer import IndexMLOptimizer
+        from src.ml.training_config import fit_estimator, get_training_config, split_thread_budget, to_float32
+
+        key = model_key(index_name, horizon)
+        model_type = self.optimizer.model_type
+        result = TrainingResult(key, index_name, horizon, model_type, status="skipped")
+
+        try:
+            if df is None:
+                df = self.candle_store.read(INDEX_SYMBOLS.get(index_name, index_name), "D")
+            if df is None or df.empty:
+                result.message = "No stored candles"
+                return self._finish(result)
+            df = df.iloc[-self.history_days:]
+
+            X, y, feature_cols, row_index = self.build_dataset(index_name, df, horizon)
+            result.samples = len(y)
+            splits = walk_forward_splits(len(y), self.n_folds, gap=horizon)
+            if not splits:
+                result.message = f"Insufficient data for walk-forward CV ({len(y)} rows)"
+                return self._finish(result)
+
+            # Folds share the thread budget: each fit gets budget / parallel folds
+            fold_jobs, fold_config = split_thread_budget(len(splits), self.n_jobs, get_training_config())
+            fold_predictions = Parallel(n_jobs=fold_jobs)(
+                delayed(_fit_and_predict)(model_type, X, y, train_end, test_start, test_end, fold_config)
+                for train_end, test_start, test_end in splits
+            )
+            scores = [
+                float(np.mean(pred == y[test_start:test_end]))
+                for pred, (_, test_start, test_end) in zip(fold_predictions, splits)
+            ]
+            result.fold_accuracies = [round(s, 4) for s in scores]
+            result.wf_accuracy_mean = float(np.mean(scores))
+            result.wf_accuracy_std = float(np.std(scores))
+
+            incumbent = self.optimizer.registry.load(key, model_type)
+            if incumbent is not None:
+                test_rows = np.concatenate([np.arange(start, end) for _, start, end in splits])
+                comparison = self._score_incumbent(
+                    incumbent, X, y, feature_cols, row_index, test_rows, np.concatenate(fold_predictions)
+                )
+                if comparison is not None:
+                    candidate_accuracy, result.incumbent_accuracy, rows = comparison
+                    # A few bars right or wrong is noise, not evidence
+                    min_rows = self.min_unseen_rows or splits[-1][2] - splits[-1][1]
+                    if rows < min_rows:
+                        result.status = "rejected"
+                        result.message = (
+                            f"Not enough unseen rows after the current model's training data "
+                            f"({rows} < {min_rows})"
+                        )
+                        return self._finish(result)
+                    if candidate_accuracy <= result.incumbent_accuracy + self.min_improvement:
+                        result.status = "rejected"
+                        result.message = (
+                            f"Candidate {candidate_accuracy:.2%} did not beat the current model "
+                            f"{result.incumbent_accuracy:.2%} on {rows} unseen rows"
+                        )
+                        return self._finish(result)
+
+            # Candidate on all labelled rows (early stopping only picks the round count)
+            scaler = StandardScaler()
+            X_all = pd.DataFrame(X, columns=feature_cols)
+            model, report = fit_estimator(
+                IndexMLOptimizer.create_model(model_type),
+                to_float32(scaler.fit_transform(X_all)), y, get_training_config()
+            )
+
+            metrics = {
+                "wf_accuracy_mean": result.wf_accuracy_mean,
+                "wf_accuracy_std": result.wf_accuracy_std,
+                "fold_accuracies": result.fold_accuracies,
+                "n_folds": len(splits),
+                "horizon": horizon,
+                "samples": result.samples,
+                "data_end": str(df.index[-1]),
+                "training_report": report.to_dict()
+            }
+            result.version = self.optimizer.registry.save(key, model_type, model, scaler, feature_cols, metrics)
+            result.status = "promoted"
+
+            # Serving optimizer picks the new version up lazily on next predict
+            self.optimizer.is_fitted.pop(key, None)
+        except Exception as e:
+            logger.error(f"❌ Walk-forward training failed for {key}: {e}")
+            result.status = "error"
+            result.message = str(e)
+
+        return self._finish(result)
+
+    @staticmethod
+    def _score_incumbent(
+        incumbent,
+        X: np.ndarray,
+        y: np.ndarray,
+        feature_cols: List[str],
+        row_index: pd.Index,
+        test_rows: np.ndarray,
+        candidate_predictions: np.ndarray
+    ) -> Optional[Tuple[Optional[float], Optional[float], int]]:
+        """
+        Candidate vs registered model on the same walk-forward test rows
+
+        Only rows after the registered model's training data are compared
+        (earlier rows are in its training set); versions saved without a
+        `data_end` metric fall back to their save time.
+
+        Returns:
+            (candidate accuracy, incumbent accuracy, rows compared); accuracies
+            are None when no row is unseen, and the whole result is None when
+            the registered model's features are no longer computed
+        """
+        missing = [c for c in incumbent.feature_names if c not in feature_cols]
+        if missing:
+            logger.warning(f"Registered {incumbent.index_name} model uses unknown features {missing[:5]}")
+            return None
+
+        cutoff = pd.Timestamp(incumbent.metrics.get("data_end") or incumbent.created_at or pd.Timestamp.min)
+        timestamps = pd.DatetimeIndex(row_index[test_rows])
+        if timestamps.tz is not None:
+            timestamps = timestamps.tz_localize(None)
+        if cutoff.tz is not None:
+            cutoff = cutoff.tz_localize(None)
+        unseen = np.asarray(timestamps > cutoff)
+        if not unseen.any():
+            return None, None, 0
+
+        rows = test_rows[unseen]
+        columns = [feature_cols.index(c) for c in incumbent.feature_names]
+        X_rows = pd.DataFrame(X[rows][:, columns], columns=incumbent.feature_names)
+        incumbent_predictions = np.asarray(incumbent.model.predict(incumbent.scaler.transform(X_rows)))
+        return (
+            float(np.mean(candidate_predictions[unseen] == y[rows])),
+            float(np.mean(incumbent_predictions == y[rows])),
+            int(len(rows))
+        )
+
+    def _finish(self, result: TrainingResult) -> TrainingResult:
+        result.finished_at = datetime.now().isoformat()
+        self.last_results[result.model_key] = result
+        self._record(result)
+        accuracy = f"{result.wf_accuracy_mean:.2%}" if result.wf_accuracy_mean is not None else "n/a"
+        logger.info(f"🧠 {result.model_key} {result.model_type}: {result.status} (walk-forward {accuracy}) {result.message}")
+        return result
+
+    def _record(self, result: TrainingResult):
+        """Append the run to the registry's training log"""
+        try:
+            os.makedirs(self.optimizer.registry.root_dir, exist_ok=True)
+            log_path = os.path.join(self.optimizer.registry.root_dir, "training_runs.jsonl")
+            with open(log_path, "a") as f:
+                f.write(json.dumps(asdict(result)) + "\n")
+        except OSError as e:
+            logger.warning(f"Could not record training run: {e}")
+
+    def run(self, index_names: Optional[List[str]] = None, horizons: Tuple[int, ...] = (1,)) -> List[TrainingResult]:
+        """
+        Train every (index, horizon); overlapping runs are skipped
+
+        Returns:
+            One TrainingResult per model (empty if a run is already in progress)
+        """
+        if not self._run_lock.acquire(blocking=False):
+            logger.info("🧠 Walk-forward training already running, skipping")
+            return []
+        try:
+            return [
+                self.train_one(index_name, horizon)
+                for index_name in (index_names or list(INDEX_SYMBOLS))
+                for horizon in horizons
+            ]
+        finally:
+            self._run_lock.release()
+
+    def get_status(self) -> Dict:
+        """Latest result per model"""
+        return {
+            "running": self._run_lock.locked(),
+            "models": {key: asdict(result) for key, result in self.last_results.items()}
+        }
+
+
+# Global trainer instance
+_trainer: Optional[WalkForwardTrainer] = None
+
+
+def get_walk_forward_trainer() -> WalkForwardTrainer:
+    """Get or create the walk-forward trainer"""
+    global _trainer
+    if _trainer is None:
+        from config.settings import settings
+        _trainer = WalkForwardTrainer(
+            n_folds=settings.ml_training_folds,
+            n_jobs=settings.ml_training_jobs,
+            min_improvement=settings.ml_training_min_improvement
+        )
+    return _trainer
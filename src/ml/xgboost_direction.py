@@ -291,6 +291,33 @@ class XGBoostDirectionPredictor:
         
         return prediction
     
+    def predict_from_state(
+        self,
+        state,
+        timestamp: Optional[datetime] = None,
+        additional_features: Optional[Dict] = None
+    ) -> DirectionPrediction:
+        """
+        Predict price direction from streaming indicator state.
+        
+        Same features as predict() on the candles the state has seen, read
+        from a LiveIndicatorState instead of recomputed from price lists.
+        
+        Args:
+            state: LiveIndicatorState (src.ml.streaming_indicators)
+            timestamp: Current time (for time-of-day features)
+            additional_features: Extra features (options flow, etc.)
+        """
+        if timestamp is None:
+            timestamp = datetime.now(IST)
+        
+        features = state.direction_features()
+        self._add_context_features(features, timestamp, additional_features)
+        
+        if self.model is not None:
+            return self._predict_with_model(features)
+        return self._predict_rule_based(features)
+    
     def _extract_features(
         self,
         prices: List[float],
@@ -350,6 +377,18 @@ class XGBoostDirectionPredictor:
             features['atr'] = 0
             features['atr_pct'] = 0
         
+        self._add_context_features(features, timestamp, additional)
+        self.feature_names = list(features.keys())
+        
+        return features
+    
+    def _add_context_features(
+        self,
+        features: Dict[str, float],
+        timestamp: datetime,
+        additional: Optional[Dict]
+    ):
+        """Add time-of-day / weekday features and any extra features in place."""
         # Time features
         features['hour'] = timestamp.hour
         features['minute'] = timestamp.minute
@@ -364,10 +403,55 @@ class XGBoostDirectionPredictor:
         # Additional features if provided
         if additional:
             features.update(additional)
+    
+    def predict_batch(self, feature_rows: List[Dict[str, float]]) -> List[DirectionPrediction]:
+        """
+        Predict many feature rows (e.g. one per index) at once.
         
-        self.feature_names = list(features.keys())
+        With a trained model the rows are stacked into one matrix and
+        scored with a single predict_proba call.
         
-        return features
+        Args:
+            feature_rows: Feature dicts as built by _extract_features /
+                LiveIndicatorState.direction_features + context features
+        
+        Returns:
+            DirectionPrediction per row, in order
+        """
+        if not feature_rows:
+            return []
+        if self.model is None:
+            return [self._predict_rule_based(features) for features in feature_rows]
+        
+        X = np.array([[features[f] for f in self.feature_names] for features in feature_rows])
+        all_probs = self.model.predict_proba(X)
+        factors = self._importance_factors()
+        return [
+            self._prediction_from_probs(features, probs, factors)
+            for features, probs in zip(feature_rows, all_probs)
+        ]
+    
+    def predict_batch_from_states(
+        self,
+        states: List,
+        timestamp: Optional[datetime] = None
+    ) -> List[DirectionPrediction]:
+        """
+        Batch version of predict_from_state().
+        
+        Args:
+            states: LiveIndicatorState per series
+            timestamp: Current time (shared time-of-day features)
+        """
+        if timestamp is None:
+            timestamp = datetime.now(IST)
+        
+        feature_rows = []
+        for state in states:
+            features = state.direction_features()
+            self._add_context_features(features, timestamp, None)
+            feature_rows.append(features)
+        return self.predict_batch(feature_rows)
     
     def _predict_with_model(self, features: Dict[str, float]) -> DirectionPrediction:
         """Make prediction using trained XGBoost model."""
@@ -377,6 +461,29 @@ class XGBoostDirectionPredictor:
         # Get probability predictions
         probs = self.model.predict_proba(X)[0]
         
+        return self._prediction_from_probs(features, probs, self._importance_factors())
+    
+    def _importance_factors(self) -> Tuple[List, List]:
+        """Top bullish / bearish factors from the model's feature importances."""
+        importances = self.model.feature_importances_
+        feature_importance = list(zip(self.feature_names, importances))
+        feature_importance.sort(key=lambda x: x[1], reverse=True)
+        
+        # Separate bullish and bearish factors
+        bullish_features = ['momentum_5', 'momentum_10', 'rsi_14', 'volume_ratio']
+        bearish_features = ['rsi_14', 'bb_position', 'macd_histogram']
+        
+        bullish = [(f, v) for f, v in feature_importance if f in bullish_features][:3]
+        bearish = [(f, v) for f, v in feature_importance if f in bearish_features][:3]
+        return bullish, bearish
+    
+    def _prediction_from_probs(
+        self,
+        features: Dict[str, float],
+        probs: np.ndarray,
+        factors: Tuple[List, List]
+    ) -> DirectionPrediction:
+        """Build a DirectionPrediction from one row of class probabilities."""
         # Class mapping (model trained with these classes)
         classes = [Direction.STRONG_DOWN, Direction.DOWN, Direction.SIDEWAYS, 
                    Direction.UP, Direction.STRONG_UP]
@@ -395,18 +502,7 @@ class XGBoostDirectionPredictor:
             Direction.STRONG_DOWN: -0.6
         }
         expected_move = move_map[direction]
-        
-        # Get feature importances
-        importances = self.model.feature_importances_
-        feature_importance = list(zip(self.feature_names, importances))
-        feature_importance.sort(key=lambda x: x[1], reverse=True)
-        
-        # Separate bullish and bearish factors
-        bullish_features = ['momentum_5', 'momentum_10', 'rsi_14', 'volume_ratio']
-        bearish_features = ['rsi_14', 'bb_position', 'macd_histogram']
-        
-        bullish = [(f, v) for f, v in feature_importance if f in bullish_features][:3]
-        bearish = [(f, v) for f, v in feature_importance if f in bearish_features][:3]
+        bullish, bearish = factors
         
         return DirectionPrediction(
             direction=direction,
@@ -562,6 +658,74 @@ class XGBoostDirectionPredictor:
         total = sum(raw_probs.values())
         return {k: v/total for k, v in raw_probs.items()}
     
+    def predict_rule_based_vectorized(self, features: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        Rule-based prediction for many rows at once (historical backfills).
+        
+        Applies the same rules, in the same order, as _predict_rule_based,
+        so each row gives the same direction/confidence as the scalar path.
+        
+        Args:
+            features: Feature name -> 1-D array (one entry per bar); missing
+                features take the scalar path's defaults
+        
+        Returns:
+            Dict of arrays: 'score', 'direction' (Direction objects),
+            'confidence', 'expected_move_pct', 'probabilities' (n x 5, columns
+            strong_down/down/sideways/up/strong_up), 'trade_signal'
+        """
+        n = len(next(iter(features.values())))
+        
+        def column(name: str, default: float) -> np.ndarray:
+            values = features.get(name)
+            if values is None:
+                return np.full(n, default, dtype=np.float64)
+            return np.asarray(values, dtype=np.float64)
+        
+        rsi = column('rsi_14', 50)
+        macd_hist = column('macd_histogram', 0)
+        mom_5 = column('momentum_5', 0)
+        bb_pos = column('bb_position', 0.5)
+        vol_ratio = column('volume_ratio', 1.0)
+        
+        score = np.zeros(n)
+        score += np.select([rsi < 30, rsi > 70, rsi < 40, rsi > 60], [0.3, -0.3, 0.1, -0.1], 0.0)
+        score += np.where(macd_hist > 0, 0.2, -0.2)
+        score += np.select([mom_5 > 0.3, mom_5 < -0.3, mom_5 > 0], [0.25, -0.25, 0.1], -0.1)
+        score += np.select([bb_pos < 0.1, bb_pos > 0.9], [0.2, -0.2], 0.0)
+        score *= np.where(vol_ratio > 1.5, 1.2, 1.0)
+        score *= np.where(column('is_first_hour', 0) != 0, 1.1, 1.0)
+        score *= np.where(column('is_lunch', 0) != 0, 0.7, 1.0)
+        
+        bucket = np.select([score > 0.4, score > 0.15, score > -0.15, score > -0.4], [0, 1, 2, 3], 4)
+        directions = np.array(
+            [Direction.STRONG_UP, Direction.UP, Direction.SIDEWAYS, Direction.DOWN, Direction.STRONG_DOWN],
+            dtype=object
+        )
+        expected_moves = np.array([0.5, 0.25, 0.0, -0.25, -0.5])
+        
+        confidence = np.minimum(0.85, 0.4 + np.abs(score) * 0.5)
+        
+        centers = np.array([-0.6, -0.3, 0.0, 0.3, 0.6])
+        raw_probs = np.exp(-np.abs(score[:, None] - centers) * 3)
+        probabilities = raw_probs / raw_probs.sum(axis=1, keepdims=True)
+        
+        is_up = bucket <= 1
+        is_down = bucket >= 3
+        trade_signal = np.where(
+            confidence < 0.45, "HOLD",
+            np.where(is_up, "BUY", np.where(is_down, "SELL", "HOLD"))
+        ).astype(object)
+        
+        return {
+            'score': score,
+            'direction': directions[bucket],
+            'confidence': confidence,
+            'expected_move_pct': expected_moves[bucket],
+            'probabilities': probabilities,
+            'trade_signal': trade_signal
+        }
+    
     def _get_trade_signal(self, direction: Direction, confidence: float) -> str:
         """Get trading signal from direction and confidence."""
         if confidence < 0.45:
@@ -607,6 +771,7 @@ class XGBoostDirectionPredictor:
             from sklearn.model_selection import train_test_split
         except ImportError:
             raise ImportError("xgboost and scikit-learn required for training")
+        from src.ml.training_config import fit_estimator, get_training_config
         
         self.feature_names = feature_names
         
@@ -627,13 +792,8 @@ class XGBoostDirectionPredictor:
             eval_metric='mlogloss'
         )
         
-        # Train
-        self.model.fit(
-            X_train, y_train,
-            eval_set=[(X_val, y_val)],
-            early_stopping_rounds=10,
-            verbose=False
-        )
+        # Train (float32, hist method, thread budget, early stopping on the validation split)
+        self.model, report = fit_estimator(self.model, X_train, y_train, get_training_config(), X_val, y_val)
         
         # Calculate metrics
         train_acc = self.model.score(X_train, y_train)
@@ -643,7 +803,8 @@ class XGBoostDirectionPredictor:
             'train_accuracy': train_acc,
             'validation_accuracy': val_acc,
             'n_samples': len(X),
-            'n_features': X.shape[1]
+            'n_features': X.shape[1],
+            'training_report': report.to_dict()
         }
     
     def save_model(self, path: str):
@@ -170,6 +170,10 @@ class UserBillingStatus(BaseModel):
     today_usage: TodayUsage
     limits: PlanLimits
     
+    # Month-to-date scans: 'total', 'option_scans', 'stock_scans', 'bulk_scans'
+    # (None when not loaded with the status)
+    monthly_usage: Optional[Dict[str, int]] = None
+    
     # Computed fields
     can_use_credits: bool = True
     has_active_subscription: bool = False
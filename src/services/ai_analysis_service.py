@@ -118,35 +118,29 @@ class CohereAnalysisService:
             logger.info(f"🤖 Triggering AGENTIC SCAN for {index}...")
             
             try:
-                import httpx
-                # Call the internal scan endpoint
-                async with httpx.AsyncClient(timeout=60.0) as client:
-                    # In production, we'd use an env var for the base URL, but for now we'll try to reach ourselves
-                    # This respects all existing billing, fyers-auth and scan logic in main.py
-                    headers = {"Authorization": authorization}
-                    # Always use quick_scan=True for AI requests to keep it under 30s
-                    scan_url = f"http://localhost:8000/options/scan?index={index}&quick_scan=True"
+                from src.services.signal_pipeline import scan_options
+                # Same pipeline (billing, fyers-auth, scan logic) as GET /options/scan, called in-process
+                # Always use quick_scan=True for AI requests to keep it under 30s
+                result = await scan_options(index, authorization=authorization, quick_scan=True)
+                if result.success:
+                    scan_results = result.data
+                    logger.info(f"✅ Agentic scan complete for {index}")
                     
-                    response = await client.get(scan_url, headers=headers)
-                    if response.status_code == 200:
-                        scan_results = response.json()
-                        logger.info(f"✅ Agentic scan complete for {index}")
-                        
-                        # Extract the best signal from scan results for analysis
-                        signals = scan_results.get("signals", []) or scan_results.get("top_opportunities", [])
-                        new_signal_data = signals[0] if signals else None
-                        
-                        # Recursively call analyze_signal with the fresh scan data
-                        # We change query_type to 'explanation' so it analyzes the results it just found
-                        return await self.analyze_signal(
-                            query=f"Explain the best signal you found in your {index} scan",
-                            signal_data=new_signal_data,
-                            scan_data=scan_results,
-                            use_cache=False,
-                            authorization=authorization
-                        )
-                    else:
-                        logger.error(f"❌ Internal scan request failed: {response.status_code} - {response.text}")
+                    # Extract the best signal from scan results for analysis
+                    signals = scan_results.get("signals", []) or scan_results.get("top_opportunities", [])
+                    new_signal_data = signals[0] if signals else None
+                    
+                    # Recursively call analyze_signal with the fresh scan data
+                    # We change query_type to 'explanation' so it analyzes the results it just found
+                    return await self.analyze_signal(
+                        query=f"Explain the best signal you found in your {index} scan",
+                        signal_data=new_signal_data,
+                        scan_data=scan_results,
+                        use_cache=False,
+                        authorization=authorization
+                    )
+                else:
+                    logger.error(f"❌ Internal scan failed: {result.status_code} - {result.error}")
             except Exception as e:
                 logger.error(f"❌ Agentic scan error: {str(e)}")
         
@@ -184,13 +178,24 @@ class CohereAnalysisService:
         except Exception as e:
             logger.error(f"Error fetching news for AI context: {e}")
 
+        # Full-chain OI analytics from the background job cache (no API calls)
+        oi_data = None
+        if scan_data and (scan_data.get("index") or scan_data.get("symbol")):
+            try:
+                from src.analytics.oi_analytics import oi_analyzer
+                if oi_analyzer:
+                    oi_data = oi_analyzer.get_cached_dict(scan_data.get("index") or scan_data.get("symbol"))
+            except Exception as e:
+                logger.debug(f"OI analytics unavailable for AI context: {e}")
+
         # Build context
         context = build_query_context(
             query=query,
             scan_data=scan_data,
             signal_data=optimizer.optimize_signal_context(signal_data) if signal_data else None,
             news_data=news_data,
-            sentiment_data=sentiment_data
+            sentiment_data=sentiment_data,
+            oi_data=oi_data
         )
         
         # Debug log the context
@@ -320,7 +325,8 @@ class CohereAnalysisService:
                             scan_data=scan_data,
                             signal_data=signal_data,
                             news_data=news_data,
-                            sentiment_data=sentiment_data
+                            sentiment_data=sentiment_data,
+                            oi_data=oi_data
                         )
                 
                 # Second call to Cohere with tool results
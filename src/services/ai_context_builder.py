@@ -431,6 +431,40 @@ def format_multiple_indices(indices_data: List[Dict[str, Any]]) -> str:
     return "\n".join(sections)
 
 
+def format_oi_analytics_context(oi_analytics: Dict[str, Dict[str, Any]]) -> str:
+    """
+    Format cached full-chain OI analytics (per expiry) for LLM context.
+    
+    Args:
+        oi_analytics: {expiry_type: ExpiryOIAnalytics.to_dict()} for one index
+    
+    Returns:
+        Formatted OI context
+    """
+    lines = ["\n🧱 FULL-CHAIN OI ANALYTICS:"]
+    
+    for expiry_type, data in oi_analytics.items():
+        spot = data.get("spot_price", 0)
+        lines.append(
+            f"• {expiry_type.replace('_', ' ').title()} ({data.get('expiry_date')}, "
+            f"{data.get('days_to_expiry', 0)} DTE): Max Pain {data.get('max_pain', 0):.0f} "
+            f"({data.get('max_pain_distance_pct', 0):+.1f}% from spot), PCR {data.get('pcr_oi', 0):.2f}"
+        )
+        
+        call_walls = [f"{w['strike']:.0f}" for w in data.get("call_walls", [])]
+        put_walls = [f"{w['strike']:.0f}" for w in data.get("put_walls", [])]
+        if call_walls:
+            lines.append(f"  - Call walls (resistance): {', '.join(call_walls)}")
+        if put_walls:
+            lines.append(f"  - Put walls (support): {', '.join(put_walls)}")
+        
+        near_band = next(iter(data.get("pcr_by_band", {}).items()), None)
+        if near_band and spot:
+            lines.append(f"  - Near-ATM PCR ({near_band[0]}): {near_band[1].get('pcr', 0):.2f}")
+    
+    return "\n".join(lines)
+
+
 def optimize_context_window(context: str, max_tokens: int = 2500) -> str:
     """
     Optimize context to fit within token limits.
@@ -499,7 +533,8 @@ def build_query_context(
     signal_data: Optional[Dict[str, Any]] = None,
     comparison_data: Optional[List[Dict[str, Any]]] = None,
     news_data: Optional[List[Dict]] = None,
-    sentiment_data: Optional[Dict] = None
+    sentiment_data: Optional[Dict] = None,
+    oi_data: Optional[Dict[str, Dict[str, Any]]] = None
 ) -> str:
     """
     Build complete context for a user query.
@@ -512,6 +547,7 @@ def build_query_context(
         comparison_data: Multiple scans for comparison
         news_data: Recent market news
         sentiment_data: Aggregated sentiment data
+        oi_data: Cached full-chain OI analytics per expiry
     
     Returns:
         Formatted context string with clear sections
@@ -541,6 +577,10 @@ def build_query_context(
         context_parts.append("=" * 60)
         context_parts.append(format_multiple_indices(comparison_data))
     
+    # Full-chain OI analytics (supplements scan data, never replaces it)
+    if oi_data and context_parts:
+        context_parts.append(format_oi_analytics_context(oi_data))
+    
     # Add news context if available
     if news_data or sentiment_data:
         context_parts.append("")
@@ -2,9 +2,9 @@
 AI Tools for Cohere Function Calling
 Allows the AI to trigger actual actions: scans, Fyers API calls, etc.
 """
+import asyncio
 import logging
 from typing import Dict, Any, List, Optional
-import httpx
 
 logger = logging.getLogger(__name__)
 
@@ -48,12 +48,10 @@ COHERE_TOOLS = [
 class AIToolExecutor:
     """
     Executes tools called by the AI.
-    Bridges between Cohere's function calling and actual API endpoints.
+    Bridges between Cohere's function calling and the in-process services
+    behind the API endpoints (no HTTP round-trip to the app itself).
     """
     
-    def __init__(self, base_url: str = "http://localhost:8000"):
-        self.base_url = base_url
-    
     async def execute_tool(
         self, 
         tool_name: str, 
@@ -91,123 +89,110 @@ class AIToolExecutor:
             return {"error": str(e)}
     
     async def _scan_index(self, params: Dict[str, Any], auth: str) -> Dict[str, Any]:
-        """Trigger a fresh options scan."""
+        """Trigger a fresh options scan (charged like GET /options/scan)."""
+        from src.services.signal_pipeline import scan_options
+        
         index = params.get("index", "NIFTY").upper()
         expiry = params.get("expiry", "weekly")
         
         logger.info(f"📊 Scanning {index} with expiry={expiry}")
         
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            url = f"{self.base_url}/options/scan"
-            headers = {"Authorization": auth}
-            params_dict = {
+        result = await scan_options(index, authorization=auth, expiry=expiry, quick_scan=True)
+        
+        if result.success:
+            logger.info(f"✅ Scan complete for {index}")
+            return {
+                "success": True,
                 "index": index,
-                "expiry": expiry,
-                "quick_scan": "true"
+                "data": result.data,
+                "message": f"Successfully scanned {index} options"
             }
-            
-            response = await client.get(url, headers=headers, params=params_dict)
-            
-            if response.status_code == 200:
-                data = response.json()
-                logger.info(f"✅ Scan complete for {index}")
-                return {
-                    "success": True,
-                    "index": index,
-                    "data": data,
-                    "message": f"Successfully scanned {index} options"
-                }
-            else:
-                logger.error(f"❌ Scan failed: {response.status_code}")
-                return {
-                    "success": False,
-                    "error": f"Scan failed with status {response.status_code}",
-                    "details": response.text
-                }
+        
+        logger.error(f"❌ Scan failed: {result.status_code}")
+        return {
+            "success": False,
+            "error": f"Scan failed with status {result.status_code}",
+            "details": result.error
+        }
+    
+    async def _user_fyers_client(self, auth: str):
+        """Fyers client on the calling user's stored token (None if not connected)"""
+        from src.api.fyers_client import FyersClient
+        from src.services.auth_service import auth_service
+        
+        user = await auth_service.get_current_user(auth.replace("Bearer ", ""))
+        fyers_token = await auth_service.get_fyers_token(user.id)
+        if not fyers_token or not fyers_token.access_token:
+            return None
+        
+        # Own instance, so the shared fyers_client keeps its token
+        client = FyersClient()
+        client.access_token = fyers_token.access_token
+        client._initialize_client()
+        return client
     
     async def _get_fyers_positions(self, auth: str) -> Dict[str, Any]:
         """Get user's Fyers positions."""
         logger.info("📈 Getting Fyers positions")
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            url = f"{self.base_url}/fyers/positions"
-            headers = {"Authorization": auth}
-            
-            response = await client.get(url, headers=headers)
-            
-            if response.status_code == 200:
-                data = response.json()
-                return {
-                    "success": True,
-                    "positions": data.get("netPositions", []),
-                    "message": "Successfully fetched positions"
-                }
-            else:
-                return {
-                    "success": False,
-                    "error": "Could not fetch positions",
-                    "details": response.text
-                }
+        client = await self._user_fyers_client(auth)
+        if client is None:
+            return {
+                "success": False,
+                "error": "Could not fetch positions",
+                "details": "Fyers account not connected"
+            }
+        
+        data = await asyncio.to_thread(client.get_positions)
+        return {
+            "success": True,
+            "positions": data.get("netPositions", []),
+            "message": "Successfully fetched positions"
+        }
     
     async def _get_fyers_funds(self, auth: str) -> Dict[str, Any]:
         """Get user's Fyers account balance."""
         logger.info("💰 Getting Fyers funds")
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            url = f"{self.base_url}/fyers/funds"
-            headers = {"Authorization": auth}
-            
-            response = await client.get(url, headers=headers)
-            
-            if response.status_code == 200:
-                data = response.json()
-                return {
-                    "success": True,
-                    "funds": data.get("fund_limit", []),
-                    "message": "Successfully fetched funds"
-                }
-            else:
-                return {
-                    "success": False,
-                    "error": "Could not fetch funds",
-                    "details": response.text
-                }
+        client = await self._user_fyers_client(auth)
+        if client is None:
+            return {
+                "success": False,
+                "error": "Could not fetch funds",
+                "details": "Fyers account not connected"
+            }
+        
+        data = await asyncio.to_thread(client.get_funds)
+        return {
+            "success": True,
+            "funds": data.get("fund_limit", []),
+            "message": "Successfully fetched funds"
+        }
     
     async def _get_latest_scan(self, auth: str, index: str = None) -> Dict[str, Any]:
         """Get latest scan from database, optionally filtered by index."""
+        from src.services.auth_service import auth_service
+        from src.services.screener_service import screener_service
+        
         logger.info(f"📂 Getting latest scan from database{' for ' + index if index else ''}")
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            # Build URL with optional index parameter
-            url = f"{self.base_url}/screener/latest"
-            if index:
-                url += f"?index={index.upper()}"
-            headers = {"Authorization": auth}
-            
-            response = await client.get(url, headers=headers)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data.get("status") == "success":
-                    return {
-                        "success": True,
-                        "data": data,
-                        "index": data.get("index", index or "NIFTY"),
-                        "message": f"Successfully fetched latest scan for {data.get('index', index or 'NIFTY')}"
-                    }
-                else:
-                    return {
-                        "success": False,
-                        "message": data.get("message", "No scan data available"),
-                        "suggestion": "Please run a fresh scan using 'scan nifty' or 'scan banknifty'"
-                    }
-            else:
-                return {
-                    "success": False,
-                    "error": "Could not fetch scan data",
-                    "details": response.text,
-                    "suggestion": "Please run a fresh scan using 'scan nifty'"
-                }
+        user = await auth_service.get_current_user(auth.replace("Bearer ", ""))
+        latest_scan = await screener_service.get_latest_option_scanner_result(user.id, index)
+        
+        if not latest_scan:
+            return {
+                "success": False,
+                "message": f"No saved scans found{' for ' + index.upper() if index else ''}",
+                "suggestion": "Please run a fresh scan using 'scan nifty' or 'scan banknifty'"
+            }
+        
+        data = {"status": "success", **latest_scan}
+        return {
+            "success": True,
+            "data": data,
+            "index": data.get("index", index or "NIFTY"),
+            "message": f"Successfully fetched latest scan for {data.get('index', index or 'NIFTY')}"
+        }
 
 
 def format_tool_result_for_ai(tool_name: str, result: Dict[str, Any]) -> str:
@@ -1,33 +1,53 @@
 """
 Authentication Service - Handles user authentication and token management
+
+Access tokens are verified locally (JWT signature/expiry) and user
+profiles / Fyers tokens are cached per user id for a short TTL, so an
+authenticated request normally makes no Supabase calls. Caches are
+invalidated on logout and when a Fyers token is stored or deleted.
 """
-from config.supabase_config import supabase, supabase_admin
+from config.supabase_config import async_supabase, async_supabase_admin, SUPABASE_URL, SUPABASE_JWT_SECRET
 from src.models.auth_models import (
     UserRegister, UserLogin, UserResponse, TokenResponse,
     FyersTokenStore, FyersTokenResponse
 )
+from src.services.token_verifier import TokenVerifier, LocalVerificationUnavailable
+from src.utils.ttl_cache import TTLCache
 from fastapi import HTTPException
 from datetime import datetime
 from typing import Optional
+import jwt
 import logging
 import uuid
 
 logger = logging.getLogger(__name__)
 
 
+# Cached user profiles / Fyers token records (seconds, entries)
+USER_CACHE_TTL_SECONDS = 300
+FYERS_TOKEN_CACHE_TTL_SECONDS = 60
+AUTH_CACHE_SIZE = 5000
+
+# Cached "user has no Fyers token"
+_NO_TOKEN = object()
+
+
 class AuthService:
     """Handle authentication operations"""
 
     def __init__(self):
-        self.supabase = supabase
+        self.supabase = async_supabase
         # Use admin client for operations that need to bypass RLS (like token storage)
-        self.supabase_admin = supabase_admin
+        self.supabase_admin = async_supabase_admin
+        self.token_verifier = TokenVerifier(SUPABASE_URL, SUPABASE_JWT_SECRET)
+        self._user_cache = TTLCache(USER_CACHE_TTL_SECONDS, AUTH_CACHE_SIZE)
+        self._fyers_token_cache = TTLCache(FYERS_TOKEN_CACHE_TTL_SECONDS, AUTH_CACHE_SIZE)
     
     async def register_user(self, user_data: UserRegister) -> TokenResponse:
         """Register a new user"""
         try:
             # Sign up with Supabase Auth
-            response = self.supabase.auth.sign_up({
+            response = await self.supabase.auth.sign_up({
                 "email": user_data.email,
                 "password": user_data.password,
             })
@@ -43,7 +63,7 @@ class AuthService:
                     "email": user_data.email,
                     "full_name": user_data.full_name
                 }
-                self.supabase.table("users").insert(user_profile).execute()
+                await self.supabase.table("users").insert(user_profile).execute()
             except Exception as profile_error:
                 # Log but don't fail - profile will be created on login
                 logger.warning(f"Could not create user profile (will be created on login): {profile_error}")
@@ -104,7 +124,7 @@ class AuthService:
         """Login existing user"""
         try:
             # Sign in with Supabase Auth
-            response = self.supabase.auth.sign_in_with_password({
+            response = await self.supabase.auth.sign_in_with_password({
                 "email": login_data.email,
                 "password": login_data.password
             })
@@ -113,7 +133,7 @@ class AuthService:
                 raise HTTPException(status_code=401, detail="Invalid credentials")
             
             # Get user profile
-            user_profile = self.supabase.table("users").select("*").eq("id", response.user.id).execute()
+            user_profile = await self.supabase.table("users").select("*").eq("id", response.user.id).execute()
             
             profile = user_profile.data[0] if user_profile.data else {}
             
@@ -165,8 +185,12 @@ class AuthService:
     
     async def logout_user(self, access_token: str):
         """Logout user and invalidate token"""
+        # Locally verified tokens stay valid until expiry, so reject this session here
+        user_id = self.token_verifier.revoke(access_token)
+        if user_id:
+            self.invalidate_user(user_id)
         try:
-            self.supabase.auth.sign_out()
+            await self.supabase.auth.sign_out()
             return {"message": "Logged out successfully"}
         except Exception as e:
             logger.error(f"Logout error: {str(e)}")
@@ -176,13 +200,13 @@ class AuthService:
         """Refresh access token using refresh token"""
         try:
             # Use Supabase refresh session
-            response = self.supabase.auth.refresh_session(refresh_token)
+            response = await self.supabase.auth.refresh_session(refresh_token)
             
             if not response.session or not response.user:
                 raise HTTPException(status_code=401, detail="Invalid refresh token")
             
             # Get user profile
-            user_profile = self.supabase.table("users").select("*").eq("id", response.user.id).execute()
+            user_profile = await self.supabase.table("users").select("*").eq("id", response.user.id).execute()
             profile = user_profile.data[0] if user_profile.data else {}
             
             # Parse created_at
@@ -217,41 +241,41 @@ class AuthService:
             raise HTTPException(status_code=401, detail="Failed to refresh token")
     
     async def get_current_user(self, access_token: str) -> UserResponse:
-        """Get current user from access token"""
+        """
+        Get current user from access token
+        
+        The token is verified locally when a key is available and the
+        profile is served from the user cache. On a cache miss a verified
+        token's claims identify the user and only the profile is fetched;
+        Supabase Auth is only asked when the token cannot be checked locally.
+        """
+        try:
+            claims = self.token_verifier.verify(access_token)
+        except LocalVerificationUnavailable as e:
+            logger.debug(f"Local token verification unavailable: {e}")
+            claims = None
+        except jwt.InvalidTokenError as e:
+            logger.info(f"Rejected access token: {e}")
+            raise HTTPException(status_code=401, detail="Invalid token")
+        
+        if claims is not None:
+            cached = self._user_cache.get(claims["sub"])
+            if cached is not None:
+                return cached
+            return await self._load_user(claims["sub"], claims.get("email"))
+        
         try:
             # Get user directly from token (don't need to set session)
-            user_response = self.supabase.auth.get_user(access_token)
+            user_response = await self.supabase.auth.get_user(access_token)
             
             if not user_response or not user_response.user:
                 raise HTTPException(status_code=401, detail="Invalid token")
             
             user = user_response.user
-            
-            # Get user profile using admin client to bypass RLS
-            try:
-                user_profile = self.supabase_admin.table("users").select("*").eq("id", user.id).execute()
-                profile = user_profile.data[0] if user_profile.data else {}
-            except Exception as profile_error:
-                logger.warning(f"Could not fetch user profile: {profile_error}")
-                profile = {}
-            
-            # Handle created_at properly - it might be a string or datetime object
-            created_at = user.created_at
-            if isinstance(created_at, str):
-                created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-            elif hasattr(created_at, 'isoformat'):
-                # It's already a datetime object
-                pass
-            else:
-                # Fallback to current time if we can't parse it
-                created_at = datetime.now()
-            
-            return UserResponse(
-                id=user.id,
-                email=user.email,
-                full_name=profile.get("full_name"),
-                created_at=created_at
-            )
+            cached = self._user_cache.get(user.id)
+            if cached is not None:
+                return cached
+            return await self._load_user(user.id, user.email, user.created_at)
             
         except HTTPException:
             raise
@@ -259,12 +283,42 @@ class AuthService:
             logger.error(f"Get user error: {str(e)}")
             raise HTTPException(status_code=401, detail="Invalid token")
     
+    async def _load_user(self, user_id: str, email: Optional[str], created_at=None) -> UserResponse:
+        """Build the user from its profile row and cache it (email / created_at fall back to the profile)"""
+        # Get user profile using admin client to bypass RLS
+        try:
+            user_profile = await self.supabase_admin.table("users").select("*").eq("id", user_id).execute()
+            profile = user_profile.data[0] if user_profile.data else {}
+        except Exception as profile_error:
+            logger.warning(f"Could not fetch user profile: {profile_error}")
+            profile = {}
+        
+        # Handle created_at properly - it might be a string or datetime object
+        created_at = created_at or profile.get("created_at")
+        if isinstance(created_at, str):
+            created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+        elif hasattr(created_at, 'isoformat'):
+            # It's already a datetime object
+            pass
+        else:
+            # Fallback to current time if we can't parse it
+            created_at = datetime.now()
+        
+        current_user = UserResponse(
+            id=user_id,
+            email=email or profile.get("email") or "",
+            full_name=profile.get("full_name"),
+            created_at=created_at
+        )
+        self._user_cache.set(user_id, current_user)
+        return current_user
+    
     async def store_fyers_token(self, user_id: str, token_data: FyersTokenStore) -> FyersTokenResponse:
         """Store or update Fyers authentication token"""
         try:
             # Use admin client to bypass RLS for token storage
             # Check if token exists
-            existing = self.supabase_admin.table("fyers_tokens").select("*").eq("user_id", user_id).execute()
+            existing = await self.supabase_admin.table("fyers_tokens").select("*").eq("user_id", user_id).execute()
 
             token_record = {
                 "user_id": user_id,
@@ -280,17 +334,17 @@ class AuthService:
             if existing.data:
                 # Update existing token
                 logger.info(f"🔄 Updating existing token for user {user_id}")
-                response = self.supabase_admin.table("fyers_tokens").update(token_record).eq("user_id", user_id).execute()
+                response = await self.supabase_admin.table("fyers_tokens").update(token_record).eq("user_id", user_id).execute()
             else:
                 # Insert new token
                 logger.info(f"➕ Inserting new token for user {user_id}")
                 token_record["id"] = str(uuid.uuid4())
                 token_record["created_at"] = datetime.now().isoformat()
-                response = self.supabase_admin.table("fyers_tokens").insert(token_record).execute()
+                response = await self.supabase_admin.table("fyers_tokens").insert(token_record).execute()
             
             data = response.data[0]
             
-            return FyersTokenResponse(
+            stored = FyersTokenResponse(
                 id=data["id"],
                 user_id=data["user_id"],
                 access_token=data["access_token"],
@@ -298,26 +352,34 @@ class AuthService:
                 created_at=datetime.fromisoformat(data["created_at"]),
                 updated_at=datetime.fromisoformat(data["updated_at"])
             )
+            self._fyers_token_cache.set(user_id, stored)
+            return stored
             
         except Exception as e:
+            self._fyers_token_cache.pop(user_id)
             logger.error(f"Store Fyers token error: {str(e)}")
             raise HTTPException(status_code=400, detail=f"Failed to store token: {str(e)}")
     
     async def get_fyers_token(self, user_id: str) -> Optional[FyersTokenResponse]:
         """Get Fyers token for user - returns token from DB without expiry check.
         Let Fyers API validate the token and return appropriate error if expired."""
+        cached = self._fyers_token_cache.get(user_id)
+        if cached is not None:
+            return None if cached is _NO_TOKEN else cached
+        
         try:
             # Use admin client to bypass RLS
-            response = self.supabase_admin.table("fyers_tokens").select("*").eq("user_id", user_id).execute()
+            response = await self.supabase_admin.table("fyers_tokens").select("*").eq("user_id", user_id).execute()
 
             if not response.data:
                 logger.info(f"🔍 No Fyers token found for user {user_id}")
+                self._fyers_token_cache.set(user_id, _NO_TOKEN)
                 return None
 
             data = response.data[0]
             logger.info(f"✅ Found Fyers token for user {user_id}")
 
-            return FyersTokenResponse(
+            token = FyersTokenResponse(
                 id=data["id"],
                 user_id=data["user_id"],
                 access_token=data["access_token"],
@@ -325,6 +387,8 @@ class AuthService:
                 created_at=datetime.fromisoformat(data["created_at"]),
                 updated_at=datetime.fromisoformat(data["updated_at"])
             )
+            self._fyers_token_cache.set(user_id, token)
+            return token
 
         except Exception as e:
             logger.error(f"Get Fyers token error: {str(e)}")
@@ -334,19 +398,33 @@ class AuthService:
         """Delete Fyers token for user"""
         try:
             # Use admin client to bypass RLS
-            self.supabase_admin.table("fyers_tokens").delete().eq("user_id", user_id).execute()
+            await self.supabase_admin.table("fyers_tokens").delete().eq("user_id", user_id).execute()
             logger.info(f"🗑️ Deleted Fyers token for user {user_id}")
             return {"message": "Token deleted successfully"}
         except Exception as e:
             logger.error(f"Delete Fyers token error: {str(e)}")
             raise HTTPException(status_code=400, detail="Failed to delete token")
+        finally:
+            self._fyers_token_cache.pop(user_id)
+    
+    def invalidate_user(self, user_id: str):
+        """Drop cached profile and Fyers token for a user"""
+        self._user_cache.pop(user_id)
+        self._fyers_token_cache.pop(user_id)
+    
+    def cache_stats(self) -> dict:
+        """Hit rates of the auth caches"""
+        return {
+            "users": self._user_cache.stats(),
+            "fyers_tokens": self._fyers_token_cache.stats()
+        }
     
     
     async def get_user_email(self, user_id: str) -> Optional[str]:
         """Get user email from auth.users table"""
         try:
             # Query auth.users table directly
-            response = self.supabase_admin.auth.admin.get_user_by_id(user_id)
+            response = await self.supabase_admin.auth.admin.get_user_by_id(user_id)
             
             if response and response.user:
                 return response.user.email
@@ -361,7 +439,7 @@ class AuthService:
     async def get_user_name(self, user_id: str) -> Optional[str]:
         """Get user name from public.users table"""
         try:
-            response = self.supabase.table("users").select("full_name").eq("id", user_id).single().execute()
+            response = await self.supabase.table("users").select("full_name").eq("id", user_id).single().execute()
             
             if response.data and response.data.get('full_name'):
                 return response.data['full_name']
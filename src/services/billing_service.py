@@ -6,7 +6,9 @@ import os
 from typing import Optional, Tuple, Dict, List
 from datetime import datetime, date, timedelta
 from decimal import Decimal
-from supabase import create_client, Client
+from config.supabase_config import async_supabase_admin
+from src.utils.ttl_cache import TTLCache
+from src.services.write_behind import get_write_behind_queue
 from src.models.billing_models import (
     UserBillingStatus,
     TodayUsage,
@@ -21,6 +23,12 @@ from src.models.billing_models import (
 )
 
 
+# Plan limits / credit packs change only through migrations or the dashboard
+BILLING_CONFIG_TTL_SECONDS = 600
+
+SCAN_TYPES = ('option_scan', 'stock_scan', 'bulk_scan')
+
+
 class BillingService:
     """Service for managing subscriptions and PAYG credits"""
     
@@ -31,8 +39,13 @@ class BillingService:
         if not self.supabase_url or not self.supabase_key:
             raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set")
         
-        self.supabase: Client = create_client(self.supabase_url, self.supabase_key)
+        # Service-role async client; same key as above
+        self.supabase = async_supabase_admin
         self.pricing = PricingConfig()
+        self._config_cache = TTLCache(BILLING_CONFIG_TTL_SECONDS, max_entries=8)
+        # Cleared if the get_billing_status / deduct_credits_atomic SQL functions are not deployed
+        self._status_rpc_available = True
+        self._deduct_rpc_available = True
     
     
     # ============================================
@@ -43,62 +56,35 @@ class BillingService:
         """
         Get complete billing status for a user
         Returns subscription info, credits balance, usage, and limits
+        
+        Subscription, credits and usage come from one get_billing_status
+        RPC call (database/migrations/billing_status_function.sql); plan
+        limits from the in-process config cache.
         """
-        # Get subscription
-        try:
-            sub_response = self.supabase.table('user_subscriptions')\
-                .select('*')\
-                .eq('user_id', user_id)\
-                .maybe_single()\
-                .execute()
-            subscription = sub_response.data if sub_response.data else None
-        except Exception as e:
-            subscription = None
+        rows = await self._fetch_billing_rows(user_id)
+        if rows is None:
+            rows = await self._fetch_billing_rows_separately(user_id)
+        subscription, credits, today_counts, month_counts = rows
         
-        # Get credits
-        try:
-            credits_response = self.supabase.table('user_credits')\
-                .select('*')\
-                .eq('user_id', user_id)\
-                .maybe_single()\
-                .execute()
-            
-            if credits_response.data:
-                credits = credits_response.data
-            else:
-                # Initialize user with 100 free credits if they don't have a record
-                credits = await self._initialize_user_credits(user_id)
-        except Exception as e:
-            # If something goes wrong, try to initialize
+        if not credits:
+            # Initialize user with 100 free credits if they don't have a record
             credits = await self._initialize_user_credits(user_id)
         
-        # Get today's usage
-        today = date.today()
-        usage_response = self.supabase.table('usage_logs')\
-            .select('*')\
-            .eq('user_id', user_id)\
-            .eq('usage_date', today.isoformat())\
-            .execute()
+        today_usage = TodayUsage(
+            option_scans=today_counts.get('option_scan', 0),
+            stock_scans=today_counts.get('stock_scan', 0),
+            bulk_scans=today_counts.get('bulk_scan', 0)
+        )
         
-        today_usage = TodayUsage()
-        if usage_response.data:
-            for log in usage_response.data:
-                if log['scan_type'] == 'option_scan':
-                    today_usage.option_scans = log['count']
-                elif log['scan_type'] == 'stock_scan':
-                    today_usage.stock_scans = log['count']
-                elif log['scan_type'] == 'bulk_scan':
-                    today_usage.bulk_scans = log['count']
+        monthly_usage = None
+        if month_counts is not None:
+            monthly_usage = {f'{scan_type}s': month_counts.get(scan_type, 0) for scan_type in SCAN_TYPES}
+            monthly_usage['total'] = sum(month_counts.values())
         
         # Get plan limits
         plan_type = subscription['plan_type'] if subscription else 'free'
         try:
-            limits_response = self.supabase.table('plan_limits')\
-                .select('*')\
-                .eq('plan_type', plan_type)\
-                .maybe_single()\
-                .execute()
-            limits = PlanLimits(**limits_response.data) if limits_response.data else PlanLimits(plan_type='free')
+            limits = (await self._get_cached_plan_limits()).get(plan_type) or PlanLimits(plan_type='free')
         except Exception as e:
             limits = PlanLimits(plan_type='free')
         
@@ -121,11 +107,97 @@ class BillingService:
             credits_balance=Decimal(str(credits.get('balance', 0))),
             today_usage=today_usage,
             limits=limits,
+            monthly_usage=monthly_usage,
             can_use_credits=True,
             has_active_subscription=has_active_sub
         )
     
     
+    async def _fetch_billing_rows(self, user_id: str) -> Optional[Tuple[Optional[Dict], Optional[Dict], Dict, Dict]]:
+        """
+        Subscription, credits, today's and month-to-date usage in one RPC
+        
+        Returns:
+            (subscription, credits, {scan_type: today count}, {scan_type: month count}),
+            or None when the RPC is unavailable
+        """
+        if not self._status_rpc_available:
+            return None
+        
+        try:
+            response = await self.supabase.rpc('get_billing_status', {
+                'p_user_id': user_id,
+                'p_today': date.today().isoformat()
+            }).execute()
+        except Exception as e:
+            if 'get_billing_status' in str(e) or 'PGRST202' in str(e):
+                # Function not deployed; stop trying until restart
+                self._status_rpc_available = False
+                print(f"get_billing_status RPC unavailable, using per-table reads: {e}")
+            else:
+                print(f"get_billing_status RPC failed: {e}")
+            return None
+        
+        data = response.data or {}
+        return (
+            data.get('subscription'),
+            data.get('credits'),
+            {scan_type: int(count) for scan_type, count in (data.get('today_usage') or {}).items()},
+            {scan_type: int(count) for scan_type, count in (data.get('month_usage') or {}).items()}
+        )
+    
+    
+    async def _fetch_billing_rows_separately(self, user_id: str) -> Tuple[Optional[Dict], Optional[Dict], Dict, None]:
+        """Per-table reads, for databases without the get_billing_status function"""
+        # Get subscription
+        try:
+            sub_response = await self.supabase.table('user_subscriptions')\
+                .select('*')\
+                .eq('user_id', user_id)\
+                .maybe_single()\
+                .execute()
+            subscription = sub_response.data if sub_response.data else None
+        except Exception as e:
+            subscription = None
+        
+        # Get credits
+        try:
+            credits_response = await self.supabase.table('user_credits')\
+                .select('*')\
+                .eq('user_id', user_id)\
+                .maybe_single()\
+                .execute()
+            credits = credits_response.data if credits_response.data else None
+        except Exception as e:
+            credits = None
+        
+        # Get today's usage
+        today = date.today()
+        usage_response = await self.supabase.table('usage_logs')\
+            .select('*')\
+            .eq('user_id', user_id)\
+            .eq('usage_date', today.isoformat())\
+            .execute()
+        today_counts = {log['scan_type']: log['count'] for log in usage_response.data or []}
+        
+        return subscription, credits, today_counts, None
+    
+    
+    async def _get_cached_plan_limits(self) -> Dict[str, PlanLimits]:
+        """All plan limits keyed by plan type (one query per cache TTL)"""
+        limits = self._config_cache.get('plan_limits')
+        if limits is None:
+            response = await self.supabase.table('plan_limits').select('*').execute()
+            limits = {row['plan_type']: PlanLimits(**row) for row in response.data or []}
+            self._config_cache.set('plan_limits', limits)
+        return limits
+    
+    
+    def invalidate_config_cache(self):
+        """Reload plan limits and credit packs on next use"""
+        self._config_cache.clear()
+    
+    
     async def check_can_perform_action(
         self, 
         user_id: str, 
@@ -162,7 +234,9 @@ class BillingService:
         
         # Check monthly scan limit first (most important for medium/pro)
         if limits.monthly_scan_limit is not None:
-            monthly_usage = await self._get_monthly_usage(status.user_id)
+            monthly_usage = status.monthly_usage
+            if monthly_usage is None:
+                monthly_usage = await self._get_monthly_usage(status.user_id)
             total_monthly_scans = monthly_usage.get('total', 0)
             
             if total_monthly_scans + count > limits.monthly_scan_limit:
@@ -270,7 +344,7 @@ class BillingService:
         month_start = date(today.year, today.month, 1)
         
         try:
-            usage_response = self.supabase.table('usage_logs')\
+            usage_response = await self.supabase.table('usage_logs')\
                 .select('scan_type, count')\
                 .eq('user_id', user_id)\
                 .gte('usage_date', month_start.isoformat())\
@@ -337,14 +411,14 @@ class BillingService:
         today = date.today()
         
         try:
-            # Upsert usage log
-            self.supabase.table('usage_logs').upsert({
+            # Upsert usage log (batched off the request path)
+            get_write_behind_queue().enqueue('usage_logs', {
                 'user_id': user_id,
                 'scan_type': action,
                 'count': count,
                 'usage_date': today.isoformat(),
                 'metadata': metadata
-            }, on_conflict='user_id,scan_type,usage_date').execute()
+            }, on_conflict='user_id,scan_type,usage_date')
             
             return True, f"Usage logged: {count} {action}"
         except Exception as e:
@@ -361,47 +435,17 @@ class BillingService:
         """Deduct credits for PAYG user"""
         cost = self.pricing.calculate_scan_cost(action, count)
         
-        try:
-            # Get current balance
-            credits_response = self.supabase.table('user_credits')\
-                .select('*')\
-                .eq('user_id', user_id)\
-                .single()\
-                .execute()
-            
-            if not credits_response.data:
-                return False, "Credits account not found"
-            
-            current_balance = Decimal(str(credits_response.data['balance']))
-            
-            if current_balance < cost:
-                return False, f"Insufficient credits. Required: ₹{cost}, Balance: ₹{current_balance}"
-            
-            new_balance = current_balance - cost
-            
-            # Update balance
-            self.supabase.table('user_credits').update({
-                'balance': float(new_balance),
-                'lifetime_spent': float(Decimal(str(credits_response.data['lifetime_spent'])) + cost)
-            }).eq('user_id', user_id).execute()
-            
-            # Log transaction
-            self.supabase.table('credit_transactions').insert({
-                'user_id': user_id,
-                'transaction_type': 'debit',
-                'amount': float(cost),
-                'balance_before': float(current_balance),
-                'balance_after': float(new_balance),
-                'description': f"{action.replace('_', ' ').title()} - {count} item(s)",
-                'scan_type': action,
-                'scan_count': count,
-                'metadata': metadata
-            }).execute()
-            
-            return True, f"Deducted ₹{cost}. New balance: ₹{new_balance}"
-        
-        except Exception as e:
-            return False, f"Failed to deduct credits: {str(e)}"
+        success, message, balance_data = await self.deduct_credits(
+            user_id=user_id,
+            amount=cost,
+            description=f"{action.replace('_', ' ').title()} - {count} item(s)",
+            scan_type=action,
+            scan_count=count,
+            metadata=metadata
+        )
+        if not success:
+            return False, message
+        return True, f"Deducted ₹{cost}. New balance: ₹{balance_data['balance']}"
     
     
     # ============================================
@@ -444,14 +488,14 @@ class BillingService:
             # Insert or update payment record
             if razorpay_payment_id:
                 # Check if payment already exists
-                existing = self.supabase.table('payment_history')\
+                existing = await self.supabase.table('payment_history')\
                     .select('*')\
                     .eq('razorpay_payment_id', razorpay_payment_id)\
                     .execute()
                 
                 if existing.data:
                     # Update existing payment
-                    self.supabase.table('payment_history')\
+                    await self.supabase.table('payment_history')\
                         .update({
                             'status': status,
                             'payment_method': payment_method,
@@ -463,10 +507,10 @@ class BillingService:
                         .execute()
                 else:
                     # Insert new payment
-                    self.supabase.table('payment_history').insert(payment_data).execute()
+                    await self.supabase.table('payment_history').insert(payment_data).execute()
             else:
                 # Insert new payment (for cases without razorpay_payment_id)
-                self.supabase.table('payment_history').insert(payment_data).execute()
+                await self.supabase.table('payment_history').insert(payment_data).execute()
             
             return True, f"Payment event logged: {status}"
             
@@ -492,7 +536,7 @@ class BillingService:
             if payment_type:
                 query = query.eq('payment_type', payment_type)
             
-            response = query.execute()
+            response = await query.execute()
             return response.data or []
             
         except Exception as e:
@@ -522,7 +566,7 @@ class BillingService:
             if metadata:
                 update_data['metadata'] = metadata
             
-            self.supabase.table('payment_history')\
+            await self.supabase.table('payment_history')\
                 .update(update_data)\
                 .eq('razorpay_payment_id', razorpay_payment_id)\
                 .execute()
@@ -551,7 +595,7 @@ class BillingService:
         try:
             # 🔒 PREVENT DOUBLE PROCESSING: Check if payment already processed
             if payment_id:
-                existing_txn = self.supabase.table('credit_transactions')\
+                existing_txn = await self.supabase.table('credit_transactions')\
                     .select('*')\
                     .eq('razorpay_payment_id', payment_id)\
                     .execute()
@@ -560,7 +604,7 @@ class BillingService:
                     return False, f"Payment {payment_id} already processed", None
             
             # Get current balance
-            credits_response = self.supabase.table('user_credits')\
+            credits_response = await self.supabase.table('user_credits')\
                 .select('*')\
                 .eq('user_id', user_id)\
                 .single()\
@@ -568,7 +612,7 @@ class BillingService:
             
             if not credits_response.data:
                 # Create credits account if not exists
-                self.supabase.table('user_credits').insert({
+                await self.supabase.table('user_credits').insert({
                     'user_id': user_id,
                     'balance': float(amount),
                     'lifetime_purchased': float(amount),
@@ -582,14 +626,14 @@ class BillingService:
                 new_balance = current_balance + amount
                 
                 # Update balance
-                self.supabase.table('user_credits').update({
+                await self.supabase.table('user_credits').update({
                     'balance': float(new_balance),
                     'lifetime_purchased': float(Decimal(str(credits_response.data['lifetime_purchased'])) + amount),
                     'last_topped_up': datetime.now().isoformat()
                 }).eq('user_id', user_id).execute()
             
             # Log transaction with payment_id for idempotency
-            self.supabase.table('credit_transactions').insert({
+            await self.supabase.table('credit_transactions').insert({
                 'user_id': user_id,
                 'transaction_type': 'purchase',
                 'amount': float(amount),
@@ -610,19 +654,24 @@ class BillingService:
     
     
     async def get_credit_packs(self) -> List[CreditPack]:
-        """Get available credit packs"""
-        response = self.supabase.table('credit_packs')\
-            .select('*')\
-            .eq('is_active', True)\
-            .order('display_order')\
-            .execute()
+        """Get available credit packs (cached)"""
+        packs = self._config_cache.get('credit_packs')
+        if packs is None:
+            response = await self.supabase.table('credit_packs')\
+                .select('*')\
+                .eq('is_active', True)\
+                .order('display_order')\
+                .execute()
+            
+            packs = [CreditPack(**pack) for pack in response.data] if response.data else []
+            self._config_cache.set('credit_packs', packs)
         
-        return [CreditPack(**pack) for pack in response.data] if response.data else []
+        return list(packs)
     
     
     async def get_transactions(self, user_id: str, limit: int = 10) -> List[CreditTransaction]:
         """Get recent credit transactions"""
-        response = self.supabase.table('credit_transactions')\
+        response = await self.supabase.table('credit_transactions')\
             .select('*')\
             .eq('user_id', user_id)\
             .order('created_at', desc=True)\
@@ -653,7 +702,7 @@ class BillingService:
             period_end = now + timedelta(days=30 * period_months)
             
             # Upsert subscription
-            self.supabase.table('user_subscriptions').upsert({
+            await self.supabase.table('user_subscriptions').upsert({
                 'user_id': user_id,
                 'plan_type': plan_type,
                 'status': 'active',
@@ -678,7 +727,7 @@ class BillingService:
         try:
             if immediately:
                 # Downgrade to free immediately
-                self.supabase.table('user_subscriptions').update({
+                await self.supabase.table('user_subscriptions').update({
                     'plan_type': 'free',
                     'status': 'cancelled',
                     'cancelled_at': datetime.now().isoformat()
@@ -687,7 +736,7 @@ class BillingService:
                 return True, "Subscription cancelled immediately"
             else:
                 # Cancel at period end
-                self.supabase.table('user_subscriptions').update({
+                await self.supabase.table('user_subscriptions').update({
                     'cancel_at_period_end': True,
                     'cancelled_at': datetime.now().isoformat()
                 }).eq('user_id', user_id).execute()
@@ -699,14 +748,8 @@ class BillingService:
     
     
     async def get_plan_limits(self, plan_type: str) -> Optional[PlanLimits]:
-        """Get limits for a plan"""
-        response = self.supabase.table('plan_limits')\
-            .select('*')\
-            .eq('plan_type', plan_type)\
-            .single()\
-            .execute()
-        
-        return PlanLimits(**response.data) if response.data else None
+        """Get limits for a plan (cached)"""
+        return (await self._get_cached_plan_limits()).get(plan_type)
     
     
     async def _initialize_user_credits(self, user_id: str) -> Dict:
@@ -724,7 +767,7 @@ class BillingService:
                 'updated_at': datetime.now().isoformat()
             }
             
-            self.supabase.table('user_credits').upsert(
+            await self.supabase.table('user_credits').upsert(
                 credits_data,
                 on_conflict='user_id'
             ).execute()
@@ -740,7 +783,7 @@ class BillingService:
                 'created_at': datetime.now().isoformat()
             }
             
-            self.supabase.table('credit_transactions').insert(
+            await self.supabase.table('credit_transactions').insert(
                 transaction_data
             ).execute()
             
@@ -760,10 +803,27 @@ class BillingService:
         scan_count: Optional[int] = None,
         metadata: Optional[Dict] = None
     ) -> Tuple[bool, str, Optional[Dict]]:
-        """Deduct credits from user wallet"""
+        """
+        Deduct credits from user wallet
+        
+        Balance check, debit, credit_transactions row and usage_logs bump run
+        in one deduct_credits_atomic RPC call
+        (database/migrations/deduct_credits_function.sql), so concurrent
+        deductions for the same user cannot overdraw the wallet.
+        """
+        result = await self._deduct_credits_rpc(user_id, amount, description, scan_type, scan_count, metadata)
+        if result is not None:
+            if result.get('success'):
+                return True, f"Deducted {amount} credits", {'balance': float(result['balance'])}
+            if result.get('reason') == 'not_found':
+                return False, "User credits not found", None
+            if result.get('reason') == 'insufficient':
+                return False, f"Insufficient balance. Required: {amount}, Available: {Decimal(str(result['balance']))}", None
+            return False, f"Failed to deduct credits: {result.get('reason')}", None
+        
         try:
             # Get current balance
-            response = self.supabase.table('user_credits').select('*').eq('user_id', user_id).single().execute()
+            response = await self.supabase.table('user_credits').select('*').eq('user_id', user_id).single().execute()
             
             if not response.data:
                 return False, "User credits not found", None
@@ -777,14 +837,14 @@ class BillingService:
             new_balance = current_balance - amount
             
             # Update user credits
-            self.supabase.table('user_credits').update({
+            await self.supabase.table('user_credits').update({
                 'balance': float(new_balance),
                 'lifetime_spent': float(Decimal(str(response.data['lifetime_spent'])) + amount),
                 'updated_at': datetime.now().isoformat()
             }).eq('user_id', user_id).execute()
             
             # Record transaction
-            self.supabase.table('credit_transactions').insert({
+            await self.supabase.table('credit_transactions').insert({
                 'user_id': user_id,
                 'transaction_type': 'debit',
                 'amount': float(amount),
@@ -802,12 +862,52 @@ class BillingService:
             return False, f"Failed to deduct credits: {str(e)}", None
     
     
+    async def _deduct_credits_rpc(
+        self,
+        user_id: str,
+        amount: Decimal,
+        description: Optional[str],
+        scan_type: Optional[str],
+        scan_count: Optional[int],
+        metadata: Optional[Dict]
+    ) -> Optional[Dict]:
+        """
+        Call deduct_credits_atomic
+        
+        Returns:
+            {'success', 'balance', 'reason'} from the function, or None when it
+            is not deployed (callers fall back to the per-table path)
+        """
+        if not self._deduct_rpc_available:
+            return None
+        
+        try:
+            response = await self.supabase.rpc('deduct_credits_atomic', {
+                'p_user_id': user_id,
+                'p_amount': str(amount),
+                'p_description': description,
+                'p_scan_type': scan_type,
+                'p_scan_count': scan_count,
+                'p_metadata': metadata,
+                'p_usage_date': date.today().isoformat()
+            }).execute()
+        except Exception as e:
+            if 'deduct_credits_atomic' in str(e) or 'PGRST202' in str(e):
+                # Function not deployed; stop trying until restart
+                self._deduct_rpc_available = False
+                print(f"deduct_credits_atomic RPC unavailable, using per-table writes: {e}")
+                return None
+            return {'success': False, 'reason': str(e)}
+        
+        return response.data or {'success': False, 'reason': 'empty response'}
+    
+    
     async def get_today_usage(self, user_id: str) -> TodayUsage:
         """Get today's usage for a user"""
         try:
             today = date.today().isoformat()
             
-            response = self.supabase.table('usage_logs').select('*').eq('user_id', user_id).eq('usage_date', today).execute()
+            response = await self.supabase.table('usage_logs').select('*').eq('user_id', user_id).eq('usage_date', today).execute()
             
             # Initialize usage counters
             stock_scans = 0
@@ -864,14 +964,14 @@ class BillingService:
             if metadata:
                 usage_metadata.update(metadata)
             
-            # Upsert usage log (increment if exists)
-            self.supabase.table('usage_logs').upsert({
+            # Upsert usage log (batched off the request path)
+            get_write_behind_queue().enqueue('usage_logs', {
                 'user_id': user_id,
                 'scan_type': scan_type,
                 'count': count,
                 'usage_date': today,
                 'metadata': usage_metadata
-            }, on_conflict='user_id,scan_type,usage_date').execute()
+            }, on_conflict='user_id,scan_type,usage_date')
             
             return True
             
@@ -888,7 +988,7 @@ class BillingService:
         """Extend subscription period by specified months"""
         try:
             # Get current subscription
-            response = self.supabase.table('user_subscriptions').select('*').eq('user_id', user_id).single().execute()
+            response = await self.supabase.table('user_subscriptions').select('*').eq('user_id', user_id).single().execute()
             
             if not response.data:
                 return False, "No subscription found to extend"
@@ -902,7 +1002,7 @@ class BillingService:
             new_end = current_end + timedelta(days=30 * months)
             
             # Update subscription
-            self.supabase.table('user_subscriptions').update({
+            await self.supabase.table('user_subscriptions').update({
                 'current_period_end': new_end.isoformat(),
                 'status': 'active',
                 'updated_at': datetime.now().isoformat()
@@ -921,7 +1021,7 @@ class BillingService:
         """Cancel subscription by Razorpay subscription ID"""
         try:
             # Find subscription by Razorpay ID
-            response = self.supabase.table('user_subscriptions').select('*').eq('razorpay_subscription_id', razorpay_subscription_id).single().execute()
+            response = await self.supabase.table('user_subscriptions').select('*').eq('razorpay_subscription_id', razorpay_subscription_id).single().execute()
             
             if not response.data:
                 return False, f"No subscription found with Razorpay ID: {razorpay_subscription_id}"
@@ -929,7 +1029,7 @@ class BillingService:
             subscription = response.data
             
             # Update subscription status
-            self.supabase.table('user_subscriptions').update({
+            await self.supabase.table('user_subscriptions').update({
                 'status': 'cancelled',
                 'cancelled_at': datetime.now().isoformat(),
                 'updated_at': datetime.now().isoformat()
@@ -16,11 +16,14 @@ Created: 2026-02-02
 """
 
 import logging
+import time
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 import pytz
 from dataclasses import asdict
 
+from src.ml.ml_metrics import get_ml_metrics
+
 logger = logging.getLogger(__name__)
 IST = pytz.timezone('Asia/Kolkata')
 
@@ -118,6 +121,9 @@ class EnhancedMLService:
         iv_history: Optional[List[float]] = None,
         timestamp: Optional[datetime] = None,
         is_expiry_day: bool = False,
+        monte_carlo: bool = False,
+        indicator_state=None,
+        index_name: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         Get comprehensive ML-enhanced prediction for an option trade.
@@ -128,7 +134,17 @@ class EnhancedMLService:
         - iv_prediction: Expected IV direction
         - theta_scenarios: Time-based P&L scenarios
         - simulation_result: Full P&L simulation with grade
+          (plus a Monte Carlo P&L distribution when monte_carlo=True)
+        
+        indicator_state: LiveIndicatorState for the underlying; when given,
+        direction features are read from it instead of recomputed.
+        
+        index_name: Underlying the prediction is for; keys the rolling
+        prediction record used for drift monitoring (see ml_metrics).
         """
+        started = time.perf_counter()
+        metrics = get_ml_metrics()
+        drift_key = index_name or "UNKNOWN"
         if timestamp is None:
             timestamp = datetime.now(IST)
         
@@ -146,11 +162,18 @@ class EnhancedMLService:
         # 1. Direction Prediction
         if self.direction_predictor and len(price_history) >= 20:
             try:
-                direction_pred = self.direction_predictor.predict(
-                    prices=price_history,
-                    volumes=volume_history,
-                    timestamp=timestamp
-                )
+                with metrics.time('direction'):
+                    if indicator_state is not None:
+                        direction_pred = self.direction_predictor.predict_from_state(
+                            indicator_state,
+                            timestamp=timestamp
+                        )
+                    else:
+                        direction_pred = self.direction_predictor.predict(
+                            prices=price_history,
+                            volumes=volume_history,
+                            timestamp=timestamp
+                        )
                 result['direction_prediction'] = {
                     'direction': direction_pred.direction.value,
                     'confidence': direction_pred.confidence,
@@ -169,6 +192,10 @@ class EnhancedMLService:
                     'top_bearish_factors': direction_pred.top_bearish_factors,
                     'model_version': direction_pred.model_version
                 }
+                metrics.record_prediction(
+                    drift_key, 'direction', direction_pred.direction.value,
+                    direction_pred.confidence, direction_pred.model_version
+                )
                 logger.info(f"✅ Direction: {direction_pred.direction.value} ({direction_pred.confidence:.0%})")
             except Exception as e:
                 logger.error(f"Direction prediction failed: {e}")
@@ -179,14 +206,15 @@ class EnhancedMLService:
         # 2. Speed Prediction
         if self.speed_predictor and len(price_history) >= 20:
             try:
-                speed_pred = self.speed_predictor.predict_speed(
-                    current_price=spot_price,
-                    price_history=price_history,
-                    volume_history=volume_history or [1000000] * len(price_history),
-                    current_volume=volume_history[-1] if volume_history else 1000000,
-                    timestamp=timestamp,
-                    is_expiry_day=is_expiry_day
-                )
+                with metrics.time('speed'):
+                    speed_pred = self.speed_predictor.predict_speed(
+                        current_price=spot_price,
+                        price_history=price_history,
+                        volume_history=volume_history or [1000000] * len(price_history),
+                        current_volume=volume_history[-1] if volume_history else 1000000,
+                        timestamp=timestamp,
+                        is_expiry_day=is_expiry_day
+                    )
                 result['speed_prediction'] = {
                     'category': speed_pred.category.value,
                     'confidence': speed_pred.confidence,
@@ -205,6 +233,7 @@ class EnhancedMLService:
                         'breakeven_time_mins': speed_pred.breakeven_time_mins
                     }
                 }
+                metrics.record_prediction(drift_key, 'speed', speed_pred.category.value, speed_pred.confidence)
                 logger.info(f"✅ Speed: {speed_pred.category.value} ({speed_pred.confidence:.0%})")
             except Exception as e:
                 logger.error(f"Speed prediction failed: {e}")
@@ -215,15 +244,16 @@ class EnhancedMLService:
         # 3. IV Prediction
         if self.iv_predictor:
             try:
-                iv_pred = self.iv_predictor.predict_iv(
-                    current_iv=current_iv,
-                    spot_price=spot_price,
-                    iv_history=iv_history or [current_iv] * 30,
-                    price_history=price_history,
-                    timestamp=timestamp,
-                    is_expiry_day=is_expiry_day,
-                    days_to_expiry=int(days_to_expiry)
-                )
+                with metrics.time('iv'):
+                    iv_pred = self.iv_predictor.predict_iv(
+                        current_iv=current_iv,
+                        spot_price=spot_price,
+                        iv_history=iv_history or [current_iv] * 30,
+                        price_history=price_history,
+                        timestamp=timestamp,
+                        is_expiry_day=is_expiry_day,
+                        days_to_expiry=int(days_to_expiry)
+                    )
                 result['iv_prediction'] = {
                     'direction': iv_pred.direction.value,
                     'confidence': iv_pred.confidence,
@@ -247,6 +277,7 @@ class EnhancedMLService:
                     },
                     'iv_risk_score': iv_pred.iv_risk_score
                 }
+                metrics.record_prediction(drift_key, 'iv', iv_pred.direction.value, iv_pred.confidence)
                 logger.info(f"✅ IV: {iv_pred.direction.value} ({iv_pred.confidence:.0%})")
             except Exception as e:
                 logger.error(f"IV prediction failed: {e}")
@@ -257,16 +288,17 @@ class EnhancedMLService:
         # 4. Theta Scenarios
         if self.theta_planner:
             try:
-                theta_result = self.theta_planner.generate_scenarios(
-                    option_type=option_type,
-                    strike=strike,
-                    entry_premium=premium,
-                    current_spot=spot_price,
-                    current_iv=current_iv,
-                    days_to_expiry=days_to_expiry,
-                    timestamp=timestamp,
-                    is_expiry_day=is_expiry_day
-                )
+                with metrics.time('theta'):
+                    theta_result = self.theta_planner.generate_scenarios(
+                        option_type=option_type,
+                        strike=strike,
+                        entry_premium=premium,
+                        current_spot=spot_price,
+                        current_iv=current_iv,
+                        days_to_expiry=days_to_expiry,
+                        timestamp=timestamp,
+                        is_expiry_day=is_expiry_day
+                    )
                 result['theta_scenarios'] = {
                     'greeks': {
                         'delta': theta_result.delta,
@@ -308,20 +340,23 @@ class EnhancedMLService:
             result.get('iv_prediction', {}).get('direction')
         ]):
             try:
-                sim_result = self.simulator.simulate(
-                    option_type=option_type,
-                    strike=strike,
-                    premium=premium,
-                    spot_price=spot_price,
-                    current_iv=current_iv,
-                    days_to_expiry=days_to_expiry,
-                    price_history=price_history,
-                    volume_history=volume_history,
-                    iv_history=iv_history,
-                    timestamp=timestamp,
-                    is_expiry_day=is_expiry_day
-                )
+                with metrics.time('simulation'):
+                    sim_result = self.simulator.simulate(
+                        option_type=option_type,
+                        strike=strike,
+                        premium=premium,
+                        spot_price=spot_price,
+                        current_iv=current_iv,
+                        days_to_expiry=days_to_expiry,
+                        price_history=price_history,
+                        volume_history=volume_history,
+                        iv_history=iv_history,
+                        timestamp=timestamp,
+                        is_expiry_day=is_expiry_day,
+                        monte_carlo=monte_carlo
+                    )
                 result['simulation'] = self.simulator.to_dict(sim_result)
+                metrics.record_prediction(drift_key, 'simulation', sim_result.grade.value)
                 logger.info(f"✅ Simulation: Grade {sim_result.grade.value}, Expected P&L: {sim_result.expected_pnl_pct:.1f}%")
             except Exception as e:
                 logger.error(f"Simulation failed: {e}")
@@ -333,6 +368,11 @@ class EnhancedMLService:
         
         # 6. Generate Combined Trading Recommendation
         result['combined_recommendation'] = self._generate_combined_recommendation(result)
+        metrics.record_prediction(
+            drift_key, 'combined', result['combined_recommendation']['action'],
+            result['combined_recommendation']['confidence']
+        )
+        metrics.record_latency('enhanced_prediction_total', time.perf_counter() - started)
         
         return result
     
@@ -0,0 +1,273 @@
+"""
+Paper Trading Exit Monitor
+Checks every open paper position against its target / stop loss in one pass
+
+- Open positions are held in memory: loaded with one query, then kept up to
+  date as positions are opened and closed (plus a periodic resync, so rows
+  changed by another worker are picked up)
+- One batched quote call per tick covers the option symbols of every user
+- Exit rules are evaluated as arrays (np.select), not per position
+- Only positions whose LTP moved are written; exits go through the service
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from datetime import time as dt_time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from src.utils.ist_utils import now_ist
+
+logger = logging.getLogger(__name__)
+
+# Fyers quotes API accepts at most 50 symbols per call
+QUOTE_BATCH_SIZE = 50
+
+# Seconds between full reloads of the open positions
+RESYNC_SECONDS = 300
+
+# Positions still open at this time (IST) are closed at their LTP
+EOD_EXIT_TIME = dt_time(15, 15)
+
+
+def evaluate_exits(
+    ltp: np.ndarray,
+    stop_loss: np.ndarray,
+    target_1: np.ndarray,
+    target_2: np.ndarray,
+    peak: np.ndarray,
+    trailing_stop_pct: float = 0.0,
+    eod: bool = False
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Exit reason and price for each position
+
+    Rules in priority order: TARGET_2, TARGET_1, TRAILING_STOP (only once the
+    trailing level is above the fixed stop), STOP_LOSS. After EOD every
+    position exits at its LTP. Targets and stops fill at their level.
+
+    Args:
+        ltp: Last traded price per position (NaN = no quote, never exits)
+        stop_loss, target_1, target_2: Levels per position
+        peak: Highest LTP seen since entry (including this tick)
+        trailing_stop_pct: Trail below the peak by this percent (0 = off)
+        eod: Past the end-of-day exit time
+
+    Returns:
+        (reasons, prices); reason "" means the position stays open
+    """
+    trail = peak * (1 - trailing_stop_pct / 100.0)
+    trailing = (trailing_stop_pct > 0) & (trail > stop_loss)
+
+    conditions = [
+        ltp >= target_2,
+        ltp >= target_1,
+        trailing & (ltp <= trail),
+        ltp <= stop_loss
+    ]
+    reasons = np.select(conditions, ["TARGET_2", "TARGET_1", "TRAILING_STOP", "STOP_LOSS"], default="")
+    prices = np.select(conditions, [target_2, target_1, trail, stop_loss], default=np.nan)
+
+    if eod:
+        reasons = np.full(ltp.shape, "EOD_EXIT", dtype=reasons.dtype)
+        prices = ltp.copy()
+
+    quoted = ~np.isnan(ltp)
+    reasons = np.where(quoted, reasons, "")
+    prices = np.where(quoted, prices, np.nan)
+    return reasons, prices
+
+
+class PaperExitMonitor:
+    """In-memory open positions with batched exit checks"""
+
+    def __init__(
+        self,
+        service,
+        quote_source=None,
+        trailing_stop_pct: float = 0.0,
+        now: Callable[[], datetime] = now_ist,
+        clock: Callable[[], float] = time.monotonic,
+        resync_seconds: Optional[float] = RESYNC_SECONDS
+    ):
+        """
+        Args:
+            service: PaperTradingService (database client, exits, activity log)
+            quote_source: Object with get_quotes(symbols) (default: shared Fyers client)
+            trailing_stop_pct: Trailing stop below the peak LTP, in percent (0 = off)
+            now: Current IST time, for the EOD exit
+            clock: Monotonic seconds, for resync scheduling
+            resync_seconds: Seconds between reloads from the database
+                (None: never load, positions come only from track())
+        """
+        self.service = service
+        self._quote_source = quote_source
+        self.trailing_stop_pct = trailing_stop_pct
+        self.now = now
+        self.clock = clock
+        self.resync_seconds = resync_seconds
+        self.positions: Dict[str, Dict] = {}
+        self._peaks: Dict[str, float] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self.stats = {"ticks": 0, "quote_calls": 0, "updates": 0, "exits": 0}
+
+    @property
+    def quote_source(self):
+        if self._quote_source is None:
+            from src.api.fyers_client import fyers_client
+            self._quote_source = fyers_client
+        return self._quote_source
+
+    # ==================== POSITIONS ====================
+
+    async def load(self):
+        """Replace the in-memory positions with every OPEN row (one query)"""
+        response = await self.service.supabase.table("paper_trading_positions")\
+            .select("*")\
+            .eq("status", "OPEN")\
+            .execute()
+        rows = response.data or []
+        self.positions = {row["id"]: row for row in rows}
+        self._peaks = {
+            position_id: self._peaks.get(position_id, self._entry_peak(row))
+            for position_id, row in self.positions.items()
+        }
+        self._loaded_at = self.clock()
+        logger.info(f"📋 Exit monitor loaded {len(rows)} open positions")
+
+    def track(self, position: Dict):
+        """Start watching a newly opened position"""
+        if position and position.get("status", "OPEN") == "OPEN":
+            self.positions[position["id"]] = position
+            self._peaks.setdefault(position["id"], self._entry_peak(position))
+
+    def forget(self, position_id: str):
+        """Stop watching a position (closed)"""
+        self.positions.pop(position_id, None)
+        self._peaks.pop(position_id, None)
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the in-memory positions reflect the database"""
+        return self.resync_seconds is None or self._loaded_at is not None
+
+    def open_positions(self, user_id: str) -> List[Dict]:
+        return [p for p in self.positions.values() if p["user_id"] == user_id]
+
+    @staticmethod
+    def _entry_peak(position: Dict) -> float:
+        return max(float(position["entry_price"]), float(position.get("current_ltp") or 0))
+
+    # ==================== TICK ====================
+
+    async def check(self, user_ids: Optional[Iterable[str]] = None) -> List[Tuple[str, str, float]]:
+        """
+        Quote, evaluate and write the positions of the given users (default: all)
+
+        Returns:
+            Exits taken this tick as (position_id, reason, price)
+        """
+        async with self._lock:
+            if self.resync_seconds is not None and (
+                self._loaded_at is None or self.clock() - self._loaded_at >= self.resync_seconds
+            ):
+                await self.load()
+
+            wanted = set(user_ids) if user_ids is not None else None
+            positions = [
+                p for p in self.positions.values()
+                if wanted is None or p["user_id"] in wanted
+            ]
+            if not positions:
+                return []
+            self.stats["ticks"] += 1
+
+            quotes = await self._fetch_ltps({p["option_symbol"] for p in positions})
+            ltp = np.array([quotes.get(p["option_symbol"], np.nan) for p in positions], dtype=float)
+            peak = np.fmax(np.array([self._peaks[p["id"]] for p in positions], dtype=float), ltp)
+            for position, value in zip(positions, peak):
+                self._peaks[position["id"]] = float(value)
+
+            reasons, prices = evaluate_exits(
+                ltp,
+                stop_loss=np.array([float(p["stop_loss"]) for p in positions]),
+                target_1=np.array([float(p["target_1"]) for p in positions]),
+                target_2=np.array([float(p["target_2"]) for p in positions]),
+                peak=peak,
+                trailing_stop_pct=self.trailing_stop_pct,
+                eod=self.now().time() >= EOD_EXIT_TIME
+            )
+
+            exits = []
+            updates = []
+            for position, price_now, reason, exit_price in zip(positions, ltp, reasons, prices):
+                if np.isnan(price_now):
+                    continue
+                if reason:
+                    exits.append((position, str(reason), float(exit_price)))
+                elif position.get("current_ltp") is None or float(position["current_ltp"]) != price_now:
+                    updates.append((position, float(price_now)))
+
+            await asyncio.gather(*(self._write_ltp(p, price) for p, price in updates))
+            taken = []
+            for position, reason, exit_price in exits:
+                # False: closed elsewhere (manual close, another worker) first
+                if await self.service._exit_position(position["user_id"], position, exit_price, reason):
+                    taken.append((position["id"], reason, exit_price))
+                self.forget(position["id"])
+            self.stats["exits"] += len(taken)
+            return taken
+
+    async def _fetch_ltps(self, symbols: Iterable[str]) -> Dict[str, float]:
+        """LTP by symbol, QUOTE_BATCH_SIZE symbols per quotes call"""
+        symbols = sorted(symbols)
+        ltps: Dict[str, float] = {}
+        for start in range(0, len(symbols), QUOTE_BATCH_SIZE):
+            batch = symbols[start:start + QUOTE_BATCH_SIZE]
+            self.stats["quote_calls"] += 1
+            try:
+                response = await asyncio.to_thread(self.quote_source.get_quotes, batch)
+            except Exception as e:
+                logger.error(f"Error fetching quotes for {len(batch)} symbols: {e}")
+                continue
+            for item in (response or {}).get("d") or []:
+                try:
+                    ltps[item["n"]] = float(item["v"]["lp"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+        missing = len(symbols) - len(ltps)
+        if missing:
+            logger.warning(f"Could not fetch quotes for {missing} of {len(symbols)} symbols")
+        return ltps
+
+    async def _write_ltp(self, position: Dict, ltp: float):
+        """Persist a moved LTP / unrealized P&L and log the target check"""
+        current_pnl = (ltp - float(position["entry_price"])) * position["quantity"]
+        try:
+            await self.service._update_position_mark(position["id"], ltp, current_pnl)
+        except Exception as e:
+            logger.error(f"Error updating position {position['id']}: {e}")
+            return
+        position["current_ltp"] = ltp
+        position["current_pnl"] = current_pnl
+        self.stats["updates"] += 1
+        await self.service._log_activity(position["user_id"], position["id"], "TARGET_CHECK", {
+            "current_ltp": ltp,
+            "entry_price": float(position["entry_price"]),
+            "target_1": float(position["target_1"]),
+            "target_2": float(position["target_2"]),
+            "stop_loss": float(position["stop_loss"]),
+            "current_pnl": current_pnl
+        })
+
+    def get_status(self) -> Dict:
+        return {
+            "open_positions": len(self.positions),
+            "symbols": len({p["option_symbol"] for p in self.positions.values()}),
+            "trailing_stop_pct": self.trailing_stop_pct,
+            **self.stats
+        }
@@ -0,0 +1,339 @@
+"""
+ML Execution Service
+Runs CPU-bound model fitting on a process pool so the API event loop keeps serving
+
+- Bounded queue: submissions beyond max_pending are rejected (MLExecutorBusy)
+- Timeouts: awaiting a job gives up after `timeout` seconds and cancels it
+- Cancellation: queued jobs can be cancelled by job id
+- Data goes to workers as a dict of NumPy arrays, never a pickled DataFrame,
+  and workers return fitted estimators / parameter vectors, not frames
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+OHLCV_COLUMNS = ("open", "high", "low", "close", "volume")
+
+# Finished jobs kept so result() still works after a job completes
+FINISHED_JOBS_KEPT = 32
+
+
+class MLExecutorBusy(RuntimeError):
+    """Raised when the pending-job limit is reached"""
+
+
+# ==================== ARRAY TRANSPORT ====================
+
+def frame_to_arrays(df: pd.DataFrame, columns: Tuple[str, ...] = OHLCV_COLUMNS) -> Dict[str, np.ndarray]:
+    """
+    Pack an OHLCV frame into plain arrays for a worker process
+
+    Returns:
+        Dict with 'timestamp' (int64 ns, empty for non-datetime indexes)
+        and one float64 array per column present in the frame
+    """
+    arrays = {
+        col: np.ascontiguousarray(df[col].to_numpy(dtype=np.float64))
+        for col in columns if col in df.columns
+    }
+    if isinstance(df.index, pd.DatetimeIndex):
+        arrays["timestamp"] = df.index.to_numpy(dtype="datetime64[ns]").view(np.int64)
+    else:
+        arrays["timestamp"] = np.empty(0, dtype=np.int64)
+    return arrays
+
+
+def arrays_to_frame(arrays: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """Rebuild the OHLCV frame from frame_to_arrays() output"""
+    columns = {k: v for k, v in arrays.items() if k != "timestamp"}
+    timestamps = arrays.get("timestamp")
+    index = None
+    if timestamps is not None and len(timestamps):
+        index = pd.DatetimeIndex(pd.to_datetime(timestamps), name="timestamp")
+    return pd.DataFrame(columns, index=index)
+
+
+# ==================== WORKER TASKS ====================
+# Module-level functions so they pickle by reference into the pool
+
+def train_index_model_task(
+    index_name: str,
+    model_type: str,
+    arrays: Dict[str, np.ndarray],
+    test_size: float = 0.2,
+    prediction_horizon: int = 1
+) -> Dict:
+    """Train an IndexMLOptimizer model in a worker"""
+    from src.ml.index_ml_optimizer import IndexMLOptimizer
+
+    optimizer = IndexMLOptimizer(model_type)
+    metrics = optimizer.train(index_name, arrays_to_frame(arrays), test_size, prediction_horizon)
+    if not optimizer.is_fitted.get(index_name):
+        return {"metrics": metrics}
+
+    return {
+        "metrics": metrics,
+        "model": optimizer.models[index_name],
+        "scaler": optimizer.scalers[index_name],
+        "feature_names": optimizer.feature_names
+    }
+
+
+def train_price_model_task(model_type: str, arrays: Dict[str, np.ndarray], test_size: float = 0.2) -> Dict:
+    """Train a PricePredictor model in a worker"""
+    from src.ml.price_prediction import PricePredictor
+
+    predictor = PricePredictor(model_type)
+    metrics = predictor.train(arrays_to_frame(arrays), test_size=test_size)
+    return {
+        "metrics": metrics,
+        "model": predictor.model,
+        "scaler": predictor.scaler,
+        "feature_names": predictor.feature_names
+    }
+
+
+def fit_arima_task(
+    values: np.ndarray,
+    order: Tuple[int, int, int],
+    start_params: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Estimate ARIMA parameters in a worker; only the parameter vector comes back"""
+    from statsmodels.tsa.arima.model import ARIMA
+    import warnings
+    warnings.filterwarnings('ignore')
+
+    result = ARIMA(values, order=order).fit(start_params=start_params)
+    return np.asarray(result.params, dtype=np.float64)
+
+
+# ==================== EXECUTOR ====================
+
+class MLExecutor:
+    """
+    Process pool for model fitting with async submit/await
+
+    A job that times out is cancelled if still queued; a job already
+    running in a worker cannot be interrupted, so its result is discarded
+    and its slot frees up when the worker finishes.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_pending: int = 8, default_timeout: float = 120.0):
+        """
+        Args:
+            max_workers: Worker processes (default: CPU count - 1, at least 1)
+            max_pending: Queued + running jobs accepted before rejecting
+            default_timeout: Seconds to wait for a job when no timeout is given
+        """
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.max_pending = max_pending
+        self.default_timeout = default_timeout
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._jobs: "OrderedDict[str, Future]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: forking a process that runs an event loop and scheduler threads is unsafe
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            logger.info(f"⚙️ ML executor started with {self.max_workers} worker processes")
+        return self._pool
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return self._pending_locked()
+
+    def _pending_locked(self) -> int:
+        return sum(1 for f in self._jobs.values() if not f.done())
+
+    def _prune_locked(self):
+        finished = [job_id for job_id, f in self._jobs.items() if f.done()]
+        for job_id in finished[:max(0, len(finished) - FINISHED_JOBS_KEPT)]:
+            del self._jobs[job_id]
+
+    def submit(self, fn: Callable, *args, **kwargs) -> str:
+        """
+        Queue a job on the pool
+
+        Returns:
+            Job id for result() / cancel()
+
+        Raises:
+            MLExecutorBusy: when max_pending jobs are already queued or running
+        """
+        with self._lock:
+            pending = self._pending_locked()
+            if pending >= self.max_pending:
+                raise MLExecutorBusy(f"ML executor busy ({pending} jobs pending)")
+            self._prune_locked()
+            job_id = uuid.uuid4().hex[:12]
+            self._jobs[job_id] = self._get_pool().submit(fn, *args, **kwargs)
+        return job_id
+
+    async def result(self, job_id: str, timeout: Optional[float] = None):
+        """
+        Await a submitted job
+
+        Raises:
+            KeyError: unknown (or long finished) job id
+            asyncio.TimeoutError: job did not finish in time (it is cancelled)
+        """
+        with self._lock:
+            future = self._jobs[job_id]
+        wrapped = asyncio.wrap_future(future)
+        try:
+            # Cancelling the wrapper on timeout cancels the pool future too
+            return await asyncio.wait_for(wrapped, timeout or self.default_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"⏱️ ML job {job_id} timed out after {timeout or self.default_timeout}s")
+            raise
+
+    async def run(self, fn: Callable, *args, timeout: Optional[float] = None, **kwargs):
+        """Submit a job and await its result"""
+        job_id = self.submit(fn, *args, **kwargs)
+        return await self.result(job_id, timeout)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued job; returns False if it is running, finished or unknown"""
+        with self._lock:
+            future = self._jobs.get(job_id)
+        return future.cancel() if future is not None else False
+
+    def get_status(self) -> Dict:
+        """Pool size and queue depth"""
+        with self._lock:
+            running = sum(1 for f in self._jobs.values() if f.running())
+            return {
+                "workers": self.max_workers,
+                "started": self._pool is not None,
+                "pending": self._pending_locked(),
+                "running": running,
+                "max_pending": self.max_pending
+            }
+
+    def shutdown(self, wait: bool = False):
+        """Stop the worker processes, cancelling queued jobs"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
+            logger.info("⚙️ ML executor stopped")
+
+
+# ==================== HIGH-LEVEL JOBS ====================
+
+async def train_index_model(optimizer, index_name: str, df: pd.DataFrame, timeout: Optional[float] = None) -> Dict:
+    """
+    Train an index direction model off the event loop and install it
+    on the given IndexMLOptimizer (same state as optimizer.train())
+
+    Returns:
+        Training metrics
+    """
+    result = await get_ml_executor().run(
+        train_index_model_task, index_name, optimizer.model_type, frame_to_arrays(df),
+        timeout=timeout
+    )
+    if "model" in result:
+        optimizer.models[index_name] = result["model"]
+        optimizer.scalers[index_name] = result["scaler"]
+        optimizer.feature_names = result["feature_names"]
+        optimizer.index_features[index_name] = result["feature_names"]
+        optimizer.training_metrics[index_name] = result["metrics"]
+        optimizer.model_versions.pop(index_name, None)
+        optimizer.is_fitted[index_name] = True
+    return result["metrics"]
+
+
+async def train_price_model(predictor, df: pd.DataFrame, timeout: Optional[float] = None) -> Dict:
+    """
+    Train a price regression model off the event loop and install it
+    on the given PricePredictor
+
+    Returns:
+        Training metrics
+    """
+    result = await get_ml_executor().run(
+        train_price_model_task, predictor.model_type, frame_to_arrays(df),
+        timeout=timeout
+    )
+    predictor.model = result["model"]
+    predictor.scaler = result["scaler"]
+    predictor.feature_names = result["feature_names"]
+    predictor.is_fitted = True
+    return result["metrics"]
+
+
+async def prefit_ensemble(
+    prices: pd.Series,
+    symbol: str,
+    resolution: Optional[str] = None,
+    timeout: Optional[float] = None
+) -> str:
+    """
+    Bring the cached ARIMA ensemble for (symbol, resolution) up to date,
+    estimating parameters in the pool when a (warm-)refit is needed.
+
+    Cheap paths (cached / refilter) are left to get_ml_signal(); afterwards
+    get_ml_signal() on the same series finds the model already fitted.
+
+    Returns:
+        The update mode that applies to this series
+    """
+    from src.ml.time_series_models import get_ensemble_predictor, infer_resolution
+
+    predictor = get_ensemble_predictor(symbol, resolution or infer_resolution(prices))
+    mode, _ = predictor.plan_update(prices)
+    if mode not in ("warm_refit", "full_fit") or len(prices) < 30:
+        return mode
+
+    start_params = None
+    if mode == "warm_refit":
+        start_params = np.asarray(predictor.arima.last_fit_result.params, dtype=np.float64)
+
+    params = await get_ml_executor().run(
+        fit_arima_task, prices.to_numpy(dtype=np.float64), predictor.arima.order, start_params,
+        timeout=timeout
+    )
+
+    with predictor.lock:
+        # Another request may have updated the model while the worker ran
+        if predictor.plan_update(prices)[0] == mode:
+            predictor.apply_params(prices, params, mode)
+            logger.info(f"🔄 ML model {mode} for {symbol} estimated in worker ({len(prices)} bars)")
+    return mode
+
+
+# Global executor instance
+_ml_executor: Optional[MLExecutor] = None
+_ml_executor_lock = threading.Lock()
+
+
+def get_ml_executor() -> MLExecutor:
+    """Get or create the ML executor"""
+    global _ml_executor
+    with _ml_executor_lock:
+        if _ml_executor is None:
+            from config.settings import settings
+            _ml_executor = MLExecutor(
+                max_workers=settings.ml_executor_workers or None,
+                max_pending=settings.ml_executor_max_pending,
+                default_timeout=settings.ml_executor_timeout_seconds
+            )
+        return _ml_executor
@@ -19,7 +19,7 @@ from dataclasses import dataclass, asdict
 import json
 import asyncio
 
-from config.supabase_config import get_supabase_admin_client
+from config.supabase_config import async_supabase_admin
 
 logger = logging.getLogger(__name__)
 
@@ -118,7 +118,7 @@ class MarketauxNewsService:
         if not self.api_key:
             logger.warning("⚠️ MARKETAUX_API_KEY not set. News fetching will be disabled.")
         
-        self.supabase = get_supabase_admin_client()
+        self.supabase = async_supabase_admin
         self._request_count_today = 0
         self._last_request_date = None
     
@@ -422,7 +422,7 @@ class MarketauxNewsService:
                         credits: Optional[int] = None):
         """Log the fetch attempt to database"""
         try:
-            self.supabase.table("news_fetch_log").insert({
+            await self.supabase.table("news_fetch_log").insert({
                 "articles_fetched": articles_count,
                 "api_response_code": status_code,
                 "error_message": error,
@@ -471,7 +471,7 @@ class MarketauxNewsService:
                 }
                 
                 # Upsert to avoid duplicates
-                self.supabase.table("market_news").upsert(
+                await self.supabase.table("market_news").upsert(
                     data, 
                     on_conflict="article_uuid"
                 ).execute()
@@ -545,7 +545,7 @@ class MarketauxNewsService:
                 window_start = now - window_delta
                 
                 # Get articles in this window
-                response = self.supabase.table("market_news").select("*").gte(
+                response = await self.supabase.table("market_news").select("*").gte(
                     "published_at", window_start.isoformat()
                 ).lte("published_at", now.isoformat()).execute()
                 
@@ -647,7 +647,7 @@ class MarketauxNewsService:
                     "computed_at": now.isoformat()
                 }
                 
-                self.supabase.table("market_sentiment_cache").upsert(
+                await self.supabase.table("market_sentiment_cache").upsert(
                     cache_data,
                     on_conflict="time_window,window_start"
                 ).execute()
@@ -685,7 +685,7 @@ class MarketauxNewsService:
                 "published_at", desc=True
             ).limit(limit)
             
-            response = query.execute()
+            response = await query.execute()
             articles = response.data or []
             
             # Filter by indices if specified
@@ -719,7 +719,7 @@ class MarketauxNewsService:
             Cached sentiment data or None
         """
         try:
-            response = self.supabase.table("market_sentiment_cache").select("*").eq(
+            response = await self.supabase.table("market_sentiment_cache").select("*").eq(
                 "time_window", time_window
             ).order("computed_at", desc=True).limit(1).execute()
             
@@ -0,0 +1,223 @@
+"""
+Paper Trading Daily Performance
+Running per-user, per-day aggregates updated as each position closes
+
+Each close is an O(1) update of counters and sums; the derived summary
+(win rate, averages, profit factor, ...) is queued as an upsert on the
+write-behind queue, which coalesces repeated updates of the same
+(user_id, date) row and persists them on its flush interval. The first
+close seen for a (user, day) — e.g. after a restart — rebuilds that day
+from paper_trading_positions, as does a close after another instance
+persisted the row; rebuild()/verify() give the same full recomputation
+for consistency checks.
+"""
+
+import logging
+from dataclasses import dataclass, field, fields
+from datetime import date, datetime
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from src.services.write_behind import get_write_behind_queue
+
+logger = logging.getLogger(__name__)
+
+PERFORMANCE_TABLE = "paper_trading_performance"
+
+
+def _duration_minutes(entry_time, exit_time) -> Optional[float]:
+    """Minutes between two ISO timestamps (naive ones are taken as local time)"""
+    if not entry_time or not exit_time:
+        return None
+    try:
+        entry = datetime.fromisoformat(str(entry_time)).astimezone()
+        exit = datetime.fromisoformat(str(exit_time)).astimezone()
+    except ValueError:
+        return None
+    return (exit - entry).total_seconds() / 60
+
+
+@dataclass
+class DailyPerformance:
+    """Running aggregates for one user's closed positions on one day"""
+    user_id: str
+    date: date
+    total_trades: int = 0
+    winning_trades: int = 0
+    losing_trades: int = 0
+    breakeven_trades: int = 0
+    total_pnl: float = 0.0
+    gross_profit: float = 0.0
+    gross_loss: float = 0.0
+    max_win: float = 0.0
+    max_loss: float = 0.0
+    duration_minutes: float = 0.0
+    timed_trades: int = 0
+    position_ids: Set[str] = field(default_factory=set, repr=False)
+
+    @classmethod
+    def from_positions(cls, user_id: str, day: date, positions: Iterable[Dict]) -> "DailyPerformance":
+        """Recompute from closed position rows"""
+        performance = cls(user_id=user_id, date=day)
+        for position in positions:
+            performance.add(position)
+        return performance
+
+    def add(self, position: Dict) -> bool:
+        """
+        Count one closed position (needs pnl; entry_time/exit_time for duration)
+
+        Returns:
+            False if this position was already counted
+        """
+        position_id = position.get("id")
+        if position_id is not None:
+            if position_id in self.position_ids:
+                return False
+            self.position_ids.add(position_id)
+
+        pnl = float(position["pnl"])
+        self.total_trades += 1
+        self.total_pnl += pnl
+        if pnl > 0:
+            self.winning_trades += 1
+            self.gross_profit += pnl
+            self.max_win = max(self.max_win, pnl)
+        elif pnl < 0:
+            self.losing_trades += 1
+            self.gross_loss += pnl
+            self.max_loss = min(self.max_loss, pnl)
+        else:
+            self.breakeven_trades += 1
+
+        duration = _duration_minutes(position.get("entry_time"), position.get("exit_time"))
+        if duration is not None:
+            self.duration_minutes += duration
+            self.timed_trades += 1
+        return True
+
+    def to_row(self) -> Dict:
+        """paper_trading_performance row"""
+        return {
+            "user_id": self.user_id,
+            "date": self.date.isoformat(),
+            "total_trades": self.total_trades,
+            "winning_trades": self.winning_trades,
+            "losing_trades": self.losing_trades,
+            "breakeven_trades": self.breakeven_trades,
+            "win_rate": (self.winning_trades / self.total_trades * 100) if self.total_trades else 0,
+            "total_pnl": self.total_pnl,
+            "avg_win": (self.gross_profit / self.winning_trades) if self.winning_trades else 0,
+            "avg_loss": (self.gross_loss / self.losing_trades) if self.losing_trades else 0,
+            "max_win": self.max_win,
+            "max_loss": self.max_loss,
+            "profit_factor": (self.gross_profit / abs(self.gross_loss)) if self.gross_loss else None,
+            "avg_trade_duration_minutes": int(self.duration_minutes / self.timed_trades) if self.timed_trades else 0,
+            "updated_at": datetime.now().isoformat()
+        }
+
+
+class PaperPerformanceTracker:
+    """Today's DailyPerformance per user, kept in memory and persisted write-behind"""
+
+    def __init__(self, service, today=lambda: datetime.now().date()):
+        """
+        Args:
+            service: PaperTradingService (database client)
+            today: Current trading date
+        """
+        self.service = service
+        self.today = today
+        self._days: Dict[Tuple[str, date], DailyPerformance] = {}
+        self._rebuilt_trades: Dict[Tuple[str, date], int] = {}
+
+    async def record_close(self, user_id: str, position: Dict) -> DailyPerformance:
+        """
+        Add a just-closed position (with pnl and exit_time) to today's aggregates
+
+        The day is rebuilt instead (which already includes this position)
+        on the first close seen for the user today, and whenever the
+        persisted row's total_trades is not a count this tracker wrote since
+        its last rebuild: another instance closed positions for the user,
+        and upserting the running aggregates would overwrite them. (Counts
+        between the rebuild and the running one are this tracker's own
+        upserts, possibly still waiting on the write-behind flush.)
+        """
+        day = self.today()
+        performance = self._days.get((user_id, day))
+        if performance is not None and position.get("id") in performance.position_ids:
+            return performance
+        if performance is None:
+            return await self.rebuild(user_id, day)
+
+        persisted = await self._persisted_trades(user_id, day)
+        if persisted is not None and not self._rebuilt_trades[(user_id, day)] <= persisted <= performance.total_trades:
+            logger.info(f"Paper performance for {user_id} on {day} changed elsewhere, rebuilding")
+            return await self.rebuild(user_id, day)
+
+        if performance.add(position):
+            self._persist(performance)
+        return performance
+
+    async def _persisted_trades(self, user_id: str, day: date) -> Optional[int]:
+        """total_trades of the stored performance row (None when there is none)"""
+        response = await self.service.supabase.table(PERFORMANCE_TABLE)\
+            .select("total_trades")\
+            .eq("user_id", user_id)\
+            .eq("date", day.isoformat())\
+            .execute()
+        return response.data[0]["total_trades"] if response.data else None
+
+    async def rebuild(self, user_id: str, day: Optional[date] = None) -> DailyPerformance:
+        """Recompute a day from paper_trading_positions, replace the running aggregates and persist"""
+        day = day or self.today()
+        response = await self.service.supabase.table("paper_trading_positions")\
+            .select("id,pnl,entry_time,exit_time")\
+            .eq("user_id", user_id)\
+            .eq("status", "CLOSED")\
+            .gte("exit_time", day.isoformat())\
+            .lt("exit_time", date.fromordinal(day.toordinal() + 1).isoformat())\
+            .execute()
+
+        performance = DailyPerformance.from_positions(user_id, day, response.data or [])
+        self._evict_before(day)
+        self._days[(user_id, day)] = performance
+        self._rebuilt_trades[(user_id, day)] = performance.total_trades
+        if performance.total_trades:
+            self._persist(performance)
+        return performance
+
+    async def verify(self, user_id: str, day: Optional[date] = None, tolerance: float = 0.01) -> Dict[str, Tuple]:
+        """
+        Compare the running aggregates with a full rebuild (which then replaces them)
+
+        Returns:
+            Mismatched fields as {name: (running, rebuilt)}; empty when consistent
+        """
+        day = day or self.today()
+        running = self._days.get((user_id, day))
+        rebuilt = await self.rebuild(user_id, day)
+        if running is None:
+            return {}
+
+        mismatches = {}
+        for f in fields(DailyPerformance):
+            if f.name in ("user_id", "date", "position_ids"):
+                continue
+            before, after = getattr(running, f.name), getattr(rebuilt, f.name)
+            if abs(before - after) > tolerance:
+                mismatches[f.name] = (before, after)
+        if mismatches:
+            logger.warning(f"⚠️ Paper performance drift for {user_id} on {day}: {mismatches}")
+        return mismatches
+
+    def get(self, user_id: str, day: Optional[date] = None) -> Optional[DailyPerformance]:
+        return self._days.get((user_id, day or self.today()))
+
+    def _evict_before(self, day: date):
+        for key in [key for key in self._days if key[1] < day]:
+            del self._days[key]
+            self._rebuilt_trades.pop(key, None)
+
+    @staticmethod
+    def _persist(performance: DailyPerformance):
+        get_write_behind_queue().enqueue(PERFORMANCE_TABLE, performance.to_row(), on_conflict="user_id,date")
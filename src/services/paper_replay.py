@@ -0,0 +1,520 @@
+"""
+Paper Trading Replay
+Runs the paper-trading engine, exit monitor and daily performance over
+stored history at simulated time
+
+- The timeline is the set of option-chain snapshot times
+- Each step pins fyers_client.get_current_time() to the simulated time,
+  marks options to the latest snapshot, checks exits through the exit
+  monitor, then runs an engine tick (during market hours)
+- Signals come from a pluggable source given the index candles completed
+  by the step and the latest option chain (default: SignalGenerator on the
+  stored candles, ATM option from the chain)
+- ReplayBroker fills orders and answers quotes at the snapshot LTPs;
+  positions and trades are kept in memory instead of Supabase
+
+Option-chain snapshots are a table (CSV or Parquet) with one row per
+(timestamp, index, symbol): timestamp, index, symbol, strike, option_type, ltp.
+Candles are read from the local candle store.
+
+Usage:
+    python -m src.services.paper_replay --snapshots data/replay/nifty_jan.parquet --index NIFTY
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.ml.candle_store import get_candle_store
+from src.ml.training_pipeline import INDEX_SYMBOLS
+from src.services.exit_monitor import PaperExitMonitor
+from src.services.paper_performance import DailyPerformance
+from src.services.paper_trading_engine import PaperTradingEngine
+from src.utils.ist_utils import MARKET_CLOSE_TIME, MARKET_OPEN_TIME
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_COLUMNS = ("timestamp", "index", "symbol", "strike", "option_type", "ltp")
+
+# Same fallback lot sizes as PaperTradingService (used when a signal carries none)
+DEFAULT_LOT_SIZES = {"NIFTY": 65, "BANKNIFTY": 30, "FINNIFTY": 40, "MIDCPNIFTY": 75, "SENSEX": 10}
+
+# signal_source(index, now, candles, chain) -> actionable signal dict or None
+SignalSource = Callable[[str, datetime, pd.DataFrame, pd.DataFrame], Optional[Dict]]
+
+
+def _bar_length(resolution: str) -> pd.Timedelta:
+    if resolution.upper() == "D":
+        return pd.Timedelta(days=1)
+    return pd.Timedelta(minutes=int(resolution))
+
+
+class ReplayData:
+    """Option-chain snapshots and index candles for a replay"""
+
+    def __init__(
+        self,
+        snapshots: pd.DataFrame,
+        candles: Optional[Dict[str, pd.DataFrame]] = None,
+        resolution: str = "60"
+    ):
+        """
+        Args:
+            snapshots: Rows with SNAPSHOT_COLUMNS (timestamps in IST)
+            candles: Index -> OHLCV DataFrame indexed by bar start time
+                (naive timestamps are UTC, as Fyers history and the candle store hold them)
+            resolution: Candle resolution, so only completed bars are shown
+        """
+        missing = [c for c in SNAPSHOT_COLUMNS if c not in snapshots.columns]
+        if missing:
+            raise ValueError(f"Snapshots are missing columns: {missing}")
+
+        snapshots = snapshots.loc[:, list(SNAPSHOT_COLUMNS)].copy()
+        timestamps = pd.to_datetime(snapshots["timestamp"])
+        if timestamps.dt.tz is not None:
+            timestamps = timestamps.dt.tz_convert("Asia/Kolkata").dt.tz_localize(None)
+        snapshots["timestamp"] = timestamps
+        snapshots["index"] = snapshots["index"].str.upper()
+        snapshots["ltp"] = snapshots["ltp"].astype(np.float64)
+        self.snapshots = snapshots.sort_values("timestamp", kind="stable").reset_index(drop=True)
+        self.candles = {index.upper(): self._to_ist(df) for index, df in (candles or {}).items()}
+        self.bar_length = _bar_length(resolution)
+
+    @staticmethod
+    def _to_ist(df: pd.DataFrame) -> pd.DataFrame:
+        """Re-index candles on naive IST, the clock the snapshots and replay use"""
+        index = pd.DatetimeIndex(df.index)
+        if index.tz is None:
+            index = index.tz_localize("UTC")
+        df = df.copy()
+        df.index = index.tz_convert("Asia/Kolkata").tz_localize(None)
+        return df.sort_index()
+
+    @classmethod
+    def load(cls, snapshot_path: str, resolution: str = "60", store=None) -> "ReplayData":
+        """Read snapshots from CSV/Parquet and each index's candles from the candle store"""
+        if snapshot_path.endswith(".parquet"):
+            snapshots = pd.read_parquet(snapshot_path)
+        else:
+            snapshots = pd.read_csv(snapshot_path)
+
+        store = store or get_candle_store()
+        candles = {}
+        for index in snapshots["index"].str.upper().unique():
+            df = store.read(INDEX_SYMBOLS.get(index, index), resolution)
+            if df is None:
+                logger.warning(f"No stored {resolution} candles for {index}")
+                continue
+            candles[index] = df
+        return cls(snapshots, candles, resolution)
+
+    def timeline(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> pd.DatetimeIndex:
+        times = pd.DatetimeIndex(self.snapshots["timestamp"].unique())
+        if start is not None:
+            times = times[times >= pd.Timestamp(start)]
+        if end is not None:
+            times = times[times <= pd.Timestamp(end)]
+        return times
+
+    def candles_until(self, index: str, now: datetime) -> pd.DataFrame:
+        """Bars of an index that had closed by now (no look-ahead)"""
+        df = self.candles.get(index)
+        if df is None:
+            return pd.DataFrame(columns=["open", "high", "low", "close", "volume"])
+        return df.iloc[:df.index.searchsorted(pd.Timestamp(now) - self.bar_length, side="right")]
+
+
+class ReplayBroker:
+    """Fake Fyers quotes and orders at the replayed option-chain LTPs"""
+
+    def __init__(self, data: ReplayData):
+        snapshots = data.snapshots
+        self._snapshots = snapshots
+        self._times = snapshots["timestamp"].to_numpy()
+        self._symbols = snapshots["symbol"].to_numpy()
+        self._indexes = snapshots["index"].to_numpy()
+        self._ltps = snapshots["ltp"].to_numpy()
+        self._groups = snapshots.groupby(["index", "timestamp"], sort=False).indices
+        self._cursor = 0
+        self._latest: Dict[str, np.datetime64] = {}
+        self.ltp: Dict[str, float] = {}
+        self.fills: List[Dict] = []
+        self.quote_calls = 0
+
+    def advance(self, now: datetime):
+        """Apply every snapshot row up to now"""
+        end = int(np.searchsorted(self._times, np.datetime64(pd.Timestamp(now)), side="right"))
+        if end <= self._cursor:
+            return
+        window = slice(self._cursor, end)
+        self.ltp.update(zip(self._symbols[window], self._ltps[window].tolist()))
+        self._latest.update(zip(self._indexes[window], self._times[window]))
+        self._cursor = end
+
+    def chain(self, index: str) -> pd.DataFrame:
+        """Latest snapshot of an index's option chain"""
+        latest = self._latest.get(index)
+        if latest is None:
+            return self._snapshots.iloc[0:0]
+        return self._snapshots.iloc[self._groups[(index, pd.Timestamp(latest))]]
+
+    def get_quotes(self, symbols: List[str]) -> Dict:
+        self.quote_calls += 1
+        return {
+            "s": "ok",
+            "code": 200,
+            "d": [{"n": s, "s": "ok", "v": {"lp": self.ltp[s]}} for s in symbols if s in self.ltp]
+        }
+
+    def place_order(self, symbol: str, qty: int, side: int, **kwargs) -> Dict:
+        if symbol not in self.ltp:
+            return {"s": "error", "code": -1, "message": f"No replay quote for {symbol}"}
+        fill = {"id": f"REPLAY-{len(self.fills) + 1}", "symbol": symbol, "qty": qty, "side": side, "traded_price": self.ltp[symbol]}
+        self.fills.append(fill)
+        return {"s": "ok", "code": 200, "id": fill["id"], "traded_price": fill["traded_price"]}
+
+
+class GeneratorSignalSource:
+    """
+    Default replay signals: SignalGenerator on the completed candles,
+    bought through the ATM option of the latest chain snapshot
+    """
+
+    def __init__(
+        self,
+        min_candles: int = 50,
+        stop_loss_pct: float = 30.0,
+        target_1_pct: float = 30.0,
+        target_2_pct: float = 60.0
+    ):
+        """
+        Args:
+            min_candles: Candles needed before any signal is generated
+            stop_loss_pct, target_1_pct, target_2_pct: Levels relative to the option entry price
+        """
+        from src.trading.signal_generator import signal_generator
+        self.generator = signal_generator
+        self.min_candles = min_candles
+        self.stop_loss_pct = stop_loss_pct
+        self.target_1_pct = target_1_pct
+        self.target_2_pct = target_2_pct
+
+    def __call__(self, index: str, now: datetime, candles: pd.DataFrame, chain: pd.DataFrame) -> Optional[Dict]:
+        if len(candles) < self.min_candles or chain.empty:
+            return None
+
+        spot = float(candles["close"].iloc[-1])
+        result = self.generator.generate_comprehensive_signal(candles, spot)
+        confidence = {"score": round(float(result.get("confidence", 0)) * 100, 1)}
+        option_type = {"buy": "CE", "sell": "PE"}.get(result.get("signal"))
+        if option_type is None:
+            return {"action": "WAIT", "confidence": confidence}
+
+        options = chain[chain["option_type"] == option_type]
+        if options.empty:
+            return None
+        atm = options.iloc[int(np.argmin(np.abs(options["strike"].to_numpy(dtype=float) - spot)))]
+        entry = float(atm["ltp"])
+        return {
+            "action": "BUY CALL" if option_type == "CE" else "BUY PUT",
+            "confidence": confidence,
+            "option": {"trading_symbol": atm["symbol"], "strike": float(atm["strike"]), "type": option_type},
+            "entry": {"price": entry},
+            "targets": {
+                "stop_loss": round(entry * (1 - self.stop_loss_pct / 100), 2),
+                "target_1": round(entry * (1 + self.target_1_pct / 100), 2),
+                "target_2": round(entry * (1 + self.target_2_pct / 100), 2)
+            },
+            "market_context": {"index": index, "spot_price": spot}
+        }
+
+
+class ReplayPaperTradingService:
+    """In-memory PaperTradingService for the engine and exit monitor, at simulated time"""
+
+    def __init__(
+        self,
+        data: ReplayData,
+        broker: ReplayBroker,
+        signal_source: SignalSource,
+        capital_per_trade: float = 10000,
+        lot_sizes: Optional[Dict[str, int]] = None,
+        trailing_stop_pct: float = 0.0
+    ):
+        self.data = data
+        self.broker = broker
+        self.signal_source = signal_source
+        self.capital_per_trade = capital_per_trade
+        self.lot_sizes = lot_sizes or DEFAULT_LOT_SIZES
+        self.now = datetime.now()
+        self.engine = PaperTradingEngine(self, market_open=lambda: False, clock=self._clock)
+        self.exit_monitor = PaperExitMonitor(
+            self, quote_source=broker, trailing_stop_pct=trailing_stop_pct,
+            now=lambda: self.now, clock=self._clock, resync_seconds=None
+        )
+        self.performance: Dict[Tuple[str, object], DailyPerformance] = {}
+        self.trades: List[Dict] = []
+        self.activity: Counter = Counter()
+        self._signals: Dict[str, Dict] = {}
+        self._positions = 0
+
+    def _clock(self) -> float:
+        return self.now.timestamp()
+
+    # ==================== ENGINE INTERFACE ====================
+
+    async def _fetch_signal(self, index: str) -> Optional[Dict]:
+        signal = self.signal_source(
+            index, self.now, self.data.candles_until(index, self.now), self.broker.chain(index)
+        )
+        if signal is not None:
+            signal.setdefault("market_context", {})["index"] = index
+        return signal
+
+    async def monitor_positions(self, user_ids=None):
+        """No-op: the replay checks exits on every step, not only on engine ticks"""
+
+    async def _count_open_positions(self, user_id: str) -> int:
+        return len(self.exit_monitor.open_positions(user_id))
+
+    async def save_signal(self, user_id: str, signal: Dict) -> Optional[Dict]:
+        option = signal.get("option", {})
+        targets = signal.get("targets", {})
+        signal_id = f"signal-{len(self._signals) + 1}"
+        self._signals[signal_id] = {
+            "id": signal_id,
+            "index": signal["market_context"]["index"],
+            "option_symbol": option.get("trading_symbol", ""),
+            "strike": float(option.get("strike", 0)),
+            "option_type": option.get("type", "CE"),
+            "lot_size": option.get("lot_size"),
+            "entry_price": float(signal.get("entry", {}).get("price", 0)),
+            "stop_loss": float(targets.get("stop_loss", 0)),
+            "target_1": float(targets.get("target_1", 0)),
+            "target_2": float(targets.get("target_2", 0))
+        }
+        return self._signals[signal_id]
+
+    async def execute_order(self, signal_id: str, user_id: str, action: str = "BUY") -> Dict:
+        signal = self._signals.pop(signal_id)
+        symbol = signal["option_symbol"]
+        entry_price = self.broker.ltp.get(symbol, signal["entry_price"])
+        lot_size = int(signal["lot_size"] or self.lot_sizes.get(signal["index"], 1))
+        quantity = max(1, int(self.capital_per_trade / (entry_price * lot_size))) * lot_size
+
+        order = self.broker.place_order(symbol=symbol, qty=quantity, side=1 if action == "BUY" else -1)
+        if order.get("code") != 200:
+            await self._log_activity(user_id, None, "ERROR", {"error": order.get("message")})
+            return {"status": "error", "message": order.get("message")}
+
+        self._positions += 1
+        position = {
+            "id": f"position-{self._positions}",
+            "user_id": user_id,
+            "signal_id": signal_id,
+            "index": signal["index"],
+            "option_symbol": symbol,
+            "strike": signal["strike"],
+            "option_type": signal["option_type"],
+            "quantity": quantity,
+            "entry_price": float(order["traded_price"]),
+            "entry_time": self.now.isoformat(),
+            "stop_loss": signal["stop_loss"],
+            "target_1": signal["target_1"],
+            "target_2": signal["target_2"],
+            "current_ltp": float(order["traded_price"]),
+            "status": "OPEN"
+        }
+        self.exit_monitor.track(position)
+        await self._log_activity(user_id, position["id"], "POSITION_OPENED", {})
+        return {"status": "success", "message": "Filled at replay LTP", "position": position}
+
+    async def _update_position_mark(self, position_id: str, current_ltp: float, current_pnl: float):
+        """No-op: the exit monitor already updates the in-memory position"""
+
+    async def _exit_position(self, user_id: str, position: Dict, exit_price: float, exit_reason: str) -> bool:
+        entry_price = float(position["entry_price"])
+        pnl = (exit_price - entry_price) * position["quantity"]
+        trade = {
+            **position,
+            "status": "CLOSED",
+            "exit_price": exit_price,
+            "exit_time": self.now.isoformat(),
+            "exit_reason": exit_reason,
+            "pnl": pnl,
+            "pnl_pct": (exit_price - entry_price) / entry_price * 100
+        }
+        self.trades.append(trade)
+        day = self.now.date()
+        self.performance.setdefault((user_id, day), DailyPerformance(user_id, day)).add(trade)
+        await self._log_activity(user_id, position["id"], "POSITION_CLOSED", {})
+        return True
+
+    async def _log_activity(self, user_id: str, position_id: Optional[str], activity_type: str, details: Dict):
+        self.activity[activity_type] += 1
+
+
+@dataclass
+class ReplayReport:
+    """Throughput and P&L of one replay"""
+    start: Optional[str]
+    end: Optional[str]
+    steps: int
+    trading_days: int
+    wall_seconds: float
+    steps_per_second: float
+    signals_computed: int
+    orders: int
+    closed_trades: int
+    open_positions: int
+    total_pnl: float
+    win_rate: float
+    exits_by_reason: Dict[str, int] = field(default_factory=dict)
+    daily: List[Dict] = field(default_factory=list)
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def _fyers_time_hook() -> Optional[Callable[[Optional[datetime]], None]]:
+    try:
+        from src.api.fyers_client import set_simulated_time
+    except Exception as e:
+        # Standalone replays run without the API's .env / Fyers SDK
+        logger.debug(f"Fyers time hook unavailable: {e}")
+        return None
+    return set_simulated_time
+
+
+class PaperTradingReplay:
+    """Replays stored history through the paper-trading engine and exit monitor"""
+
+    def __init__(
+        self,
+        data: ReplayData,
+        users: Dict[str, Dict],
+        signal_source: Optional[SignalSource] = None,
+        capital_per_trade: float = 10000,
+        lot_sizes: Optional[Dict[str, int]] = None,
+        trailing_stop_pct: float = 0.0
+    ):
+        """
+        Args:
+            data: Snapshots and candles to replay
+            users: user_id -> paper_trading_config (indices, scan interval, limits)
+            signal_source: Signal per (index, step) (default: GeneratorSignalSource)
+            capital_per_trade: Capital per order, for the quantity
+            lot_sizes: Lot size per index when a signal carries none
+            trailing_stop_pct: Exit monitor trailing stop (0 = off)
+        """
+        self.data = data
+        self.users = users
+        self.signal_source = signal_source
+        self.capital_per_trade = capital_per_trade
+        self.lot_sizes = lot_sizes
+        self.trailing_stop_pct = trailing_stop_pct
+        self.service: Optional[ReplayPaperTradingService] = None
+
+    async def run(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> ReplayReport:
+        """Replay every snapshot time in [start, end]"""
+        timeline = self.data.timeline(start, end)
+        broker = ReplayBroker(self.data)
+        service = ReplayPaperTradingService(
+            self.data, broker, self.signal_source or GeneratorSignalSource(),
+            capital_per_trade=self.capital_per_trade,
+            lot_sizes=self.lot_sizes,
+            trailing_stop_pct=self.trailing_stop_pct
+        )
+        self.service = service
+        pin_time = _fyers_time_hook()
+
+        if len(timeline):
+            service.now = timeline[0].to_pydatetime()
+        for user_id, config in self.users.items():
+            service.engine.subscribe(user_id, config)
+
+        started = time.perf_counter()
+        try:
+            for step in timeline:
+                service.now = step.to_pydatetime()
+                if pin_time:
+                    pin_time(service.now)
+                broker.advance(service.now)
+                await service.exit_monitor.check()
+                if MARKET_OPEN_TIME <= service.now.time() <= MARKET_CLOSE_TIME:
+                    await service.engine.run_tick()
+        finally:
+            await service.engine.stop()
+            if pin_time:
+                pin_time(None)
+        wall_seconds = time.perf_counter() - started
+
+        trades = service.trades
+        wins = sum(1 for trade in trades if trade["pnl"] > 0)
+        report = ReplayReport(
+            start=timeline[0].isoformat() if len(timeline) else None,
+            end=timeline[-1].isoformat() if len(timeline) else None,
+            steps=len(timeline),
+            trading_days=len({step.date() for step in timeline}),
+            wall_seconds=round(wall_seconds, 3),
+            steps_per_second=round(len(timeline) / wall_seconds, 1) if wall_seconds > 0 else 0.0,
+            signals_computed=service.engine.stats["signals_computed"],
+            orders=len(broker.fills),
+            closed_trades=len(trades),
+            open_positions=len(service.exit_monitor.positions),
+            total_pnl=round(sum(trade["pnl"] for trade in trades), 2),
+            win_rate=round(wins / len(trades) * 100, 2) if trades else 0.0,
+            exits_by_reason=dict(Counter(trade["exit_reason"] for trade in trades)),
+            daily=[
+                {k: v for k, v in performance.to_row().items() if k != "updated_at"}
+                for _, performance in sorted(service.performance.items(), key=lambda item: (item[0][1], item[0][0]))
+            ]
+        )
+        logger.info(
+            f"🔁 Replayed {report.steps} steps over {report.trading_days} days in {report.wall_seconds}s: "
+            f"{report.closed_trades} trades, P&L ₹{report.total_pnl:.2f}"
+        )
+        return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay stored option-chain snapshots through paper trading")
+    parser.add_argument("--snapshots", required=True, help="CSV/Parquet of option-chain snapshots")
+    parser.add_argument("--index", action="append", dest="indices", help="Index to trade (repeatable, default: NIFTY)")
+    parser.add_argument("--start", type=datetime.fromisoformat, help="First simulated time (IST)")
+    parser.add_argument("--end", type=datetime.fromisoformat, help="Last simulated time (IST)")
+    parser.add_argument("--resolution", default="60", help="Stored candle resolution")
+    parser.add_argument("--interval", type=int, default=5, help="Scan interval in minutes")
+    parser.add_argument("--min-confidence", type=float, default=65)
+    parser.add_argument("--max-positions", type=int, default=3)
+    parser.add_argument("--capital", type=float, default=10000, help="Capital per trade")
+    parser.add_argument("--trailing-stop-pct", type=float, default=0.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    replay = PaperTradingReplay(
+        ReplayData.load(args.snapshots, resolution=args.resolution),
+        users={"replay": {
+            "indices": args.indices or ["NIFTY"],
+            "scan_interval_minutes": args.interval,
+            "min_confidence": args.min_confidence,
+            "max_positions": args.max_positions
+        }},
+        capital_per_trade=args.capital,
+        trailing_stop_pct=args.trailing_stop_pct
+    )
+    report = asyncio.run(replay.run(args.start, args.end))
+    print(json.dumps(report.to_dict(), indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
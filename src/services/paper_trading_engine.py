@@ -0,0 +1,279 @@
+"""
+Paper Trading Engine
+One scan loop shared by every user running automated paper trading
+
+Users subscribe with their rule set (indices, scan interval, min confidence,
+max positions). Each tick the engine finds the (index, interval) groups
+that are due, computes each due index's signal once and fans it out to
+every subscriber of those groups, so signal cost scales with the number of
+indices traded rather than the number of users.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from src.utils.ist_utils import is_market_open
+
+logger = logging.getLogger(__name__)
+
+ACTIONABLE_SIGNALS = ("BUY CALL", "BUY PUT")
+
+# Longest the loop sleeps, so market open/close and new groups are noticed
+MAX_SLEEP_SECONDS = 60
+
+
+@dataclass
+class Subscription:
+    """One user's automated trading rules"""
+    user_id: str
+    indices: List[str]
+    interval_minutes: int = 5
+    max_positions: int = 3
+    min_confidence: float = 65.0
+
+    @classmethod
+    def from_config(cls, user_id: str, config: Dict) -> "Subscription":
+        """Build from a paper_trading_config row"""
+        return cls(
+            user_id=user_id,
+            indices=[index.upper() for index in (config.get("indices") or ["NIFTY"])],
+            interval_minutes=max(int(config.get("scan_interval_minutes") or 5), 1),
+            max_positions=int(config.get("max_positions") or 3),
+            min_confidence=float(config.get("min_confidence") or 65)
+        )
+
+    @property
+    def groups(self) -> List[Tuple[str, int]]:
+        return [(index, self.interval_minutes) for index in self.indices]
+
+
+class PaperTradingEngine:
+    """Computes signals per (index, interval) tick and applies each subscriber's rules"""
+
+    def __init__(
+        self,
+        service,
+        market_open: Callable[[], bool] = is_market_open,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            service: PaperTradingService (signal fetch, positions, orders, activity log)
+            market_open: Market hours check
+            clock: Monotonic seconds, for scheduling group ticks
+        """
+        self.service = service
+        self.market_open = market_open
+        self.clock = clock
+        self.subscriptions: Dict[str, Subscription] = {}
+        self._next_run: Dict[Tuple[str, int], float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self.stats = {"ticks": 0, "signals_computed": 0, "signals_delivered": 0}
+
+    # ==================== SUBSCRIPTIONS ====================
+
+    def subscribe(self, user_id: str, config: Dict) -> Subscription:
+        """Add (or update) a user's rules; new groups are due immediately"""
+        subscription = Subscription.from_config(user_id, config)
+        self.subscriptions[user_id] = subscription
+        for group in subscription.groups:
+            self._next_run.setdefault(group, 0.0)
+        # Groups from the user's previous config may now have no subscriber
+        self._prune_groups()
+        self._ensure_running()
+        return subscription
+
+    def unsubscribe(self, user_id: str) -> bool:
+        """Remove a user; the loop stops once nobody is subscribed"""
+        if self.subscriptions.pop(user_id, None) is None:
+            return False
+        self._prune_groups()
+        if not self.subscriptions and self._task is not None:
+            self._task.cancel()
+            self._task = None
+        return True
+
+    def _prune_groups(self):
+        """Drop schedule entries no subscriber uses"""
+        active = {group for sub in self.subscriptions.values() for group in sub.groups}
+        for group in list(self._next_run):
+            if group not in active:
+                del self._next_run[group]
+
+    def _ensure_running(self):
+        if self._task is not None and not self._task.done():
+            self._wakeup.set()
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info("🤖 Paper trading engine started")
+
+    async def stop(self):
+        """Cancel the loop (subscriptions are kept)"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # ==================== LOOP ====================
+
+    async def _run(self):
+        try:
+            while self.subscriptions:
+                if not self.market_open():
+                    await self._sleep(MAX_SLEEP_SECONDS)
+                    continue
+                try:
+                    await self.run_tick()
+                except Exception as e:
+                    logger.error(f"Paper trading engine tick error: {e}", exc_info=True)
+                await self._sleep(self._seconds_until_next_run())
+        except asyncio.CancelledError:
+            pass
+        logger.info("🤖 Paper trading engine stopped")
+
+    async def _sleep(self, seconds: float):
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    def _seconds_until_next_run(self) -> float:
+        if not self._next_run:
+            return MAX_SLEEP_SECONDS
+        wait = min(self._next_run.values()) - self.clock()
+        return min(max(wait, 1.0), MAX_SLEEP_SECONDS)
+
+    async def run_tick(self) -> Dict[str, Optional[Dict]]:
+        """
+        Process every due group once
+
+        Returns:
+            Signals computed this tick, by index
+        """
+        now = self.clock()
+        due: Set[Tuple[str, int]] = {
+            group for group, next_run in self._next_run.items() if now >= next_run
+        }
+        if not due:
+            return {}
+        for group in due:
+            self._next_run[group] = now + group[1] * 60
+        self.stats["ticks"] += 1
+
+        # Check exits for every due subscriber (one batched pass), then measure spare capacity
+        subscribers = [
+            sub for sub in self.subscriptions.values()
+            if any(group in due for group in sub.groups)
+        ]
+        await self.service.monitor_positions([sub.user_id for sub in subscribers])
+        open_counts = await asyncio.gather(
+            *(self.service._count_open_positions(sub.user_id) for sub in subscribers)
+        )
+        capacity = {sub.user_id: count for sub, count in zip(subscribers, open_counts)}
+
+        # One signal per index that at least one subscriber can still act on
+        wanted = []
+        for sub in subscribers:
+            if capacity[sub.user_id] < sub.max_positions:
+                for index in sub.indices:
+                    if (index, sub.interval_minutes) in due and index not in wanted:
+                        wanted.append(index)
+
+        signals: Dict[str, Optional[Dict]] = {}
+        errors: Dict[str, str] = {}
+        for index in wanted:
+            try:
+                signals[index] = await self.service._fetch_signal(index)
+                self.stats["signals_computed"] += 1
+            except Exception as e:
+                logger.error(f"Error generating signal for {index}: {e}")
+                signals[index] = None
+                errors[index] = str(e)
+
+        await asyncio.gather(*(
+            self._deliver(sub, due, signals, errors, capacity[sub.user_id])
+            for sub in subscribers
+            if capacity[sub.user_id] < sub.max_positions
+        ))
+        return signals
+
+    async def _deliver(
+        self,
+        sub: Subscription,
+        due: Set[Tuple[str, int]],
+        signals: Dict[str, Optional[Dict]],
+        errors: Dict[str, str],
+        open_positions: int
+    ):
+        """Apply one subscriber's rules to this tick's signals, in their index order"""
+        user_id = sub.user_id
+        for index in sub.indices:
+            if (index, sub.interval_minutes) not in due or index not in signals:
+                continue
+            if user_id not in self.subscriptions or open_positions >= sub.max_positions:
+                return
+
+            try:
+                if index in errors:
+                    await self.service._log_activity(user_id, None, "ERROR", {
+                        "error": errors[index],
+                        "context": f"Signal generation for {index}"
+                    })
+                    continue
+
+                signal = signals[index]
+                if signal is None:
+                    continue
+                self.stats["signals_delivered"] += 1
+                await self.service._log_activity(user_id, None, "SIGNAL_GENERATED", {
+                    "index": index,
+                    "signal": signal
+                })
+
+                if signal.get("action") not in ACTIONABLE_SIGNALS:
+                    logger.info(f"No actionable signal for {index}: {signal.get('action')}")
+                    continue
+
+                confidence = signal.get("confidence", {}).get("score", 0)
+                if confidence < sub.min_confidence:
+                    logger.info(
+                        f"Signal confidence too low for {user_id}: "
+                        f"{confidence}% < {sub.min_confidence}%"
+                    )
+                    continue
+
+                saved_signal = await self.service.save_signal(user_id, signal)
+                if saved_signal:
+                    execution_result = await self.service.execute_order(
+                        saved_signal["id"], user_id, action="BUY"
+                    )
+                    logger.info(f"Order execution result: {execution_result.get('message')}")
+                    open_positions = await self.service._count_open_positions(user_id)
+
+            except Exception as e:
+                logger.error(f"Error applying {index} signal for {user_id}: {e}")
+                await self.service._log_activity(user_id, None, "ERROR", {
+                    "error": str(e),
+                    "context": f"Paper trading engine ({index})"
+                })
+
+    def get_status(self) -> Dict:
+        now = self.clock()
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "subscribers": len(self.subscriptions),
+            "groups": [
+                {"index": index, "interval_minutes": interval, "next_run_in_seconds": max(round(next_run - now), 0)}
+                for (index, interval), next_run in sorted(self._next_run.items())
+            ],
+            **self.stats
+        }
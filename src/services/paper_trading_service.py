@@ -4,21 +4,53 @@ Handles automated paper trading logic with order execution testing
 """
 import asyncio
 from datetime import datetime, time, timedelta
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Iterable, Optional, Any
 import logging
-from config.supabase_config import supabase_admin
+from config.supabase_config import async_supabase_admin
 from src.api.fyers_client import fyers_client
 from src.utils.ist_utils import now_ist, is_market_open
+from src.services.write_behind import get_write_behind_queue
+from src.services.paper_trading_engine import PaperTradingEngine
+from src.services.exit_monitor import PaperExitMonitor
+from src.services.paper_performance import PaperPerformanceTracker
+from src.services.signal_pipeline import get_actionable_signal
 
 logger = logging.getLogger(__name__)
 
+# Seconds the shared engine waits for one index's signal before skipping it
+SIGNAL_TIMEOUT_SECONDS = 30.0
+
+
+def _trailing_stop_pct() -> float:
+    try:
+        from config.settings import settings
+        return settings.paper_trading_trailing_stop_pct
+    except Exception:
+        # Standalone scripts run without the API's .env
+        return 0.0
+
+
+def _signal_timeout_seconds() -> float:
+    try:
+        from config.settings import settings
+        return settings.paper_trading_signal_timeout_seconds
+    except Exception:
+        return SIGNAL_TIMEOUT_SECONDS
+
 
 class PaperTradingService:
     """Automated Paper Trading Service"""
     
     def __init__(self):
-        self.supabase = supabase_admin
-        self.active_scanners = {}  # user_id -> task
+        self.supabase = async_supabase_admin
+        # Shared scan loop for all users with automated trading running
+        self.engine = PaperTradingEngine(self)
+        # Open positions of every user, checked with one batched quote call per tick
+        self.exit_monitor = PaperExitMonitor(self, quote_source=fyers_client, trailing_stop_pct=_trailing_stop_pct())
+        # One engine tick awaits every index in turn, so a hung pipeline must not stall it
+        self.signal_timeout_seconds = _signal_timeout_seconds()
+        # Today's per-user performance summary, updated on each close
+        self.performance = PaperPerformanceTracker(self)
         # Fallback lot sizes (if Fyers lookup fails)
         # Updated as of Jan 2026
         self.lot_size_map = {
@@ -29,6 +61,11 @@ class PaperTradingService:
             "SENSEX": 10
         }
     
+    @property
+    def active_scanners(self) -> Dict:
+        """user_id -> subscription, for users with automated trading running"""
+        return self.engine.subscriptions
+    
     async def _get_lot_size_from_fyers(self, option_symbol: str, index: str) -> int:
         """
         Get actual lot size from Fyers for the option symbol
@@ -68,7 +105,7 @@ class PaperTradingService:
     async def get_user_config(self, user_id: str) -> Optional[Dict]:
         """Get user's paper trading configuration"""
         try:
-            response = self.supabase.table("paper_trading_config")\
+            response = await self.supabase.table("paper_trading_config")\
                 .select("*")\
                 .eq("user_id", user_id)\
                 .execute()
@@ -100,16 +137,23 @@ class PaperTradingService:
             
             if existing:
                 # Update existing
-                response = self.supabase.table("paper_trading_config")\
+                response = await self.supabase.table("paper_trading_config")\
                     .update(config_data)\
                     .eq("user_id", user_id)\
                     .execute()
             else:
                 # Insert new
-                response = self.supabase.table("paper_trading_config")\
+                response = await self.supabase.table("paper_trading_config")\
                     .insert(config_data)\
                     .execute()
             
+            # Running users pick up new rules on their next tick
+            if user_id in self.engine.subscriptions:
+                if config_data["enabled"]:
+                    self.engine.subscribe(user_id, config_data)
+                else:
+                    self.engine.unsubscribe(user_id)
+            
             return {
                 "status": "success",
                 "config": response.data[0] if response.data else None
@@ -122,7 +166,31 @@ class PaperTradingService:
     
     async def generate_signal(self, index: str, user_id: str) -> Optional[Dict]:
         """
-        Generate trading signal for index
+        Generate trading signal for index and log it for the user
+        
+        Automated trading goes through the shared engine instead, which
+        fetches each index's signal once per tick for all users.
+        """
+        try:
+            signal = await self._fetch_signal(index)
+            if signal is not None:
+                # Log signal generation
+                await self._log_activity(user_id, None, "SIGNAL_GENERATED", {
+                    "index": index,
+                    "signal": signal
+                })
+            return signal
+        except Exception as e:
+            logger.error(f"Error generating signal for {index}: {e}", exc_info=True)
+            await self._log_activity(user_id, None, "ERROR", {
+                "error": str(e),
+                "context": f"Signal generation for {index}"
+            })
+            return None
+    
+    async def _fetch_signal(self, index: str) -> Optional[Dict]:
+        """
+        Fetch the actionable signal for an index
         
         Uses QUICK MODE by default for automated trading to:
         - Avoid API rate limits (10-20 calls vs 100-150)
@@ -136,49 +204,34 @@ class PaperTradingService:
         
         Skips (to save API calls):
         - 50-stock constituent probability analysis
+        
+        Returns:
+            Signal dict, or None if the pipeline failed or timed out
         """
+        # Same pipeline as GET /signals/{index}/actionable?quick_mode=true, called in-process
+        logger.info(f"📡 Generating QUICK signal for {index}")
+        logger.info(f"   ⚡ Quick mode: Fast analysis without 50-stock scan")
+        
         try:
-            # Import signal generation function from main
-            import httpx
-            
-            # Call the existing actionable signal endpoint with quick_mode=true
-            # This makes automated trading fast and avoids rate limits
-            signal_url = f"http://localhost:8000/signals/{index}/actionable?quick_mode=true"
-            logger.info(f"📡 Fetching QUICK signal from: {signal_url}")
-            logger.info(f"   ⚡ Quick mode: Fast analysis without 50-stock scan")
-            
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(signal_url)
-                logger.info(f"📊 Signal response status: {response.status_code}")
-                
-                if response.status_code == 200:
-                    signal = response.json()
-                    
-                    # Inject the index into the signal (since API response may not have it)
-                    if "market_context" not in signal:
-                        signal["market_context"] = {}
-                    signal["market_context"]["index"] = index
-                    
-                    logger.info(f"✅ Signal generated for {index}: {signal.get('action', 'UNKNOWN')}")
-                    
-                    # Log signal generation
-                    await self._log_activity(user_id, None, "SIGNAL_GENERATED", {
-                        "index": index,
-                        "signal": signal
-                    })
-                    
-                    return signal
-                else:
-                    logger.error(f"Signal generation failed: {response.status_code} - {response.text}")
-                    return None
-        except Exception as e:
-            logger.error(f"Error generating signal for {index}: {e}", exc_info=True)
-            await self._log_activity(user_id, None, "ERROR", {
-                "error": str(e),
-                "context": f"Signal generation for {index}"
-            })
+            result = await asyncio.wait_for(
+                get_actionable_signal(index, quick_mode=True), timeout=self.signal_timeout_seconds
+            )
+        except asyncio.TimeoutError:
+            logger.error(f"⏱️ Signal generation for {index} timed out after {self.signal_timeout_seconds}s")
             return None
+        if not result.success:
+            logger.error(f"Signal generation failed: {result.status_code} - {result.error}")
             return None
+        
+        signal = result.data
+        
+        # Inject the index into the signal (since the response may not have it)
+        if "market_context" not in signal:
+            signal["market_context"] = {}
+        signal["market_context"]["index"] = index
+        
+        logger.info(f"✅ Signal generated for {index}: {signal.get('action', 'UNKNOWN')}")
+        return signal
     
     async def save_signal(self, user_id: str, signal: Dict, scan_id: str = None) -> Optional[Dict]:
         """Save generated signal to database"""
@@ -210,7 +263,7 @@ class PaperTradingService:
                 "status": "PENDING"
             }
             
-            response = self.supabase.table("paper_trading_signals")\
+            response = await self.supabase.table("paper_trading_signals")\
                 .insert(signal_data)\
                 .execute()
             
@@ -228,7 +281,7 @@ class PaperTradingService:
         """
         try:
             # Get user's Fyers token
-            token_response = self.supabase.table("fyers_tokens")\
+            token_response = await self.supabase.table("fyers_tokens")\
                 .select("*")\
                 .eq("user_id", user_id)\
                 .order("updated_at", desc=True)\
@@ -244,7 +297,7 @@ class PaperTradingService:
                 logger.warning("⚠️  No Fyers token found for user - orders will fail")
             
             # Get signal details
-            signal_response = self.supabase.table("paper_trading_signals")\
+            signal_response = await self.supabase.table("paper_trading_signals")\
                 .select("*")\
                 .eq("id", signal_id)\
                 .execute()
@@ -346,7 +399,7 @@ class PaperTradingService:
             )
             
             # Mark signal as executed
-            self.supabase.table("paper_trading_signals")\
+            await self.supabase.table("paper_trading_signals")\
                 .update({
                     "executed": True,
                     "execution_timestamp": datetime.now().isoformat(),
@@ -400,13 +453,14 @@ class PaperTradingService:
                 "order_response": order_response
             }
             
-            response = self.supabase.table("paper_trading_positions")\
+            response = await self.supabase.table("paper_trading_positions")\
                 .insert(position_data)\
                 .execute()
             
             position = response.data[0] if response.data else None
             
             if position:
+                self.exit_monitor.track(position)
                 # Log activity
                 await self._log_activity(user_id, position["id"], "POSITION_OPENED", {
                     "position": position_data,
@@ -420,101 +474,36 @@ class PaperTradingService:
     
     # ==================== POSITION MONITORING ====================
     
-    async def monitor_positions(self, user_id: str):
-        """Monitor open positions and check for target/stop loss hits"""
+    async def monitor_positions(self, user_ids: Optional[Iterable[str]] = None):
+        """Check target/stop loss/EOD exits for the given users' open positions (default: all)"""
         try:
-            # Get all open positions
-            response = self.supabase.table("paper_trading_positions")\
-                .select("*")\
-                .eq("user_id", user_id)\
-                .eq("status", "OPEN")\
-                .execute()
-            
-            if not response.data:
-                return
-            
-            positions = response.data
-            logger.info(f"Monitoring {len(positions)} open positions for user {user_id}")
-            
-            for position in positions:
-                await self._check_exit_conditions(user_id, position)
-        
+            exits = await self.exit_monitor.check(user_ids)
+            if exits:
+                logger.info(f"Exit monitor closed {len(exits)} positions")
         except Exception as e:
             logger.error(f"Error monitoring positions: {e}")
     
-    async def _check_exit_conditions(self, user_id: str, position: Dict):
-        """Check if position should be exited (target/stop loss hit)"""
-        try:
-            # Get current LTP
-            option_symbol = position["option_symbol"]
-            
-            # Fetch current price from Fyers
-            try:
-                quote = fyers_client.get_quotes([option_symbol])
-                if not quote or not quote.get("d"):
-                    logger.warning(f"Could not fetch quote for {option_symbol}")
-                    return
-                
-                current_ltp = float(quote["d"][0]["v"]["lp"])
-            except Exception as quote_error:
-                logger.error(f"Error fetching quote: {quote_error}")
-                return
-            
-            entry_price = float(position["entry_price"])
-            target_1 = float(position["target_1"])
-            target_2 = float(position["target_2"])
-            stop_loss = float(position["stop_loss"])
-            
-            # Update current LTP and P&L
-            current_pnl = (current_ltp - entry_price) * position["quantity"]
-            
-            self.supabase.table("paper_trading_positions")\
-                .update({
-                    "current_ltp": current_ltp,
-                    "current_pnl": current_pnl,
-                    "updated_at": datetime.now().isoformat()
-                })\
-                .eq("id", position["id"])\
-                .execute()
-            
-            # Check exit conditions
-            exit_reason = None
-            exit_price = None
-            
-            if current_ltp >= target_2:
-                exit_reason = "TARGET_2"
-                exit_price = target_2
-            elif current_ltp >= target_1:
-                exit_reason = "TARGET_1"
-                exit_price = target_1
-            elif current_ltp <= stop_loss:
-                exit_reason = "STOP_LOSS"
-                exit_price = stop_loss
-            
-            # Check EOD exit (3:15 PM)
-            now = now_ist()
-            if now.time() >= time(15, 15):
-                exit_reason = "EOD_EXIT"
-                exit_price = current_ltp
-            
-            if exit_reason:
-                await self._exit_position(user_id, position, exit_price, exit_reason)
-            else:
-                # Log target check
-                await self._log_activity(user_id, position["id"], "TARGET_CHECK", {
-                    "current_ltp": current_ltp,
-                    "entry_price": entry_price,
-                    "target_1": target_1,
-                    "target_2": target_2,
-                    "stop_loss": stop_loss,
-                    "current_pnl": current_pnl
-                })
-        
-        except Exception as e:
-            logger.error(f"Error checking exit conditions: {e}")
+    async def _update_position_mark(self, position_id: str, current_ltp: float, current_pnl: float):
+        """Persist an open position's latest LTP and unrealized P&L"""
+        await self.supabase.table("paper_trading_positions")\
+            .update({
+                "current_ltp": current_ltp,
+                "current_pnl": current_pnl,
+                "updated_at": datetime.now().isoformat()
+            })\
+            .eq("id", position_id)\
+            .execute()
     
-    async def _exit_position(self, user_id: str, position: Dict, exit_price: float, exit_reason: str):
-        """Exit position and calculate P&L"""
+    async def _exit_position(self, user_id: str, position: Dict, exit_price: float, exit_reason: str) -> bool:
+        """
+        Exit position and calculate P&L
+        
+        Only an OPEN row is closed, so a manual close racing the exit monitor
+        (or another worker) closes the position once.
+        
+        Returns:
+            True if this call closed the position
+        """
         try:
             entry_price = float(position["entry_price"])
             quantity = position["quantity"]
@@ -524,11 +513,13 @@ class PaperTradingService:
             total_pnl = pnl_per_unit * quantity
             pnl_pct = (pnl_per_unit / entry_price) * 100
             
+            exit_time = datetime.now().isoformat()
+            
             # Update position
-            self.supabase.table("paper_trading_positions")\
+            response = await self.supabase.table("paper_trading_positions")\
                 .update({
                     "exit_price": exit_price,
-                    "exit_time": datetime.now().isoformat(),
+                    "exit_time": exit_time,
                     "exit_reason": exit_reason,
                     "status": "CLOSED",
                     "pnl": total_pnl,
@@ -536,8 +527,13 @@ class PaperTradingService:
                     "updated_at": datetime.now().isoformat()
                 })\
                 .eq("id", position["id"])\
+                .eq("status", "OPEN")\
                 .execute()
             
+            if not response.data:
+                logger.info(f"Position {position['id']} already closed, skipping {exit_reason} exit")
+                return False
+            
             # Log activity
             await self._log_activity(user_id, position["id"], "POSITION_CLOSED", {
                 "exit_reason": exit_reason,
@@ -546,16 +542,23 @@ class PaperTradingService:
                 "pnl_pct": pnl_pct
             })
             
-            # Update daily performance
-            await self._update_daily_performance(user_id)
+            # Update daily performance (running aggregates, persisted write-behind)
+            try:
+                await self.performance.record_close(
+                    user_id, {**position, "pnl": total_pnl, "exit_time": exit_time}
+                )
+            except Exception as perf_error:
+                logger.error(f"Error updating daily performance: {perf_error}")
             
             logger.info(
                 f"Position closed: {position['option_symbol']} | "
                 f"{exit_reason} | P&L: ₹{total_pnl:.2f} ({pnl_pct:.2f}%)"
             )
+            return True
         
         except Exception as e:
             logger.error(f"Error exiting position: {e}")
+            return False
     
     # ==================== ACTIVITY LOGGING ====================
     
@@ -568,124 +571,42 @@ class PaperTradingService:
     ):
         """Log paper trading activity"""
         try:
-            self.supabase.table("paper_trading_activity_log")\
-                .insert({
-                    "user_id": user_id,
-                    "position_id": position_id,
-                    "activity_type": activity_type,
-                    "details": details,
-                    "timestamp": datetime.now().isoformat()
-                })\
-                .execute()
+            get_write_behind_queue().enqueue("paper_trading_activity_log", {
+                "user_id": user_id,
+                "position_id": position_id,
+                "activity_type": activity_type,
+                "details": details,
+                "timestamp": datetime.now().isoformat()
+            })
         except Exception as e:
             logger.error(f"Error logging activity: {e}")
     
     async def _update_daily_performance(self, user_id: str):
-        """Update daily performance summary"""
+        """Recompute today's performance summary from the closed positions (consistency rebuild)"""
         try:
-            today = datetime.now().date()
-            
-            # Get today's closed positions
-            response = self.supabase.table("paper_trading_positions")\
-                .select("*")\
-                .eq("user_id", user_id)\
-                .eq("status", "CLOSED")\
-                .gte("exit_time", today.isoformat())\
-                .execute()
-            
-            if not response.data:
-                return
-            
-            positions = response.data
-            total_trades = len(positions)
-            winning_trades = len([p for p in positions if p["pnl"] > 0])
-            losing_trades = len([p for p in positions if p["pnl"] < 0])
-            breakeven_trades = len([p for p in positions if p["pnl"] == 0])
-            win_rate = (winning_trades / total_trades * 100) if total_trades > 0 else 0
-            
-            total_pnl = sum(float(p["pnl"]) for p in positions)
-            
-            winning_positions = [p for p in positions if p["pnl"] > 0]
-            losing_positions = [p for p in positions if p["pnl"] < 0]
-            
-            avg_win = (sum(float(p["pnl"]) for p in winning_positions) / len(winning_positions)) if winning_positions else 0
-            avg_loss = (sum(float(p["pnl"]) for p in losing_positions) / len(losing_positions)) if losing_positions else 0
-            
-            max_win = max([float(p["pnl"]) for p in winning_positions]) if winning_positions else 0
-            max_loss = min([float(p["pnl"]) for p in losing_positions]) if losing_positions else 0
-            
-            # Calculate profit factor
-            gross_profit = sum(float(p["pnl"]) for p in winning_positions)
-            gross_loss = abs(sum(float(p["pnl"]) for p in losing_positions))
-            profit_factor = (gross_profit / gross_loss) if gross_loss > 0 else None
-            
-            # Calculate average trade duration
-            durations = []
-            for p in positions:
-                if p.get("exit_time") and p.get("entry_time"):
-                    entry = datetime.fromisoformat(p["entry_time"])
-                    exit = datetime.fromisoformat(p["exit_time"])
-                    duration_minutes = (exit - entry).total_seconds() / 60
-                    durations.append(duration_minutes)
-            
-            avg_duration = int(sum(durations) / len(durations)) if durations else 0
-            
-            # Update or insert performance summary
-            performance_data = {
-                "user_id": user_id,
-                "date": today.isoformat(),
-                "total_trades": total_trades,
-                "winning_trades": winning_trades,
-                "losing_trades": losing_trades,
-                "breakeven_trades": breakeven_trades,
-                "win_rate": win_rate,
-                "total_pnl": total_pnl,
-                "avg_win": avg_win,
-                "avg_loss": avg_loss,
-                "max_win": max_win,
-                "max_loss": max_loss,
-                "profit_factor": profit_factor,
-                "avg_trade_duration_minutes": avg_duration,
-                "updated_at": datetime.now().isoformat()
-            }
-            
-            # Try upsert (update if exists, insert if not)
-            try:
-                self.supabase.table("paper_trading_performance")\
-                    .upsert(performance_data, on_conflict="user_id,date")\
-                    .execute()
-            except:
-                # If upsert fails, try delete and insert
-                self.supabase.table("paper_trading_performance")\
-                    .delete()\
-                    .eq("user_id", user_id)\
-                    .eq("date", today.isoformat())\
-                    .execute()
-                
-                self.supabase.table("paper_trading_performance")\
-                    .insert(performance_data)\
-                    .execute()
-        
+            await self.performance.rebuild(user_id)
         except Exception as e:
             logger.error(f"Error updating daily performance: {e}")
     
     # ==================== AUTOMATED SCANNER ====================
     
     async def start_automated_trading(self, user_id: str) -> Dict:
-        """Start automated paper trading scanner"""
+        """Start automated paper trading (subscribe the user to the shared engine)"""
         try:
-            if user_id in self.active_scanners:
+            if user_id in self.engine.subscriptions:
                 return {"status": "error", "message": "Scanner already running"}
             
             config = await self.get_user_config(user_id)
             if not config or not config.get("enabled"):
                 return {"status": "error", "message": "Paper trading not enabled"}
             
-            # Start background task
-            task = asyncio.create_task(self._scanner_loop(user_id, config))
-            self.active_scanners[user_id] = task
+            subscription = self.engine.subscribe(user_id, config)
             
-            logger.info(f"Started automated trading for user {user_id}")
+            logger.info(
+                f"Started automated trading for user {user_id}: "
+                f"{subscription.indices} every {subscription.interval_minutes} mins, "
+                f"max {subscription.max_positions} positions, min confidence {subscription.min_confidence}%"
+            )
             return {"status": "success", "message": "Automated trading started"}
         
         except Exception as e:
@@ -693,15 +614,11 @@ class PaperTradingService:
             return {"status": "error", "message": str(e)}
     
     async def stop_automated_trading(self, user_id: str) -> Dict:
-        """Stop automated paper trading scanner"""
+        """Stop automated paper trading"""
         try:
-            if user_id not in self.active_scanners:
+            if not self.engine.unsubscribe(user_id):
                 return {"status": "error", "message": "Scanner not running"}
             
-            task = self.active_scanners[user_id]
-            task.cancel()
-            del self.active_scanners[user_id]
-            
             logger.info(f"Stopped automated trading for user {user_id}")
             return {"status": "success", "message": "Automated trading stopped"}
         
@@ -709,102 +626,12 @@ class PaperTradingService:
             logger.error(f"Error stopping automated trading: {e}")
             return {"status": "error", "message": str(e)}
     
-    async def _scanner_loop(self, user_id: str, config: Dict):
-        """Main scanner loop"""
-        try:
-            indices = config.get("indices", ["NIFTY"])
-            scan_interval = config.get("scan_interval_minutes", 5)
-            max_positions = config.get("max_positions", 3)
-            min_confidence = float(config.get("min_confidence", 65))
-            
-            logger.info(f"Scanner loop started for user {user_id}")
-            logger.info(f"  Indices: {indices}")
-            logger.info(f"  Scan interval: {scan_interval} mins")
-            logger.info(f"  Max positions: {max_positions}")
-            logger.info(f"  Min confidence: {min_confidence}%")
-            
-            while True:
-                # Check if market is open
-                if not is_market_open():
-                    logger.info("Market closed, pausing scanner")
-                    await asyncio.sleep(60)  # Check every minute
-                    continue
-                
-                # 1. Monitor existing positions (every loop iteration)
-                await self.monitor_positions(user_id)
-                
-                # 2. Check if we can take new positions
-                open_positions_count = await self._count_open_positions(user_id)
-                
-                if open_positions_count < max_positions:
-                    # 3. Scan for signals
-                    for index in indices:
-                        try:
-                            logger.info(f"Scanning {index}...")
-                            
-                            # Generate signal
-                            signal = await self.generate_signal(index, user_id)
-                            
-                            if signal and signal.get("action") in ["BUY CALL", "BUY PUT"]:
-                                confidence = signal.get("confidence", {}).get("score", 0)
-                                
-                                if confidence >= min_confidence:
-                                    logger.info(
-                                        f"Signal generated: {signal['action']} | "
-                                        f"Confidence: {confidence}%"
-                                    )
-                                    
-                                    # Save signal
-                                    saved_signal = await self.save_signal(user_id, signal)
-                                    
-                                    if saved_signal:
-                                        # Execute order
-                                        execution_result = await self.execute_order(
-                                            saved_signal["id"],
-                                            user_id,
-                                            action="BUY"
-                                        )
-                                        
-                                        logger.info(
-                                            f"Order execution result: "
-                                            f"{execution_result.get('message')}"
-                                        )
-                                        
-                                        # Update open positions count
-                                        open_positions_count = await self._count_open_positions(user_id)
-                                        
-                                        # Stop scanning if max positions reached
-                                        if open_positions_count >= max_positions:
-                                            break
-                                else:
-                                    logger.info(
-                                        f"Signal confidence too low: "
-                                        f"{confidence}% < {min_confidence}%"
-                                    )
-                            else:
-                                action = signal.get("action") if signal else "None"
-                                logger.info(f"No actionable signal for {index}: {action}")
-                        
-                        except Exception as scan_error:
-                            logger.error(f"Error scanning {index}: {scan_error}")
-                
-                # Wait for next scan
-                logger.info(f"Waiting {scan_interval} minutes until next scan...")
-                await asyncio.sleep(scan_interval * 60)
-        
-        except asyncio.CancelledError:
-            logger.info(f"Scanner loop cancelled for user {user_id}")
-        except Exception as e:
-            logger.error(f"Scanner loop error: {e}")
-            await self._log_activity(user_id, None, "ERROR", {
-                "error": str(e),
-                "context": "Scanner loop"
-            })
-    
     async def _count_open_positions(self, user_id: str) -> int:
-        """Count number of open positions"""
+        """Count number of open positions (from the exit monitor once it has loaded them)"""
+        if self.exit_monitor.loaded:
+            return len(self.exit_monitor.open_positions(user_id))
         try:
-            response = self.supabase.table("paper_trading_positions")\
+            response = await self.supabase.table("paper_trading_positions")\
                 .select("id", count="exact")\
                 .eq("user_id", user_id)\
                 .eq("status", "OPEN")\
@@ -820,7 +647,7 @@ class PaperTradingService:
         """Manually close a position"""
         try:
             # Get position
-            response = self.supabase.table("paper_trading_positions")\
+            response = await self.supabase.table("paper_trading_positions")\
                 .select("*")\
                 .eq("id", position_id)\
                 .eq("user_id", user_id)\
@@ -841,7 +668,10 @@ class PaperTradingService:
                 current_ltp = float(position["entry_price"])
             
             # Close position
-            await self._exit_position(user_id, position, current_ltp, "MANUAL")
+            closed = await self._exit_position(user_id, position, current_ltp, "MANUAL")
+            self.exit_monitor.forget(position_id)
+            if not closed:
+                return {"status": "error", "message": "Position not found or already closed"}
             
             return {
                 "status": "success",
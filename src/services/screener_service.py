@@ -1,7 +1,7 @@
 """
 Screener Service - Handles saving screener results to database
 """
-from config.supabase_config import supabase, supabase_admin
+from config.supabase_config import async_supabase, async_supabase_admin
 from src.models.auth_models import ScreenerResultModel, ScreenerScanModel
 from fastapi import HTTPException
 from datetime import datetime
@@ -11,6 +11,7 @@ import uuid
 
 # IST timezone utilities for consistent timestamps
 from src.utils.ist_utils import ist_timestamp
+from src.services.write_behind import get_write_behind_queue
 
 logger = logging.getLogger(__name__)
 
@@ -19,8 +20,8 @@ class ScreenerService:
     """Handle screener database operations"""
     
     def __init__(self):
-        self.supabase = supabase
-        self.supabase_admin = supabase_admin  # Use admin client to bypass RLS
+        self.supabase = async_supabase
+        self.supabase_admin = async_supabase_admin  # Use admin client to bypass RLS
     
     async def save_scan_results(
         self,
@@ -51,7 +52,7 @@ class ScreenerService:
             }
             
             # Use admin client to bypass RLS
-            self.supabase_admin.table("screener_scans").insert(scan_record).execute()
+            await self.supabase_admin.table("screener_scans").insert(scan_record).execute()
             
             # Save individual signals
             all_signals = []
@@ -68,7 +69,7 @@ class ScreenerService:
             
             # Batch insert signals using admin client to bypass RLS
             if all_signals:
-                insert_response = self.supabase_admin.table("screener_results").insert(all_signals).execute()
+                insert_response = await self.supabase_admin.table("screener_results").insert(all_signals).execute()
                 logger.info(f"✅ Inserted {len(all_signals)} signals to screener_results table")
                 logger.info(f"   User ID: {user_id}, Scan ID: {scan_id}")
                 logger.info(f"   First signal: {all_signals[0]['symbol']} - {all_signals[0]['action']}")
@@ -128,7 +129,7 @@ class ScreenerService:
                 # Use jsonb contains operator to filter metadata
                 query = query.contains("metadata", {"index": index.upper()})
             
-            usage_response = query.order("created_at", desc=True)\
+            usage_response = await query.order("created_at", desc=True)\
                 .limit(1)\
                 .execute()
             
@@ -156,7 +157,7 @@ class ScreenerService:
         """Get latest scan results for user from screener_scans table (legacy)"""
         try:
             # Get latest scan metadata
-            scan_response = self.supabase.table("screener_scans")\
+            scan_response = await self.supabase.table("screener_scans")\
                 .select("*")\
                 .eq("user_id", user_id)\
                 .order("scan_time", desc=True)\
@@ -170,7 +171,7 @@ class ScreenerService:
             scan_id = scan["scan_id"]
             
             # Get signals for this scan
-            signals_response = self.supabase.table("screener_results")\
+            signals_response = await self.supabase.table("screener_results")\
                 .select("*")\
                 .eq("user_id", user_id)\
                 .eq("scan_id", scan_id)\
@@ -208,7 +209,7 @@ class ScreenerService:
     async def get_scan_history(self, user_id: str, limit: int = 10) -> list:
         """Get scan history for user"""
         try:
-            response = self.supabase.table("screener_scans")\
+            response = await self.supabase.table("screener_scans")\
                 .select("*")\
                 .eq("user_id", user_id)\
                 .order("scan_time", desc=True)\
@@ -230,7 +231,7 @@ class ScreenerService:
             time_threshold = (datetime.now(timezone.utc) - timedelta(hours=hours)).isoformat()
             
             # Get recent signals
-            response = self.supabase.table("screener_results")\
+            response = await self.supabase.table("screener_results")\
                 .select("*")\
                 .eq("user_id", user_id)\
                 .gte("scanned_at", time_threshold)\
@@ -317,7 +318,7 @@ class ScreenerService:
             time_threshold = (datetime.now(timezone.utc) - timedelta(hours=hours)).isoformat()
             
             # Get recent options signals
-            response = self.supabase.table("screener_results")\
+            response = await self.supabase.table("screener_results")\
                 .select("*")\
                 .eq("user_id", user_id)\
                 .eq("signal_type", "OPTIONS")\
@@ -450,10 +451,11 @@ class ScreenerService:
                 "timestamp": signal_data.get("timestamp") or ist_timestamp()
             }
             
-            # Insert using admin client to bypass RLS
-            self.supabase_admin.table("option_scanner_results").insert(record).execute()
+            # Queued for a batched insert with the admin client (bypasses RLS);
+            # the id is generated here so callers can link to it right away
+            get_write_behind_queue().enqueue("option_scanner_results", record)
             
-            logger.info(f"✅ Saved option scanner result: {index_name} {record['action']} {record['strike']} {record['option_type']} (ID: {signal_id})")
+            logger.info(f"✅ Queued option scanner result: {index_name} {record['action']} {record['strike']} {record['option_type']} (ID: {signal_id})")
             
             return {
                 "signal_id": signal_id,
@@ -478,7 +480,7 @@ class ScreenerService:
             if index:
                 query = query.eq("index", index.upper())
             
-            response = query.order("timestamp", desc=True).limit(1).execute()
+            response = await query.order("timestamp", desc=True).limit(1).execute()
             
             if not response.data:
                 return None
@@ -525,7 +527,7 @@ class ScreenerService:
             if index:
                 query = query.eq("index", index.upper())
             
-            response = query.order("timestamp", desc=True).limit(limit).execute()
+            response = await query.order("timestamp", desc=True).limit(limit).execute()
             
             return response.data if response.data else []
             
@@ -662,12 +664,12 @@ class ScreenerService:
                 
                 records.append(record)
             
-            # Batch insert all records
+            # Batch insert all records (write-behind, off the request path)
             if records:
-                self.supabase_admin.table("option_scan_opportunities").insert(records).execute()
+                get_write_behind_queue().enqueue("option_scan_opportunities", records)
                 saved_count = len(records)
             
-            logger.info(f"✅ Saved {saved_count} scan opportunities for {index} (scan_id: {scan_id[:8]}...)")
+            logger.info(f"✅ Queued {saved_count} scan opportunities for {index} (scan_id: {scan_id[:8]}...)")
             
             return {
                 "saved": True,
@@ -716,7 +718,7 @@ class ScreenerService:
             if min_score > 0:
                 query = query.gte("score", min_score)
             
-            response = query.order("scanned_at", desc=True).order("rank", desc=False).limit(limit).execute()
+            response = await query.order("scanned_at", desc=True).order("rank", desc=False).limit(limit).execute()
             
             return response.data if response.data else []
             
@@ -739,7 +741,7 @@ class ScreenerService:
             if index:
                 query = query.eq("index", index.upper())
             
-            response = query.order("scanned_at", desc=True).limit(1).execute()
+            response = await query.order("scanned_at", desc=True).limit(1).execute()
             
             if not response.data:
                 return []
@@ -0,0 +1,117 @@
+"""
+Signal Pipelines
+In-process entry points to the actionable-signal and options-scan pipelines
+
+The pipelines live in main.py next to the caches, analyzers and Fyers client
+they use; main.py registers them here when it is imported. Internal
+consumers (paper trading engine, AI tools) call them directly instead of
+going back through HTTP on localhost, which serialized every result twice
+and could block a single-worker deployment on its own request.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+ACTIONABLE_SIGNAL = "actionable_signal"
+OPTIONS_SCAN = "options_scan"
+
+_pipelines: Dict[str, Callable[..., Awaitable[Dict[str, Any]]]] = {}
+
+
+class PipelineUnavailable(RuntimeError):
+    """Raised when a pipeline is called before main.py registered it"""
+
+
+@dataclass
+class PipelineResult:
+    """Outcome of a pipeline call (the endpoint's response body, or its error)"""
+    success: bool
+    data: Optional[Dict[str, Any]] = None
+    status_code: int = 200
+    error: Optional[str] = None
+
+
+def register_pipeline(name: str):
+    """Decorator: expose an endpoint function as an in-process pipeline (returns it unchanged)"""
+    def decorator(func):
+        _pipelines[name] = func
+        return func
+    return decorator
+
+
+async def _run(name: str, **kwargs) -> PipelineResult:
+    func = _pipelines.get(name)
+    if func is None:
+        raise PipelineUnavailable(f"{name} pipeline is not registered (main.py not loaded)")
+
+    try:
+        data = await func(**kwargs)
+    except HTTPException as e:
+        return PipelineResult(success=False, status_code=e.status_code, error=str(e.detail))
+    except Exception as e:
+        logger.error(f"❌ {name} pipeline error: {e}")
+        return PipelineResult(success=False, status_code=500, error=str(e))
+    return PipelineResult(success=True, data=data)
+
+
+async def get_actionable_signal(
+    index: str,
+    quick_mode: bool = True,
+    expiry: str = "weekly",
+    authorization: Optional[str] = None
+) -> PipelineResult:
+    """
+    Actionable trading signal for an index (same as GET /signals/{index}/actionable)
+
+    Args:
+        index: Index name or full symbol
+        quick_mode: Skip the constituent stock analysis
+        expiry: weekly, next_weekly, monthly, or YYYY-MM-DD
+        authorization: Bearer token; loads that user's Fyers token when given
+    """
+    return await _run(
+        ACTIONABLE_SIGNAL,
+        symbol=index,
+        quick_mode=quick_mode,
+        expiry=expiry,
+        authorization=authorization
+    )
+
+
+async def scan_options(
+    index: str,
+    authorization: str,
+    expiry: str = "weekly",
+    quick_scan: bool = True,
+    min_volume: int = 1000,
+    min_oi: int = 10000,
+    strategy: str = "all",
+    include_probability: bool = True,
+    analysis_mode: str = "auto"
+) -> PipelineResult:
+    """
+    Options scan for an index (same as GET /options/scan, including the credit check)
+
+    Args:
+        index: NIFTY, BANKNIFTY, FINNIFTY, ...
+        authorization: Bearer token of the user being charged
+        expiry: weekly or monthly
+        quick_scan: Skip the constituent stock analysis
+    """
+    return await _run(
+        OPTIONS_SCAN,
+        index=index,
+        expiry=expiry,
+        min_volume=min_volume,
+        min_oi=min_oi,
+        strategy=strategy,
+        quick_scan=quick_scan,
+        include_probability=include_probability,
+        analysis_mode=analysis_mode,
+        authorization=authorization
+    )
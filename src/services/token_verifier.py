@@ -0,0 +1,127 @@
+"""
+Token Verifier - Local verification of Supabase access tokens
+
+Supabase access tokens are JWTs signed either with the project's JWT
+secret (HS256) or with an asymmetric signing key published at
+<SUPABASE_URL>/auth/v1/.well-known/jwks.json (RS256/ES256). Checking the
+signature, expiry and audience here avoids a Supabase Auth round trip
+per authenticated request.
+"""
+import hashlib
+import logging
+import time
+from typing import Dict, Optional
+
+import jwt
+
+from src.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+# Seconds a signing key fetched from the JWKS endpoint is trusted before refetching
+JWKS_CACHE_SECONDS = 3600
+
+# Clock skew tolerated on exp / iat
+CLOCK_LEEWAY_SECONDS = 30
+
+SYMMETRIC_ALGORITHMS = ("HS256",)
+ASYMMETRIC_ALGORITHMS = ("RS256", "ES256")
+
+
+class LocalVerificationUnavailable(Exception):
+    """The token cannot be checked locally (no secret / signing key); verify remotely instead"""
+
+
+class TokenVerifier:
+    """Verify Supabase JWTs and track locally revoked sessions"""
+
+    def __init__(
+        self,
+        supabase_url: Optional[str],
+        jwt_secret: Optional[str] = None,
+        audience: str = "authenticated",
+        leeway: int = CLOCK_LEEWAY_SECONDS
+    ):
+        """
+        Args:
+            supabase_url: Project URL (for the JWKS endpoint)
+            jwt_secret: Project JWT secret for HS256 tokens (optional)
+            audience: Expected "aud" claim
+            leeway: Clock skew tolerated, in seconds
+        """
+        self.jwt_secret = jwt_secret
+        self.audience = audience
+        self.leeway = leeway
+        self._jwks_client = None
+        if supabase_url:
+            self._jwks_client = jwt.PyJWKClient(
+                f"{supabase_url.rstrip('/')}/auth/v1/.well-known/jwks.json",
+                cache_keys=True,
+                lifespan=JWKS_CACHE_SECONDS
+            )
+        # Sessions logged out in this process, kept until their tokens expire
+        self._revoked = TTLCache(ttl_seconds=3600, max_entries=10000)
+
+    def verify(self, token: str) -> Dict:
+        """
+        Check signature, expiry and audience
+
+        Returns:
+            Token claims ("sub" is the user id)
+
+        Raises:
+            jwt.InvalidTokenError: Token is invalid, expired or revoked
+            LocalVerificationUnavailable: No key to check this token with
+        """
+        header = jwt.get_unverified_header(token)
+        algorithm = header.get("alg")
+
+        if algorithm in SYMMETRIC_ALGORITHMS:
+            if not self.jwt_secret:
+                raise LocalVerificationUnavailable("SUPABASE_JWT_SECRET not configured")
+            key = self.jwt_secret
+        elif algorithm in ASYMMETRIC_ALGORITHMS:
+            if self._jwks_client is None:
+                raise LocalVerificationUnavailable("Supabase URL not configured")
+            try:
+                key = self._jwks_client.get_signing_key_from_jwt(token).key
+            except jwt.PyJWKClientError as e:
+                raise LocalVerificationUnavailable(f"Signing key unavailable: {e}")
+        else:
+            raise jwt.InvalidAlgorithmError(f"Unsupported token algorithm: {algorithm}")
+
+        claims = jwt.decode(
+            token,
+            key,
+            algorithms=[algorithm],
+            audience=self.audience,
+            leeway=self.leeway,
+            options={"require": ["exp", "sub"]}
+        )
+        if self._session_key(token, claims) in self._revoked:
+            raise jwt.InvalidTokenError("Session has been logged out")
+        return claims
+
+    def revoke(self, token: str) -> Optional[str]:
+        """
+        Reject this token's session locally until the token expires
+
+        Returns:
+            User id of the token, or None if it could not be decoded
+        """
+        try:
+            claims = jwt.decode(token, options={"verify_signature": False})
+        except jwt.InvalidTokenError:
+            return None
+        remaining = claims.get("exp", 0) - time.time() + self.leeway
+        if remaining > 0:
+            self._revoked.set(self._session_key(token, claims), True, ttl_seconds=remaining)
+        return claims.get("sub")
+
+    @staticmethod
+    def _session_key(token: str, claims: Dict) -> str:
+        session_id = claims.get("session_id")
+        if session_id:
+            return f"session:{session_id}"
+        return "token:" + hashlib.sha256(token.encode()).hexdigest()
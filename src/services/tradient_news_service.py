@@ -20,7 +20,7 @@ from datetime import datetime, timedelta, timezone
 from dataclasses import dataclass, field
 import asyncio
 
-from config.supabase_config import get_supabase_admin_client
+from config.supabase_config import async_supabase_admin
 
 logger = logging.getLogger(__name__)
 
@@ -102,7 +102,7 @@ class TradientNewsService:
     def __init__(self, marketaux_api_key: Optional[str] = None):
         """Initialize with optional Marketaux fallback key"""
         self.marketaux_api_key = marketaux_api_key or os.getenv("MARKETAUX_API_KEY")
-        self.supabase = get_supabase_admin_client()
+        self.supabase = async_supabase_admin
         self._last_fetch_time = None
         self._consecutive_failures = 0
         self._using_fallback = False
@@ -447,7 +447,7 @@ class TradientNewsService:
                 }
                 
                 # Upsert to avoid duplicates
-                self.supabase.table("market_news").upsert(
+                await self.supabase.table("market_news").upsert(
                     data,
                     on_conflict="article_uuid"
                 ).execute()
@@ -463,7 +463,7 @@ class TradientNewsService:
     async def _log_fetch(self, articles_count: int, status_code: int, error: Optional[str], source: str):
         """Log the fetch attempt"""
         try:
-            self.supabase.table("news_fetch_log").insert({
+            await self.supabase.table("news_fetch_log").insert({
                 "articles_fetched": articles_count,
                 "api_response_code": status_code,
                 "error_message": error,
@@ -490,7 +490,7 @@ class TradientNewsService:
                 window_start = now - window_delta
                 
                 # Get articles in this window
-                response = self.supabase.table("market_news").select("*").gte(
+                response = await self.supabase.table("market_news").select("*").gte(
                     "published_at", window_start.isoformat()
                 ).lte("published_at", now.isoformat()).execute()
                 
@@ -573,11 +573,11 @@ class TradientNewsService:
                 }
                 
                 # Delete old cache for this window and insert new
-                self.supabase.table("market_sentiment_cache").delete().eq(
+                await self.supabase.table("market_sentiment_cache").delete().eq(
                     "time_window", window_name
                 ).execute()
                 
-                self.supabase.table("market_sentiment_cache").insert(cache_data).execute()
+                await self.supabase.table("market_sentiment_cache").insert(cache_data).execute()
                 
             logger.info("✅ Sentiment cache updated")
             
@@ -651,7 +651,7 @@ class TradientNewsService:
                 "published_at", cutoff.isoformat()
             ).gte("relevance_score", min_relevance).order("published_at", desc=True).limit(limit * 2)
             
-            response = query.execute()
+            response = await query.execute()
             articles = response.data or []
             
             # Filter by indices if specified
@@ -700,7 +700,7 @@ class TradientNewsService:
                 # Filter by category in keywords
                 pass  # Supabase array filtering is complex, handle in Python
             
-            response = query.execute()
+            response = await query.execute()
             articles = response.data or []
             
             # Apply filters in Python
@@ -730,7 +730,7 @@ class TradientNewsService:
             Cached sentiment data or None
         """
         try:
-            response = self.supabase.table("market_sentiment_cache").select("*").eq(
+            response = await self.supabase.table("market_sentiment_cache").select("*").eq(
                 "time_window", time_window
             ).order("computed_at", desc=True).limit(1).execute()
             
@@ -0,0 +1,435 @@
+"""
+Write-Behind Queue
+Buffers fire-and-forget Supabase writes (activity logs, usage logs, scan
+persistence) and flushes them in batches off the request path
+
+- Rows are buffered per (table, on_conflict) and written as one bulk
+  insert/upsert when a buffer reaches batch_size or every flush_interval
+- Rows are snapshotted to plain JSON on enqueue, so later mutation of the
+  caller's dicts (or NumPy scalars in them) cannot affect what is written
+- Upserts are coalesced on their conflict columns (last row wins), same
+  result as running them one by one
+- Failed batches are retried with backoff, then appended to a bounded
+  per-process JSONL spill file which is replayed once the database is
+  reachable again (any process may replay any spill file; files are claimed
+  with an atomic rename)
+- A batch rejected for its content (constraint / 4xx errors) is retried row
+  by row, so one bad row cannot hold back the rest; rows the database
+  rejects on their own go to a dead-letter file and are never retried
+- Without a running flush loop (scripts, tests) enqueue writes inline,
+  without retry sleeps when called from an event loop
+"""
+
+import asyncio
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_SPILL_DIR = os.path.join(os.path.dirname(__file__), '../../data/write_behind')
+
+# Spill files in the spill directory, one per process (spill-<pid>.jsonl by default)
+SPILL_FILE_PATTERN = "spill*.jsonl"
+
+# Seconds to wait before replaying the spill file again after a failed replay
+SPILL_REPLAY_BACKOFF_SECONDS = 60
+
+# Failed batches in a row after which a replay assumes the database is down
+SPILL_REPLAY_MAX_FAILURES = 3
+
+# PostgREST / Postgres error codes for requests that will fail the same way
+# again: data exceptions (22), integrity constraints (23), undefined objects
+# (42), PostgREST request and schema errors (PGRST1xx / PGRST2xx)
+PERMANENT_ERROR_PREFIXES = ("22", "23", "42", "PGRST1", "PGRST2")
+
+
+def is_permanent_error(error: Exception) -> bool:
+    """True if the database rejected the request itself (retrying cannot help)"""
+    code = getattr(error, "code", None)
+    if isinstance(code, str) and code.startswith(PERMANENT_ERROR_PREFIXES):
+        return True
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    return isinstance(status, int) and 400 <= status < 500 and status not in (408, 429)
+
+
+def _json_default(value):
+    """JSON encoding for NumPy scalars/arrays, dates and Decimals"""
+    if hasattr(value, "item") and not isinstance(value, (list, dict)):
+        try:
+            return value.item()
+        except (TypeError, ValueError):
+            pass
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def snapshot_rows(rows: Union[Dict, List[Dict]]) -> List[Dict]:
+    """Deep copy rows as plain JSON types"""
+    if isinstance(rows, dict):
+        rows = [rows]
+    return json.loads(json.dumps(rows, default=_json_default))
+
+
+class WriteBehindQueue:
+    """Batched, retried, spill-to-disk background writes"""
+
+    def __init__(
+        self,
+        client=None,
+        batch_size: int = 200,
+        flush_interval: float = 2.0,
+        max_retries: int = 3,
+        retry_backoff: float = 0.5,
+        spill_path: Optional[str] = None,
+        max_spill_bytes: int = 50 * 2**20,
+        dead_letter_path: Optional[str] = None
+    ):
+        """
+        Args:
+            client: Supabase client (default: service-role admin client)
+            batch_size: Buffered rows per table that trigger an early flush
+            flush_interval: Seconds between background flushes
+            max_retries: Write attempts per batch before spilling to disk
+            retry_backoff: Base delay between attempts (doubles each retry)
+            spill_path: This process's JSONL file for batches the database did
+                not accept (default: spill-<pid>.jsonl in data/write_behind);
+                replay reads every spill*.jsonl file in the same directory
+            max_spill_bytes: Spill / dead-letter file size cap; rows beyond it are dropped
+            dead_letter_path: JSONL file for rows the database rejected
+                (default: dead_letter-<pid>.jsonl next to the spill file)
+        """
+        self._client = client
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.spill_path = spill_path or os.path.join(DEFAULT_SPILL_DIR, f"spill-{os.getpid()}.jsonl")
+        self.dead_letter_path = dead_letter_path or os.path.join(
+            os.path.dirname(self.spill_path) or ".", f"dead_letter-{os.getpid()}.jsonl"
+        )
+        self.max_spill_bytes = max_spill_bytes
+
+        self._buffers: "OrderedDict[Tuple[str, Optional[str]], List[Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._next_replay_at = 0.0
+        self.stats = {"enqueued": 0, "written": 0, "batches": 0, "retries": 0, "spilled": 0, "replayed": 0, "dead_lettered": 0, "dropped": 0}
+
+    @property
+    def client(self):
+        if self._client is None:
+            from config.supabase_config import supabase_admin
+            self._client = supabase_admin
+        return self._client
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    # ==================== PRODUCERS ====================
+
+    def enqueue(self, table: str, rows: Union[Dict, List[Dict]], on_conflict: Optional[str] = None):
+        """
+        Queue rows for a bulk insert (or upsert when on_conflict is given)
+
+        Never raises for database problems; returns as soon as the rows are buffered.
+        """
+        rows = snapshot_rows(rows)
+        if not rows:
+            return
+
+        if not self.running:
+            # Never sleep between retries on an event loop thread
+            self._write_or_spill(table, rows, on_conflict, backoff=not _on_event_loop())
+            return
+
+        with self._lock:
+            buffer = self._buffers.setdefault((table, on_conflict), [])
+            buffer.extend(rows)
+            self.stats["enqueued"] += len(rows)
+            full = len(buffer) >= self.batch_size
+        if full:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    # ==================== LIFECYCLE ====================
+
+    async def start(self):
+        """Start the background flush loop (idempotent)"""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"📝 Write-behind queue started (batch {self.batch_size}, every {self.flush_interval}s)")
+
+    async def stop(self):
+        """Stop the loop and flush everything still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        logger.info(f"📝 Write-behind queue stopped: {self.stats}")
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                if (
+                    await self.flush()
+                    and self._spill_files()
+                    and time.monotonic() >= self._next_replay_at
+                ):
+                    await asyncio.to_thread(self.replay_spill)
+            except Exception as e:
+                logger.error(f"❌ Write-behind flush error: {e}")
+
+    # ==================== WRITES ====================
+
+    async def flush(self) -> bool:
+        """
+        Write every buffered batch
+
+        Returns:
+            True if all batches were written (none spilled)
+        """
+        with self._lock:
+            batches = list(self._buffers.items())
+            self._buffers.clear()
+
+        all_written = True
+        for (table, on_conflict), rows in batches:
+            for start in range(0, len(rows), self.batch_size):
+                written = await asyncio.to_thread(
+                    self._write_or_spill, table, rows[start:start + self.batch_size], on_conflict
+                )
+                all_written = all_written and written
+        return all_written
+
+    def _write_or_spill(self, table: str, rows: List[Dict], on_conflict: Optional[str], backoff: bool = True) -> bool:
+        """
+        Write rows; spill what could not be written right now
+
+        Returns:
+            True if nothing was spilled
+        """
+        failed = self._write(table, rows, on_conflict, backoff)
+        if failed:
+            self._spill(self.spill_path, table, failed, on_conflict)
+        return not failed
+
+    def _write(self, table: str, rows: List[Dict], on_conflict: Optional[str], backoff: bool = True) -> List[Dict]:
+        """
+        Bulk write with retries; row by row if the batch was rejected for its content
+
+        Returns:
+            Rows to retry later (transient failures); rejected rows are dead-lettered
+        """
+        if on_conflict:
+            rows = self._coalesce(rows, on_conflict)
+        error = self._attempt(table, rows, on_conflict, self.max_retries if backoff else 1, backoff)
+        if error is None:
+            return []
+        if not is_permanent_error(error):
+            logger.warning(f"⚠️ Write-behind batch for {table} failed ({len(rows)} rows): {error}")
+            return rows
+
+        # One bad row rejects the whole batch: find it, write the rest
+        retry = []
+        for row in rows:
+            row_error = error if len(rows) == 1 else self._attempt(table, [row], on_conflict, 1, False)
+            if row_error is None:
+                continue
+            if is_permanent_error(row_error):
+                self._dead_letter(table, row, on_conflict, row_error)
+            else:
+                retry.append(row)
+        return retry
+
+    def _attempt(self, table: str, rows: List[Dict], on_conflict: Optional[str], attempts: int, backoff: bool) -> Optional[Exception]:
+        """One bulk insert/upsert, retried on transient errors; returns the last error"""
+        error = None
+        for attempt in range(attempts):
+            try:
+                query = self.client.table(table)
+                if on_conflict:
+                    query.upsert(rows, on_conflict=on_conflict).execute()
+                else:
+                    query.insert(rows).execute()
+                self.stats["written"] += len(rows)
+                self.stats["batches"] += 1
+                return None
+            except Exception as e:
+                error = e
+                if is_permanent_error(e):
+                    return e
+                if attempt + 1 < attempts:
+                    self.stats["retries"] += 1
+                    if backoff:
+                        time.sleep(self.retry_backoff * 2 ** attempt)
+        return error
+
+    @staticmethod
+    def _coalesce(rows: List[Dict], on_conflict: str) -> List[Dict]:
+        """One row per conflict key (the last), so a batched upsert never touches a row twice"""
+        columns = [c.strip() for c in on_conflict.split(",")]
+        latest: "OrderedDict[tuple, Dict]" = OrderedDict()
+        for row in rows:
+            key = tuple(row.get(c) for c in columns)
+            latest.pop(key, None)
+            latest[key] = row
+        return list(latest.values())
+
+    # ==================== SPILL / DEAD-LETTER FILES ====================
+
+    def _spill(self, path: str, table: str, rows: List[Dict], on_conflict: Optional[str]):
+        if self._append(path, {"table": table, "on_conflict": on_conflict, "rows": rows}, len(rows)):
+            self.stats["spilled"] += len(rows)
+
+    def _dead_letter(self, table: str, row: Dict, on_conflict: Optional[str], error: Exception):
+        logger.error(f"❌ Write-behind row rejected by {table}, dead-lettered: {error}")
+        record = {"table": table, "on_conflict": on_conflict, "rows": [row], "error": str(error)}
+        if self._append(self.dead_letter_path, record, 1):
+            self.stats["dead_lettered"] += 1
+
+    def _append(self, path: str, record: Dict, count: int) -> bool:
+        line = json.dumps(record) + "\n"
+        with self._spill_lock:
+            try:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                size = os.path.getsize(path) if os.path.exists(path) else 0
+                if size + len(line) > self.max_spill_bytes:
+                    self.stats["dropped"] += count
+                    logger.error(f"❌ Write-behind file {os.path.basename(path)} full, dropped {count} {record['table']} rows")
+                    return False
+                with open(path, "a") as f:
+                    f.write(line)
+                return True
+            except OSError as e:
+                self.stats["dropped"] += count
+                logger.error(f"❌ Could not write {count} {record['table']} rows to {path}: {e}")
+                return False
+
+    def _spill_files(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(os.path.dirname(self.spill_path) or ".", SPILL_FILE_PATTERN)))
+
+    def replay_spill(self) -> int:
+        """
+        Retry batches from every spill file, oldest first
+
+        A batch that fails again is kept and the replay moves on; after
+        SPILL_REPLAY_MAX_FAILURES failures in a row the database is taken to
+        be down and the rest is kept for later. Kept batches go back to this
+        process's spill file, failed ones after the untried ones.
+
+        Returns:
+            Rows written
+        """
+        written = 0
+        failures = 0
+        for path in self._spill_files():
+            # Claim the file; a concurrent replay (this or another process) may win
+            claimed = f"{path}.replaying-{os.getpid()}-{threading.get_ident()}"
+            with self._spill_lock:
+                try:
+                    os.replace(path, claimed)
+                except FileNotFoundError:
+                    continue
+
+            with open(claimed) as f:
+                lines = f.readlines()
+            kept, failed = [], []
+            for i, line in enumerate(lines):
+                if failures >= SPILL_REPLAY_MAX_FAILURES:
+                    kept = lines[i:]
+                    break
+                try:
+                    batch = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                retry = self._write(batch["table"], batch["rows"], batch.get("on_conflict"))
+                written += len(batch["rows"]) - len(retry)
+                if retry:
+                    failures += 1
+                    failed.append(json.dumps({**batch, "rows": retry}) + "\n")
+                else:
+                    failures = 0
+
+            if kept or failed:
+                with self._spill_lock, open(self.spill_path, "a") as spill:
+                    spill.writelines(kept + failed)
+            os.remove(claimed)
+
+        if failures:
+            self._next_replay_at = time.monotonic() + SPILL_REPLAY_BACKOFF_SECONDS
+        self.stats["replayed"] += written
+        if written:
+            logger.info(f"📝 Replayed {written} spilled rows")
+        return written
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            buffered = {table: len(rows) for (table, _), rows in self._buffers.items()}
+        return {
+            "running": self.running,
+            "buffered": buffered,
+            "spill_bytes": sum(os.path.getsize(path) for path in self._spill_files() if os.path.exists(path)),
+            **self.stats
+        }
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+# Global queue instance
+_write_behind_queue: Optional[WriteBehindQueue] = None
+_write_behind_lock = threading.Lock()
+
+
+def get_write_behind_queue() -> WriteBehindQueue:
+    """Get or create the write-behind queue"""
+    global _write_behind_queue
+    with _write_behind_lock:
+        if _write_behind_queue is None:
+            try:
+                from config.settings import settings
+                _write_behind_queue = WriteBehindQueue(
+                    batch_size=settings.write_behind_batch_size,
+                    flush_interval=settings.write_behind_flush_seconds,
+                    max_spill_bytes=settings.write_behind_max_spill_mb * 2**20
+                )
+            except Exception as e:
+                # Standalone scripts run without the API's .env
+                logger.debug(f"Write-behind settings unavailable, using defaults: {e}")
+                _write_behind_queue = WriteBehindQueue()
+        return _write_behind_queue
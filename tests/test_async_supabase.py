@@ -0,0 +1,83 @@
+"""
+Unit tests for the async Supabase clients
+
+Covers:
+- Anon and admin clients share one connection pool per event loop
+- Each event loop gets its own clients
+- Concurrent queries overlap instead of running one after another
+"""
+
+import asyncio
+import os
+import time
+import unittest
+from unittest.mock import patch
+
+import httpx
+
+os.environ.setdefault("SUPABASE_URL", "https://example.supabase.co")
+os.environ.setdefault("SUPABASE_KEY", "test-key")
+
+from config.supabase_config import (  # noqa: E402
+    async_supabase_admin,
+    close_async_supabase_clients,
+    get_async_supabase_admin_client,
+    get_async_supabase_client,
+)
+
+QUERY_LATENCY = 0.2
+_HttpxAsyncClient = httpx.AsyncClient
+
+
+async def _slow_postgrest(request):
+    await asyncio.sleep(QUERY_LATENCY)
+    return httpx.Response(200, json=[{"path": request.url.path}])
+
+
+def _mock_http_client(**kwargs):
+    return _HttpxAsyncClient(transport=httpx.MockTransport(_slow_postgrest), **kwargs)
+
+
+class TestAsyncSupabaseClients(unittest.TestCase):
+
+    def test_clients_share_pool_within_loop(self):
+        async def run():
+            anon, admin = get_async_supabase_client(), get_async_supabase_admin_client()
+            try:
+                return (
+                    anon is get_async_supabase_client(),
+                    anon.postgrest.session is admin.postgrest.session,
+                    admin
+                )
+            finally:
+                await close_async_supabase_clients()
+
+        same_client, shared_pool, first_admin = asyncio.run(run())
+        self.assertTrue(same_client)
+        self.assertTrue(shared_pool)
+
+        async def other_loop():
+            client = get_async_supabase_admin_client()
+            await close_async_supabase_clients()
+            return client
+
+        self.assertIsNot(asyncio.run(other_loop()), first_admin)
+
+    def test_concurrent_queries_overlap(self):
+        async def run():
+            queries = [async_supabase_admin.table(f"t{i}").select("*").execute() for i in range(5)]
+            start = time.perf_counter()
+            responses = await asyncio.gather(*queries)
+            elapsed = time.perf_counter() - start
+            await close_async_supabase_clients()
+            return responses, elapsed
+
+        with patch.object(httpx, "AsyncClient", _mock_http_client):
+            responses, elapsed = asyncio.run(run())
+
+        self.assertEqual([r.data[0]["path"] for r in responses], [f"/rest/v1/t{i}" for i in range(5)])
+        self.assertLess(elapsed, QUERY_LATENCY * 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+"""
+Unit tests for AuthService user caching
+
+Covers:
+- Cache miss with a locally verified token: user built from the claims,
+  only the profile is fetched (no Supabase Auth call)
+- Cache hit: no Supabase calls at all
+- Invalidation and logout
+- Supabase Auth fallback when the token cannot be verified locally
+"""
+
+import asyncio
+import os
+import time
+import unittest
+
+import jwt
+from fastapi import HTTPException
+
+os.environ.setdefault("SUPABASE_URL", "https://example.supabase.co")
+os.environ.setdefault("SUPABASE_KEY", "test-key")
+
+from src.services.auth_service import AuthService  # noqa: E402
+from src.services.token_verifier import TokenVerifier  # noqa: E402
+
+SECRET = "test-secret-with-enough-length-for-hs256"
+
+
+def make_token(**claims):
+    payload = {
+        "sub": "user-1",
+        "email": "trader@example.com",
+        "aud": "authenticated",
+        "exp": int(time.time()) + 3600,
+        "session_id": "session-1",
+        **claims
+    }
+    return jwt.encode(payload, SECRET, algorithm="HS256")
+
+
+class _Response:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeProfiles:
+    """users table: select("*").eq("id", ...).execute()"""
+
+    def __init__(self):
+        self.queries = 0
+
+    def table(self, name):
+        return self
+
+    def select(self, *_):
+        return self
+
+    def eq(self, column, value):
+        self.user_id = value
+        return self
+
+    async def execute(self):
+        self.queries += 1
+        return _Response([{
+            "id": self.user_id, "email": "profile@example.com",
+            "full_name": "Paper Trader", "created_at": "2026-01-05T09:15:00+00:00"
+        }])
+
+
+class _AuthUser:
+    id = "user-1"
+    email = "trader@example.com"
+    created_at = "2026-01-01T00:00:00Z"
+
+
+class FakeAuth:
+    def __init__(self):
+        self.get_user_calls = 0
+
+    async def get_user(self, token):
+        self.get_user_calls += 1
+        return type("UserResponse", (), {"user": _AuthUser()})()
+
+    async def sign_out(self):
+        return None
+
+
+class FakeClient:
+    def __init__(self):
+        self.auth = FakeAuth()
+
+
+class TestAuthServiceUserCache(unittest.TestCase):
+
+    def setUp(self):
+        self.service = AuthService()
+        self.service.token_verifier = TokenVerifier(None, SECRET)
+        self.service.supabase = FakeClient()
+        self.service.supabase_admin = self.profiles = FakeProfiles()
+
+    def get_user(self, token):
+        return asyncio.run(self.service.get_current_user(token))
+
+    def test_miss_builds_user_from_claims(self):
+        user = self.get_user(make_token())
+
+        self.assertEqual(self.service.supabase.auth.get_user_calls, 0)
+        self.assertEqual(self.profiles.queries, 1)
+        self.assertEqual((user.id, user.email, user.full_name), ("user-1", "trader@example.com", "Paper Trader"))
+        self.assertEqual(user.created_at.year, 2026)
+
+    def test_hit_makes_no_calls(self):
+        first = self.get_user(make_token())
+        second = self.get_user(make_token(session_id="session-2"))
+
+        self.assertIs(second, first)
+        self.assertEqual(self.profiles.queries, 1)
+        self.assertEqual(self.service.supabase.auth.get_user_calls, 0)
+
+    def test_invalidate_refetches_profile(self):
+        self.get_user(make_token())
+        self.service.invalidate_user("user-1")
+        self.get_user(make_token())
+        self.assertEqual(self.profiles.queries, 2)
+
+    def test_logout_rejects_session(self):
+        token = make_token()
+        self.get_user(token)
+        asyncio.run(self.service.logout_user(token))
+
+        with self.assertRaises(HTTPException) as ctx:
+            self.get_user(token)
+        self.assertEqual(ctx.exception.status_code, 401)
+        self.assertEqual(self.get_user(make_token(session_id="session-2")).id, "user-1")
+        self.assertEqual(self.profiles.queries, 2)
+
+    def test_unverifiable_token_asks_supabase_auth(self):
+        self.service.token_verifier = TokenVerifier(None, None)
+        user = self.get_user(make_token())
+
+        self.assertEqual(self.service.supabase.auth.get_user_calls, 1)
+        # created_at comes from the auth user, not the profile row
+        self.assertEqual(user.created_at.day, 1)
+        self.get_user(make_token())
+        self.assertEqual(self.service.supabase.auth.get_user_calls, 2)
+        self.assertEqual(self.profiles.queries, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
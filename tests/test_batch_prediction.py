@@ -0,0 +1,105 @@
+"""
+Unit tests for batch ML prediction
+
+Covers:
+- IndexMLOptimizer.predict_batch matches per-item predict()
+- XGBoostDirectionPredictor.predict_batch matches single predictions
+"""
+
+import unittest
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+from src.ml.index_ml_optimizer import IndexMLOptimizer
+from src.ml.streaming_indicators import LiveIndicatorState
+from src.ml.xgboost_direction import XGBoostDirectionPredictor
+
+
+def make_candles(n=400, seed=0, freq="1D"):
+    rng = np.random.default_rng(seed)
+    close = 25000 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    index = pd.date_range("2024-01-01", periods=n, freq=freq, name="timestamp")
+    return pd.DataFrame({
+        "open": close * (1 + rng.normal(0, 0.002, n)),
+        "high": close * (1 + rng.uniform(0, 0.01, n)),
+        "low": close * (1 - rng.uniform(0, 0.01, n)),
+        "close": close,
+        "volume": rng.integers(1000, 5000, n).astype(float)
+    }, index=index)
+
+
+class TestIndexBatchPrediction(unittest.TestCase):
+    """IndexMLOptimizer.predict_batch"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.optimizer = IndexMLOptimizer("random_forest")
+        cls.candles = {"NIFTY": make_candles(seed=1), "BANKNIFTY": make_candles(seed=2)}
+        for name, df in cls.candles.items():
+            cls.optimizer.train(name, df)
+
+    def test_batch_matches_single(self):
+        items = [
+            ("NIFTY", self.candles["NIFTY"]),
+            ("BANKNIFTY", self.candles["BANKNIFTY"]),
+            ("NIFTY", self.candles["NIFTY"].iloc[:300])
+        ]
+        batch = self.optimizer.predict_batch(items)
+        self.assertEqual(len(batch), 3)
+        for (name, df), result in zip(items, batch):
+            single = self.optimizer.predict(name, df)
+            self.assertEqual(result.predicted_direction, single.predicted_direction)
+            self.assertAlmostEqual(result.probability_up, single.probability_up)
+            self.assertAlmostEqual(result.probability_down, single.probability_down)
+            self.assertAlmostEqual(result.confidence, single.confidence)
+
+    def test_untrained_index_returns_none(self):
+        batch = self.optimizer.predict_batch([
+            ("NIFTY", self.candles["NIFTY"]),
+            ("UNKNOWN_INDEX", self.candles["NIFTY"])
+        ])
+        self.assertIsNotNone(batch[0])
+        self.assertIsNone(batch[1])
+
+
+class TestDirectionBatchPrediction(unittest.TestCase):
+    """XGBoostDirectionPredictor.predict_batch"""
+
+    def setUp(self):
+        self.timestamp = datetime(2026, 1, 5, 10, 30)
+        self.states = []
+        for seed in range(3):
+            state = LiveIndicatorState()
+            for _, row in make_candles(120, seed=seed, freq="1h").iterrows():
+                state.update(row.to_dict())
+            self.states.append(state)
+        self.predictor = XGBoostDirectionPredictor()
+
+    def assert_same(self, batch):
+        self.assertEqual(len(batch), len(self.states))
+        for state, result in zip(self.states, batch):
+            single = self.predictor.predict_from_state(state, timestamp=self.timestamp)
+            self.assertEqual(result.direction, single.direction)
+            self.assertAlmostEqual(result.confidence, single.confidence, places=9)
+            self.assertAlmostEqual(result.prob_up, single.prob_up, places=9)
+
+    def test_rule_based_batch(self):
+        self.assert_same(self.predictor.predict_batch_from_states(self.states, timestamp=self.timestamp))
+
+    def test_model_batch(self):
+        features = self.states[0].direction_features()
+        self.predictor._add_context_features(features, self.timestamp, None)
+        names = list(features.keys())
+        rng = np.random.default_rng(0)
+        model = RandomForestClassifier(n_estimators=10, random_state=0)
+        model.fit(rng.normal(size=(200, len(names))), rng.integers(0, 5, 200))
+        self.predictor.model = model
+        self.predictor.feature_names = names
+        self.assert_same(self.predictor.predict_batch_from_states(self.states, timestamp=self.timestamp))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+"""
+Unit tests for the consolidated billing status read
+
+Covers:
+- Status assembled from one get_billing_status RPC call
+- Plan limits served from the config cache
+- Per-table fallback when the SQL function is not deployed
+"""
+
+import asyncio
+import os
+import unittest
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock
+
+os.environ.setdefault("SUPABASE_URL", "https://example.supabase.co")
+os.environ.setdefault("SUPABASE_KEY", "test-key")
+
+from src.services.billing_service import BillingService  # noqa: E402
+
+PLAN_LIMITS = [
+    {"plan_type": "free", "daily_option_scans": 3, "daily_stock_scans": 10},
+    {"plan_type": "medium", "daily_option_scans": 50, "monthly_scan_limit": 30000},
+]
+
+
+def make_service(rpc_data=None, rpc_error=None):
+    """BillingService over a stub Supabase client"""
+    service = BillingService()
+    client = MagicMock()
+    client.rpc.return_value.execute = AsyncMock()
+    if rpc_error is not None:
+        client.rpc.return_value.execute.side_effect = rpc_error
+    else:
+        client.rpc.return_value.execute.return_value = MagicMock(data=rpc_data)
+
+    def table(name):
+        query = MagicMock()
+        query.select.return_value = query
+        query.eq.return_value = query
+        query.maybe_single.return_value = query
+        query.execute = AsyncMock()
+        if name == "plan_limits":
+            query.execute.return_value = MagicMock(data=PLAN_LIMITS)
+        elif name == "user_credits":
+            query.execute.return_value = MagicMock(data={"balance": 42.5})
+        elif name == "usage_logs":
+            query.execute.return_value = MagicMock(data=[{"scan_type": "option_scan", "count": 2}])
+        else:
+            query.execute.return_value = MagicMock(data=None)
+        return query
+
+    client.table.side_effect = table
+    service.supabase = client
+    return service
+
+
+class TestBillingStatus(unittest.TestCase):
+    """BillingService.get_user_billing_status"""
+
+    def test_single_rpc_and_cached_limits(self):
+        service = make_service({
+            "subscription": {"plan_type": "medium", "status": "active", "cancel_at_period_end": False},
+            "credits": {"balance": 12.5},
+            "today_usage": {"option_scan": 4, "stock_scan": 1},
+            "month_usage": {"option_scan": 40, "bulk_scan": 2}
+        })
+
+        for _ in range(3):
+            status = asyncio.run(service.get_user_billing_status("user-1"))
+
+        self.assertEqual(service.supabase.rpc.call_count, 3)
+        # plan_limits read once, nothing else per request
+        self.assertEqual([c.args[0] for c in service.supabase.table.call_args_list], ["plan_limits"])
+        self.assertTrue(status.has_active_subscription)
+        self.assertEqual(status.credits_balance, Decimal("12.5"))
+        self.assertEqual((status.today_usage.option_scans, status.today_usage.stock_scans), (4, 1))
+        self.assertEqual(status.limits.monthly_scan_limit, 30000)
+        self.assertEqual(status.monthly_usage, {"option_scans": 40, "stock_scans": 0, "bulk_scans": 2, "total": 42})
+
+    def test_fallback_when_function_missing(self):
+        service = make_service(rpc_error=Exception("PGRST202: Could not find the function public.get_billing_status"))
+
+        status = asyncio.run(service.get_user_billing_status("user-1"))
+        asyncio.run(service.get_user_billing_status("user-1"))
+
+        self.assertEqual(service.supabase.rpc.call_count, 1)
+        self.assertFalse(service._status_rpc_available)
+        self.assertEqual(status.plan_type, "free")
+        self.assertEqual(status.credits_balance, Decimal("42.5"))
+        self.assertEqual(status.today_usage.option_scans, 2)
+        self.assertIsNone(status.monthly_usage)
+
+
+if __name__ == '__main__':
+    unittest.main()
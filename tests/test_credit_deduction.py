@@ -0,0 +1,138 @@
+"""
+Unit tests for atomic credit deduction
+
+LocalBillingDatabase is an in-process stand-in for the
+deduct_credits_atomic SQL function (same checks and writes, one lock in
+place of the user_credits row lock).
+
+Covers:
+- One RPC call per deduction, usage_logs bumped
+- Insufficient / missing balance results
+- No overdraw under concurrent deductions
+"""
+
+import asyncio
+import os
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+os.environ.setdefault("SUPABASE_URL", "https://example.supabase.co")
+os.environ.setdefault("SUPABASE_KEY", "test-key")
+
+from src.services.billing_service import BillingService  # noqa: E402
+
+USAGE_SCAN_TYPES = ("option_scan", "stock_scan", "bulk_scan")
+
+
+class _Response:
+    def __init__(self, data):
+        self.data = data
+
+
+class _Call:
+    def __init__(self, fn, params):
+        self.fn = fn
+        self.params = params
+
+    async def execute(self):
+        return _Response(self.fn(**self.params))
+
+
+class LocalBillingDatabase:
+    """In-memory user_credits / credit_transactions / usage_logs with the deduct_credits_atomic RPC"""
+
+    def __init__(self, balances):
+        self.credits = {user_id: {"balance": Decimal(str(b)), "lifetime_spent": Decimal("0")} for user_id, b in balances.items()}
+        self.transactions = []
+        self.usage_logs = {}
+        self.rpc_calls = 0
+        self._lock = threading.Lock()
+
+    def rpc(self, name, params):
+        self.rpc_calls += 1
+        return _Call(getattr(self, name), params)
+
+    def table(self, name):
+        raise AssertionError(f"unexpected table access: {name}")
+
+    def deduct_credits_atomic(self, p_user_id, p_amount, p_description=None, p_scan_type=None,
+                              p_scan_count=None, p_metadata=None, p_usage_date=None):
+        amount = Decimal(str(p_amount))
+        with self._lock:
+            row = self.credits.get(p_user_id)
+            if row is None:
+                return {"success": False, "reason": "not_found", "balance": None}
+            if row["balance"] < amount:
+                return {"success": False, "reason": "insufficient", "balance": float(row["balance"])}
+
+            before = row["balance"]
+            row["balance"] -= amount
+            row["lifetime_spent"] += amount
+            self.transactions.append({
+                "user_id": p_user_id, "transaction_type": "debit", "amount": amount,
+                "balance_before": before, "balance_after": row["balance"], "scan_type": p_scan_type
+            })
+            if p_scan_type in USAGE_SCAN_TYPES:
+                key = (p_user_id, p_scan_type, p_usage_date)
+                self.usage_logs[key] = self.usage_logs.get(key, 0) + max(p_scan_count or 1, 1)
+            return {"success": True, "balance": float(row["balance"]), "balance_before": float(before)}
+
+
+def make_service(balances):
+    service = BillingService()
+    service.supabase = LocalBillingDatabase(balances)
+    return service
+
+
+class TestAtomicDeduction(unittest.TestCase):
+    """BillingService.deduct_credits / deduct_for_action"""
+
+    def test_single_call_debits_and_logs_usage(self):
+        service = make_service({"user-1": 10})
+        success, _, data = asyncio.run(service.deduct_credits(
+            "user-1", Decimal("0.98"), scan_type="option_scan", scan_count=1
+        ))
+        db = service.supabase
+
+        self.assertTrue(success)
+        self.assertAlmostEqual(data["balance"], 9.02)
+        self.assertEqual(db.rpc_calls, 1)
+        self.assertEqual(len(db.transactions), 1)
+        self.assertEqual(list(db.usage_logs.values()), [1])
+
+    def test_insufficient_and_missing(self):
+        service = make_service({"user-1": 0.5})
+        success, message, _ = asyncio.run(service.deduct_credits("user-1", Decimal("0.98")))
+        self.assertFalse(success)
+        self.assertIn("Insufficient balance", message)
+
+        success, message, _ = asyncio.run(service.deduct_credits("nobody", Decimal("1")))
+        self.assertEqual((success, message), (False, "User credits not found"))
+        self.assertEqual(service.supabase.transactions, [])
+
+    def test_concurrent_deductions_never_overdraw(self):
+        service = make_service({"user-1": 10})
+
+        def deduct(_):
+            return asyncio.run(service.deduct_credits("user-1", Decimal("1"), scan_type="stock_scan", scan_count=1))[0]
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(deduct, range(40)))
+
+        db = service.supabase
+        self.assertEqual(sum(results), 10)
+        self.assertEqual(db.credits["user-1"]["balance"], Decimal("0"))
+        self.assertEqual(len(db.transactions), 10)
+        self.assertEqual(sum(db.usage_logs.values()), 10)
+
+    def test_payg_action_goes_through_rpc(self):
+        service = make_service({"user-1": 10})
+        success, message = asyncio.run(service._deduct_credits("user-1", "bulk_scan", 1))
+        self.assertTrue(success, message)
+        self.assertEqual(service.supabase.rpc_calls, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
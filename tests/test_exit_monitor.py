@@ -0,0 +1,211 @@
+"""
+Unit tests for the paper trading exit monitor
+
+Covers:
+- Vectorized target / stop / trailing / EOD rules
+- One query to load, one quote call per tick for every user's symbols
+- Only positions whose LTP moved are written; exits leave memory
+- A position already closed elsewhere is dropped, not counted as an exit
+"""
+
+import asyncio
+import unittest
+from datetime import datetime
+
+import numpy as np
+
+from src.services.exit_monitor import PaperExitMonitor, evaluate_exits
+
+
+class _Response:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeTable:
+    def __init__(self, db, name):
+        self.db = db
+        self.name = name
+        self.op = None
+        self.values = None
+        self.filters = {}
+
+    def select(self, *_):
+        self.op = "select"
+        return self
+
+    def update(self, values):
+        self.op = "update"
+        self.values = values
+        return self
+
+    def eq(self, column, value):
+        self.filters[column] = value
+        return self
+
+    async def execute(self):
+        rows = [r for r in self.db.rows if all(r.get(c) == v for c, v in self.filters.items())]
+        if self.op == "select":
+            self.db.selects += 1
+            return _Response([dict(r) for r in rows])
+        self.db.updates.append((self.filters["id"], self.values))
+        for row in rows:
+            row.update(self.values)
+        return _Response(rows)
+
+
+class FakeDatabase:
+    def __init__(self, rows):
+        self.rows = rows
+        self.selects = 0
+        self.updates = []
+
+    def table(self, name):
+        return FakeTable(self, name)
+
+
+class FakeQuotes:
+    def __init__(self, ltps):
+        self.ltps = ltps
+        self.calls = []
+
+    def get_quotes(self, symbols):
+        self.calls.append(list(symbols))
+        return {"d": [{"n": s, "v": {"lp": self.ltps[s]}} for s in symbols if s in self.ltps]}
+
+
+class FakeService:
+    def __init__(self, rows):
+        self.supabase = FakeDatabase(rows)
+        self.exits = []
+        self.activity = []
+        self.closed_elsewhere = set()
+
+    async def _update_position_mark(self, position_id, current_ltp, current_pnl):
+        await self.supabase.table("paper_trading_positions")\
+            .update({"current_ltp": current_ltp, "current_pnl": current_pnl})\
+            .eq("id", position_id)\
+            .execute()
+
+    async def _exit_position(self, user_id, position, exit_price, exit_reason):
+        if position["id"] in self.closed_elsewhere:
+            return False
+        self.exits.append((position["id"], exit_reason, exit_price))
+        return True
+
+    async def _log_activity(self, user_id, position_id, activity_type, details):
+        self.activity.append((position_id, activity_type))
+
+
+def position(position_id, user_id, symbol, entry=100.0, stop_loss=80.0, target_1=130.0, target_2=160.0):
+    return {
+        "id": position_id, "user_id": user_id, "option_symbol": symbol, "status": "OPEN",
+        "quantity": 50, "entry_price": entry, "stop_loss": stop_loss,
+        "target_1": target_1, "target_2": target_2, "current_ltp": None
+    }
+
+
+def make_monitor(rows, ltps, hour=11, trailing_stop_pct=0.0):
+    service = FakeService(rows)
+    quotes = FakeQuotes(ltps)
+    monitor = PaperExitMonitor(
+        service, quote_source=quotes, trailing_stop_pct=trailing_stop_pct,
+        now=lambda: datetime(2026, 1, 6, hour, 0), clock=lambda: 0.0
+    )
+    return monitor, service, quotes
+
+
+class TestEvaluateExits(unittest.TestCase):
+
+    def test_rules_in_priority_order(self):
+        ltp = np.array([170.0, 135.0, 75.0, 110.0, np.nan])
+        levels = dict(
+            stop_loss=np.full(5, 80.0), target_1=np.full(5, 130.0), target_2=np.full(5, 160.0)
+        )
+        reasons, prices = evaluate_exits(ltp, peak=np.fmax(ltp, 100.0), **levels)
+        self.assertEqual(list(reasons), ["TARGET_2", "TARGET_1", "STOP_LOSS", "", ""])
+        self.assertEqual(list(prices[:3]), [160.0, 130.0, 80.0])
+
+        reasons, prices = evaluate_exits(ltp, peak=np.fmax(ltp, 100.0), eod=True, **levels)
+        self.assertEqual(list(reasons), ["EOD_EXIT"] * 4 + [""])
+        self.assertEqual(prices[3], 110.0)
+
+    def test_trailing_stop_only_above_fixed_stop(self):
+        ltp = np.array([105.0, 105.0])
+        reasons, prices = evaluate_exits(
+            ltp, stop_loss=np.array([80.0, 80.0]), target_1=np.full(2, 130.0),
+            target_2=np.full(2, 160.0), peak=np.array([125.0, 90.0]), trailing_stop_pct=10
+        )
+        # 125 * 0.9 = 112.5 trails above the stop; 90 * 0.9 = 81 does not reach 105
+        self.assertEqual(list(reasons), ["TRAILING_STOP", ""])
+        self.assertAlmostEqual(prices[0], 112.5)
+
+
+class TestPaperExitMonitor(unittest.TestCase):
+
+    def test_one_quote_call_for_all_users(self):
+        rows = [
+            position("p1", "user-1", "NSE:NIFTY26JAN25000CE"),
+            position("p2", "user-2", "NSE:NIFTY26JAN25000CE"),
+            position("p3", "user-3", "NSE:BANKNIFTY26JAN52000PE")
+        ]
+        monitor, service, quotes = make_monitor(rows, {
+            "NSE:NIFTY26JAN25000CE": 110.0, "NSE:BANKNIFTY26JAN52000PE": 75.0
+        })
+        exits = asyncio.run(monitor.check())
+
+        self.assertEqual(len(quotes.calls), 1)
+        self.assertEqual(sorted(quotes.calls[0]), ["NSE:BANKNIFTY26JAN52000PE", "NSE:NIFTY26JAN25000CE"])
+        self.assertEqual(exits, [("p3", "STOP_LOSS", 80.0)])
+        self.assertEqual(service.exits, [("p3", "STOP_LOSS", 80.0)])
+        self.assertEqual(sorted(pid for pid, _ in service.supabase.updates), ["p1", "p2"])
+        self.assertNotIn("p3", monitor.positions)
+
+    def test_unchanged_ltp_not_written_again(self):
+        monitor, service, quotes = make_monitor([position("p1", "user-1", "SYM")], {"SYM": 110.0})
+
+        async def run():
+            await monitor.check()
+            await monitor.check()
+            quotes.ltps["SYM"] = 112.0
+            await monitor.check()
+
+        asyncio.run(run())
+        self.assertEqual(service.supabase.selects, 1)
+        self.assertEqual(len(quotes.calls), 3)
+        self.assertEqual([values["current_ltp"] for _, values in service.supabase.updates], [110.0, 112.0])
+        self.assertEqual(len(service.activity), 2)
+
+    def test_tracked_positions_and_user_filter(self):
+        monitor, service, quotes = make_monitor([], {"A": 170.0, "B": 110.0}, hour=16)
+
+        async def run():
+            await monitor.check()
+            monitor.track(position("p1", "user-1", "A"))
+            monitor.track(position("p2", "user-2", "B"))
+            return await monitor.check(["user-2"])
+
+        exits = asyncio.run(run())
+        # After 15:15 every quoted position exits at its LTP
+        self.assertEqual(exits, [("p2", "EOD_EXIT", 110.0)])
+        self.assertEqual(quotes.calls, [["B"]])
+        self.assertEqual(list(monitor.positions), ["p1"])
+
+    def test_missing_quote_leaves_position_untouched(self):
+        monitor, service, _ = make_monitor([position("p1", "user-1", "SYM")], {})
+        self.assertEqual(asyncio.run(monitor.check()), [])
+        self.assertEqual(service.supabase.updates, [])
+        self.assertIn("p1", monitor.positions)
+
+    def test_position_closed_elsewhere_not_counted(self):
+        monitor, service, _ = make_monitor([position("p1", "user-1", "SYM")], {"SYM": 75.0})
+        service.closed_elsewhere.add("p1")
+
+        self.assertEqual(asyncio.run(monitor.check()), [])
+        self.assertEqual(monitor.stats["exits"], 0)
+        self.assertNotIn("p1", monitor.positions)
+        self.assertEqual(monitor.open_positions("user-1"), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
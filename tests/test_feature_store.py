@@ -0,0 +1,99 @@
+"""
+Unit tests for the index ML feature store
+
+Covers:
+- Incremental appends match a full rebuild
+- Revised live bar (any OHLCV column) / unrelated series handling
+- Revisions never mutate a matrix already handed out
+- Window and latest-row serving
+"""
+
+import unittest
+import numpy as np
+import pandas as pd
+
+from src.ml.feature_store import FeatureStore, compute_index_features
+
+
+def make_candles(n=600, seed=0, freq="15min"):
+    rng = np.random.default_rng(seed)
+    close = 25000 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    index = pd.date_range("2026-01-05 09:15", periods=n, freq=freq, name="timestamp")
+    return pd.DataFrame({
+        "open": close * (1 + rng.normal(0, 0.0005, n)),
+        "high": close * 1.002,
+        "low": close * 0.998,
+        "close": close,
+        "volume": rng.integers(1000, 5000, n).astype(float)
+    }, index=index)
+
+
+class TestFeatureStore(unittest.TestCase):
+    """FeatureStore.update"""
+
+    def setUp(self):
+        self.store = FeatureStore()
+        self.candles = make_candles()
+
+    def assert_matches_full_build(self, matrix, df):
+        expected, columns = compute_index_features(df)
+        self.assertEqual(matrix.columns, columns)
+        np.testing.assert_allclose(matrix.values, expected, rtol=1e-5, atol=1e-4, equal_nan=True)
+
+    def test_incremental_append_matches_full_build(self):
+        self.store.update("NIFTY", "15", self.candles.iloc[:500])
+        matrix = self.store.update("NIFTY", "15", self.candles.iloc[20:510])
+        self.assertEqual(len(matrix), 510)
+        self.assertEqual(matrix.values.dtype, np.float32)
+        self.assert_matches_full_build(matrix, self.candles.iloc[:510])
+
+    def test_revised_last_bar_is_recomputed(self):
+        self.store.update("NIFTY", "15", self.candles.iloc[:500])
+        revised = self.candles.iloc[:505].copy()
+        revised.iloc[499, revised.columns.get_loc("close")] *= 1.001
+        matrix = self.store.update("NIFTY", "15", revised)
+        self.assertEqual(len(matrix), 505)
+        self.assert_matches_full_build(matrix, revised)
+
+    def test_revised_high_low_volume_is_recomputed(self):
+        self.store.update("NIFTY", "15", self.candles.iloc[:500])
+        revised = self.candles.iloc[:503].copy()
+        revised.iloc[499, revised.columns.get_loc("high")] *= 1.01
+        revised.iloc[499, revised.columns.get_loc("volume")] += 500
+        matrix = self.store.update("NIFTY", "15", revised)
+        self.assertEqual(len(matrix), 503)
+        self.assert_matches_full_build(matrix, revised)
+
+    def test_revision_does_not_mutate_served_matrix(self):
+        served = self.store.update("NIFTY", "15", self.candles.iloc[:500])
+        timestamps, values = served.timestamps.copy(), served.values.copy()
+        revised = self.candles.iloc[:505].copy()
+        revised.iloc[499, revised.columns.get_loc("close")] *= 1.001
+        self.store.update("NIFTY", "15", revised)
+
+        self.assertEqual(len(served), 500)
+        np.testing.assert_array_equal(served.timestamps, timestamps)
+        np.testing.assert_array_equal(served.values, values)
+
+    def test_unrelated_series_rebuilds(self):
+        self.store.update("NIFTY", "15", self.candles.iloc[:500])
+        other = make_candles(300, seed=7)
+        matrix = self.store.update("NIFTY", "15", other)
+        self.assertEqual(len(matrix), 300)
+        self.assert_matches_full_build(matrix, other)
+
+    def test_window_and_latest(self):
+        matrix = self.store.update("NIFTY", "15", self.candles)
+        columns = ["rsi_14", "adx", "macd"]
+        window = matrix.frame(self.candles.index[100], self.candles.index[199], columns)
+        self.assertEqual(window.shape, (100, 3))
+        self.assertTrue(np.isfinite(window.to_numpy()).all())
+        np.testing.assert_array_equal(matrix.latest(columns), matrix.frame(columns=columns).iloc[-1:].to_numpy())
+
+    def test_same_frame_is_memoized(self):
+        first = self.store.update("NIFTY", "15", self.candles)
+        self.assertIs(self.store.update("NIFTY", "15", self.candles), first)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+Unit tests for the array-based expiry-day gamma scanner
+
+The vectorized chain scorer must agree with the scalar
+analyze_gamma_opportunity path for every option and market phase.
+"""
+
+import unittest
+from datetime import datetime
+import numpy as np
+
+from src.analytics.expiry_gamma_scanner import ExpiryDayGammaScanner, IST
+
+
+def ist(hour, minute):
+    dt = datetime(2026, 2, 10, hour, minute)
+    return IST.localize(dt) if IST else dt
+
+
+class TestScoreChainMatchesScalar(unittest.TestCase):
+    """score_chain vs analyze_gamma_opportunity, row for row"""
+
+    def setUp(self):
+        self.scanner = ExpiryDayGammaScanner()
+        rng = np.random.default_rng(11)
+        self.spot = 25037.4
+        self.strikes = np.repeat(np.arange(24600, 25500, 50), 2).astype(float)
+        self.types = np.array(["CE", "PE"] * (len(self.strikes) // 2))
+        self.premiums = np.round(rng.uniform(5, 30, len(self.strikes)), 2)
+
+    def test_all_phases(self):
+        for hour, minute in [(9, 40), (11, 0), (12, 45), (13, 45), (14, 20), (14, 45), (15, 10), (15, 45)]:
+            now = ist(hour, minute)
+            scored = self.scanner.score_chain(self.strikes, self.types, self.premiums, self.spot, now)
+            for i in range(len(self.strikes)):
+                opp = self.scanner.analyze_gamma_opportunity(
+                    symbol="X",
+                    strike=self.strikes[i],
+                    option_type=str(self.types[i]),
+                    premium=float(self.premiums[i]),
+                    spot_price=self.spot,
+                    ist_time=now
+                )
+                self.assertEqual(scored["gamma_score"][i], opp.gamma_score, (hour, minute, i))
+                self.assertEqual(bool(scored["is_opportunity"][i]), opp.is_gamma_opportunity)
+                self.assertAlmostEqual(scored["theta_per_15min"][i], opp.theta_per_15min, places=6)
+                self.assertAlmostEqual(scored["delta"][i], opp.delta, places=6)
+                self.assertAlmostEqual(scored["potential_gain_50pt"][i], opp.potential_gain_50pt, places=6)
+
+
+class TestScanChain(unittest.TestCase):
+    """scan_for_gamma_opportunities ranking"""
+
+    def test_top_opportunities_sorted(self):
+        scanner = ExpiryDayGammaScanner()
+        chain = [
+            {"strike": k, "ce_ltp": 8 + (k % 300) / 30, "pe_ltp": 12 + (k % 200) / 25}
+            for k in range(24800, 25300, 50)
+        ]
+        result = scanner.scan_for_gamma_opportunities("NIFTY", 25020, chain, ist_time=ist(14, 0))
+        scores = [o["gamma_score"] for o in result["top_opportunities"]]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertLessEqual(len(scores), 5)
+        self.assertGreaterEqual(result["total_opportunities_found"], len(scores))
+        for opp in result["top_opportunities"]:
+            self.assertTrue(opp["symbol"].startswith("NIFTY"))
+
+    def test_closed_market_finds_nothing(self):
+        scanner = ExpiryDayGammaScanner()
+        chain = [{"strike": 25000, "ce_ltp": 15, "pe_ltp": 15}]
+        result = scanner.scan_for_gamma_opportunities("NIFTY", 25000, chain, ist_time=ist(16, 0))
+        self.assertEqual(result["total_opportunities_found"], 0)
+        self.assertEqual(result["top_opportunities"], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
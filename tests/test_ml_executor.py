@@ -0,0 +1,89 @@
+"""
+Unit tests for the ML process-pool executor
+
+Covers:
+- Array transport round trip (no DataFrames cross the process boundary)
+- Pool-estimated ARIMA parameters installed into the ensemble cache
+- Bounded queue, timeout and cancellation
+"""
+
+import asyncio
+import time
+import unittest
+import numpy as np
+import pandas as pd
+
+from src.ml import time_series_models as tsm
+from src.services.ml_executor import (
+    MLExecutor, MLExecutorBusy, frame_to_arrays, arrays_to_frame, prefit_ensemble
+)
+import src.services.ml_executor as ml_executor
+
+
+def make_prices(n=120, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2026-01-05 09:15", periods=n, freq="1h")
+    return pd.Series(25000 * np.exp(np.cumsum(rng.normal(0, 0.002, n))), index=index, name="close")
+
+
+class TestArrayTransport(unittest.TestCase):
+    """frame_to_arrays / arrays_to_frame"""
+
+    def test_round_trip(self):
+        close = make_prices(30)
+        df = pd.DataFrame({"open": close, "high": close + 5, "low": close - 5, "close": close, "volume": 1000.0})
+        df.index.name = "timestamp"
+        arrays = frame_to_arrays(df)
+        self.assertTrue(all(isinstance(v, np.ndarray) for v in arrays.values()))
+        rebuilt = arrays_to_frame(arrays)
+        pd.testing.assert_frame_equal(rebuilt, df, check_freq=False, check_index_type=False)
+        self.assertTrue((rebuilt.index == df.index).all())
+
+
+class TestMLExecutor(unittest.TestCase):
+    """Process pool behaviour"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.executor = MLExecutor(max_workers=1, max_pending=3, default_timeout=60)
+        ml_executor._ml_executor = cls.executor
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.executor.shutdown(wait=True)
+        ml_executor._ml_executor = None
+
+    def test_prefit_matches_inline_fit(self):
+        tsm._ensemble_cache.clear()
+        prices = make_prices(120)
+        mode = asyncio.run(prefit_ensemble(prices, symbol="NIFTY"))
+        self.assertEqual(mode, "full_fit")
+
+        # The signal path now finds the model already fitted
+        self.assertEqual(tsm.get_ml_signal(prices, symbol="NIFTY")["model_update"], "cached")
+
+        inline = tsm.ARIMAPredictor(order=(5, 1, 2))
+        inline.fit(prices)
+        cached = tsm.get_ensemble_predictor("NIFTY", "60").arima
+        np.testing.assert_allclose(cached.last_fit_result.params, inline.last_fit_result.params, rtol=1e-6)
+
+    def test_bounded_queue_timeout_and_cancel(self):
+        async def scenario():
+            first = self.executor.submit(time.sleep, 1.0)
+            self.executor.submit(time.sleep, 0)
+            third = self.executor.submit(time.sleep, 0)
+            with self.assertRaises(MLExecutorBusy):
+                self.executor.submit(time.sleep, 0)
+
+            # Single worker: the pool hands out one extra call, the third job is still queued
+            self.assertTrue(self.executor.cancel(third))
+            with self.assertRaises(asyncio.TimeoutError):
+                await self.executor.result(first, timeout=0.05)
+
+            self.assertEqual(await self.executor.run(pow, 2, 10), 1024)
+
+        asyncio.run(scenario())
+
+
+if __name__ == '__main__':
+    unittest.main()
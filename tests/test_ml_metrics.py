@@ -0,0 +1,105 @@
+"""
+Unit tests for ML inference metrics
+
+Covers:
+- Latency histogram buckets, percentiles and error counts
+- Cache hit rates
+- Prediction drift between rolling windows and per model version
+- EnhancedMLService component timing
+"""
+
+import unittest
+
+import numpy as np
+
+from src.ml.ml_metrics import MLMetrics, get_ml_metrics
+from src.services.enhanced_ml_service import EnhancedMLService
+
+
+class TestLatency(unittest.TestCase):
+    """Latency histogram"""
+
+    def test_buckets_and_percentiles(self):
+        metrics = MLMetrics()
+        for ms in [0.5] * 90 + [30] * 9 + [9000]:
+            metrics.record_latency("direction", ms / 1000)
+        latency = metrics.snapshot()["latency"]["direction"]
+
+        self.assertEqual(latency["calls"], 100)
+        self.assertEqual(latency["histogram"]["le_1ms"], 90)
+        self.assertEqual(latency["histogram"]["le_50ms"], 9)
+        self.assertEqual(latency["histogram"]["gt_5000ms"], 1)
+        self.assertEqual(latency["p50_ms"], 1.0)
+        self.assertEqual(latency["p95_ms"], 50.0)
+        self.assertAlmostEqual(latency["max_ms"], 9000, places=3)
+
+    def test_errors_are_counted_and_reraised(self):
+        metrics = MLMetrics()
+        with self.assertRaises(ValueError):
+            with metrics.time("speed"):
+                raise ValueError("boom")
+        with metrics.time("speed"):
+            pass
+        latency = metrics.snapshot()["latency"]["speed"]
+        self.assertEqual((latency["calls"], latency["errors"]), (2, 1))
+
+    def test_cache_hit_rate(self):
+        metrics = MLMetrics()
+        for hit in (True, True, True, False):
+            metrics.record_cache("feature_store", hit)
+        self.assertEqual(metrics.snapshot()["caches"]["feature_store"]["hit_rate"], 0.75)
+
+
+class TestDrift(unittest.TestCase):
+    """Rolling prediction record"""
+
+    def test_shift_between_windows_is_flagged(self):
+        metrics = MLMetrics()
+        for _ in range(20):
+            metrics.record_prediction("nifty", "index_model", "UP", 0.6, model_version=1)
+        for _ in range(20):
+            metrics.record_prediction("NIFTY", "index_model", "DOWN", 0.4, model_version=2)
+        summary = metrics.drift("NIFTY", window=20)["NIFTY"]["index_model"]
+
+        self.assertEqual(summary["recent"]["distribution"], {"DOWN": 1.0})
+        self.assertEqual(summary["label_shift_tvd"], 1.0)
+        self.assertAlmostEqual(summary["confidence_shift"], -0.2)
+        self.assertTrue(summary["drift_flag"])
+        self.assertEqual(set(summary["by_model_version"]), {"1", "2"})
+
+    def test_stable_outputs_are_not_flagged(self):
+        metrics = MLMetrics()
+        for i in range(40):
+            metrics.record_prediction("BANKNIFTY", "direction", "UP" if i % 2 else "DOWN", 0.5)
+        summary = metrics.drift(window=20)["BANKNIFTY"]["direction"]
+        self.assertFalse(summary["drift_flag"])
+        self.assertNotIn("by_model_version", summary)
+
+    def test_history_is_bounded(self):
+        metrics = MLMetrics(history_size=10)
+        for _ in range(25):
+            metrics.record_prediction("NIFTY", "speed", "FAST", 0.7)
+        self.assertEqual(metrics.drift(window=10)["NIFTY"]["speed"]["recent"]["count"], 10)
+
+
+class TestEnhancedServiceInstrumentation(unittest.TestCase):
+    """get_enhanced_prediction records per-component timings"""
+
+    def test_components_are_timed(self):
+        metrics = get_ml_metrics()
+        metrics.reset()
+        rng = np.random.default_rng(0)
+        prices = list(25000 * np.exp(np.cumsum(rng.normal(0, 0.002, 120))))
+
+        EnhancedMLService().get_enhanced_prediction(
+            option_type="CE", strike=25000, premium=120, spot_price=prices[-1], current_iv=15,
+            days_to_expiry=3, price_history=prices, index_name="NIFTY"
+        )
+        snapshot = metrics.snapshot("NIFTY")
+        for component in ("speed", "iv", "theta", "enhanced_prediction_total"):
+            self.assertEqual(snapshot["latency"][component]["calls"], 1, component)
+        self.assertIn("combined", snapshot["predictions"]["NIFTY"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+"""
+Unit tests for the index ML model registry
+
+Covers:
+- Save/load round trip reproduces predictions
+- Per-index feature lists, memory-mapped scaler arrays
+- Versioning and pruning, legacy pickle fallback
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.ml.index_ml_optimizer import IndexMLOptimizer
+from src.ml.model_registry import ModelRegistry
+
+
+def make_candles(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 25000 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    index = pd.date_range("2024-01-01", periods=n, freq="1D", name="timestamp")
+    return pd.DataFrame({
+        "open": close * (1 + rng.normal(0, 0.002, n)),
+        "high": close * (1 + rng.uniform(0, 0.01, n)),
+        "low": close * (1 - rng.uniform(0, 0.01, n)),
+        "close": close,
+        "volume": rng.integers(1000, 5000, n).astype(float)
+    }, index=index)
+
+
+class TestModelRegistry(unittest.TestCase):
+    """ModelRegistry + IndexMLOptimizer.save_model/_load_model"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.candles = make_candles(seed=1)
+        cls.trained = IndexMLOptimizer("random_forest")
+        cls.trained.train("NIFTY", cls.candles)
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.registry = ModelRegistry(self.tmp_dir, keep_versions=2)
+        self.trained.registry = self.registry
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def fresh_optimizer(self):
+        optimizer = IndexMLOptimizer("random_forest")
+        optimizer.model_dir = self.tmp_dir
+        optimizer.registry = ModelRegistry(self.tmp_dir)
+        return optimizer
+
+    def test_round_trip_predictions(self):
+        self.assertTrue(self.trained.save_model("NIFTY"))
+        loaded = self.fresh_optimizer()
+        expected = self.trained.predict("NIFTY", self.candles)
+        actual = loaded.predict("NIFTY", self.candles)
+        self.assertEqual(actual.predicted_direction, expected.predicted_direction)
+        self.assertAlmostEqual(actual.probability_up, expected.probability_up)
+        self.assertEqual(loaded.model_versions["NIFTY"], 1)
+        self.assertIsInstance(loaded.scalers["NIFTY"].mean_, np.memmap)
+
+    def test_feature_names_are_per_index(self):
+        self.trained.save_model("NIFTY")
+        loaded = self.fresh_optimizer()
+        loaded.feature_names = ["unrelated"]
+        self.assertIsNotNone(loaded.predict("NIFTY", self.candles))
+        self.assertEqual(loaded.index_features["NIFTY"], self.trained.index_features["NIFTY"])
+
+    def test_versions_increment_and_prune(self):
+        for _ in range(3):
+            self.trained.save_model("NIFTY")
+        self.assertEqual(self.registry.versions("NIFTY", "random_forest"), [2, 3])
+        self.assertEqual(self.registry.load("NIFTY", "random_forest").version, 3)
+        self.assertIsNone(self.registry.load("BANKNIFTY", "random_forest"))
+
+    def test_keep_zero_keeps_only_latest(self):
+        self.registry.keep_versions = 0
+        for _ in range(3):
+            self.trained.save_model("NIFTY")
+        self.assertEqual(self.registry.versions("NIFTY", "random_forest"), [3])
+        self.assertEqual(self.registry.load("NIFTY", "random_forest").version, 3)
+
+    def test_legacy_pickles_still_load(self):
+        joblib.dump({
+            "model": self.trained.models["NIFTY"],
+            "feature_names": self.trained.index_features["NIFTY"],
+            "model_type": "random_forest"
+        }, os.path.join(self.tmp_dir, "nifty_model.joblib"))
+        joblib.dump(self.trained.scalers["NIFTY"], os.path.join(self.tmp_dir, "nifty_scaler.joblib"))
+        loaded = self.fresh_optimizer()
+        self.assertIsNotNone(loaded.predict("NIFTY", self.candles))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+"""
+Unit tests for the Monte Carlo options P&L simulator
+
+Covers:
+- Distribution consistency (percentiles, hit probabilities)
+- Bootstrap vs GBM path selection
+- Latency budget for /ml/enhanced-prediction
+"""
+
+import unittest
+import numpy as np
+
+from src.ml.monte_carlo_pnl import MAX_STEPS, MonteCarloPnLSimulator
+
+
+class TestMonteCarloPnL(unittest.TestCase):
+    """Monte Carlo P&L distribution"""
+
+    def setUp(self):
+        self.sim = MonteCarloPnLSimulator(n_paths=4000, seed=42)
+        self.kwargs = dict(
+            option_type="CE", strike=25000, premium=120.0, spot_price=25000,
+            current_iv=14, days_to_expiry=4, horizon_mins=120
+        )
+
+    def test_distribution_consistency(self):
+        result = self.sim.simulate(**self.kwargs)
+        p = result.pnl_percentiles
+        self.assertLessEqual(p["p5"], p["p25"])
+        self.assertLessEqual(p["p25"], p["p50"])
+        self.assertLessEqual(p["p75"], p["p95"])
+        self.assertGreaterEqual(result.prob_hit_target1, result.prob_hit_target2)
+        self.assertLessEqual(result.prob_target1_before_stop, result.prob_hit_target1)
+        self.assertEqual(result.path_model, "gbm")
+        # No drift: theta drags the median path below entry
+        self.assertLess(p["p50"], 0)
+
+    def test_drift_moves_expected_value(self):
+        flat = self.sim.simulate(**self.kwargs)
+        bullish = MonteCarloPnLSimulator(n_paths=4000, seed=42).simulate(expected_move_pct=0.5, **self.kwargs)
+        self.assertGreater(bullish.expected_pnl, flat.expected_pnl)
+        self.assertGreater(bullish.prob_hit_target1, flat.prob_hit_target1)
+
+    def test_put_gains_on_down_move(self):
+        kwargs = dict(self.kwargs, option_type="PE")
+        result = self.sim.simulate(expected_move_pct=-0.8, **kwargs)
+        self.assertGreater(result.expected_pnl, 0)
+
+    def test_bootstrap_from_history(self):
+        rng = np.random.default_rng(1)
+        history = list(25000 * np.exp(np.cumsum(rng.normal(0, 0.002, 200))))
+        result = self.sim.simulate(price_history=history, **self.kwargs)
+        self.assertEqual(result.path_model, "bootstrap")
+
+    def test_latency_budget(self):
+        # The 50ms budget rests on pricing every path in one vectorized call
+        # (plus the entry point) over a grid capped at MAX_STEPS, however
+        # long the horizon
+        shapes = []
+        price = self.sim._price
+
+        def spy(option_type, strike, spot, iv, days_to_expiry):
+            shapes.append(spot.shape)
+            return price(option_type, strike, spot, iv, days_to_expiry)
+
+        self.sim._price = spy
+        result = self.sim.simulate(**dict(self.kwargs, horizon_mins=375))
+        self.assertEqual(shapes, [(1,), (4000, MAX_STEPS)])
+        # Wall clock only as a loose guard against gross regressions (CI load varies)
+        self.assertLess(result.elapsed_ms, 2000)
+
+
+if __name__ == '__main__':
+    unittest.main()
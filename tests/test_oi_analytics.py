@@ -0,0 +1,110 @@
+"""
+Unit tests for full-chain OI analytics
+
+Covers:
+- OI walls either side of spot
+- PCR by strike band
+- Cache staleness in MultiExpiryOIAnalyzer
+- Refresh fetches the expiry list once and never requests a chain
+  without an expiry timestamp
+"""
+
+import unittest
+from datetime import date, datetime, timedelta
+
+from src.analytics.option_chain import OptionChain
+from src.analytics.oi_analytics import (
+    MultiExpiryOIAnalyzer,
+    compute_expiry_analytics,
+    find_oi_walls,
+    pcr_by_band
+)
+
+
+def make_chain():
+    data = []
+    for k in range(24500, 25550, 50):
+        data.append({
+            "strike": k,
+            "call_oi": 9000 if k == 25300 else 100,
+            "put_oi": 9000 if k == 24800 else 100,
+            "call_oi_change": 10,
+            "put_oi_change": -20
+        })
+    return OptionChain.from_strike_dicts(data)
+
+
+class TestOIAnalytics(unittest.TestCase):
+    """Pure analytics on an OptionChain"""
+
+    def test_walls(self):
+        walls = find_oi_walls(make_chain(), spot=25020)
+        self.assertEqual(walls["call"][0].strike, 25300)
+        self.assertEqual(walls["put"][0].strike, 24800)
+        self.assertTrue(all(w.strike > 25020 for w in walls["call"]))
+
+    def test_pcr_bands_cover_chain(self):
+        chain = make_chain()
+        bands = pcr_by_band(chain, spot=25020)
+        self.assertEqual(sum(b["strikes"] for b in bands.values()), len(chain))
+        self.assertEqual(sum(b["put_oi"] for b in bands.values()), chain.total_put_oi)
+
+    def test_heatmap_intensity_bounds(self):
+        result = compute_expiry_analytics(make_chain(), "NIFTY", "weekly", "2026-10-20", 2, 25020)
+        for row in result.oi_change_heatmap:
+            self.assertLessEqual(abs(row["call_intensity"]), 1)
+            self.assertLessEqual(abs(row["put_intensity"]), 1)
+
+
+class TestOIAnalyticsCache(unittest.TestCase):
+    """Cached results expire after max_age"""
+
+    def test_stale_cache_returns_none(self):
+        analyzer = MultiExpiryOIAnalyzer(fyers_client=None)
+        result = compute_expiry_analytics(make_chain(), "NIFTY", "weekly", "2026-10-20", 2, 25020)
+        analyzer._cache["NIFTY"] = {"weekly": result}
+        analyzer._cache_time["NIFTY"] = datetime.now()
+        self.assertIs(analyzer.get_cached("nifty", "weekly"), result)
+
+        analyzer._cache_time["NIFTY"] = datetime.now() - timedelta(hours=1)
+        self.assertIsNone(analyzer.get_cached("NIFTY", "weekly"))
+
+
+class FakeFyers:
+    """Option chain API: expiry list on strike_count=1, a small chain otherwise"""
+
+    def __init__(self, expiry_data):
+        self.expiry_data = expiry_data
+        self.calls = []
+
+    def get_option_chain(self, symbol, strike_count=5, expiry_date=None):
+        self.calls.append((strike_count, expiry_date))
+        rows = [{"strike_price": -1, "ltp": 25000.0}]
+        for strike in (24900, 25000, 25100):
+            for option_type in ("CE", "PE"):
+                rows.append({"strike_price": strike, "option_type": option_type, "oi": 1000, "ltp": 50.0})
+        return {"code": 200, "data": {"expiryData": self.expiry_data, "optionsChain": rows}}
+
+
+class TestMultiExpiryRefresh(unittest.TestCase):
+    """MultiExpiryOIAnalyzer.refresh"""
+
+    def test_expiry_without_timestamp_is_skipped(self):
+        first = date.today() + timedelta(days=3)
+        # The second expiry comes back without a Fyers timestamp
+        expiry_data = [
+            {"date": (first + timedelta(days=7 * i)).strftime("%d-%m-%Y"), "expiry": expiry}
+            for i, expiry in enumerate(["1900000000", None, "1900001209"])
+        ]
+        fyers = FakeFyers(expiry_data)
+        results = MultiExpiryOIAnalyzer(fyers).refresh("NIFTY")
+
+        self.assertEqual(sum(1 for count, _ in fyers.calls if count == 1), 1)
+        self.assertEqual(sum(1 for count, _ in fyers.calls if count == 5), 0)
+        self.assertTrue(all(expiry for count, expiry in fyers.calls if count != 1))
+        self.assertIn("weekly", results)
+        self.assertNotIn("next_weekly", results)
+
+
+if __name__ == '__main__':
+    unittest.main()
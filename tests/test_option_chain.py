@@ -0,0 +1,104 @@
+"""
+Unit tests for the columnar OptionChain structure
+
+Covers:
+- Building from Fyers rows (CE/PE merge, index row skipped)
+- O(1)/O(log n) strike lookups
+- Vectorized max pain vs brute-force definition
+- OI support/resistance
+"""
+
+import unittest
+import numpy as np
+
+from src.analytics.option_chain import OptionChain
+
+
+def brute_force_max_pain(strikes, call_oi, put_oi):
+    """Quadratic reference implementation"""
+    best, best_strike = float('inf'), None
+    for test in strikes:
+        pain = 0
+        for k, c, p in zip(strikes, call_oi, put_oi):
+            if test > k:
+                pain += (test - k) * c
+            if test < k:
+                pain += (k - test) * p
+        if pain < best:
+            best, best_strike = pain, test
+    return best_strike
+
+
+class TestOptionChainBuild(unittest.TestCase):
+    """Test construction from raw Fyers rows"""
+
+    def setUp(self):
+        self.rows = [
+            {"strike_price": -1, "symbol": "NSE:NIFTY50-INDEX"},
+            {"strike_price": 25100, "option_type": "CE", "ltp": 80, "oi": 500, "volume": 10, "iv": 13, "symbol": "C25100"},
+            {"strike_price": 25000, "option_type": "PE", "ltp": 90, "oi": 700, "volume": 20, "iv": 14, "symbol": "P25000"},
+            {"strike_price": 25000, "option_type": "CE", "ltp": 120, "oi": 300, "volume": 30, "iv": 12, "symbol": "C25000"},
+        ]
+
+    def test_rows_merged_and_sorted(self):
+        chain = OptionChain.from_fyers(self.rows, default_iv=11.0)
+        self.assertEqual(list(chain.strikes), [25000.0, 25100.0])
+        self.assertEqual(chain.total_call_oi, 800)
+        self.assertEqual(chain.total_put_oi, 700)
+        self.assertEqual(chain.get("PE", "iv", 25100), 11.0)  # missing side falls back
+        self.assertEqual(chain.call_symbols, ["C25000", "C25100"])
+
+    def test_lookups(self):
+        chain = OptionChain.from_fyers(self.rows)
+        self.assertEqual(chain.index_of(25100), 1)
+        self.assertIsNone(chain.index_of(25050.5))
+        self.assertEqual(chain.nearest_index(25040), 0)
+        self.assertEqual(chain.nearest_index(25080), 1)
+        self.assertEqual(chain.nearest_index(1), 0)
+
+    def test_missing_side_has_no_analysis(self):
+        chain = OptionChain.from_fyers(self.rows)
+        rows = chain.to_strike_dicts(lambda oi_chg, px_chg: "Long Build")
+        self.assertEqual(rows[1]["call_analysis"], "Long Build")
+        self.assertEqual(rows[1]["put_analysis"], "")
+
+
+class TestMaxPain(unittest.TestCase):
+    """Vectorized max pain must match the quadratic definition"""
+
+    def test_matches_brute_force(self):
+        rng = np.random.default_rng(7)
+        for _ in range(20):
+            n = int(rng.integers(3, 60))
+            strikes = 24000 + 50 * np.arange(n)
+            call_oi = rng.integers(0, 100000, n)
+            put_oi = rng.integers(0, 100000, n)
+            data = [
+                {"strike": float(k), "call_oi": int(c), "put_oi": int(p)}
+                for k, c, p in zip(strikes, call_oi, put_oi)
+            ]
+            chain = OptionChain.from_strike_dicts(data)
+            self.assertEqual(chain.max_pain(), brute_force_max_pain(strikes, call_oi, put_oi))
+
+    def test_empty_chain(self):
+        self.assertEqual(OptionChain.from_strike_dicts([]).max_pain(), 0)
+
+
+class TestSupportResistance(unittest.TestCase):
+    """OI walls either side of spot"""
+
+    def test_walls(self):
+        data = [
+            {"strike": 24800, "call_oi": 10, "put_oi": 900},
+            {"strike": 24900, "call_oi": 10, "put_oi": 100},
+            {"strike": 25000, "call_oi": 10, "put_oi": 10},
+            {"strike": 25100, "call_oi": 100, "put_oi": 10},
+            {"strike": 25200, "call_oi": 900, "put_oi": 10},
+        ]
+        supports, resistances = OptionChain.from_strike_dicts(data).support_resistance(25000)
+        self.assertEqual(supports, [24800.0])
+        self.assertEqual(resistances, [25200.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,206 @@
+"""
+Unit tests for incremental paper trading daily performance
+
+Covers:
+- Running aggregates match a full recomputation
+- First close of the day rebuilds from the database, later closes do not query
+- Duplicate closes are counted once; verify() reports drift
+- A row persisted by another instance triggers a rebuild, this tracker's
+  own (possibly unflushed) writes do not
+"""
+
+import asyncio
+import os
+import tempfile
+import unittest
+from datetime import date
+
+from src.services import write_behind
+from src.services.paper_performance import DailyPerformance, PaperPerformanceTracker
+from src.services.write_behind import WriteBehindQueue
+
+DAY = date(2026, 1, 6)
+
+
+class _Response:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeQuery:
+    def __init__(self, db):
+        self.db = db
+
+    def select(self, *_):
+        return self
+
+    def eq(self, *_):
+        return self
+
+    def gte(self, *_):
+        return self
+
+    def lt(self, *_):
+        return self
+
+    async def execute(self):
+        self.db.selects += 1
+        return _Response([dict(p) for p in self.db.closed])
+
+
+class FakeRowQuery(FakeQuery):
+    """paper_trading_performance: the row as last persisted"""
+
+    async def execute(self):
+        self.db.row_reads += 1
+        return _Response([dict(self.db.persisted)] if self.db.persisted else [])
+
+
+class FakeService:
+    def __init__(self, closed, persisted=None):
+        self.closed = closed
+        self.persisted = persisted
+        self.selects = 0
+        self.row_reads = 0
+        self.supabase = self
+
+    def table(self, name):
+        return FakeRowQuery(self) if name == "paper_trading_performance" else FakeQuery(self)
+
+
+class RecordingClient:
+    """Sync Supabase stand-in for the write-behind queue"""
+
+    def __init__(self):
+        self.upserts = []
+
+    def table(self, name):
+        client = self
+
+        class Query:
+            def upsert(self, rows, on_conflict=None):
+                client.upserts.extend(rows)
+                return self
+
+            def execute(self):
+                return _Response([])
+        return Query()
+
+
+def closed(position_id, pnl, minutes=30):
+    return {
+        "id": position_id, "pnl": pnl,
+        "entry_time": "2026-01-06T10:00:00", "exit_time": f"2026-01-06T10:{minutes:02d}:00"
+    }
+
+
+class TestDailyPerformance(unittest.TestCase):
+
+    def test_summary_row(self):
+        performance = DailyPerformance.from_positions("user-1", DAY, [
+            closed("a", 300.0, 10), closed("b", -100.0, 20), closed("c", 0.0, 30), closed("d", 100.0, 40)
+        ])
+        row = performance.to_row()
+
+        self.assertEqual(
+            (row["total_trades"], row["winning_trades"], row["losing_trades"], row["breakeven_trades"]),
+            (4, 2, 1, 1)
+        )
+        self.assertEqual(row["win_rate"], 50)
+        self.assertEqual(row["total_pnl"], 300.0)
+        self.assertEqual((row["avg_win"], row["avg_loss"]), (200.0, -100.0))
+        self.assertEqual((row["max_win"], row["max_loss"]), (300.0, -100.0))
+        self.assertEqual(row["profit_factor"], 4.0)
+        self.assertEqual(row["avg_trade_duration_minutes"], 25)
+        self.assertEqual(row["date"], "2026-01-06")
+
+    def test_duplicate_close_counted_once(self):
+        performance = DailyPerformance("user-1", DAY)
+        self.assertTrue(performance.add(closed("a", 50.0)))
+        self.assertFalse(performance.add(closed("a", 50.0)))
+        self.assertEqual(performance.total_trades, 1)
+        self.assertIsNone(performance.to_row()["profit_factor"])
+
+
+class TestPaperPerformanceTracker(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.client = RecordingClient()
+        self._queue = write_behind._write_behind_queue
+        write_behind._write_behind_queue = WriteBehindQueue(
+            client=self.client, spill_path=os.path.join(self.tmp.name, "spill.jsonl")
+        )
+
+    def tearDown(self):
+        write_behind._write_behind_queue = self._queue
+        self.tmp.cleanup()
+
+    def test_rebuild_once_then_incremental(self):
+        service = FakeService([closed("a", 100.0)])
+        tracker = PaperPerformanceTracker(service, today=lambda: DAY)
+
+        async def run():
+            await tracker.record_close("user-1", closed("a", 100.0))
+            service.closed.append(closed("b", -40.0))
+            await tracker.record_close("user-1", closed("b", -40.0))
+            service.closed.append(closed("c", 60.0))
+            return await tracker.record_close("user-1", closed("c", 60.0))
+
+        performance = asyncio.run(run())
+        self.assertEqual(service.selects, 1)
+        self.assertEqual(performance.total_trades, 3)
+        self.assertAlmostEqual(performance.total_pnl, 120.0)
+        self.assertEqual(len(self.client.upserts), 3)
+        self.assertEqual(self.client.upserts[-1]["total_trades"], 3)
+
+        rebuilt = DailyPerformance.from_positions("user-1", DAY, service.closed)
+        self.assertEqual(performance.to_row()["profit_factor"], rebuilt.to_row()["profit_factor"])
+        self.assertEqual(asyncio.run(tracker.verify("user-1")), {})
+
+    def test_pending_own_writes_do_not_rebuild(self):
+        # Persisted row still shows the count from the rebuild (flush pending)
+        service = FakeService([closed("a", 100.0)], persisted={"total_trades": 1})
+        tracker = PaperPerformanceTracker(service, today=lambda: DAY)
+
+        async def run():
+            await tracker.record_close("user-1", closed("a", 100.0))
+            await tracker.record_close("user-1", closed("b", -40.0))
+            return await tracker.record_close("user-1", closed("c", 60.0))
+
+        performance = asyncio.run(run())
+        self.assertEqual(service.selects, 1)
+        self.assertEqual(service.row_reads, 2)
+        self.assertEqual(performance.total_trades, 3)
+
+    def test_close_by_another_instance_rebuilds(self):
+        service = FakeService([closed("a", 100.0)])
+        tracker = PaperPerformanceTracker(service, today=lambda: DAY)
+        asyncio.run(tracker.record_close("user-1", closed("a", 100.0)))
+
+        # Another worker closed "b" and persisted its rebuilt row
+        service.closed.append(closed("b", -30.0))
+        service.persisted = {"total_trades": 2}
+        service.closed.append(closed("c", 50.0))
+        performance = asyncio.run(tracker.record_close("user-1", closed("c", 50.0)))
+
+        self.assertEqual(service.selects, 2)
+        self.assertEqual(performance.total_trades, 3)
+        self.assertAlmostEqual(performance.total_pnl, 120.0)
+        self.assertEqual(self.client.upserts[-1]["total_trades"], 3)
+
+    def test_verify_reports_and_repairs_drift(self):
+        service = FakeService([closed("a", 100.0)])
+        tracker = PaperPerformanceTracker(service, today=lambda: DAY)
+        asyncio.run(tracker.record_close("user-1", closed("a", 100.0)))
+
+        # A close made by another worker never reached this tracker
+        service.closed.append(closed("b", -30.0))
+        mismatches = asyncio.run(tracker.verify("user-1"))
+
+        self.assertEqual(mismatches["total_trades"], (1, 2))
+        self.assertEqual(tracker.get("user-1").losing_trades, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
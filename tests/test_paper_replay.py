@@ -0,0 +1,109 @@
+"""
+Unit tests for the paper trading replay harness
+
+Covers:
+- Candles are cut at completed bars (no look-ahead)
+- Broker marks symbols and chains to the latest snapshot
+- Full replay: engine entries, exit monitor exits, P&L and EOD handling
+"""
+
+import asyncio
+import unittest
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from src.services.paper_replay import PaperTradingReplay, ReplayBroker, ReplayData
+
+CALL = "NSE:NIFTY26JAN25000CE"
+
+
+def snapshots(days, ltp_path):
+    """One CE quote every 5 minutes, 09:15-15:30, LTP from ltp_path(step_of_day)"""
+    rows = []
+    for day in days:
+        times = pd.date_range(f"{day} 09:15", f"{day} 15:30", freq="5min")
+        for step, ts in enumerate(times):
+            rows.append({
+                "timestamp": ts, "index": "nifty", "symbol": CALL,
+                "strike": 25000, "option_type": "CE", "ltp": ltp_path(step)
+            })
+    return pd.DataFrame(rows)
+
+
+class FirstBarSignal:
+    """BUY CALL at the chain LTP the first time each day it is asked"""
+
+    def __init__(self):
+        self.calls = []
+        self.days = set()
+
+    def __call__(self, index, now, candles, chain):
+        self.calls.append((now, len(candles)))
+        if now.date() in self.days or chain.empty:
+            return {"action": "WAIT", "confidence": {"score": 0}}
+        self.days.add(now.date())
+        entry = float(chain["ltp"].iloc[0])
+        return {
+            "action": "BUY CALL",
+            "confidence": {"score": 80},
+            "option": {"trading_symbol": CALL, "strike": 25000, "type": "CE"},
+            "entry": {"price": entry},
+            "targets": {"stop_loss": entry * 0.7, "target_1": entry * 1.3, "target_2": entry * 1.6}
+        }
+
+
+class TestReplayData(unittest.TestCase):
+
+    def test_candles_only_completed_bars(self):
+        # Bars as Fyers history returns them: epoch seconds -> naive UTC (1767584700 = 2026-01-05 09:15 IST)
+        epochs = 1767584700 + 3600 * np.arange(6)
+        candles = pd.DataFrame({"close": np.arange(6.0)}, index=pd.to_datetime(epochs, unit="s"))
+        data = ReplayData(snapshots(["2026-01-05"], lambda s: 100.0), {"NIFTY": candles}, resolution="60")
+
+        self.assertEqual(len(data.candles_until("NIFTY", datetime(2026, 1, 5, 10, 14))), 0)
+        self.assertEqual(len(data.candles_until("NIFTY", datetime(2026, 1, 5, 10, 15))), 1)
+        self.assertEqual(data.candles_until("NIFTY", datetime(2026, 1, 5, 12, 30))["close"].tolist(), [0.0, 1.0, 2.0])
+        self.assertEqual(len(data.candles_until("BANKNIFTY", datetime(2026, 1, 5, 10, 15))), 0)
+
+    def test_broker_marks_to_latest_snapshot(self):
+        data = ReplayData(snapshots(["2026-01-05"], lambda s: 100.0 + s), resolution="60")
+        broker = ReplayBroker(data)
+        broker.advance(datetime(2026, 1, 5, 9, 27))
+
+        self.assertEqual(broker.ltp[CALL], 102.0)
+        self.assertEqual(broker.chain("NIFTY")["ltp"].tolist(), [102.0])
+        quote = broker.get_quotes([CALL, "NSE:UNKNOWN"])
+        self.assertEqual([item["n"] for item in quote["d"]], [CALL])
+
+
+class TestPaperTradingReplay(unittest.TestCase):
+
+    def test_replay_entries_exits_and_pnl(self):
+        # Day 1 runs up to +30% (TARGET_1); day 2 stays flat and exits at EOD
+        data = ReplayData(snapshots(
+            ["2026-01-05", "2026-01-06"], lambda s: 100.0 + min(s, 40)
+        ).assign(ltp=lambda df: np.where(df["timestamp"].dt.day == 6, 100.0, df["ltp"])))
+        source = FirstBarSignal()
+        replay = PaperTradingReplay(
+            data,
+            users={"user-1": {"indices": ["NIFTY"], "scan_interval_minutes": 5, "min_confidence": 65}},
+            signal_source=source,
+            capital_per_trade=10000
+        )
+        report = asyncio.run(replay.run())
+
+        self.assertEqual(report.steps, 2 * 76)
+        self.assertEqual(report.trading_days, 2)
+        self.assertEqual(report.orders, 2)
+        self.assertEqual(report.exits_by_reason, {"TARGET_1": 1, "EOD_EXIT": 1})
+        # 1 lot of 65 (10000 / (100 * 65) rounds down to 1), +30 per unit on day 1
+        self.assertAlmostEqual(report.total_pnl, 65 * 30.0)
+        self.assertEqual(report.open_positions, 0)
+        self.assertEqual([row["date"] for row in report.daily], ["2026-01-05", "2026-01-06"])
+        self.assertTrue(all(now.time() >= datetime(2026, 1, 5, 9, 15).time() for now, _ in source.calls))
+
+
+if __name__ == '__main__':
+    unittest.main()
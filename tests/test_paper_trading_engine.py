@@ -0,0 +1,174 @@
+"""
+Unit tests for the shared paper trading engine
+
+Covers:
+- One signal computation per due index per tick, fanned out to all subscribers
+- One exit-monitor pass per tick for all due subscribers
+- Per-user min confidence and max positions rules
+- Group scheduling by scan interval
+- Unsubscribe stops delivery and prunes groups
+"""
+
+import asyncio
+import unittest
+
+from src.services.paper_trading_engine import PaperTradingEngine, Subscription
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakePaperTradingService:
+    """Records engine calls; positions are just per-user counters"""
+
+    def __init__(self, signals):
+        self.signals = signals
+        self.fetches = []
+        self.open_positions = {}
+        self.orders = []
+        self.activity = []
+        self.monitored = []
+
+    async def _fetch_signal(self, index):
+        self.fetches.append(index)
+        signal = self.signals.get(index)
+        if isinstance(signal, Exception):
+            raise signal
+        return signal
+
+    async def monitor_positions(self, user_ids=None):
+        self.monitored.append(sorted(user_ids))
+
+    async def _count_open_positions(self, user_id):
+        return self.open_positions.get(user_id, 0)
+
+    async def save_signal(self, user_id, signal):
+        return {"id": f"{user_id}-{signal['market_context']['index']}"}
+
+    async def execute_order(self, signal_id, user_id, action="BUY"):
+        self.orders.append((user_id, signal_id))
+        self.open_positions[user_id] = self.open_positions.get(user_id, 0) + 1
+        return {"message": "ok"}
+
+    async def _log_activity(self, user_id, position_id, activity_type, details):
+        self.activity.append((user_id, activity_type))
+
+
+def buy_signal(index, confidence):
+    return {"action": "BUY CALL", "confidence": {"score": confidence}, "market_context": {"index": index}}
+
+
+def config(indices, interval=5, max_positions=3, min_confidence=65):
+    return {
+        "indices": indices, "scan_interval_minutes": interval,
+        "max_positions": max_positions, "min_confidence": min_confidence
+    }
+
+
+class TestPaperTradingEngine(unittest.TestCase):
+
+    def run_engine(self, service, subscribe, ticks):
+        """Subscribe users, then run ticks at the given clock offsets (seconds)"""
+        clock = FakeClock()
+        engine = PaperTradingEngine(service, market_open=lambda: False, clock=clock)
+        start = clock.now
+
+        async def run():
+            for user_id, cfg in subscribe.items():
+                engine.subscribe(user_id, cfg)
+            results = []
+            for offset in ticks:
+                clock.now = start + offset
+                results.append(await engine.run_tick())
+            await engine.stop()
+            return results
+
+        return engine, asyncio.run(run())
+
+    def test_signal_computed_once_for_all_users(self):
+        service = FakePaperTradingService({"NIFTY": buy_signal("NIFTY", 80)})
+        users = {f"user-{i}": config(["NIFTY"]) for i in range(20)}
+        engine, _ = self.run_engine(service, users, ticks=[0])
+
+        self.assertEqual(service.fetches, ["NIFTY"])
+        self.assertEqual(len(service.orders), 20)
+        self.assertEqual(service.monitored, [sorted(users)])
+        self.assertEqual(engine.stats["signals_delivered"], 20)
+
+    def test_rules_applied_per_user(self):
+        service = FakePaperTradingService({
+            "NIFTY": buy_signal("NIFTY", 70),
+            "BANKNIFTY": buy_signal("BANKNIFTY", 90),
+        })
+        service.open_positions = {"full": 1}
+        self.run_engine(service, {
+            "strict": config(["NIFTY", "BANKNIFTY"], min_confidence=85),
+            "one-slot": config(["NIFTY", "BANKNIFTY"], max_positions=1),
+            "full": config(["NIFTY"], max_positions=1),
+        }, ticks=[0])
+
+        self.assertEqual(sorted(service.orders), [("one-slot", "one-slot-NIFTY"), ("strict", "strict-BANKNIFTY")])
+        self.assertEqual(sorted(service.fetches), ["BANKNIFTY", "NIFTY"])
+
+    def test_groups_follow_scan_interval(self):
+        service = FakePaperTradingService({"NIFTY": {"action": "WAIT"}, "BANKNIFTY": {"action": "WAIT"}})
+        engine, results = self.run_engine(service, {
+            "fast": config(["NIFTY"], interval=1),
+            "slow": config(["NIFTY", "BANKNIFTY"], interval=5),
+        }, ticks=[0, 30, 60, 120, 300])
+
+        # Both NIFTY groups share one computation when due together
+        self.assertEqual([sorted(r) for r in results], [
+            ["BANKNIFTY", "NIFTY"], [], ["NIFTY"], ["NIFTY"], ["BANKNIFTY", "NIFTY"]
+        ])
+        self.assertEqual(service.fetches.count("NIFTY"), 4)
+
+    def test_fetch_error_logged_for_subscribers(self):
+        service = FakePaperTradingService({"NIFTY": ConnectionError("signal endpoint down")})
+        self.run_engine(service, {"a": config(["NIFTY"]), "b": config(["NIFTY"])}, ticks=[0])
+        self.assertEqual(sorted(service.activity), [("a", "ERROR"), ("b", "ERROR")])
+        self.assertEqual(service.orders, [])
+
+    def test_unsubscribe_prunes_groups(self):
+        service = FakePaperTradingService({})
+        engine = PaperTradingEngine(service, market_open=lambda: False)
+
+        async def run():
+            engine.subscribe("a", config(["NIFTY"]))
+            engine.subscribe("b", config(["NIFTY", "SENSEX"]))
+            engine.unsubscribe("b")
+            groups = set(engine._next_run)
+            engine.unsubscribe("a")
+            return groups
+
+        self.assertEqual(asyncio.run(run()), {("NIFTY", 5)})
+        self.assertFalse(engine.unsubscribe("a"))
+        self.assertEqual(engine.subscriptions, {})
+
+    def test_config_change_prunes_old_groups(self):
+        service = FakePaperTradingService({})
+        engine = PaperTradingEngine(service, market_open=lambda: False)
+
+        async def run():
+            engine.subscribe("a", config(["NIFTY", "BANKNIFTY"]))
+            engine.subscribe("b", config(["NIFTY"]))
+            engine.subscribe("a", config(["SENSEX"], interval=15))
+            groups = set(engine._next_run)
+            await engine.stop()
+            return groups
+
+        self.assertEqual(asyncio.run(run()), {("NIFTY", 5), ("SENSEX", 15)})
+
+    def test_subscription_from_config_defaults(self):
+        sub = Subscription.from_config("u", {"indices": ["nifty"], "min_confidence": "70"})
+        self.assertEqual(sub.groups, [("NIFTY", 5)])
+        self.assertEqual((sub.max_positions, sub.min_confidence), (3, 70.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
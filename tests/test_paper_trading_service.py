@@ -0,0 +1,47 @@
+"""
+Unit tests for PaperTradingService signal fetching
+
+Covers:
+- The in-process signal pipeline call is bounded by signal_timeout_seconds
+- A normal result is returned with the index injected
+"""
+
+import asyncio
+import os
+import unittest
+from unittest.mock import patch
+
+os.environ.setdefault("SUPABASE_URL", "https://example.supabase.co")
+os.environ.setdefault("SUPABASE_KEY", "test-key")
+os.environ.setdefault("FYERS_CLIENT_ID", "test-client")
+os.environ.setdefault("FYERS_SECRET_KEY", "test-secret")
+
+from src.services import paper_trading_service  # noqa: E402
+from src.services.paper_trading_service import PaperTradingService  # noqa: E402
+from src.services.signal_pipeline import PipelineResult  # noqa: E402
+
+
+class TestFetchSignal(unittest.TestCase):
+
+    def setUp(self):
+        self.service = PaperTradingService()
+        self.service.signal_timeout_seconds = 0.05
+
+    def test_hung_pipeline_times_out(self):
+        async def hung(index, quick_mode=False):
+            await asyncio.sleep(10)
+
+        with patch.object(paper_trading_service, "get_actionable_signal", hung):
+            self.assertIsNone(asyncio.run(self.service._fetch_signal("NIFTY")))
+
+    def test_signal_returned_with_index(self):
+        async def ready(index, quick_mode=False):
+            return PipelineResult(success=True, data={"action": "BUY CALL"})
+
+        with patch.object(paper_trading_service, "get_actionable_signal", ready):
+            signal = asyncio.run(self.service._fetch_signal("BANKNIFTY"))
+        self.assertEqual(signal["market_context"]["index"], "BANKNIFTY")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+Unit tests for in-process signal pipelines
+
+Covers:
+- Registered endpoint functions called with explicit arguments
+- HTTPException / unexpected errors mapped onto PipelineResult
+- Calling a pipeline that was never registered
+"""
+
+import asyncio
+import unittest
+
+from fastapi import HTTPException
+
+from src.services import signal_pipeline
+from src.services.signal_pipeline import (
+    ACTIONABLE_SIGNAL,
+    OPTIONS_SCAN,
+    PipelineUnavailable,
+    get_actionable_signal,
+    register_pipeline,
+    scan_options,
+)
+
+
+class TestSignalPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self._saved = dict(signal_pipeline._pipelines)
+        signal_pipeline._pipelines.clear()
+
+    def tearDown(self):
+        signal_pipeline._pipelines.clear()
+        signal_pipeline._pipelines.update(self._saved)
+
+    def test_actionable_signal_called_in_process(self):
+        calls = []
+
+        @register_pipeline(ACTIONABLE_SIGNAL)
+        async def endpoint(symbol, quick_mode, expiry, authorization):
+            calls.append((symbol, quick_mode, expiry, authorization))
+            return {"action": "BUY CALL"}
+
+        result = asyncio.run(get_actionable_signal("NIFTY"))
+        self.assertTrue(result.success)
+        self.assertEqual(result.data, {"action": "BUY CALL"})
+        self.assertEqual(calls, [("NIFTY", True, "weekly", None)])
+
+    def test_scan_passes_every_query_parameter(self):
+        received = {}
+
+        @register_pipeline(OPTIONS_SCAN)
+        async def endpoint(**kwargs):
+            received.update(kwargs)
+            return {"signals": []}
+
+        asyncio.run(scan_options("BANKNIFTY", authorization="Bearer t"))
+        self.assertEqual(set(received), {
+            "index", "expiry", "min_volume", "min_oi", "strategy", "quick_scan",
+            "include_probability", "analysis_mode", "authorization"
+        })
+        self.assertEqual((received["index"], received["authorization"]), ("BANKNIFTY", "Bearer t"))
+
+    def test_errors_become_results(self):
+        @register_pipeline(OPTIONS_SCAN)
+        async def endpoint(**kwargs):
+            raise HTTPException(status_code=402, detail="Insufficient credits")
+
+        @register_pipeline(ACTIONABLE_SIGNAL)
+        async def failing(**kwargs):
+            raise RuntimeError("chain unavailable")
+
+        scan = asyncio.run(scan_options("NIFTY", authorization="Bearer t"))
+        self.assertEqual((scan.success, scan.status_code, scan.error), (False, 402, "Insufficient credits"))
+
+        signal = asyncio.run(get_actionable_signal("NIFTY"))
+        self.assertEqual((signal.success, signal.status_code, signal.error), (False, 500, "chain unavailable"))
+
+    def test_unregistered_pipeline(self):
+        with self.assertRaises(PipelineUnavailable):
+            asyncio.run(get_actionable_signal("NIFTY"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+"""
+Unit tests for streaming technical indicators
+
+Covers:
+- Direction features match XGBoostDirectionPredictor._extract_features
+- Standard indicators match pandas references
+- Registry: unseen-bar feeding, revised live bar, snapshot/restore
+"""
+
+import unittest
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from src.ml.streaming_indicators import (
+    EMA, MACD, RSI, Bollinger, VWAP, LiveIndicatorState, LiveIndicatorRegistry
+)
+from src.ml.xgboost_direction import XGBoostDirectionPredictor
+
+
+def make_candles(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 25000 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    index = pd.date_range("2026-01-05 09:15", periods=n, freq="1h", name="timestamp")
+    return pd.DataFrame({
+        "open": close,
+        "high": close * (1 + rng.uniform(0, 0.003, n)),
+        "low": close * (1 - rng.uniform(0, 0.003, n)),
+        "close": close,
+        "volume": rng.integers(1000, 5000, n).astype(float)
+    }, index=index)
+
+
+class TestDirectionFeatures(unittest.TestCase):
+    """LiveIndicatorState reproduces the recomputed features"""
+
+    def test_matches_extract_features(self):
+        candles = make_candles()
+        predictor = XGBoostDirectionPredictor()
+        state = LiveIndicatorState()
+        timestamp = datetime(2026, 1, 5, 10, 30)
+
+        for i, (_, row) in enumerate(candles.iterrows()):
+            state.update(row.to_dict())
+            if i not in (0, 5, 14, 19, 25, 26, 120, len(candles) - 1):
+                continue
+            window = candles.iloc[:i + 1]
+            expected = predictor._extract_features(
+                window['close'].tolist(), window['volume'].tolist(),
+                window['high'].tolist(), window['low'].tolist(), timestamp, None
+            )
+            actual = state.direction_features()
+            for key, value in actual.items():
+                self.assertAlmostEqual(value, expected[key], delta=1e-9 * max(1.0, abs(expected[key])), msg=f"{key} @ {i}")
+
+    def test_predict_from_state_matches_predict(self):
+        candles = make_candles()
+        state = LiveIndicatorState()
+        for _, row in candles.iterrows():
+            state.update(row.to_dict())
+        predictor = XGBoostDirectionPredictor()
+        timestamp = datetime(2026, 1, 5, 10, 30)
+        from_state = predictor.predict_from_state(state, timestamp=timestamp)
+        from_lists = predictor.predict(
+            prices=candles['close'].tolist(), volumes=candles['volume'].tolist(),
+            highs=candles['high'].tolist(), lows=candles['low'].tolist(), timestamp=timestamp
+        )
+        self.assertEqual(from_state.direction, from_lists.direction)
+        self.assertAlmostEqual(from_state.confidence, from_lists.confidence, places=9)
+
+
+class TestStandardIndicators(unittest.TestCase):
+    """Indicators against pandas references"""
+
+    def setUp(self):
+        self.close = make_candles()['close']
+
+    def test_ema_and_macd(self):
+        ema, macd = EMA(20), MACD()
+        for x in self.close:
+            ema.update(x)
+            macd.update(x)
+        self.assertAlmostEqual(ema.value, self.close.ewm(span=20, adjust=False).mean().iloc[-1], places=6)
+        line = self.close.ewm(span=12, adjust=False).mean() - self.close.ewm(span=26, adjust=False).mean()
+        self.assertAlmostEqual(macd.line, line.iloc[-1], places=6)
+        self.assertAlmostEqual(macd.signal, line.ewm(span=9, adjust=False).mean().iloc[-1], places=6)
+
+    def test_wilder_rsi(self):
+        rsi = RSI(14)
+        for x in self.close:
+            rsi.update(x)
+        delta = self.close.diff().dropna()
+        gain, loss = delta.clip(lower=0).to_numpy(), (-delta.clip(upper=0)).to_numpy()
+        avg_gain, avg_loss = gain[:14].mean(), loss[:14].mean()
+        for g, l in zip(gain[14:], loss[14:]):
+            avg_gain = (avg_gain * 13 + g) / 14
+            avg_loss = (avg_loss * 13 + l) / 14
+        self.assertAlmostEqual(rsi.value, 100 - 100 / (1 + avg_gain / avg_loss), places=9)
+
+    def test_bollinger(self):
+        bands = Bollinger(20)
+        for x in self.close:
+            bands.update(x)
+        upper, middle, lower, _ = bands.bands
+        self.assertAlmostEqual(middle, self.close.rolling(20).mean().iloc[-1], places=6)
+        self.assertAlmostEqual(upper - middle, 2 * self.close.rolling(20).std(ddof=0).iloc[-1], places=6)
+
+    def test_vwap_resets_each_session(self):
+        vwap = VWAP()
+        vwap.update(101, 99, 100, 10, session="d1")
+        vwap.update(111, 109, 110, 30, session="d1")
+        self.assertAlmostEqual(vwap.value, (100 * 10 + 110 * 30) / 40)
+        vwap.update(201, 199, 200, 5, session="d2")
+        self.assertAlmostEqual(vwap.value, 200)
+
+
+class TestIndicatorRegistry(unittest.TestCase):
+    """LiveIndicatorRegistry.sync"""
+
+    def setUp(self):
+        self.registry = LiveIndicatorRegistry()
+        self.candles = make_candles()
+
+    def fresh(self, df):
+        state = LiveIndicatorState()
+        for ts, row in df.iterrows():
+            state.update(dict(row.to_dict(), timestamp=ts))
+        return state
+
+    def test_only_new_bars_are_applied(self):
+        self.registry.sync("NIFTY", "60", self.candles.iloc[:200])
+        state = self.registry.sync("NIFTY", "60", self.candles.iloc[50:250])
+        self.assertEqual(state.bars, 250)
+        self.assertEqual(state.direction_features(), self.fresh(self.candles.iloc[:250]).direction_features())
+
+    def test_revised_last_bar_is_replayed(self):
+        self.registry.sync("NIFTY", "60", self.candles.iloc[:200])
+        revised = self.candles.iloc[:200].copy()
+        revised.iloc[-1, revised.columns.get_loc("close")] *= 1.002
+        state = self.registry.sync("NIFTY", "60", revised)
+        self.assertEqual(state.bars, 200)
+        expected = self.fresh(revised).direction_features()
+        for key, value in state.direction_features().items():
+            self.assertAlmostEqual(value, expected[key], places=6, msg=key)
+
+    def test_unrelated_frame_rebuilds(self):
+        self.registry.sync("NIFTY", "60", self.candles.iloc[:200])
+        other = make_candles(100, seed=3)
+        other.index = other.index + pd.Timedelta(days=365)
+        self.assertEqual(self.registry.sync("NIFTY", "60", other).bars, 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
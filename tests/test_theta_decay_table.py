@@ -0,0 +1,105 @@
+"""
+Unit tests for the precomputed theta decay tables
+
+Covers:
+- Intraday schedule vs the original 15-min loop over calculate_intraday_theta
+- DTE profile buckets
+- Interpolated Black-Scholes prices vs the closed form
+"""
+
+import math
+import unittest
+import numpy as np
+from scipy.stats import norm
+
+from src.analytics.expiry_gamma_scanner import ExpiryDayGammaScanner
+from src.analytics.theta_decay_table import get_theta_decay_table
+
+
+def loop_schedule(scanner, premium, remaining, moneyness_pct):
+    """Reference: iterate calculate_intraday_theta interval by interval"""
+    schedule = []
+    current = premium
+    while remaining > 0:
+        theta = scanner.calculate_intraday_theta(current, remaining, moneyness_pct)
+        schedule.append((round(remaining, 0), round(current, 2), theta["decay_category"]))
+        current = max(0, current - theta["theta_per_15min"])
+        remaining -= 15
+    return schedule
+
+
+def bs_price(option_type, strike, spot, iv, dte, r=0.07):
+    T = dte / 365
+    d1 = (math.log(spot / strike) + (r + 0.5 * iv ** 2) * T) / (iv * math.sqrt(T))
+    d2 = d1 - iv * math.sqrt(T)
+    if option_type == "CE":
+        return spot * norm.cdf(d1) - strike * math.exp(-r * T) * norm.cdf(d2)
+    return strike * math.exp(-r * T) * norm.cdf(-d2) - spot * norm.cdf(-d1)
+
+
+class TestIntradaySchedule(unittest.TestCase):
+    """Table-backed schedule vs the scalar loop"""
+
+    def test_matches_loop(self):
+        scanner = ExpiryDayGammaScanner()
+        for remaining in [375, 240.5, 181, 180, 179.25, 75, 60, 45.5, 30, 14.9, 0.5]:
+            for moneyness in [0, 0.5, -2.0]:
+                expected = loop_schedule(scanner, 48.0, remaining, moneyness)
+                actual = scanner.get_15min_decay_schedule(48.0, remaining, moneyness)
+                self.assertEqual(len(actual), len(expected), (remaining, moneyness))
+                for row, (mins, prem, category) in zip(actual, expected):
+                    self.assertEqual(row["minutes_remaining"], mins)
+                    self.assertEqual(row["decay_rate"], category)
+                    # Loop subtracts rounded theta each step; table does not round
+                    self.assertAlmostEqual(row["expected_premium"], prem, delta=0.05)
+
+    def test_beyond_market_hours(self):
+        scanner = ExpiryDayGammaScanner()
+        expected = loop_schedule(scanner, 100.0, 900, 0)
+        actual = scanner.get_15min_decay_schedule(100.0, 900, 0)
+        self.assertEqual(len(actual), len(expected))
+        self.assertEqual([r["decay_rate"] for r in actual], [e[2] for e in expected])
+
+    def test_no_time_left(self):
+        self.assertEqual(ExpiryDayGammaScanner().get_15min_decay_schedule(20, 0), [])
+
+
+class TestDailyProfile(unittest.TestCase):
+    """DTE bucket lookups"""
+
+    def test_buckets(self):
+        table = get_theta_decay_table()
+        cases = {45: 0.03, 31: 0.03, 30: 0.05, 16: 0.05, 15: 0.08, 8: 0.08, 7: 0.15, 3: 0.15, 2: 0.30, 0: 0.30, 2.5: 0.15}
+        for dte, decay in cases.items():
+            self.assertEqual(table.daily_profile(dte)["daily_decay"], decay, dte)
+
+    def test_theta(self):
+        table = get_theta_decay_table()
+        self.assertAlmostEqual(table.daily_profile(7, 0.2)["current_theta"], -0.2 / np.sqrt(7 / 365) * 0.01)
+        self.assertEqual(table.daily_profile(0)["current_theta"], -0.5)
+
+
+class TestBlackScholesGrid(unittest.TestCase):
+    """Interpolated prices stay close to the closed form"""
+
+    def test_price_accuracy(self):
+        table = get_theta_decay_table()
+        rng = np.random.default_rng(3)
+        spot = 25000.0
+        for _ in range(200):
+            strike = float(spot * np.exp(rng.uniform(-0.05, 0.05)))
+            iv = float(rng.uniform(0.08, 0.4))
+            dte = float(rng.uniform(0.5, 45))
+            for option_type in ("CE", "PE"):
+                exact = bs_price(option_type, strike, spot, iv, dte)
+                approx = table.price(option_type, strike, spot, iv, dte)
+                self.assertLess(abs(approx - exact), max(0.01 * exact, 1.0), (option_type, strike, iv, dte))
+
+    def test_time_decay_is_negative(self):
+        table = get_theta_decay_table()
+        decay = table.time_decay("CE", 25000, 25000, 0.15, 5, 60)
+        self.assertLess(decay, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
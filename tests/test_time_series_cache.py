@@ -0,0 +1,137 @@
+"""
+Unit tests for the keyed ARIMA ensemble cache
+
+Covers:
+- Reuse / refilter / warm refit / full fit selection
+- A changed forming (last) bar is re-filtered, revised history is not
+- Per-(symbol, resolution) cache with LRU eviction
+- Resolution inference from the candle index
+"""
+
+import unittest
+import numpy as np
+import pandas as pd
+
+from src.ml import time_series_models as tsm
+
+
+def make_prices(n=120, seed=0, freq="1h", start="2026-01-05 09:15"):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start, periods=n, freq=freq)
+    return pd.Series(25000 * np.exp(np.cumsum(rng.normal(0, 0.002, n))), index=index, name="close")
+
+
+class TestEnsembleUpdate(unittest.TestCase):
+    """EnsemblePredictor.update picks the cheapest valid path"""
+
+    def setUp(self):
+        self.full = make_prices(160)
+        self.predictor = tsm.EnsemblePredictor()
+        self.assertEqual(self.predictor.update(self.full.iloc[:120])["mode"], "full_fit")
+
+    def test_same_series_is_cached(self):
+        self.assertEqual(self.predictor.update(self.full.iloc[:120])["mode"], "cached")
+
+    def test_appended_bars_refilter(self):
+        params = np.asarray(self.predictor.arima.last_fit_result.params).copy()
+        result = self.predictor.update(self.full.iloc[:125])
+        self.assertEqual(result["mode"], "refilter")
+        np.testing.assert_allclose(self.predictor.arima.last_fit_result.params, params)
+        self.assertEqual(self.predictor.arima.last_fit_result.nobs, 125)
+
+    def test_forming_bar_update_refilter(self):
+        # Same bars, last (still forming) close moved since the fit
+        forming = self.full.iloc[:120].copy()
+        forming.iloc[-1] += 15.0
+        self.assertEqual(self.predictor.plan_update(forming), ("refilter", 1))
+        self.assertEqual(self.predictor.update(forming)["mode"], "refilter")
+
+        # The forming bar closes at another value and two more bars arrive
+        extended = self.full.iloc[:122].copy()
+        extended.iloc[119] += 20.0
+        self.assertEqual(self.predictor.plan_update(extended), ("refilter", 3))
+
+    def test_revised_completed_bar_full_fit(self):
+        revised = self.full.iloc[:121].copy()
+        revised.iloc[117] += 15.0
+        self.assertEqual(self.predictor.plan_update(revised), ("full_fit", None))
+
+    def test_rolling_window_refilter(self):
+        # Window slides: bars dropped at the front, appended at the back
+        self.assertEqual(self.predictor.update(self.full.iloc[3:123])["mode"], "refilter")
+
+    def test_refilter_budget_triggers_warm_refit(self):
+        n = 120 + tsm.MAX_REFILTER_BARS + 1
+        self.assertEqual(self.predictor.update(self.full.iloc[:n])["mode"], "warm_refit")
+        self.assertEqual(self.predictor.arima.bars_since_fit, 0)
+
+    def test_unrelated_series_full_fit(self):
+        self.assertEqual(self.predictor.update(make_prices(120, seed=9))["mode"], "full_fit")
+
+    def test_refiltered_forecast_matches_fixed_param_fit(self):
+        self.predictor.update(self.full.iloc[:125])
+        params = self.predictor.arima.last_fit_result.params
+        reference = tsm.ARIMA(self.full.iloc[:125], order=(5, 1, 2)).filter(params)
+        self.assertAlmostEqual(
+            float(self.predictor.arima.last_fit_result.forecast(1).iloc[0]),
+            float(reference.forecast(1).iloc[0]),
+            places=6
+        )
+
+
+class TestGetMLSignal(unittest.TestCase):
+    """get_ml_signal(allow_fit=False) never fits inline"""
+
+    def setUp(self):
+        tsm._ensemble_cache.clear()
+
+    def test_fit_needed_is_skipped(self):
+        prices = make_prices(120)
+        result = tsm.get_ml_signal(prices, symbol="NIFTY", allow_fit=False)
+        self.assertFalse(result["success"])
+        self.assertFalse(tsm.get_ensemble_predictor("NIFTY", "60").is_fitted)
+
+        self.assertTrue(tsm.get_ml_signal(prices, symbol="NIFTY")["success"])
+        result = tsm.get_ml_signal(make_prices(122).iloc[:121], symbol="NIFTY", allow_fit=False)
+        self.assertEqual(result["model_update"], "refilter")
+
+
+class TestEnsembleCache(unittest.TestCase):
+    """Module-level keyed cache"""
+
+    def setUp(self):
+        tsm._ensemble_cache.clear()
+
+    def test_keys_are_independent(self):
+        nifty = tsm.get_ensemble_predictor("NIFTY", "60")
+        bank = tsm.get_ensemble_predictor("BANKNIFTY", "60")
+        self.assertIsNot(nifty, bank)
+        self.assertIs(tsm.get_ensemble_predictor("NIFTY", "60"), nifty)
+        self.assertIsNot(tsm.get_ensemble_predictor("NIFTY", "D"), nifty)
+
+    def test_lru_eviction(self):
+        first = tsm.get_ensemble_predictor("S0", "60")
+        for i in range(1, tsm.ENSEMBLE_CACHE_SIZE):
+            tsm.get_ensemble_predictor(f"S{i}", "60")
+        tsm.get_ensemble_predictor("S0", "60")  # touch: S1 becomes oldest
+        tsm.get_ensemble_predictor("NEW", "60")
+        self.assertIn(("S0", "60"), tsm._ensemble_cache)
+        self.assertNotIn(("S1", "60"), tsm._ensemble_cache)
+        self.assertIs(tsm.get_ensemble_predictor("S0", "60"), first)
+        self.assertEqual(len(tsm._ensemble_cache), tsm.ENSEMBLE_CACHE_SIZE)
+
+    def test_alternating_symbols_do_not_refit(self):
+        nifty, bank = make_prices(100, seed=1), make_prices(100, seed=2)
+        self.assertEqual(tsm.get_ml_signal(nifty, symbol="NIFTY")["model_update"], "full_fit")
+        self.assertEqual(tsm.get_ml_signal(bank, symbol="BANKNIFTY")["model_update"], "full_fit")
+        self.assertEqual(tsm.get_ml_signal(nifty, symbol="NIFTY")["model_update"], "cached")
+        self.assertEqual(tsm.get_ml_signal(bank, symbol="BANKNIFTY")["model_update"], "cached")
+
+    def test_infer_resolution(self):
+        self.assertEqual(tsm.infer_resolution(make_prices(50, freq="15min")), "15")
+        self.assertEqual(tsm.infer_resolution(make_prices(50, freq="D")), "D")
+        self.assertEqual(tsm.infer_resolution(pd.Series([1.0, 2.0, 3.0])), "unknown")
+
+
+if __name__ == '__main__':
+    unittest.main()
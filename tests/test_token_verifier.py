@@ -0,0 +1,88 @@
+"""
+Unit tests for local access-token verification and the TTL cache
+
+Covers:
+- HS256 signature, expiry and audience checks
+- Local revocation on logout
+- Fallback signal when no key is configured
+- TTLCache expiry and LRU eviction
+"""
+
+import time
+import unittest
+
+import jwt
+
+from src.services.token_verifier import LocalVerificationUnavailable, TokenVerifier
+from src.utils.ttl_cache import TTLCache
+
+SECRET = "test-secret-with-enough-length-for-hs256"
+
+
+def make_token(secret=SECRET, expires_in=3600, **claims):
+    payload = {
+        "sub": "user-1",
+        "aud": "authenticated",
+        "exp": int(time.time()) + expires_in,
+        "session_id": "session-1",
+        **claims
+    }
+    return jwt.encode(payload, secret, algorithm="HS256")
+
+
+class TestTokenVerifier(unittest.TestCase):
+    """TokenVerifier"""
+
+    def setUp(self):
+        self.verifier = TokenVerifier(None, SECRET)
+
+    def test_valid_token(self):
+        self.assertEqual(self.verifier.verify(make_token())["sub"], "user-1")
+
+    def test_rejects_bad_signature_expiry_and_audience(self):
+        for token in (
+            make_token(secret="another-secret-with-enough-length-xx"),
+            make_token(expires_in=-120),
+            make_token(aud="anon")
+        ):
+            with self.assertRaises(jwt.InvalidTokenError):
+                self.verifier.verify(token)
+
+    def test_revoked_session_is_rejected(self):
+        token = make_token()
+        self.assertEqual(self.verifier.revoke(token), "user-1")
+        with self.assertRaises(jwt.InvalidTokenError):
+            self.verifier.verify(token)
+        # Other sessions of the same user are unaffected
+        self.verifier.verify(make_token(session_id="session-2"))
+
+    def test_no_secret_falls_back(self):
+        with self.assertRaises(LocalVerificationUnavailable):
+            TokenVerifier(None).verify(make_token())
+
+
+class TestTTLCache(unittest.TestCase):
+    """TTLCache"""
+
+    def test_expiry(self):
+        cache = TTLCache(ttl_seconds=60)
+        cache.set("a", 1, ttl_seconds=0)
+        cache.set("b", 2)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("b"), 2)
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    def test_lru_eviction(self):
+        cache = TTLCache(ttl_seconds=60, max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertEqual(cache.pop("c"), 3)
+        self.assertEqual(len(cache), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+"""
+Unit tests for the ML training configuration layer
+
+Covers:
+- float32 contiguous inputs, thread budget (shared by parallel fits)
+- Resident memory sampled around each fit
+- Early stopping (sklearn GradientBoosting, XGBoost when installed), then
+  a refit on every row
+- Training report fields and IndexMLOptimizer integration
+"""
+
+import importlib.util
+import os
+import unittest
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+
+from src.ml.index_ml_optimizer import IndexMLOptimizer
+from src.ml.training_config import TrainingConfig, fit_estimator, split_thread_budget, to_float32
+
+
+def make_dataset(n=600, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 8))
+    y = (X[:, 0] + 0.5 * X[:, 1] + rng.normal(0, 0.5, n) > 0).astype(int)
+    return X, y
+
+
+class TestTrainingConfig(unittest.TestCase):
+    """fit_estimator / configure_estimator"""
+
+    def test_float32_contiguous(self):
+        X = np.asfortranarray(np.ones((5, 3)))
+        converted = to_float32(X)
+        self.assertEqual(converted.dtype, np.float32)
+        self.assertTrue(converted.flags['C_CONTIGUOUS'])
+        self.assertIs(to_float32(converted), converted)
+
+    def test_thread_budget_and_report(self):
+        X, y = make_dataset()
+        model, report = fit_estimator(
+            RandomForestClassifier(n_estimators=10, n_jobs=-1, random_state=0), X, y, TrainingConfig(n_jobs=1)
+        )
+        self.assertEqual(model.n_jobs, 1)
+        self.assertEqual(report.n_train, 600)
+        self.assertEqual(report.n_features, 8)
+        self.assertAlmostEqual(report.input_mb, X.astype(np.float32).nbytes / 2**20, places=2)
+        self.assertGreaterEqual(report.fit_seconds, 0)
+
+    @unittest.skipUnless(os.path.exists("/proc/self/statm"), "needs /proc")
+    def test_rss_sampled_around_fit(self):
+        # A large allocation freed before the fit must not show up as this fit's memory
+        ballast = np.ones(64 * 2**20 // 8)
+        del ballast
+        X, y = make_dataset()
+        _, report = fit_estimator(RandomForestClassifier(n_estimators=5, random_state=0), X, y, TrainingConfig(n_jobs=1))
+        self.assertGreater(report.rss_mb, 0)
+        self.assertLess(abs(report.rss_growth_mb), 64)
+
+    def test_split_thread_budget(self):
+        self.assertEqual(split_thread_budget(5, -1, TrainingConfig(n_jobs=2))[0], 2)
+        self.assertEqual(split_thread_budget(5, -1, TrainingConfig(n_jobs=2))[1].n_jobs, 1)
+        self.assertEqual(split_thread_budget(5, 1, TrainingConfig(n_jobs=4))[1].n_jobs, 4)
+        jobs, config = split_thread_budget(3, -1, TrainingConfig(n_jobs=8))
+        self.assertEqual((jobs, config.n_jobs), (3, 2))
+        jobs, config = split_thread_budget(5, -1, TrainingConfig(n_jobs=-1))
+        self.assertLessEqual(jobs * config.n_jobs, os.cpu_count() or 1)
+
+    def test_gradient_boosting_early_stopping(self):
+        X, y = make_dataset()
+        config = TrainingConfig(early_stopping_rounds=5, max_estimators=1000)
+        model, report = fit_estimator(GradientBoostingClassifier(random_state=0), X, y, config)
+        self.assertLess(model.n_estimators_, 1000)
+        self.assertEqual(report.best_iteration, model.n_estimators_)
+        self.assertEqual(report.n_train, 600)
+
+    @unittest.skipUnless(importlib.util.find_spec("xgboost"), "xgboost not installed")
+    def test_xgboost_early_stopping_on_time_ordered_tail(self):
+        import xgboost as xgb
+        X, y = make_dataset()
+        config = TrainingConfig(n_jobs=1, early_stopping_rounds=5, validation_fraction=0.2, max_estimators=1000)
+        model, report = fit_estimator(xgb.XGBClassifier(), X, y, config)
+        self.assertEqual(report.n_validation, 120)
+        self.assertLess(report.best_iteration, 999)
+        self.assertEqual(model.get_params()["tree_method"], "hist")
+        # Refit on every row, including the held-out tail, for the chosen rounds
+        self.assertEqual(report.n_train, 600)
+        self.assertEqual(model.get_booster().num_boosted_rounds(), report.best_iteration + 1)
+
+    @unittest.skipUnless(importlib.util.find_spec("xgboost"), "xgboost not installed")
+    def test_explicit_validation_set_not_refit(self):
+        import xgboost as xgb
+        X, y = make_dataset()
+        config = TrainingConfig(n_jobs=1, early_stopping_rounds=5, max_estimators=1000)
+        _, report = fit_estimator(xgb.XGBClassifier(), X[:500], y[:500], config, X[500:], y[500:])
+        self.assertEqual((report.n_train, report.n_validation), (500, 100))
+
+
+class TestIndexOptimizerTraining(unittest.TestCase):
+    """IndexMLOptimizer.train reports fit cost"""
+
+    def test_training_report_in_metrics(self):
+        rng = np.random.default_rng(1)
+        close = 25000 * np.exp(np.cumsum(rng.normal(0, 0.01, 400)))
+        df = pd.DataFrame({
+            "open": close, "high": close * 1.01, "low": close * 0.99, "close": close,
+            "volume": rng.integers(1000, 5000, 400).astype(float)
+        }, index=pd.date_range("2024-01-01", periods=400, freq="1D", name="timestamp"))
+
+        optimizer = IndexMLOptimizer("random_forest")
+        metrics = optimizer.train("NIFTY", df)
+        report = metrics["training_report"]
+        self.assertEqual(report["n_features"], len(optimizer.feature_names))
+        self.assertEqual(optimizer.models["NIFTY"].n_jobs, report["n_jobs"])
+
+
+if __name__ == '__main__':
+    unittest.main()
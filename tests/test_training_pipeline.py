@@ -0,0 +1,165 @@
+"""
+Unit tests for walk-forward training and the local candle store
+
+Covers:
+- Expanding-window fold layout with a purge gap
+- Candle store merge/read round trip
+- Promotion only when the candidate beats the registered model on rows
+  the registered model was not trained on, and on enough of them
+- Horizon models served by predict(horizon=...)
+"""
+
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.ml.candle_store import LocalCandleStore
+from src.ml.index_ml_optimizer import IndexMLOptimizer
+from src.ml.model_registry import ModelRegistry
+from src.ml.training_pipeline import WalkForwardTrainer, model_key, walk_forward_splits
+
+
+def make_candles(n=400, seed=0, start="2024-01-01"):
+    rng = np.random.default_rng(seed)
+    close = 25000 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    index = pd.date_range(start, periods=n, freq="1D", name="timestamp")
+    return pd.DataFrame({
+        "open": close * (1 + rng.normal(0, 0.002, n)),
+        "high": close * (1 + rng.uniform(0, 0.01, n)),
+        "low": close * (1 - rng.uniform(0, 0.01, n)),
+        "close": close,
+        "volume": rng.integers(1000, 5000, n).astype(float)
+    }, index=index)
+
+
+class TestWalkForwardSplits(unittest.TestCase):
+    """walk_forward_splits"""
+
+    def test_expanding_contiguous_folds(self):
+        splits = walk_forward_splits(350, n_folds=5, min_train_size=100)
+        self.assertEqual(len(splits), 5)
+        self.assertGreaterEqual(splits[0][0], 100)
+        self.assertEqual(splits[-1][2], 350)
+        for train_end, test_start, _ in splits:
+            self.assertEqual(train_end, test_start)
+        for (_, _, prev_end), (_, test_start, _) in zip(splits, splits[1:]):
+            self.assertEqual(test_start, prev_end)
+
+    def test_purge_gap_between_train_and_test(self):
+        splits = walk_forward_splits(350, n_folds=5, min_train_size=100, gap=5)
+        self.assertEqual(len(splits), 5)
+        self.assertGreaterEqual(splits[0][0], 100)
+        self.assertEqual(splits[-1][2], 350)
+        for train_end, test_start, _ in splits:
+            self.assertEqual(test_start - train_end, 5)
+
+    def test_too_little_data(self):
+        self.assertEqual(walk_forward_splits(103, n_folds=5, min_train_size=100), [])
+        self.assertEqual(walk_forward_splits(108, n_folds=5, min_train_size=100, gap=5), [])
+
+
+class TestCandleStore(unittest.TestCase):
+    """LocalCandleStore"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.store = LocalCandleStore(self.tmp_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_merge_overlapping_fetches(self):
+        candles = make_candles(100)
+        self.store.merge("NSE:NIFTY50-INDEX", "D", candles.iloc[:60])
+        revised = candles.iloc[50:].copy()
+        revised["close"] += 1.0
+        self.assertEqual(self.store.merge("NSE:NIFTY50-INDEX", "D", revised), 100)
+
+        stored = self.store.read("NSE:NIFTY50-INDEX", "D")
+        np.testing.assert_array_equal(stored.index.to_numpy(), candles.index.to_numpy())
+        np.testing.assert_allclose(stored["close"].iloc[:50], candles["close"].iloc[:50])
+        np.testing.assert_allclose(stored["close"].iloc[50:], revised["close"])
+
+    def test_unstored_resolution_is_ignored(self):
+        self.assertEqual(self.store.merge("NSE:NIFTY50-INDEX", "5", make_candles(10)), 0)
+        self.assertIsNone(self.store.read("NSE:NIFTY50-INDEX", "5"))
+
+
+class TestWalkForwardTrainer(unittest.TestCase):
+    """WalkForwardTrainer.train_one"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.store = LocalCandleStore(self.tmp_dir + "/candles")
+        self.optimizer = IndexMLOptimizer("random_forest")
+        self.optimizer.registry = ModelRegistry(self.tmp_dir + "/registry")
+        self.trainer = WalkForwardTrainer(self.optimizer, self.store, n_folds=3, n_jobs=2)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_promotes_then_rejects_without_new_bars(self):
+        self.store.merge("NSE:NIFTY50-INDEX", "D", make_candles(seed=4))
+
+        first = self.trainer.train_one("NIFTY")
+        self.assertEqual(first.status, "promoted", first.message)
+        self.assertEqual(len(first.fold_accuracies), 3)
+        self.assertIsNotNone(self.optimizer.predict("NIFTY", make_candles(seed=4)))
+
+        # Every walk-forward row is in the registered model's training data
+        second = self.trainer.train_one("NIFTY")
+        self.assertEqual(second.status, "rejected")
+        self.assertIsNone(second.incumbent_accuracy)
+        self.assertEqual(self.optimizer.registry.versions("NIFTY", "random_forest"), [1])
+
+    def test_incumbent_rescored_on_unseen_rows(self):
+        candles = make_candles(seed=6)
+        first = self.trainer.train_one("NIFTY", df=candles.iloc[:300])
+        self.assertEqual(first.status, "promoted", first.message)
+
+        second = self.trainer.train_one("NIFTY", df=candles)
+        self.assertIsNotNone(second.incumbent_accuracy)
+        self.assertIn(second.status, ("promoted", "rejected"))
+        if second.status == "rejected":
+            self.assertIn("unseen rows", second.message)
+
+    def test_not_promoted_on_few_unseen_rows(self):
+        candles = make_candles(seed=6)
+        first = self.trainer.train_one("NIFTY", df=candles.iloc[:380])
+        self.assertEqual(first.status, "promoted", first.message)
+
+        for end in (381, 382, 383):
+            result = self.trainer.train_one("NIFTY", df=candles.iloc[:end])
+            self.assertEqual(result.status, "rejected")
+            self.assertIn("Not enough unseen rows", result.message)
+        self.assertEqual(self.optimizer.registry.versions("NIFTY", "random_forest"), [1])
+
+    def test_version_without_walk_forward_metrics_not_replaced(self):
+        candles = make_candles(seed=7)
+        self.optimizer.train("NIFTY", candles)
+        self.optimizer.save_model("NIFTY")
+
+        # Saved today (no data_end metric): no stored bar is after it
+        result = self.trainer.train_one("NIFTY", df=candles)
+        self.assertEqual(result.status, "rejected")
+        self.assertEqual(self.optimizer.registry.versions("NIFTY", "random_forest"), [1])
+
+    def test_horizon_models_are_keyed_separately(self):
+        candles = make_candles(seed=5)
+        result = self.trainer.train_one("NIFTY", horizon=5, df=candles)
+        self.assertEqual(result.status, "promoted", result.message)
+        self.assertEqual(self.optimizer.registry.versions(model_key("NIFTY", 5), "random_forest"), [1])
+        self.assertEqual(self.optimizer.registry.versions("NIFTY", "random_forest"), [])
+
+        self.assertIsNotNone(self.optimizer.predict("NIFTY", candles, horizon=5))
+        self.assertIsNone(self.optimizer.predict("NIFTY", candles))
+
+    def test_no_stored_candles_is_skipped(self):
+        self.assertEqual(self.trainer.train_one("SENSEX").status, "skipped")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+"""
+Unit tests for vectorized rule-based predictors
+
+Each vectorized backfill must match the scalar rule engine row for row:
+- XGBoostDirectionPredictor.predict_rule_based_vectorized
+- SpeedPredictor.predict_speed_vectorized
+- IVPredictor.predict_iv_vectorized
+"""
+
+import unittest
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from src.ml.iv_predictor import IVPredictor, MarketEvent
+from src.ml.speed_predictor import SpeedPredictor
+from src.ml.xgboost_direction import XGBoostDirectionPredictor
+
+
+def intraday_bars(n=400, seed=0):
+    """5-minute bars across several sessions, with a few quiet/volatile stretches"""
+    rng = np.random.default_rng(seed)
+    sessions = pd.bdate_range("2026-01-05", periods=n // 75 + 1)
+    timestamps = pd.DatetimeIndex([
+        day + pd.Timedelta(minutes=9 * 60 + 15 + 5 * i) for day in sessions for i in range(75)
+    ])[:n]
+    vol = np.where(np.arange(n) % 120 < 30, 0.0002, 0.003)
+    prices = 25000 * np.exp(np.cumsum(rng.normal(0, vol)))
+    volumes = rng.integers(500, 5000, n).astype(float)
+    volumes[rng.choice(n, 20, replace=False)] *= 4
+    return prices, volumes, timestamps
+
+
+class TestDirectionRules(unittest.TestCase):
+    """Direction rule engine"""
+
+    def test_matches_scalar(self):
+        rng = np.random.default_rng(1)
+        n = 500
+        features = {
+            'rsi_14': rng.choice([25, 30, 35, 40, 50, 60, 65, 70, 75], n).astype(float),
+            'macd_histogram': rng.normal(0, 1, n),
+            'momentum_5': rng.choice([-0.5, -0.3, -0.1, 0.0, 0.1, 0.3, 0.5], n),
+            'bb_position': rng.uniform(-0.1, 1.1, n),
+            'volume_ratio': rng.uniform(0.5, 2.5, n),
+            'is_first_hour': rng.integers(0, 2, n).astype(float),
+            'is_lunch': rng.integers(0, 2, n).astype(float),
+            'current_price': np.full(n, 25000.0)
+        }
+        predictor = XGBoostDirectionPredictor()
+        batch = predictor.predict_rule_based_vectorized(features)
+
+        for i in range(n):
+            single = predictor._predict_rule_based({k: v[i] for k, v in features.items()})
+            self.assertEqual(batch['direction'][i], single.direction, i)
+            self.assertAlmostEqual(batch['confidence'][i], single.confidence, places=12)
+            self.assertEqual(batch['expected_move_pct'][i], single.expected_move_pct)
+            self.assertEqual(batch['trade_signal'][i], single.trade_signal)
+            self.assertAlmostEqual(batch['probabilities'][i][4], single.prob_strong_up, places=12)
+
+
+class TestSpeedRules(unittest.TestCase):
+    """Speed rule engine"""
+
+    def check(self, is_expiry_day):
+        prices, volumes, timestamps = intraday_bars()
+        predictor = SpeedPredictor()
+        batch = predictor.predict_speed_vectorized(prices, volumes, timestamps, is_expiry_day=is_expiry_day)
+
+        for t in range(len(prices)):
+            single = predictor.predict_speed(
+                current_price=prices[t],
+                price_history=list(prices[:t + 1]),
+                volume_history=list(volumes[:t + 1]),
+                current_volume=volumes[t],
+                timestamp=timestamps[t].to_pydatetime(),
+                is_expiry_day=is_expiry_day
+            )
+            self.assertEqual(batch['category'][t], single.category, t)
+            self.assertEqual(batch['expected_time_mins'][t], single.expected_time_mins)
+            self.assertAlmostEqual(batch['volume_score'][t], single.volume_score, places=9)
+            self.assertAlmostEqual(batch['time_of_day_score'][t], single.time_of_day_score, places=9)
+            self.assertAlmostEqual(batch['volatility_squeeze_score'][t], single.volatility_squeeze_score, places=9)
+            self.assertAlmostEqual(batch['momentum_score'][t], single.momentum_score, places=9)
+            self.assertAlmostEqual(batch['confidence'][t], single.confidence, places=9)
+
+    def test_matches_scalar(self):
+        self.check(False)
+
+    def test_matches_scalar_on_expiry_day(self):
+        self.check(True)
+
+
+class TestIVRules(unittest.TestCase):
+    """IV rule engine"""
+
+    def test_matches_scalar(self):
+        prices, _, timestamps = intraday_bars(seed=2)
+        rng = np.random.default_rng(3)
+        ivs = np.clip(16 + np.cumsum(rng.normal(0, 0.4, len(prices))), 9, 40)
+        dte = np.maximum(0, 6 - np.arange(len(prices)) // 75)
+        expiry = dte == 0
+        session_days = sorted({ts.date() for ts in timestamps})
+        events = [
+            MarketEvent("RBI_POLICY", session_days[2], datetime.combine(session_days[2], datetime.min.time()) + timedelta(hours=10), "HIGH", "CRUSH_AFTER"),
+            MarketEvent("GDP_DATA", session_days[4], None, "MEDIUM", "EXPAND_BEFORE")
+        ]
+        predictor = IVPredictor()
+        batch = predictor.predict_iv_vectorized(
+            ivs, prices, timestamps, is_expiry_day=expiry, days_to_expiry=dte, upcoming_events=events
+        )
+
+        for t in range(len(prices)):
+            single = predictor.predict_iv(
+                current_iv=ivs[t],
+                spot_price=prices[t],
+                iv_history=list(ivs[max(0, t - 29):t + 1]),
+                price_history=list(prices[:t + 1]),
+                timestamp=timestamps[t].to_pydatetime(),
+                is_expiry_day=bool(expiry[t]),
+                days_to_expiry=int(dte[t]),
+                upcoming_events=events
+            )
+            self.assertEqual(batch['direction'][t], single.direction, t)
+            self.assertEqual(batch['event_factor'][t], single.event_factor)
+            self.assertEqual(batch['trend_factor'][t], single.trend_factor)
+            self.assertEqual(batch['time_factor'][t], single.time_factor)
+            self.assertEqual(batch['expiry_factor'][t], single.expiry_factor)
+            self.assertAlmostEqual(batch['regime_percentile'][t], single.regime_percentile, places=9)
+            self.assertAlmostEqual(batch['confidence'][t], single.confidence, places=12)
+            self.assertAlmostEqual(batch['predicted_iv'][t], single.predicted_iv, places=9)
+
+
+if __name__ == '__main__':
+    unittest.main()
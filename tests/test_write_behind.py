@@ -0,0 +1,223 @@
+"""
+Unit tests for the write-behind queue
+
+Covers:
+- Inline writes without a flush loop
+- Batching per table and size-triggered flushes
+- Upsert coalescing on the conflict columns
+- Retry, spill to disk and replay
+- Rejected batches split row by row, bad rows dead-lettered
+- Replay moves past batches that fail again
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.services.write_behind import WriteBehindQueue, snapshot_rows
+
+
+class ConstraintError(Exception):
+    """Shaped like postgrest's APIError for a CHECK violation"""
+    code = "23514"
+
+
+class _Query:
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.call = None
+
+    def insert(self, rows):
+        self.call = ("insert", rows, None)
+        return self
+
+    def upsert(self, rows, on_conflict=None):
+        self.call = ("upsert", rows, on_conflict)
+        return self
+
+    def execute(self):
+        if self.client.failures > 0:
+            self.client.failures -= 1
+            raise ConnectionError("database unavailable")
+        if any(row.get("bad") for row in self.call[1]):
+            raise ConstraintError("violates check constraint")
+        self.client.writes.append((self.table,) + self.call)
+
+
+class FakeClient:
+    """Records bulk writes; the first `failures` calls raise"""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.writes = []
+
+    def table(self, name):
+        return _Query(self, name)
+
+
+class TestWriteBehindQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.spill_path = os.path.join(self.tmp.name, "spill.jsonl")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_queue(self, client, **kwargs):
+        kwargs.setdefault("retry_backoff", 0)
+        return WriteBehindQueue(client=client, spill_path=self.spill_path, **kwargs)
+
+    def test_inline_write_without_loop(self):
+        client = FakeClient()
+        queue = self.make_queue(client)
+        queue.enqueue("paper_trading_activity_log", {"activity_type": "POSITION_OPENED"})
+        self.assertEqual(client.writes, [("paper_trading_activity_log", "insert", [{"activity_type": "POSITION_OPENED"}], None)])
+
+    def test_rows_batched_per_table(self):
+        client = FakeClient()
+        queue = self.make_queue(client, flush_interval=60)
+
+        async def run():
+            await queue.start()
+            for i in range(5):
+                queue.enqueue("paper_trading_activity_log", {"n": i})
+            queue.enqueue("option_scan_opportunities", [{"rank": 1}, {"rank": 2}])
+            self.assertEqual(client.writes, [])
+            await queue.stop()
+
+        asyncio.run(run())
+        self.assertEqual([(w[0], len(w[2])) for w in client.writes], [
+            ("paper_trading_activity_log", 5), ("option_scan_opportunities", 2)
+        ])
+        self.assertFalse(queue.running)
+
+    def test_full_buffer_flushes_before_interval(self):
+        client = FakeClient()
+        queue = self.make_queue(client, batch_size=3, flush_interval=60)
+
+        async def run():
+            await queue.start()
+            for i in range(3):
+                queue.enqueue("paper_trading_activity_log", {"n": i})
+            for _ in range(50):
+                if client.writes:
+                    break
+                await asyncio.sleep(0.01)
+            written = list(client.writes)
+            await queue.stop()
+            return written
+
+        self.assertEqual(len(asyncio.run(run())), 1)
+
+    def test_upserts_coalesced_on_conflict_key(self):
+        client = FakeClient()
+        queue = self.make_queue(client)
+        rows = [
+            {"user_id": "u1", "scan_type": "option_scan", "usage_date": "2026-01-05", "count": 1},
+            {"user_id": "u2", "scan_type": "option_scan", "usage_date": "2026-01-05", "count": 1},
+            {"user_id": "u1", "scan_type": "option_scan", "usage_date": "2026-01-05", "count": 3},
+        ]
+        queue.enqueue("usage_logs", rows, on_conflict="user_id,scan_type,usage_date")
+
+        table, op, written, on_conflict = client.writes[0]
+        self.assertEqual((op, on_conflict), ("upsert", "user_id,scan_type,usage_date"))
+        self.assertEqual([(r["user_id"], r["count"]) for r in written], [("u2", 1), ("u1", 3)])
+
+    def test_retry_then_spill_then_replay(self):
+        client = FakeClient(failures=4)
+        queue = self.make_queue(client, max_retries=2)
+
+        queue.enqueue("paper_trading_activity_log", {"n": 1})
+        queue.enqueue("paper_trading_activity_log", {"n": 2})
+        self.assertEqual(client.writes, [])
+        self.assertEqual(queue.stats["spilled"], 2)
+        self.assertEqual(queue.stats["retries"], 2)
+
+        # Database back: both spilled batches are written in order
+        self.assertEqual(queue.replay_spill(), 2)
+        self.assertEqual([w[2] for w in client.writes], [[{"n": 1}], [{"n": 2}]])
+        self.assertFalse(os.path.exists(self.spill_path))
+
+    def test_failed_replay_line_does_not_block(self):
+        client = FakeClient(failures=4)
+        queue = self.make_queue(client, max_retries=1)
+        for i in range(3):
+            queue.enqueue("paper_trading_activity_log", {"n": i})
+
+        # The first batch fails again: the replay moves on and keeps only it
+        client.failures = 1
+        self.assertEqual(queue.replay_spill(), 2)
+        with open(self.spill_path) as f:
+            self.assertEqual([json.loads(line)["rows"] for line in f], [[{"n": 0}]])
+
+    def test_replay_stops_when_database_down(self):
+        client = FakeClient(failures=100)
+        queue = self.make_queue(client, max_retries=1)
+        for i in range(5):
+            queue.enqueue("paper_trading_activity_log", {"n": i})
+
+        self.assertEqual(queue.replay_spill(), 0)
+        with open(self.spill_path) as f:
+            kept = [json.loads(line)["rows"][0]["n"] for line in f]
+        # Three attempts, then the untried batches first and the failed ones after
+        self.assertEqual(kept, [3, 4, 0, 1, 2])
+
+    def test_bad_row_dead_lettered_rest_written(self):
+        client = FakeClient()
+        queue = self.make_queue(client, max_retries=3)
+        queue.enqueue("option_scanner_results", [{"n": 0}, {"n": 1, "bad": True}, {"n": 2}])
+
+        self.assertEqual([w[2] for w in client.writes], [[{"n": 0}], [{"n": 2}]])
+        self.assertEqual(queue.stats["retries"], 0)
+        self.assertEqual(queue.stats["dead_lettered"], 1)
+        self.assertFalse(os.path.exists(self.spill_path))
+        with open(queue.dead_letter_path) as f:
+            record = json.loads(f.readline())
+        self.assertEqual(record["rows"], [{"n": 1, "bad": True}])
+        self.assertIn("check constraint", record["error"])
+
+    def test_inline_write_on_event_loop_does_not_sleep(self):
+        client = FakeClient(failures=1)
+        queue = self.make_queue(client, max_retries=3, retry_backoff=30)
+
+        async def run():
+            queue.enqueue("paper_trading_activity_log", {"n": 1})
+
+        asyncio.run(run())
+        self.assertEqual(queue.stats["retries"], 0)
+        self.assertEqual(queue.stats["spilled"], 1)
+
+    def test_replay_reads_other_processes_spill_files(self):
+        other = os.path.join(self.tmp.name, "spill-999.jsonl")
+        with open(other, "w") as f:
+            f.write(json.dumps({"table": "usage_logs", "on_conflict": None, "rows": [{"n": 9}]}) + "\n")
+        client = FakeClient()
+        queue = self.make_queue(client)
+
+        self.assertEqual(queue.replay_spill(), 1)
+        self.assertFalse(os.path.exists(other))
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_spill_file_is_bounded(self):
+        client = FakeClient(failures=100)
+        queue = self.make_queue(client, max_retries=1, max_spill_bytes=200)
+        for i in range(10):
+            queue.enqueue("paper_trading_activity_log", {"n": i, "pad": "x" * 40})
+        self.assertLessEqual(os.path.getsize(self.spill_path), 200)
+        self.assertGreater(queue.stats["dropped"], 0)
+
+    def test_snapshot_converts_numpy_and_copies(self):
+        details = {"pnl": np.float64(12.5), "qty": np.int64(50), "flags": np.array([True, False])}
+        rows = snapshot_rows(details)
+        details["pnl"] = 0
+        self.assertEqual(rows, [{"pnl": 12.5, "qty": 50, "flags": [True, False]}])
+
+
+if __name__ == '__main__':
+    unittest.main()